@@ -0,0 +1,287 @@
+# Motor analítico colunar - Barbearia
+# Relatórios de longo prazo (lucro por produto por mês, ranking de barbeiros por trimestre,
+# médias móveis) calculados sobre cópias colunares de `movimentacoes` e `servicos` em NumPy.
+# Datas viram segundos/dias desde a época (int64), produto/serviço/barbeiro viram códigos
+# de dicionário e valores ficam em float64; agrupamentos são bincount sobre chaves combinadas.
+# As colunas acompanham o banco incrementalmente a partir do último rowid lido.
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from nucleo import ErroValidacao, caminho_particao, catalogo
+
+UNIDADES = ('dia', 'semana', 'mes', 'trimestre', 'ano')
+BLOCO_LEITURA = 50_000
+EPOCA = datetime(1970, 1, 1)
+
+SQL_MOVIMENTACOES = """
+    SELECT id, COALESCE(CAST(strftime('%s', data_hora) AS INTEGER), 0), produto_id,
+           tipo = 'ENTRADA', quantidade, quantidade * preco_unitario
+    FROM {}movimentacoes WHERE id > ? ORDER BY id"""
+SQL_SERVICOS = """
+    SELECT id, COALESCE(CAST(strftime('%s', data_hora) AS INTEGER), 0), servico_id, barbeiro_id, valor
+    FROM {}servicos WHERE id > ? ORDER BY id"""
+
+
+class Dicionario:
+    """Codificação por dicionário: cada valor distinto recebe um código int32 estável."""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valores):
+        codigos = self._codigos
+        novos = self.valores
+        for v in set(valores) - codigos.keys():
+            codigos[v] = len(novos)
+            novos.append(v)
+        return np.fromiter((codigos[v] for v in valores), dtype=np.int32, count=len(valores))
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class Colunas:
+    """Conjunto de colunas com o mesmo comprimento e capacidade dobrada ao crescer, para que
+    anexar as linhas novas de cada sincronização seja O(novas) amortizado."""
+
+    def __init__(self, **tipos):
+        self.tipos = tipos
+        self.n = 0
+        self._dados = {nome: np.empty(0, dtype=tipo) for nome, tipo in tipos.items()}
+
+    def anexar(self, **colunas):
+        novas = len(next(iter(colunas.values())))
+        capacidade = len(next(iter(self._dados.values())))
+        if self.n + novas > capacidade:
+            capacidade = max(self.n + novas, capacidade * 2, 1024)
+            for nome, dados in self._dados.items():
+                maior = np.empty(capacidade, dtype=self.tipos[nome])
+                maior[:self.n] = dados[:self.n]
+                self._dados[nome] = maior
+        for nome, valores in colunas.items():
+            self._dados[nome][self.n:self.n + novas] = valores
+        self.n += novas
+
+    def __getitem__(self, nome):
+        return self._dados[nome][:self.n]
+
+    def __len__(self):
+        return self.n
+
+
+def _segundos(texto, fim=False):
+    """'AAAA-MM-DD[ HH:MM:SS]' -> segundos desde a época (mesma base do strftime('%s') do SQLite)."""
+    if len(texto) <= 10:
+        texto += " 23:59:59" if fim else " 00:00:00"
+    try:
+        return int((datetime.fromisoformat(texto) - EPOCA).total_seconds())
+    except ValueError:
+        raise ErroValidacao(f"Data inválida: {texto}", "Erro de Data")
+
+
+def baldes(dias, unidade):
+    """Dias desde a época -> índice do balde (semana começa na segunda-feira)."""
+    if unidade == 'dia':
+        return dias
+    if unidade == 'semana':
+        return (dias + 3) // 7          # 1970-01-01 foi quinta-feira
+    meses = dias.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    if unidade == 'mes':
+        return meses
+    if unidade == 'trimestre':
+        return meses // 3
+    if unidade == 'ano':
+        return meses // 12
+    raise ErroValidacao(f"Unidade inválida: {unidade} (use {', '.join(UNIDADES)}).", "Erro")
+
+
+def rotulo(balde, unidade):
+    balde = int(balde)
+    if unidade == 'dia':
+        return str(np.datetime64(balde, 'D'))
+    if unidade == 'semana':
+        return str(np.datetime64(balde * 7 - 3, 'D'))   # segunda-feira da semana
+    if unidade == 'mes':
+        return str(np.datetime64(balde, 'M'))
+    if unidade == 'trimestre':
+        return f"{1970 + balde // 4}-T{balde % 4 + 1}"
+    return str(1970 + balde)
+
+
+def agrupar(chave_a, chave_b, *pesos):
+    """Group-by vetorizado por (chave_a, chave_b), ambas inteiras não negativas.
+    Retorna (a, b, contagem, [soma de cada peso]) só para os grupos presentes."""
+    if len(chave_a) == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio, vazio, [np.empty(0) for _ in pesos]
+    largura = int(chave_b.max()) + 1
+    base = int(chave_a.min())
+    combinada = (chave_a.astype(np.int64) - base) * largura + chave_b
+    tamanho = (int(chave_a.max()) - base + 1) * largura
+    if tamanho <= max(1 << 20, 4 * len(combinada)):
+        # Espaço de chaves pequeno (ex.: meses x produtos): bincount direto, sem ordenar
+        contagem = np.bincount(combinada, minlength=tamanho)
+        grupos = np.flatnonzero(contagem)
+        contagem = contagem[grupos]
+        somas = [np.bincount(combinada, weights=p, minlength=tamanho)[grupos] for p in pesos]
+    else:
+        grupos, inverso = np.unique(combinada, return_inverse=True)
+        contagem = np.bincount(inverso, minlength=len(grupos))
+        somas = [np.bincount(inverso, weights=p, minlength=len(grupos)) for p in pesos]
+    return grupos // largura + base, grupos % largura, contagem, somas
+
+
+def janela_movel(valores, janela, estatistica='media'):
+    """Soma ou média móvel de `janela` posições (as primeiras usam o que houver)."""
+    acumulado = np.cumsum(np.concatenate(([0.0], np.asarray(valores, dtype=np.float64))))
+    soma = acumulado[1:] - acumulado[np.maximum(np.arange(1, len(acumulado)) - janela, 0)]
+    if estatistica == 'soma':
+        return soma
+    return soma / np.minimum(np.arange(1, len(soma) + 1), janela)
+
+
+class BaseAnalitica:
+    """Cópia colunar de movimentações e serviços para relatórios de período longo.
+
+    `sincronizar()` lê só as linhas do banco principal com rowid acima do último visto.
+    Importações com ids antigos mudam a contagem até esse rowid e um arquivamento muda a lista
+    de partições: nesses casos as colunas são recarregadas do zero, partições anuais primeiro.
+    """
+
+    def __init__(self, db):
+        if np is None:
+            raise ErroValidacao("Relatórios analíticos precisam do NumPy (pip install numpy).", "Dependência ausente")
+        self.db = db
+        self.produtos = Dicionario()
+        self.servicos = Dicionario()
+        self.barbeiros = Dicionario()
+        self._limpar()
+
+    def _limpar(self):
+        self.mov = Colunas(id=np.int64, segundo=np.int64, dia=np.int64, produto=np.int32,
+                           entrada=np.bool_, quantidade=np.float64, valor=np.float64)
+        self.serv = Colunas(id=np.int64, segundo=np.int64, dia=np.int64, servico=np.int32,
+                            barbeiro=np.int32, valor=np.float64)
+        self._particoes = ()
+        self._ultimo = {'movimentacoes': 0, 'servicos': 0}        # último id lido do banco principal
+        self._do_principal = {'movimentacoes': 0, 'servicos': 0}  # linhas vindas do banco principal
+
+    # ===== Sincronização =====
+    def sincronizar(self):
+        """Traz as linhas novas das duas tabelas. Retorna quantas linhas foram lidas."""
+        with self.db.leitor() as conn:
+            particoes = tuple(conn.execute("SELECT ano, arquivo FROM particoes ORDER BY ano"))
+            lidas = 0
+            if particoes != self._particoes or not (self._consistente(conn, 'movimentacoes')
+                                                    and self._consistente(conn, 'servicos')):
+                self._limpar()
+                for ano, arquivo in particoes:
+                    alias = f"arquivo_{ano}"
+                    self.db.anexar(conn, {alias: caminho_particao(self.db, arquivo)})
+                    lidas += self._ler(conn, SQL_MOVIMENTACOES.format(alias + "."), 0, self._anexar_movimentacoes)[0]
+                    lidas += self._ler(conn, SQL_SERVICOS.format(alias + "."), 0, self._anexar_servicos)[0]
+                self._particoes = particoes
+            for tabela, sql, anexar in (('movimentacoes', SQL_MOVIMENTACOES, self._anexar_movimentacoes),
+                                        ('servicos', SQL_SERVICOS, self._anexar_servicos)):
+                novas, ultimo = self._ler(conn, sql.format(""), self._ultimo[tabela], anexar)
+                self._ultimo[tabela] = ultimo
+                self._do_principal[tabela] += novas
+                lidas += novas
+            return lidas
+
+    def _consistente(self, conn, tabela):
+        if not self._do_principal[tabela]:
+            return True
+        return conn.execute(f"SELECT COUNT(*) FROM {tabela} WHERE id <= ?",
+                            (self._ultimo[tabela],)).fetchone()[0] == self._do_principal[tabela]
+
+    def _ler(self, conn, sql, desde, anexar):
+        """Lê em blocos as linhas com id acima de `desde`. Retorna (lidas, último id)."""
+        cursor = conn.execute(sql, (desde,))
+        lidas = 0
+        while True:
+            linhas = cursor.fetchmany(BLOCO_LEITURA)
+            if not linhas:
+                return lidas, desde
+            anexar(list(zip(*linhas)))
+            lidas += len(linhas)
+            desde = linhas[-1][0]
+
+    def _anexar_movimentacoes(self, c):
+        segundos = np.array(c[1], dtype=np.int64)
+        self.mov.anexar(id=c[0], segundo=segundos, dia=segundos // 86400,
+                        produto=self.produtos.codificar(c[2]), entrada=c[3],
+                        quantidade=c[4], valor=c[5])
+
+    def _anexar_servicos(self, c):
+        segundos = np.array(c[1], dtype=np.int64)
+        self.serv.anexar(id=c[0], segundo=segundos, dia=segundos // 86400,
+                         servico=self.servicos.codificar(c[2]), barbeiro=self.barbeiros.codificar(c[3]),
+                         valor=c[4])
+
+    @staticmethod
+    def _mascara(colunas, inicio, fim):
+        segundos = colunas['segundo']
+        mascara = np.ones(len(segundos), dtype=bool)
+        if inicio:
+            mascara &= segundos >= _segundos(inicio)
+        if fim:
+            mascara &= segundos <= _segundos(fim, fim=True)
+        return mascara
+
+    # ===== Relatórios =====
+    def lucro_por_produto(self, inicio=None, fim=None, unidade='mes'):
+        """[(periodo, produto_id, qtd_entrada, qtd_saida, total_compra, total_venda, lucro)]
+        ordenado por período e produto."""
+        m = self._mascara(self.mov, inicio, fim)
+        entrada = self.mov['entrada'][m]
+        quantidade, valor = self.mov['quantidade'][m], self.mov['valor'][m]
+        balde, produto, _, (q_in, q_out, compra, venda) = agrupar(
+            baldes(self.mov['dia'][m], unidade), self.mov['produto'][m],
+            quantidade * entrada, quantidade * ~entrada, valor * entrada, valor * ~entrada)
+        ids = self.produtos.valores
+        return [(rotulo(b, unidade), ids[p], qi, qo, c, v, v - c)
+                for b, p, qi, qo, c, v in zip(balde.tolist(), produto.tolist(), q_in.tolist(),
+                                              q_out.tolist(), compra.tolist(), venda.tolist())]
+
+    def desempenho_barbeiros(self, inicio=None, fim=None, unidade='trimestre'):
+        """[(periodo, barbeiro, atendimentos, total, ticket_medio, posicao)]: posição 1 é o maior
+        faturamento do período."""
+        m = self._mascara(self.serv, inicio, fim)
+        balde, barbeiro, contagem, (total,) = agrupar(
+            baldes(self.serv['dia'][m], unidade), self.serv['barbeiro'][m], self.serv['valor'][m])
+        # Ordena por período e faturamento decrescente; a posição reinicia a cada período
+        ordem = np.lexsort((-total, balde))
+        balde, barbeiro, contagem, total = balde[ordem], barbeiro[ordem], contagem[ordem], total[ordem]
+        inicio_grupo = np.r_[True, balde[1:] != balde[:-1]] if len(balde) else np.empty(0, dtype=bool)
+        primeira = np.maximum.accumulate(np.where(inicio_grupo, np.arange(len(balde)), 0))
+        posicao = np.arange(len(balde)) - primeira + 1
+        # Códigos -> barbeiro_id -> nome pelo catálogo em memória
+        ids, nomes = self.barbeiros.valores, catalogo(self.db)
+        return [(rotulo(b, unidade), nomes.nome_barbeiro(ids[k]), n, t, t / n, p)
+                for b, k, n, t, p in zip(balde.tolist(), barbeiro.tolist(), contagem.tolist(),
+                                         total.tolist(), posicao.tolist())]
+
+    def serie_diaria(self, fonte='servicos', inicio=None, fim=None):
+        """Faturamento dia a dia, com zeros nos dias sem movimento: (dias datetime64[D], valores).
+        `fonte`: 'servicos', 'vendas' (saídas de produto) ou 'lucro' (vendas - compras)."""
+        if fonte == 'servicos':
+            m = self._mascara(self.serv, inicio, fim)
+            dias, valores = self.serv['dia'][m], self.serv['valor'][m]
+        elif fonte in ('vendas', 'lucro'):
+            m = self._mascara(self.mov, inicio, fim)
+            dias, valores = self.mov['dia'][m], self.mov['valor'][m]
+            entrada = self.mov['entrada'][m]
+            valores = np.where(entrada, 0.0 if fonte == 'vendas' else -valores, valores)
+        else:
+            raise ErroValidacao(f"Fonte inválida: {fonte}", "Erro")
+        primeiro = _segundos(inicio) // 86400 if inicio else (int(dias.min()) if len(dias) else 0)
+        ultimo = _segundos(fim, fim=True) // 86400 if fim else (int(dias.max()) if len(dias) else -1)
+        serie = np.bincount(dias - primeiro, weights=valores, minlength=ultimo - primeiro + 1) if len(dias) \
+            else np.zeros(max(0, ultimo - primeiro + 1))
+        return np.arange(primeiro, ultimo + 1).astype('datetime64[D]'), serie
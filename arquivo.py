@@ -0,0 +1,188 @@
+# Arquivamento de histórico e manutenção do banco - Barbearia
+# Anos fechados de `movimentacoes` e `servicos` saem do banco principal para bancos anuais
+# (estoque_barbearia.2023.db, ...). Os resumos diários e o razão de estoque continuam no
+# principal; relatórios que leem as tabelas brutas anexam só as partições do período
+# (nucleo.esquemas_do_periodo) e o motor analítico as lê na carga inicial.
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import nucleo
+
+# Colunas copiadas para a partição, na ordem do schema principal
+COLUNAS = {
+    'movimentacoes': ('id', 'produto_id', 'tipo', 'quantidade', 'preco_unitario', 'data_hora'),
+    'servicos': ('id', 'servico_id', 'valor', 'barbeiro_id', 'data_hora'),
+}
+SCHEMA_PARTICAO = [
+    """CREATE TABLE IF NOT EXISTS arquivo.movimentacoes (
+           id INTEGER PRIMARY KEY,
+           produto_id INTEGER NOT NULL,
+           tipo TEXT NOT NULL,
+           quantidade REAL NOT NULL,
+           preco_unitario REAL NOT NULL,
+           data_hora TEXT NOT NULL
+       )""",
+    # ids de servicos_catalogo/barbeiros do banco principal (sem REFERENCES: não atravessa bancos)
+    """CREATE TABLE IF NOT EXISTS arquivo.servicos (
+           id INTEGER PRIMARY KEY,
+           servico_id INTEGER NOT NULL,
+           valor REAL NOT NULL,
+           barbeiro_id INTEGER NOT NULL,
+           data_hora TEXT NOT NULL
+       )""",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_mov_data_produto_tipo "
+    "ON movimentacoes (data_hora, produto_id, tipo, quantidade, preco_unitario)",
+    "CREATE INDEX IF NOT EXISTS arquivo.idx_servicos_data_barbeiro ON servicos (data_hora, barbeiro_id, servico_id, valor)",
+]
+GATILHO_IMUTAVEL = 'trg_movimentacoes_imutavel_excluir'
+
+ANALYZE_A_CADA = timedelta(days=7)
+VACUUM_PAGINAS_LIVRES = 0.20      # fração do arquivo em páginas livres que justifica um VACUUM
+
+
+def arquivo_do_ano(db, ano):
+    base, extensao = os.path.splitext(os.path.basename(db.caminho))
+    return f"{base}.{ano}{extensao or '.db'}"
+
+
+def anos_arquivaveis(db, hoje=None):
+    """Anos fechados (anteriores ao atual) que ainda têm linhas no banco principal."""
+    hoje = hoje or date.today()
+    anos = set()
+    for tabela in COLUNAS:
+        anos.update(int(linha[0]) for linha in db.consultar(
+            f"SELECT DISTINCT substr(data_hora, 1, 4) FROM {tabela} WHERE data_hora < ?", (f"{hoje.year:04d}-01-01",)))
+    arquivados = {linha[0] for linha in db.consultar("SELECT ano FROM particoes")}
+    return sorted(anos - arquivados)
+
+
+# ===== Arquivamento =====
+def arquivar_ano(db, ano, hoje=None):
+    """Move as movimentações e serviços do ano para a partição anual.
+
+    Duas transações: a cópia é confirmada na partição (INSERT OR IGNORE, então repetir após uma
+    queda é seguro) e só depois o principal apaga as linhas e registra a partição. Enquanto a
+    partição não está em `particoes`, os relatórios leem apenas o principal, sem contar duas vezes.
+    Retorna (movimentacoes, servicos) arquivados."""
+    hoje = hoje or date.today()
+    ano = int(ano)
+    if ano >= hoje.year:
+        raise nucleo.ErroValidacao(f"Só anos fechados podem ser arquivados ({ano} ainda está aberto).")
+    if db.consultar_um("SELECT 1 FROM particoes WHERE ano = ?", (ano,)):
+        raise nucleo.ErroValidacao(f"O ano {ano} já está arquivado.")
+    arquivo = arquivo_do_ano(db, ano)
+    periodo = (f"{ano:04d}-01-01", f"{ano + 1:04d}-01-01")
+    filtro = "data_hora >= ? AND data_hora < ?"
+
+    with db.escritor_anexado(nucleo.caminho_particao(db, arquivo), 'arquivo'):
+        with db.transacao() as cursor:
+            for comando in SCHEMA_PARTICAO:
+                cursor.execute(comando)
+            for tabela, colunas in COLUNAS.items():
+                lista = ", ".join(colunas)
+                cursor.execute(f"INSERT OR IGNORE INTO arquivo.{tabela} ({lista}) "
+                               f"SELECT {lista} FROM main.{tabela} WHERE {filtro}", periodo)
+
+        with db.transacao() as cursor:
+            contagens, ultimos = {}, {}
+            for tabela in COLUNAS:
+                principal = cursor.execute(f"SELECT COUNT(*) FROM main.{tabela} WHERE {filtro}", periodo).fetchone()[0]
+                copiadas = cursor.execute(
+                    f"SELECT COUNT(*) FROM main.{tabela} t WHERE {filtro} "
+                    f"AND EXISTS (SELECT 1 FROM arquivo.{tabela} a WHERE a.id = t.id)", periodo).fetchone()[0]
+                if copiadas != principal:
+                    raise nucleo.ErroValidacao(
+                        f"A partição {arquivo} já tem ids diferentes dos de {tabela} em {ano}; nada foi apagado.")
+                contagens[tabela] = principal
+                ultimos[tabela] = cursor.execute(f"SELECT MAX(id) FROM main.{tabela} WHERE {filtro}", periodo).fetchone()[0]
+            if not any(contagens.values()):
+                raise nucleo.ErroValidacao(f"Não há movimentações nem serviços em {ano}.")
+            # Movimentações são somente inclusão; o arquivamento é o único caminho que as remove
+            gatilho = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                                     (GATILHO_IMUTAVEL,)).fetchone()
+            if gatilho:
+                cursor.execute(f"DROP TRIGGER {GATILHO_IMUTAVEL}")
+            for tabela in COLUNAS:
+                cursor.execute(f"DELETE FROM main.{tabela} WHERE {filtro}", periodo)
+            if gatilho:
+                cursor.execute(gatilho[0])
+            # O AUTOINCREMENT já não devolve esses ids; o maior deles delimita o que a importação
+            # não pode mais inserir no principal (transferencia.py)
+            cursor.execute(
+                "INSERT INTO particoes (ano, arquivo, movimentacoes, servicos, arquivado_em, "
+                "ultimo_id_movimentacoes, ultimo_id_servicos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ano, arquivo, contagens['movimentacoes'], contagens['servicos'],
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), ultimos['movimentacoes'], ultimos['servicos']))
+    return contagens['movimentacoes'], contagens['servicos']
+
+
+# ===== Manutenção =====
+def _registrar(db, tarefa):
+    db.execute("INSERT INTO manutencao (tarefa, executada_em) VALUES (?, ?) "
+               "ON CONFLICT (tarefa) DO UPDATE SET executada_em = excluded.executada_em",
+               (tarefa, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def paginas_livres(db):
+    """Fração do arquivo principal ocupada por páginas livres (sobras de exclusões)."""
+    total = db.consultar_um("PRAGMA page_count")[0]
+    return db.consultar_um("PRAGMA freelist_count")[0] / total if total else 0.0
+
+
+def manutencao_se_necessario(db, forcar=False):
+    """ANALYZE semanal e VACUUM quando as páginas livres passam de VACUUM_PAGINAS_LIVRES
+    (típico logo depois de um arquivamento). Retorna as tarefas executadas."""
+    feitas = []
+    ultimo = db.consultar_um("SELECT executada_em FROM manutencao WHERE tarefa = 'analyze'")
+    if forcar or not ultimo or datetime.now() - datetime.fromisoformat(ultimo[0]) >= ANALYZE_A_CADA:
+        db.analisar()
+        _registrar(db, 'analyze')
+        feitas.append('analyze')
+    if paginas_livres(db) >= VACUUM_PAGINAS_LIVRES or (forcar and paginas_livres(db) > 0):
+        db.vacuum()
+        _registrar(db, 'vacuum')
+        feitas.append('vacuum')
+    return feitas
+
+
+# ===== Medição =====
+def _tamanho(caminho):
+    return sum(os.path.getsize(c) for c in (caminho, caminho + "-wal") if os.path.exists(c))
+
+
+def _cronometrar(funcao, repeticoes=3):
+    """Melhor de `repeticoes` execuções, em ms (a primeira também paga o ATTACH das partições)."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def medir(db, ano_antigo=None, hoje=None):
+    """Tamanho dos arquivos e latência de leituras típicas, para comparar antes e depois.
+    Os fechamentos usam horários quebrados de propósito: os trechos parciais leem as tabelas
+    brutas (e as partições), não só os resumos diários. `ano_antigo` (padrão: o ano mais
+    antigo com dados) define o fechamento de março usado como consulta histórica."""
+    hoje = hoje or date.today()
+    particoes = db.consultar("SELECT ano, arquivo FROM particoes ORDER BY ano")
+    if ano_antigo is None:
+        primeiro = db.consultar_um("SELECT MIN(substr(data_hora, 1, 4)) FROM movimentacoes")[0]
+        ano_antigo = particoes[0][0] if particoes else int(primeiro or hoje.year)
+    antigo = f"{int(ano_antigo):04d}-03-01"
+    recente = (hoje - timedelta(days=30)).isoformat()
+    return {
+        'banco_principal': _tamanho(db.caminho),
+        'particoes': sum(_tamanho(nucleo.caminho_particao(db, arquivo)) for _, arquivo in particoes),
+        'movimentacoes': db.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0],
+        'servicos': db.consultar_um("SELECT COUNT(*) FROM servicos")[0],
+        'fechamento_30_dias': _cronometrar(
+            lambda: nucleo.fechamento(db, recente + " 10:30:00", hoje.isoformat() + " 18:00:00")),
+        'fechamento_antigo': _cronometrar(
+            lambda: nucleo.fechamento(db, antigo + " 10:30:00", antigo[:8] + "20 18:00:00")),
+        'varredura_movimentacoes': _cronometrar(
+            lambda: db.consultar("SELECT produto_id, SUM(quantidade) FROM movimentacoes "
+                                 "WHERE preco_unitario > 0 GROUP BY produto_id")),
+    }
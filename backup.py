@@ -0,0 +1,302 @@
+# Backup a quente e restauração - Barbearia
+# Copia o banco aberto pela API de backup do SQLite, em passos de poucas páginas, a partir de
+# uma conexão própria com uma transação de leitura aberta: com WAL a cópia é um instantâneo
+# consistente e nem escritores nem a interface esperam por ela. Cada conjunto (banco principal
+# + partições de arquivo) vai comprimido em gzip para uma pasta com data e hora, com um
+# manifesto de SHA-256 gravado por último; só os `manter` conjuntos mais recentes ficam.
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+PAGINAS_POR_PASSO = 256         # ~1 MB com páginas de 4 KB
+PAUSA_ENTRE_PASSOS = 0.002      # segundos; devolve o disco e o GIL entre passos
+MANTER = 7
+INTERVALO = timedelta(hours=24)
+NIVEL_COMPRESSAO = 6
+BLOCO = 1 << 20
+MANIFESTO = "manifesto.json"
+CONTADAS = ('produtos', 'movimentacoes', 'servicos', 'razao_estoque')
+
+
+class ErroBackup(ValueError):
+    """Conjunto de backup incompleto, corrompido ou que não confere com o manifesto."""
+
+
+class BackupInterrompido(Exception):
+    """O backup foi cancelado (ex.: o programa está fechando)."""
+
+
+def pasta_padrao(caminho_banco):
+    return os.path.join(os.path.dirname(os.path.abspath(caminho_banco)), "backups")
+
+
+def listar_conjuntos(pasta):
+    """Conjuntos completos (com manifesto), do mais antigo para o mais recente."""
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta)
+                  if os.path.isfile(os.path.join(pasta, nome, MANIFESTO)))
+
+
+def ler_manifesto(conjunto):
+    try:
+        with open(os.path.join(conjunto, MANIFESTO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError) as e:
+        raise ErroBackup(f"Manifesto ilegível em {conjunto}: {e}")
+
+
+# ===== Backup =====
+class _Hash:
+    """Arquivo de saída que calcula o SHA-256 do que é gravado nele."""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.sha = hashlib.sha256()
+
+    def write(self, dados):
+        self.sha.update(dados)
+        return self.arquivo.write(dados)
+
+    def flush(self):
+        self.arquivo.flush()
+
+
+def _comprimir(origem, destino, interromper=None):
+    """gzip de `origem` em `destino`. Retorna (sha256 do conteúdo, sha256 do .gz, tamanho)."""
+    conteudo = hashlib.sha256()
+    tamanho = 0
+    with open(origem, 'rb') as entrada, open(destino, 'wb') as bruto:
+        saida = _Hash(bruto)
+        with gzip.GzipFile(filename=os.path.basename(origem), mode='wb', fileobj=saida,
+                           compresslevel=NIVEL_COMPRESSAO, mtime=0) as compactado:
+            while bloco := entrada.read(BLOCO):
+                if interromper is not None and interromper.is_set():
+                    raise BackupInterrompido(os.path.basename(origem))
+                conteudo.update(bloco)
+                compactado.write(bloco)
+                tamanho += len(bloco)
+        bruto.flush()
+        os.fsync(bruto.fileno())
+    return conteudo.hexdigest(), saida.sha.hexdigest(), tamanho
+
+
+def _copiar(origem, conjunto, nome, paginas, pausa, interromper):
+    """Backup em passos de `origem` (conexão) para `conjunto/nome.parcial`, conferido por quick_check.
+    A compressão fica para _fechar, depois que o instantâneo de leitura foi liberado."""
+    parcial = os.path.join(conjunto, nome + ".parcial")
+    estatisticas = {'passos': 0, 'reinicios': 0}
+    inicio = time.perf_counter()
+    restantes_antes = [None]
+
+    def progresso(status, restantes, total):
+        estatisticas['passos'] += 1
+        if restantes_antes[0] is not None and restantes > restantes_antes[0]:
+            estatisticas['reinicios'] += 1      # a origem mudou por fora do instantâneo
+        restantes_antes[0] = restantes
+        if interromper is not None and interromper.is_set():
+            raise BackupInterrompido(nome)
+        if pausa and restantes:
+            time.sleep(pausa)
+
+    destino = sqlite3.connect(parcial)
+    try:
+        origem.backup(destino, pages=paginas, progress=progresso)
+        verificacao = destino.execute("PRAGMA quick_check").fetchone()[0]
+        paginas_total = destino.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        destino.close()
+    if verificacao != 'ok':
+        raise ErroBackup(f"Cópia de {nome} falhou no quick_check: {verificacao}")
+    return {'nome': nome, 'gz': nome + ".gz", 'paginas': paginas_total,
+            'copia_s': round(time.perf_counter() - inicio, 3), **estatisticas}
+
+
+def _fechar(conjunto, item, interromper=None):
+    """Comprime a cópia conferida de `item` e completa o item com tamanho e somas."""
+    inicio = time.perf_counter()
+    parcial = os.path.join(conjunto, item['nome'] + ".parcial")
+    sha, sha_gz, tamanho = _comprimir(parcial, os.path.join(conjunto, item['gz']), interromper)
+    os.remove(parcial)
+    item.update(tamanho=tamanho, sha256=sha, sha256_gz=sha_gz,
+                compressao_s=round(time.perf_counter() - inicio, 3))
+    return item
+
+
+def fazer_backup(caminho_banco, pasta=None, manter=MANTER, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS,
+                 interromper=None):
+    """Grava um conjunto de backup e apaga os excedentes. Retorna (pasta do conjunto, manifesto).
+    `interromper` (threading.Event) cancela a cópia entre dois passos ou a compressão entre blocos."""
+    pasta = pasta or pasta_padrao(caminho_banco)
+    inicio = time.perf_counter()
+    criado_em = datetime.now()
+    conjunto = os.path.join(pasta, criado_em.strftime("%Y%m%d-%H%M%S"))
+    sufixo = 1
+    while os.path.exists(conjunto):
+        conjunto = os.path.join(pasta, criado_em.strftime("%Y%m%d-%H%M%S") + f"-{sufixo}")
+        sufixo += 1
+    os.makedirs(conjunto)
+    try:
+        origem = sqlite3.connect(caminho_banco, isolation_level=None)
+        try:
+            # A transação de leitura fixa o instantâneo do WAL durante todos os passos
+            origem.execute("BEGIN")
+            versao = origem.execute("PRAGMA user_version").fetchone()[0]
+            existentes = {linha[0] for linha in origem.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            contagens = {tabela: origem.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                         for tabela in CONTADAS if tabela in existentes}
+            particoes = ([linha[0] for linha in origem.execute("SELECT arquivo FROM particoes ORDER BY ano")]
+                         if 'particoes' in existentes else [])
+            arquivos = [dict(_copiar(origem, conjunto, os.path.basename(caminho_banco), paginas, pausa, interromper),
+                             principal=True)]
+            origem.execute("COMMIT")
+        finally:
+            origem.close()
+        for nome in particoes:
+            particao = sqlite3.connect(os.path.join(os.path.dirname(os.path.abspath(caminho_banco)), nome))
+            try:
+                arquivos.append(dict(_copiar(particao, conjunto, nome, paginas, pausa, interromper), principal=False))
+            finally:
+                particao.close()
+        for item in arquivos:
+            _fechar(conjunto, item, interromper)
+        manifesto = {
+            'criado_em': criado_em.strftime("%Y-%m-%d %H:%M:%S"),
+            'banco': os.path.abspath(caminho_banco),
+            'versao_schema': versao,
+            'contagens': contagens,
+            'arquivos': arquivos,
+            'duracao_s': round(time.perf_counter() - inicio, 3),
+        }
+        # O manifesto é gravado por último: sem ele o conjunto não conta como backup
+        temporario = os.path.join(conjunto, MANIFESTO + ".parcial")
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, os.path.join(conjunto, MANIFESTO))
+    except BaseException:
+        shutil.rmtree(conjunto, ignore_errors=True)
+        raise
+    rotacionar(pasta, manter)
+    return conjunto, manifesto
+
+
+def rotacionar(pasta, manter=MANTER):
+    """Apaga os conjuntos completos além dos `manter` mais recentes e sobras de backups que
+    não chegaram ao manifesto. Retorna as pastas apagadas."""
+    completos = listar_conjuntos(pasta)
+    apagar = completos[:-manter] if manter > 0 else completos
+    recente = completos[-1] if completos else ""
+    apagar += [os.path.join(pasta, nome) for nome in os.listdir(pasta)
+               if os.path.isdir(os.path.join(pasta, nome)) and os.path.join(pasta, nome) not in completos
+               and os.path.join(pasta, nome) < recente]
+    for conjunto in apagar:
+        shutil.rmtree(conjunto, ignore_errors=True)
+    return apagar
+
+
+def backup_se_necessario(caminho_banco, pasta=None, intervalo=INTERVALO, interromper=None, **opcoes):
+    """Faz um backup se o mais recente tiver mais de `intervalo`. Retorna o conjunto ou None."""
+    pasta = pasta or pasta_padrao(caminho_banco)
+    conjuntos = listar_conjuntos(pasta)
+    if conjuntos:
+        ultimo = datetime.fromisoformat(ler_manifesto(conjuntos[-1])['criado_em'])
+        if datetime.now() - ultimo < intervalo:
+            return None
+    return fazer_backup(caminho_banco, pasta, interromper=interromper, **opcoes)[0]
+
+
+# ===== Verificação e restauração =====
+def _extrair(conjunto, item, destino):
+    """Confere o .gz, descomprime em `destino` conferindo o conteúdo e roda integrity_check."""
+    gz = os.path.join(conjunto, item['gz'])
+    sha_gz = hashlib.sha256()
+    try:
+        with open(gz, 'rb') as arquivo:
+            while bloco := arquivo.read(BLOCO):
+                sha_gz.update(bloco)
+    except OSError as e:
+        raise ErroBackup(f"{item['gz']} ausente ou ilegível: {e}")
+    if sha_gz.hexdigest() != item['sha256_gz']:
+        raise ErroBackup(f"{item['gz']}: SHA-256 do arquivo comprimido não confere.")
+    sha = hashlib.sha256()
+    try:
+        with gzip.open(gz, 'rb') as entrada, open(destino, 'wb') as saida:
+            while bloco := entrada.read(BLOCO):
+                sha.update(bloco)
+                saida.write(bloco)
+            saida.flush()
+            os.fsync(saida.fileno())
+    except (OSError, EOFError) as e:
+        raise ErroBackup(f"{item['gz']}: falha ao descomprimir: {e}")
+    if sha.hexdigest() != item['sha256']:
+        raise ErroBackup(f"{item['gz']}: SHA-256 do banco descomprimido não confere.")
+    conn = sqlite3.connect(destino)
+    try:
+        resultado = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        contagens = {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                     for tabela in item.get('contar', ())}
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+    if resultado != 'ok':
+        raise ErroBackup(f"{item['nome']}: integrity_check falhou: {resultado}")
+    return versao, contagens
+
+
+def _verificar_principal(manifesto, versao, contagens):
+    if versao != manifesto['versao_schema'] or contagens != manifesto['contagens']:
+        raise ErroBackup(f"Banco restaurado não confere com o manifesto (versão {versao}, contagens {contagens}).")
+
+
+def verificar(conjunto):
+    """Confere checksums, integridade e contagens de todo o conjunto sem tocar no banco em uso.
+    Retorna o manifesto; levanta ErroBackup no primeiro problema."""
+    manifesto = ler_manifesto(conjunto)
+    with tempfile.TemporaryDirectory(dir=conjunto) as temporaria:
+        for item in manifesto['arquivos']:
+            item = dict(item, contar=list(manifesto['contagens']) if item['principal'] else ())
+            versao, contagens = _extrair(conjunto, item, os.path.join(temporaria, item['nome']))
+            if item['principal']:
+                _verificar_principal(manifesto, versao, contagens)
+            os.remove(os.path.join(temporaria, item['nome']))
+    return manifesto
+
+
+def restaurar(conjunto, destino):
+    """Restaura o conjunto sobre `destino` (o programa e o servidor precisam estar fechados).
+
+    Tudo é extraído e conferido ao lado do destino antes de qualquer troca; então cada arquivo
+    atual (com seus -wal/-shm, que não podem sobreviver à troca) é renomeado para
+    `.antes-restauracao-<data>` e o restaurado toma seu lugar. Retorna o manifesto."""
+    manifesto = ler_manifesto(conjunto)
+    pasta = os.path.dirname(os.path.abspath(destino))
+    extraidos = []
+    try:
+        for item in manifesto['arquivos']:
+            alvo = os.path.abspath(destino) if item['principal'] else os.path.join(pasta, item['nome'])
+            temporario = alvo + ".restaurando"
+            extraidos.append((temporario, alvo))
+            item = dict(item, contar=list(manifesto['contagens']) if item['principal'] else ())
+            versao, contagens = _extrair(conjunto, item, temporario)
+            if item['principal']:
+                _verificar_principal(manifesto, versao, contagens)
+    except BaseException:
+        for temporario, _ in extraidos:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        raise
+    marca = datetime.now().strftime("%Y%m%d-%H%M%S")
+    for temporario, alvo in extraidos:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(alvo + sufixo):
+                os.replace(alvo + sufixo, f"{alvo}.antes-restauracao-{marca}{sufixo}")
+        os.replace(temporario, alvo)
+    return manifesto
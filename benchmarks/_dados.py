@@ -0,0 +1,46 @@
+# Geração de bases sintéticas para os benchmarks.
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+from database import Database  # noqa: E402
+import nucleo  # noqa: E402
+
+CATEGORIAS = ["Pomada", "Shampoo", "Frigobar", "Outro Insumo"]
+SERVICOS = ["Barba", "Bigode", "Corte", "Cabelo E Barba", "Luzes", "Sobrancelha"]
+BARBEIROS = ["Barbeiro 1", "Barbeiro 2"]
+
+
+def criar_base(caminho, n_produtos=1000, n_movimentacoes=100_000, n_servicos=50_000, dias=365, semente=42):
+    rnd = random.Random(semente)
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    fim = datetime(2025, 10, 31, 20, 0, 0)
+    inicio = fim - timedelta(days=dias)
+    span = int((fim - inicio).total_seconds())
+
+    def instante():
+        return (inicio + timedelta(seconds=rnd.randrange(span))).strftime("%Y-%m-%d %H:%M:%S")
+
+    with db.transacao() as cur:
+        cur.executemany(
+            "INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"Produto {i:06d}", rnd.choice(CATEGORIAS), rnd.randint(0, 50), rnd.randint(0, 10),
+              round(rnd.uniform(5, 50), 2), round(rnd.uniform(10, 90), 2)) for i in range(n_produtos)])
+        movs = [(rnd.randint(1, n_produtos), rnd.choice(("ENTRADA", "SAIDA")), rnd.randint(1, 5),
+                 round(rnd.uniform(5, 90), 2), instante()) for _ in range(n_movimentacoes)]
+        movs.sort(key=lambda m: m[4])
+        cur.executemany(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) VALUES (?, ?, ?, ?, ?)", movs)
+        servs = [(rnd.choice(SERVICOS), float(rnd.choice((10, 30, 40, 60, 150))), rnd.choice(BARBEIROS), instante())
+                 for _ in range(n_servicos)]
+        servs.sort(key=lambda s: s[3])
+        ids = {(s, b): nucleo.codificar_servico(cur, s, b) for s in SERVICOS for b in BARBEIROS}
+        cur.executemany("INSERT INTO servicos (servico_id, valor, barbeiro_id, data_hora) VALUES (?, ?, ?, ?)",
+                        [(ids[(s, b)][0], v, ids[(s, b)][1], d) for s, v, b, d in servs])
+        nucleo.reconstruir_resumos(cur)
+    return db, fim.date()
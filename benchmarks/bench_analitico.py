@@ -0,0 +1,86 @@
+# Relatórios de período longo: SQL (tabela bruta e resumos diários) x motor colunar NumPy.
+# Mede lucro por produto por mês e ranking de barbeiros por trimestre sobre vários anos,
+# a carga inicial das colunas e a sincronização incremental depois de novas linhas, e
+# confere que os três caminhos dão o mesmo resultado.
+# Uso: python benchmarks/bench_analitico.py [n_movimentacoes] [anos]
+import os
+import sys
+import tempfile
+
+from _dados import criar_base
+from bench_relatorios import cronometrar
+import analitico
+import nucleo
+
+LUCRO_SQL = """
+    SELECT strftime('%Y-%m', data_hora) AS mes, produto_id,
+           SUM(CASE WHEN tipo='ENTRADA' THEN quantidade ELSE 0 END),
+           SUM(CASE WHEN tipo='SAIDA' THEN quantidade ELSE 0 END),
+           SUM(CASE WHEN tipo='ENTRADA' THEN quantidade*preco_unitario ELSE 0 END),
+           SUM(CASE WHEN tipo='SAIDA' THEN quantidade*preco_unitario ELSE 0 END)
+    FROM movimentacoes GROUP BY mes, produto_id ORDER BY mes, produto_id
+"""
+LUCRO_RESUMOS = """
+    SELECT substr(dia, 1, 7) AS mes, produto_id, SUM(qtd_entrada), SUM(qtd_saida),
+           SUM(valor_entrada), SUM(valor_saida)
+    FROM resumo_diario_produtos GROUP BY mes, produto_id ORDER BY mes, produto_id
+"""
+RANKING_SQL = """
+    SELECT periodo, barbeiro, atendimentos, total,
+           RANK() OVER (PARTITION BY periodo ORDER BY total DESC) AS posicao
+    FROM (SELECT strftime('%Y', data_hora) || '-T' || ((CAST(strftime('%m', data_hora) AS INTEGER) + 2) / 3) AS periodo,
+                 b.nome AS barbeiro, COUNT(*) AS atendimentos, SUM(valor) AS total
+          FROM servicos JOIN barbeiros b ON b.id = servicos.barbeiro_id GROUP BY periodo, barbeiro_id)
+    ORDER BY periodo, posicao
+"""
+
+
+def normalizar(linhas):
+    return sorted(tuple(round(v, 4) if isinstance(v, float) else v for v in linha) for linha in linhas)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    anos = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        db, _ = criar_base(os.path.join(tmp, "bench.db"), n_movimentacoes=n, n_servicos=n // 2, dias=365 * anos)
+
+        base = analitico.BaseAnalitica(db)
+        carga = cronometrar(lambda: (base._limpar(), base.sincronizar()), repeticoes=1)
+        vazia = cronometrar(base.sincronizar)
+        with db.transacao() as cur:
+            for i in range(1000):
+                nucleo._inserir_servico(cur, "Corte", 40, "Barbeiro 1", "2025-10-31 19:00:00")
+        incremental = cronometrar(base.sincronizar, repeticoes=1)
+
+        sql = cronometrar(lambda: db.consultar(LUCRO_SQL), repeticoes=3)
+        resumos = cronometrar(lambda: db.consultar(LUCRO_RESUMOS), repeticoes=3)
+        colunar = cronometrar(lambda: base.lucro_por_produto(unidade='mes'))
+        ranking_sql = cronometrar(lambda: db.consultar(RANKING_SQL), repeticoes=3)
+        ranking = cronometrar(lambda: base.desempenho_barbeiros(unidade='trimestre'))
+        serie = cronometrar(lambda: analitico.janela_movel(base.serie_diaria('lucro')[1], 30))
+
+        print(f"{n} movimentações e {n // 2} serviços em {anos} anos")
+        print(f"  carga inicial das colunas:        {carga:9.2f} ms")
+        print(f"  sincronização sem novidades:      {vazia:9.2f} ms")
+        print(f"  sincronização de 1000 serviços:   {incremental:9.2f} ms")
+        print("Lucro por produto por mês:")
+        print(f"  SQL na tabela bruta:              {sql:9.2f} ms")
+        print(f"  SQL nos resumos diários:          {resumos:9.2f} ms")
+        print(f"  NumPy colunar:                    {colunar:9.2f} ms")
+        print("Ranking de barbeiros por trimestre:")
+        print(f"  SQL (GROUP BY + RANK()):          {ranking_sql:9.2f} ms")
+        print(f"  NumPy colunar:                    {ranking:9.2f} ms")
+        print(f"Lucro diário com média móvel de 30 dias (NumPy): {serie:.2f} ms")
+
+        esperado = normalizar(db.consultar(LUCRO_SQL))
+        assert normalizar(db.consultar(LUCRO_RESUMOS)) == esperado, "resumos divergem da tabela bruta"
+        assert normalizar(r[:6] for r in base.lucro_por_produto(unidade='mes')) == esperado, "colunar diverge do SQL"
+        assert normalizar((p, b, n, t, k) for p, b, n, t, _, k in base.desempenho_barbeiros()) == \
+            normalizar(db.consultar(RANKING_SQL)), "ranking colunar diverge do SQL"
+        db.fechar()
+    print("OK: os três caminhos dão o mesmo resultado.")
+
+
+if __name__ == "__main__":
+    main()
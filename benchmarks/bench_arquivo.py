@@ -0,0 +1,65 @@
+# Arquivamento de anos fechados: tamanho do banco principal e latência de leituras antes e
+# depois de mover o histórico para bancos anuais (com VACUUM/ANALYZE ao final). Confere que
+# fechamentos com trechos parciais e o motor analítico dão o mesmo resultado depois.
+# Uso: python benchmarks/bench_arquivo.py [n_movimentacoes] [anos]
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+from _dados import criar_base
+import analitico
+import arquivo
+import nucleo
+
+# Períodos com horários quebrados: os trechos parciais leem as tabelas brutas e as partições
+PERIODOS = [("{a}-03-01 10:30:00", "{a}-03-20 18:00:00"), ("{a}-12-31 12:00:00", "{b}-01-01 09:00:00"),
+            ("{a}-05-05 08:00:00", "{a}-05-05 12:00:00"), ("{a}-01-01", "{b}-12-31")]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    anos = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ultimo_dia = criar_base(os.path.join(tmp, "estoque_barbearia.db"), n_movimentacoes=n,
+                                    n_servicos=n // 2, dias=365 * anos)
+        hoje = ultimo_dia + timedelta(days=1)
+        fechados = arquivo.anos_arquivaveis(db, hoje)
+        primeiro = fechados[0] + 1           # o primeiro ano costuma estar incompleto
+        periodos = [(a.format(a=primeiro, b=primeiro + 1), b.format(a=primeiro, b=primeiro + 1)) for a, b in PERIODOS]
+        antes = [nucleo.fechamento(db, a, b) for a, b in periodos]
+        base = analitico.BaseAnalitica(db)
+        base.sincronizar()
+        lucro = sorted(base.lucro_por_produto(unidade='mes'))
+        medidas = [arquivo.medir(db, primeiro, hoje)]
+
+        for ano in fechados:
+            movimentacoes, servicos = arquivo.arquivar_ano(db, ano, hoje)
+            print(f"{ano}: {movimentacoes} movimentações e {servicos} serviços arquivados")
+        print("manutenção:", ", ".join(arquivo.manutencao_se_necessario(db, forcar=True)))
+        medidas.append(arquivo.medir(db, primeiro, hoje))
+
+        print(f"\n{n} movimentações e {n // 2} serviços em {anos} anos; {len(fechados)} anos arquivados")
+        print(f"{'':<28} {'antes':>12} {'depois':>12}")
+        for chave, valor in medidas[0].items():
+            if chave in ('banco_principal', 'particoes'):
+                print(f"{chave + ' (MB)':<28} {valor / 2**20:>12.1f} {medidas[1][chave] / 2**20:>12.1f}")
+            elif isinstance(valor, float):
+                print(f"{chave + ' (ms)':<28} {valor:>12.2f} {medidas[1][chave]:>12.2f}")
+            else:
+                print(f"{chave:<28} {valor:>12} {medidas[1][chave]:>12}")
+
+        depois = [nucleo.fechamento(db, a, b) for a, b in periodos]
+        base.sincronizar()
+        lucro_depois = sorted(base.lucro_por_produto(unidade='mes'))
+        db.fechar()
+    for (a, b), x, y in zip(periodos, antes, depois):
+        assert all(abs(x[k] - y[k]) < 1e-6 for k in x if k.startswith('total')), f"fechamento {a}..{b} mudou"
+        assert len(x['produtos']) == len(y['produtos']) and len(x['servicos']) == len(y['servicos'])
+    assert len(lucro) == len(lucro_depois) and all(
+        abs(p - q) < 1e-6 for x, y in zip(lucro, lucro_depois) for p, q in zip(x[2:], y[2:])), "analítico mudou"
+    print("OK: fechamentos e relatórios analíticos iguais antes e depois do arquivamento.")
+
+
+if __name__ == "__main__":
+    main()
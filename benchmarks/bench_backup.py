@@ -0,0 +1,124 @@
+# Backup a quente: API de backup em passos (com instantâneo de leitura) x cópia de uma vez só,
+# num banco de vários GB com um escritor e um "laço de interface" rodando ao mesmo tempo.
+# Mede a duração (cópia + compressão), a latência das escritas e o atraso de um tique de 5 ms
+# (o que o mainloop do Tk sentiria), depois confere e restaura o conjunto comprimido.
+# Uso: python benchmarks/bench_backup.py [tamanho_mb]
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from _dados import criar_base
+import backup
+import nucleo
+from database import Database
+
+
+def crescer(db, caminho, tamanho_mb):
+    """Duplica as movimentações até o arquivo passar de `tamanho_mb`."""
+    while os.path.getsize(caminho) < tamanho_mb * 2**20:
+        with db.transacao() as cur:
+            cur.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) "
+                        "SELECT produto_id, tipo, quantidade, preco_unitario, data_hora FROM movimentacoes")
+        db.consultar_um("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def sob_carga(db, funcao):
+    """Roda `funcao` com um escritor contínuo e um tique de 5 ms. Retorna (duração, escritas, tiques)."""
+    parar = threading.Event()
+    escritas, atrasos = [], []
+
+    def escritor():
+        i = 0
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            nucleo.movimentar_estoque(db, 1 + i % 500, 1, "ENTRADA")
+            escritas.append(time.perf_counter() - inicio)
+            i += 1
+            time.sleep(0.001)
+
+    def tique():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            time.sleep(0.005)
+            atrasos.append(time.perf_counter() - inicio - 0.005)
+
+    threads = [threading.Thread(target=escritor), threading.Thread(target=tique)]
+    for t in threads:
+        t.start()
+    inicio = time.perf_counter()
+    try:
+        funcao()
+    finally:
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        for t in threads:
+            t.join()
+    return duracao, sorted(escritas), sorted(atrasos)
+
+
+def percentil(valores, p):
+    return valores[min(int(len(valores) * p), len(valores) - 1)] * 1000 if valores else 0.0
+
+
+def main():
+    tamanho_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "estoque_barbearia.db")
+        db, _ = criar_base(caminho, n_produtos=500, n_movimentacoes=200_000, n_servicos=50_000)
+        crescer(db, caminho, tamanho_mb)
+        tamanho = os.path.getsize(caminho) / 2**20
+        pasta = os.path.join(tmp, "backups")
+        manifestos = {}
+
+        def em_passos():
+            manifestos['passos'] = backup.fazer_backup(caminho, pasta, manter=5)
+
+        def de_uma_vez():
+            manifestos['uma_vez'] = backup.fazer_backup(caminho, pasta, manter=5, paginas=-1, pausa=0)
+
+        def copia_do_arquivo():
+            shutil.copyfile(caminho, os.path.join(tmp, "copia.db"))
+
+        print(f"Banco de {tamanho:.0f} MB, com escritas e um tique de 5 ms durante cada cópia")
+        print(f"{'':<34} {'total':>9} {'escritas':>9} {'p99 escrita':>12} {'máx escrita':>12} "
+              f"{'p99 tique':>10} {'máx tique':>10}")
+        for rotulo, funcao in (("backup em passos (256 páginas)", em_passos),
+                               ("backup de uma vez (pages=-1)", de_uma_vez),
+                               ("cópia do arquivo (inconsistente)", copia_do_arquivo)):
+            duracao, escritas, atrasos = sob_carga(db, funcao)
+            print(f"{rotulo:<34} {duracao:>8.1f}s {len(escritas):>9} {percentil(escritas, .99):>10.1f}ms "
+                  f"{percentil(escritas, 1):>10.1f}ms {percentil(atrasos, .99):>8.1f}ms {percentil(atrasos, 1):>8.1f}ms")
+
+        for chave, (conjunto, manifesto) in manifestos.items():
+            principal = manifesto['arquivos'][0]
+            gz = os.path.getsize(os.path.join(conjunto, principal['gz'])) / 2**20
+            print(f"{chave}: cópia {principal['copia_s']:.1f} s ({principal['tamanho'] / 2**20 / principal['copia_s']:.0f} MB/s, "
+                  f"{principal['passos']} passos, {principal['reinicios']} reinícios), compressão "
+                  f"{principal['compressao_s']:.1f} s ({principal['tamanho'] / 2**20:.0f} -> {gz:.0f} MB)")
+        conjunto, manifesto = manifestos['passos']
+        principal = manifesto['arquivos'][0]
+        inicio = time.perf_counter()
+        backup.verificar(conjunto)
+        verificacao = time.perf_counter() - inicio
+        esperado = db.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0]
+        db.fechar()
+
+        restaurado = os.path.join(tmp, "restaurado", "estoque_barbearia.db")
+        os.makedirs(os.path.dirname(restaurado))
+        inicio = time.perf_counter()
+        backup.restaurar(conjunto, restaurado)
+        restauracao = time.perf_counter() - inicio
+        print(f"verificação do conjunto: {verificacao:.1f} s; restauração verificada: {restauracao:.1f} s")
+        db = Database(restaurado)
+        obtido = db.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0]
+        db.fechar()
+    assert principal['reinicios'] == 0, "o instantâneo de leitura deveria evitar reinícios"
+    assert obtido == manifesto['contagens']['movimentacoes'] <= esperado
+    print("OK: conjunto conferido e restaurado com as contagens do instantâneo.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Benchmark: latência da busca de produtos em um catálogo de 100k itens.
+# Compara a varredura linear antiga (lower() a cada tecla) com o IndiceBusca.
+# Uso: python benchmarks/bench_busca.py [n_produtos]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from busca import IndiceBusca  # noqa: E402
+
+MARCAS = ["Pómada", "Shampoo", "Condicionador", "Cera", "Óleo", "Gel", "Navalha", "Lâmina", "Cerveja", "Refrigerante"]
+ADJETIVOS = ["Modeladora", "Matte", "Brilho", "Anticaspa", "Fixação Forte", "Mentolado", "Premium", "Clássico"]
+TERMOS = ["po", "pomada", "modelad", "anticaspa", "lamina", "premum", "xyz123"]
+
+
+def gerar(n):
+    rnd = random.Random(7)
+    return [(i, f"{rnd.choice(MARCAS)} {rnd.choice(ADJETIVOS)} {i}", rnd.choice(("Pomada", "Shampoo", "Frigobar")))
+            for i in range(1, n + 1)]
+
+
+def busca_linear(registros, termo):
+    termo = termo.lower().strip()
+    return [r for r in registros if termo in str(r[1]).lower()]
+
+
+def cronometrar(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    registros = gerar(n)
+    indice = IndiceBusca()
+    construcao, _ = cronometrar(lambda: indice.reconstruir(registros), repeticoes=1)
+    print(f"{n} produtos; construção do índice: {construcao:.0f} ms")
+    print(f"{'termo':<12} {'linear (ms)':>12} {'índice (ms)':>12} {'resultados':>11}")
+    for termo in TERMOS:
+        linear, _ = cronometrar(lambda: busca_linear(registros, termo))
+        indexada, ids = cronometrar(lambda: indice.buscar(termo))
+        print(f"{termo:<12} {linear:>12.2f} {indexada:>12.2f} {len(ids):>11}")
+    com_categoria, ids = cronometrar(lambda: indice.buscar("modelad", categoria="Frigobar"))
+    print(f"{'modelad+cat':<12} {'':>12} {com_categoria:>12.2f} {len(ids):>11}")
+    manutencao, _ = cronometrar(lambda: indice.atualizar(1, "Pomada Nova Fórmula", "Pomada"), repeticoes=1)
+    print(f"atualização incremental de 1 produto: {manutencao:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Benchmark: movimentações por segundo com sqlite3.connect por chamada (antes)
+# versus a conexão persistente da camada Database (depois).
+# Uso: python benchmarks/bench_conexao.py [n_movimentacoes]
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import Database  # noqa: E402
+
+SCHEMA = (
+    "CREATE TABLE produtos (id INTEGER PRIMARY KEY, nome TEXT NOT NULL, categoria TEXT NOT NULL,"
+    " quantidade REAL NOT NULL, minimo INTEGER NOT NULL, preco_custo REAL DEFAULT 0, preco_venda REAL DEFAULT 0)",
+    "CREATE TABLE movimentacoes (id INTEGER PRIMARY KEY, produto_id INTEGER NOT NULL, tipo TEXT NOT NULL,"
+    " quantidade REAL NOT NULL, preco_unitario REAL NOT NULL, data_hora TEXT NOT NULL)",
+)
+
+
+def preparar(caminho, n_produtos=100):
+    with sqlite3.connect(caminho) as conn:
+        for sql in SCHEMA:
+            conn.execute(sql)
+        conn.executemany(
+            "INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"Produto {i}", "Pomada", 1e9, 5, 10.0, 20.0) for i in range(n_produtos)])
+
+
+def movimentar_antes(caminho, produto_id):
+    # Reproduz o padrão antigo de atualizar_estoque: uma conexão nova por comando
+    with sqlite3.connect(caminho) as conn:
+        quantidade = conn.execute("SELECT quantidade FROM produtos WHERE id=?", (produto_id,)).fetchone()[0]
+    with sqlite3.connect(caminho) as conn:
+        conn.execute("UPDATE produtos SET quantidade = ? WHERE id = ?", (quantidade - 1, produto_id))
+        conn.commit()
+    with sqlite3.connect(caminho) as conn:
+        conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) VALUES (?, ?, ?, ?, ?)",
+                     (produto_id, "SAIDA", 1, 20.0, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        conn.commit()
+
+
+def movimentar_depois(db, produto_id):
+    quantidade = db.consultar_um("SELECT quantidade FROM produtos WHERE id=?", (produto_id,))[0]
+    db.execute("UPDATE produtos SET quantidade = ? WHERE id = ?", (quantidade - 1, produto_id))
+    db.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) VALUES (?, ?, ?, ?, ?)",
+               (produto_id, "SAIDA", 1, 20.0, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+
+def medir(rotulo, funcao, n):
+    inicio = time.perf_counter()
+    for i in range(n):
+        funcao(i % 100 + 1)
+    duracao = time.perf_counter() - inicio
+    print(f"{rotulo:<28} {n / duracao:10.1f} mov/s  ({duracao * 1000 / n:.3f} ms/mov)")
+    return n / duracao
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_antes = os.path.join(tmp, "antes.db")
+        preparar(caminho_antes)
+        antes = medir("antes (connect por chamada)", lambda pid: movimentar_antes(caminho_antes, pid), n)
+
+        caminho_depois = os.path.join(tmp, "depois.db")
+        preparar(caminho_depois)
+        db = Database(caminho_depois)
+        try:
+            depois = medir("depois (Database persistente)", lambda pid: movimentar_depois(db, pid), n)
+        finally:
+            db.fechar()
+    print(f"ganho: {depois / antes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
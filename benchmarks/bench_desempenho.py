@@ -0,0 +1,126 @@
+# Relatório de desempenho por barbeiro (nucleo.desempenho_barbeiros): uma consulta que lê os
+# resumos diários nos dias completos e `servicos` só nos trechos parciais, com os níveis serviço,
+# barbeiro e geral por funções de janela, x uma consulta por nível sobre `servicos` para o período
+# atual e o anterior. Confere que os números batem e, pelo EXPLAIN QUERY PLAN, que cada trecho
+# parcial é lido uma única vez em cada banco (principal e partições) por relatório.
+# Uso: python benchmarks/bench_desempenho.py [n_servicos]
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from _dados import criar_base
+import arquivo
+import nucleo
+from database import Database
+
+# Um nível por consulta, como um relatório montado em pedaços faria
+POR_NIVEL = {
+    'celulas': "SELECT servico_id, barbeiro_id, COUNT(*), SUM(valor) FROM servicos "
+               "WHERE data_hora BETWEEN ? AND ? GROUP BY servico_id, barbeiro_id",
+    'servicos': "SELECT servico_id, COUNT(*), SUM(valor) FROM servicos WHERE data_hora BETWEEN ? AND ? GROUP BY servico_id",
+    'barbeiros': "SELECT barbeiro_id, COUNT(*), SUM(valor) FROM servicos WHERE data_hora BETWEEN ? AND ? GROUP BY barbeiro_id",
+    'horas': "SELECT barbeiro_id, COUNT(DISTINCT substr(data_hora, 1, 13)) FROM servicos "
+             "WHERE data_hora BETWEEN ? AND ? GROUP BY barbeiro_id",
+    'geral': "SELECT COUNT(*), SUM(valor) FROM servicos WHERE data_hora BETWEEN ? AND ?",
+}
+
+
+def por_nivel(db, inicio, fim):
+    anterior = nucleo.periodo_anterior(inicio, fim)
+    return [{nivel: db.consultar(sql, periodo) for nivel, sql in POR_NIVEL.items()} for periodo in ((inicio, fim), anterior)]
+
+
+def cronometrar(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def leituras_de_servicos(db, inicio, fim):
+    """Linhas do plano que leem alguma tabela `servicos` (principal ou partição)."""
+    capturadas = []
+    with db.leitor() as conn:        # pool de um leitor: o relatório usa esta mesma conexão
+        conn.set_trace_callback(capturadas.append)
+    try:
+        nucleo.desempenho_barbeiros(db, inicio, fim)
+    finally:
+        with db.leitor() as conn:
+            conn.set_trace_callback(None)
+    sql = next(s for s in capturadas if "WITH brutos" in s)
+    with db.leitor() as conn:
+        plano = [linha[-1] for linha in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    return [linha for linha in plano if ".servicos " in linha or linha.startswith(("SCAN servicos", "SEARCH servicos"))]
+
+
+def conferir(db, relatorio, inicio, fim):
+    nomes = nucleo.catalogo(db)
+    esperado = por_nivel(db, inicio, fim)[0]
+    celulas = {(nomes.nome_servico(s), nomes.nome_barbeiro(b)): (n, t) for s, b, n, t in esperado['celulas']}
+    assert {(s, b): (n, t) for s, _, _, b, n, t in relatorio['linhas']} == celulas, "células diferentes"
+    servicos = {nomes.nome_servico(s): (n, t) for s, n, t in esperado['servicos']}
+    assert {s: (n, t) for s, n, t, _ in relatorio['servicos']} == servicos, "totais por serviço diferentes"
+    horas = dict(esperado['horas'])
+    barbeiros = {nomes.nome_barbeiro(b): (n, t, horas[b]) for b, n, t in esperado['barbeiros']}
+    assert {b: (n, t, h) for b, n, t, _, h, _, _ in relatorio['barbeiros']} == barbeiros, "totais por barbeiro diferentes"
+    n, t = esperado['geral'][0]
+    assert (relatorio['geral']['atendimentos'], relatorio['geral']['total']) == (n, t), "total geral diferente"
+
+
+def leituras_esperadas(db, inicio, fim):
+    """Uma leitura de `servicos` por trecho parcial e banco (principal + partições do trecho)."""
+    anos = [linha[0] for linha in db.consultar("SELECT ano FROM particoes")]
+    total = 0
+    for periodo in ((inicio, fim), nucleo.periodo_anterior(inicio, fim)):
+        for ini, fim_trecho in nucleo.fatiar_periodo(*periodo)[2]:
+            total += 1 + sum(int(ini[:4]) <= ano <= int(fim_trecho[:4]) for ano in anos)
+    return total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "estoque_barbearia.db")
+        db, ultimo_dia = criar_base(caminho, n_produtos=100, n_movimentacoes=1000, n_servicos=n, dias=730)
+        db.fechar()
+        db = Database(caminho, tamanho_pool=1)      # um leitor só: o plano vê as partições anexadas
+
+        fim = ultimo_dia.isoformat()
+        periodos = [("último mês", (ultimo_dia - timedelta(days=29)).isoformat(), fim),
+                    ("mês, horários quebrados", (ultimo_dia - timedelta(days=29)).isoformat() + " 10:30:00", fim + " 18:00:00"),
+                    ("último trimestre", (ultimo_dia - timedelta(days=90)).isoformat(), fim),
+                    ("último ano", (ultimo_dia - timedelta(days=364)).isoformat(), fim)]
+        print(f"{n} serviços em 2 anos; cada relatório compara com o período anterior")
+        print(f"{'período':<26} {'relatório':>10} {'por nível':>10} {'leituras de servicos':>21}")
+        for rotulo, inicio, fim_periodo in periodos:
+            t_relatorio, relatorio = cronometrar(lambda: nucleo.desempenho_barbeiros(db, inicio, fim_periodo))
+            t_niveis, _ = cronometrar(lambda: por_nivel(db, relatorio['inicio'], relatorio['fim']))
+            conferir(db, relatorio, relatorio['inicio'], relatorio['fim'])
+            leituras = leituras_de_servicos(db, inicio, fim_periodo)
+            print(f"{rotulo:<26} {t_relatorio:>8.1f}ms {t_niveis:>8.1f}ms {len(leituras):>21} (por nível: {2 * len(POR_NIVEL)})")
+            assert len(leituras) == leituras_esperadas(db, inicio, fim_periodo), f"plano: {leituras}"
+
+        # Com o primeiro ano arquivado, o período que cruza a virada lê o trecho de cada banco uma vez
+        hoje = ultimo_dia + timedelta(days=1)
+        for ano in arquivo.anos_arquivaveis(db, hoje)[:-1]:
+            arquivo.arquivar_ano(db, ano, hoje)
+        ano = db.consultar_um("SELECT MAX(ano) FROM particoes")[0]
+        inicio, fim_periodo = f"{ano}-12-31 12:00:00", f"{ano + 1}-01-31 18:00:00"
+        t_relatorio, relatorio = cronometrar(lambda: nucleo.desempenho_barbeiros(db, inicio, fim_periodo))
+        leituras = leituras_de_servicos(db, inicio, fim_periodo)
+        print(f"{'virada com partição':<26} {t_relatorio:>8.1f}ms {'':>10} {len(leituras):>21}")
+        assert len(leituras) == leituras_esperadas(db, inicio, fim_periodo), f"plano: {leituras}"
+        geral = relatorio['geral']
+        print(f"virada: {geral['atendimentos']} atendimentos, ticket R$ {geral['ticket_medio']:.2f}, "
+              f"{geral['servicos_por_hora']:.2f} serviços/hora, {geral['variacao']:+.1%} vs "
+              f"{relatorio['anterior']['inicio']} .. {relatorio['anterior']['fim']}")
+        db.fechar()
+    print("OK: mesmos números da consulta por nível, com cada trecho bruto lido uma vez.")
+
+
+if __name__ == "__main__":
+    main()
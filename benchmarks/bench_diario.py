@@ -0,0 +1,254 @@
+# Commit por evento x group commit (diario.py).
+# Vários produtores (threads, como os workers do app) registram serviços e movimentações:
+#   - commit por evento com synchronous=NORMAL (padrão do app: sem fsync no COMMIT em WAL)
+#   - commit por evento com synchronous=FULL (um fsync por evento, durabilidade equivalente)
+#   - diário com group commit (um fsync por grupo; confirmação quando o evento está no log)
+# Cada produtor espera a confirmação do seu evento antes do próximo, como um caixa do app
+# (no diário a confirmação é o fsync do log; o COMMIT vem depois). O ganho do group commit
+# depende do custo do fsync no disco, medido e exibido no início.
+# Reporta eventos/s e latência de confirmação, confere que nada se perdeu e simula uma queda
+# do processo entre o fsync do log e o COMMIT no banco para validar a reaplicação, e falhas
+# da transação do grupo (banco travado) para validar que nenhum evento fica para trás.
+# Uso: python benchmarks/bench_diario.py [produtores] [eventos_por_produtor]
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from _dados import RAIZ
+from database import Database
+import nucleo
+from diario import DiarioEscrita
+
+N_PRODUTOS = 20
+QTD_INICIAL = 100_000
+
+
+def preparar(caminho):
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    with db.transacao() as cur:
+        cur.executemany("INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) "
+                        "VALUES (?, 'Pomada', ?, 5, 10, 20)",
+                        [(f"Produto {i}", QTD_INICIAL) for i in range(N_PRODUTOS)])
+    return db
+
+
+def eventos(semente, n):
+    rnd = random.Random(semente)
+    for i in range(n):
+        if rnd.random() < 0.7:
+            yield "servico", (f"Corte {semente}-{i}", rnd.choice((30, 40, 60)), f"Barbeiro {semente % 3}")
+        else:
+            delta = rnd.choice((-1, -2, 3))
+            yield "movimentacao", (rnd.randint(1, N_PRODUTOS), delta, "ENTRADA" if delta > 0 else "SAIDA")
+
+
+def produzir(enviar, produtores, n):
+    latencias = []
+    lock = threading.Lock()
+
+    def produtor(semente):
+        minhas = []
+        for tipo, args in eventos(semente, n):
+            inicio = time.perf_counter()
+            enviar(tipo, args)
+            minhas.append((time.perf_counter() - inicio) * 1000)
+        with lock:
+            latencias.extend(minhas)
+
+    threads = [threading.Thread(target=produtor, args=(s,)) for s in range(produtores)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return inicio, latencias
+
+
+def conferir(db, total):
+    servicos = db.consultar_um("SELECT COUNT(*) FROM servicos")[0]
+    movs = db.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0]
+    divergentes = db.consultar("""
+        SELECT p.id FROM produtos p LEFT JOIN movimentacoes m ON m.produto_id = p.id
+        GROUP BY p.id
+        HAVING ABS(p.quantidade - (? + COALESCE(SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade
+                                                     ELSE -m.quantidade END), 0))) > 1e-9
+    """, (QTD_INICIAL,))
+    assert servicos + movs == total, f"esperados {total} eventos, gravados {servicos + movs}"
+    assert not divergentes, f"saldo divergente do histórico: {divergentes}"
+
+
+def rodar(nome, tmp, produtores, n, sincronismo=None, grupo_ms=None):
+    caminho = os.path.join(tmp, nome.replace("/", "_").replace(" ", "_") + ".db")
+    db = preparar(caminho)
+    if sincronismo:
+        db._conn.execute(f"PRAGMA synchronous={sincronismo}")
+    diario = None
+    if grupo_ms is not None:
+        diario = DiarioEscrita(db, caminho + ".diario", intervalo_ms=grupo_ms)
+
+        def enviar(tipo, args):
+            recibo = diario.registrar_servico(*args) if tipo == "servico" else diario.movimentar(*args)[0]
+            recibo.duravel.result()
+    else:
+        def enviar(tipo, args):
+            if tipo == "servico":
+                nucleo.registrar_servico(db, *args)
+            else:
+                nucleo.movimentar_estoque(db, *args)
+
+    inicio, latencias = produzir(enviar, produtores, n)
+    # fsyncs no caminho da confirmação: NORMAL nenhum (só nos checkpoints do WAL), FULL um por
+    # COMMIT, diário um por grupo
+    fsyncs = 0 if sincronismo is None and diario is None else produtores * n
+    if diario:
+        diario.fechar()   # espera o último grupo: a vazão conta até tudo estar no banco
+        fsyncs = diario.grupos
+    duracao = time.perf_counter() - inicio
+    conferir(db, produtores * n)
+    db.fechar()
+    latencias.sort()
+    print(f"{nome:<24} {len(latencias) / duracao:>9.0f} {statistics.median(latencias):>9.2f} "
+          f"{latencias[int(0.99 * (len(latencias) - 1))]:>9.2f} {fsyncs:>8}")
+
+
+# ===== Simulação de queda =====
+FILHO = r"""
+import os, sys
+sys.path.insert(0, {raiz!r})
+from database import Database
+import diario
+
+caminho, corte = sys.argv[1], int(sys.argv[2])
+grupos = 0
+salvar = diario._salvar_checkpoint
+
+def salvar_e_cair(cursor, nome, seq):
+    # Queda depois do fsync do log e antes do COMMIT do grupo
+    global grupos
+    grupos += 1
+    if grupos == corte:
+        os._exit(1)
+    salvar(cursor, nome, seq)
+
+diario._salvar_checkpoint = salvar_e_cair
+db = Database(caminho)
+d = diario.DiarioEscrita(db, caminho + ".diario", intervalo_ms=5, max_eventos=50)
+
+def confirmar(futuro, nome):
+    print(nome, flush=True)
+
+while True:
+    nome = f"Queda {{d._seq + 1}}"
+    d.registrar_servico(nome, 40, "Barbeiro 1").duravel.add_done_callback(lambda f, nome=nome: confirmar(f, nome))
+"""
+
+
+def simular_queda(tmp):
+    caminho = os.path.join(tmp, "queda.db")
+    preparar(caminho).fechar()
+    filho = subprocess.run([sys.executable, "-c", FILHO.format(raiz=RAIZ), caminho, "4"],
+                           capture_output=True, text=True)
+    confirmados = filho.stdout.splitlines()
+    db = Database(caminho)
+    antes = db.consultar_um("SELECT COUNT(*) FROM servicos")[0]
+    diario = DiarioEscrita(db, caminho + ".diario")
+    diario.fechar()
+    gravados = {r[0] for r in db.consultar(
+        "SELECT c.nome FROM servicos s JOIN servicos_catalogo c ON c.id = s.servico_id")}
+    db.fechar()
+    perdidos = [s for s in confirmados if s not in gravados]
+    print(f"queda simulada: {len(confirmados)} confirmados, {antes} no banco antes da reabertura, "
+          f"{diario.recuperados} reaplicados do log, perdidos: {len(perdidos)}")
+    assert filho.returncode == 1 and confirmados and not perdidos
+
+
+# ===== Falha na transação do grupo =====
+def injetar_falhas(db, falhas):
+    """Faz as `falhas` próximas transações de `db` falharem como um banco travado (None: todas)."""
+    original = db.transacao
+    restantes = [falhas]
+
+    @contextmanager
+    def transacao():
+        if restantes[0] is None or restantes[0] > 0:
+            if restantes[0] is not None:
+                restantes[0] -= 1
+            raise sqlite3.OperationalError("database is locked")
+        with original() as cursor:
+            yield cursor
+
+    db.transacao = transacao
+
+
+def simular_falha_commit(tmp):
+    # Falha passageira: o grupo é repetido e o seguinte espera, sem pular o checkpoint
+    caminho = os.path.join(tmp, "falha.db")
+    db = preparar(caminho)
+    diario = DiarioEscrita(db, caminho + ".diario", intervalo_ms=1, max_eventos=1)
+    injetar_falhas(db, 1)
+    diario.movimentar(1, -4, "SAIDA")
+    diario.movimentar(1, -1, "SAIDA")
+    diario.descarregar(timeout=10)
+    saldo = db.consultar_um("SELECT quantidade FROM produtos WHERE id = 1")[0]
+    assert diario.falhas == 1 and saldo == QTD_INICIAL - 5, (diario.falhas, saldo)
+    assert not diario._pendentes, f"deltas presos nos pendentes: {dict(diario._pendentes)}"
+    diario.fechar()
+    db.fechar()
+
+    # Banco indisponível até o fechamento: os eventos confirmados voltam do log na reabertura
+    caminho = os.path.join(tmp, "falha_fechando.db")
+    db = preparar(caminho)
+    diario = DiarioEscrita(db, caminho + ".diario", intervalo_ms=1, max_eventos=1)
+    injetar_falhas(db, None)
+    diario.movimentar(1, -4, "SAIDA")[0].duravel.result(timeout=10)
+    segundo = diario.movimentar(1, -1, "SAIDA")[0]    # fica na fila atrás do grupo que não aplica
+    assert diario._pendentes[1] == -5, "sem aplicar, os deltas continuam pendentes"
+    diario.fechar()
+    assert segundo.duravel.done() and not segundo.duravel.exception(), "o fechamento grava a fila no log"
+    db.fechar()
+    db = Database(caminho)
+    diario = DiarioEscrita(db, caminho + ".diario")
+    diario.fechar()
+    saldo = db.consultar_um("SELECT quantidade FROM produtos WHERE id = 1")[0]
+    db.fechar()
+    print(f"falha no COMMIT: passageira repetida (saldo {QTD_INICIAL - 5}); persistente, "
+          f"{diario.recuperados} reaplicados do log na reabertura")
+    assert diario.recuperados == 2 and saldo == QTD_INICIAL - 5, (diario.recuperados, saldo)
+
+
+def custo_fsync(tmp, n=200):
+    with open(os.path.join(tmp, "fsync.bin"), "ab") as arquivo:
+        inicio = time.perf_counter()
+        for _ in range(n):
+            arquivo.write(b"x" * 100)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+    return (time.perf_counter() - inicio) / n * 1000
+
+
+def main():
+    produtores = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{produtores} produtores x {n} eventos (70% serviços, 30% movimentações); "
+              f"fsync neste disco: {custo_fsync(tmp):.2f} ms")
+        print(f"{'modo':<24} {'eventos/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'fsyncs':>8}")
+        rodar("commit/evento NORMAL", tmp, produtores, n)
+        rodar("commit/evento FULL", tmp, produtores, n, sincronismo="FULL")
+        rodar("group commit 2 ms", tmp, produtores, n, grupo_ms=2)
+        rodar("group commit 10 ms", tmp, produtores, n, grupo_ms=10)
+        simular_queda(tmp)
+        simular_falha_commit(tmp)
+    print("OK: nenhum evento confirmado foi perdido.")
+
+
+if __name__ == "__main__":
+    main()
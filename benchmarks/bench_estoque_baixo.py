@@ -0,0 +1,76 @@
+# Produtos abaixo do mínimo: tabela estoque_baixo (triggers) x varredura de produtos.
+# Mede contagem e listagem com um catálogo grande e poucos alertas, o custo dos triggers por
+# movimentação e confere que a tabela bate com a varredura depois de movimentações aleatórias.
+# Uso: python benchmarks/bench_estoque_baixo.py [n_produtos] [movimentacoes]
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench_relatorios import cronometrar  # noqa: E402
+from database import Database  # noqa: E402
+import nucleo  # noqa: E402
+
+VARREDURA = "SELECT id FROM produtos WHERE quantidade < minimo ORDER BY id"
+
+
+def preparar(caminho, n_produtos, com_triggers=True):
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    rnd = random.Random(7)
+    with db.transacao() as cur:
+        if not com_triggers:
+            for nome in ('inserir', 'entrar', 'sair', 'excluir'):
+                cur.execute(f"DROP TRIGGER trg_estoque_baixo_{nome}")
+        cur.executemany("INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) "
+                        "VALUES (?, 'Pomada', ?, 5, 10, 20)",
+                        [(f"Produto {i:06d}", 3 if rnd.random() < 0.001 else rnd.choice((6, 20, 50)))
+                         for i in range(n_produtos)])
+    return db
+
+
+def movimentar(db, n_produtos, n, semente):
+    rnd = random.Random(semente)
+    for _ in range(n):
+        delta = rnd.choice((-1, -2, 1, 3))
+        try:
+            nucleo.movimentar_estoque(db, rnd.randint(1, n_produtos), delta, "ENTRADA" if delta > 0 else "SAIDA")
+        except nucleo.EstoqueInsuficiente:
+            pass
+
+
+def main():
+    n_produtos = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = preparar(os.path.join(tmp, "com.db"), n_produtos)
+        sem = preparar(os.path.join(tmp, "sem.db"), n_produtos, com_triggers=False)
+        com_triggers = cronometrar(lambda: movimentar(db, n_produtos, n, 1), repeticoes=1)
+        sem_triggers = cronometrar(lambda: movimentar(sem, n_produtos, n, 1), repeticoes=1)
+        sem.fechar()
+
+        alertas = nucleo.contar_estoque_baixo(db)
+        contar_varredura = cronometrar(lambda: db.consultar_um("SELECT COUNT(*) FROM produtos WHERE quantidade < minimo"))
+        contar_tabela = cronometrar(lambda: nucleo.contar_estoque_baixo(db))
+        listar_varredura = cronometrar(lambda: db.consultar(
+            "SELECT id, nome, categoria, quantidade, minimo FROM produtos WHERE quantidade < minimo"))
+        listar_tabela = cronometrar(lambda: nucleo.listar_estoque_baixo(db))
+
+        print(f"{n_produtos} produtos, {alertas} abaixo do mínimo")
+        print(f"  contagem por varredura:   {contar_varredura:8.3f} ms")
+        print(f"  contagem em estoque_baixo:{contar_tabela:8.3f} ms")
+        print(f"  lista por varredura:      {listar_varredura:8.3f} ms")
+        print(f"  lista em estoque_baixo:   {listar_tabela:8.3f} ms")
+        print(f"{n} movimentações: {com_triggers / n * 1000:.1f} µs/op com triggers, "
+              f"{sem_triggers / n * 1000:.1f} µs/op sem")
+
+        esperado = [r[0] for r in db.consultar(VARREDURA)]
+        obtido = sorted(r[0] for r in nucleo.listar_estoque_baixo(db))
+        db.fechar()
+    assert obtido == esperado, "estoque_baixo diverge da varredura"
+    print("OK: estoque_baixo confere com a varredura do catálogo.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Benchmark: troca de filtro no Fechamento de Caixa com milhares de produtos.
+# Compara destruir e recriar o LabelFrame + Treeview com todas as linhas a cada carregar()
+# (antes) com a TabelaRelatorio persistente, paginada e atualizada por diferença (depois).
+# Os dados de cada filtro são consultados antes; só o custo de interface é medido.
+# Requer um display (Tk); uso: python benchmarks/bench_fechamento.py [n_produtos]
+import os
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import timedelta
+from tkinter import ttk
+
+from _dados import criar_base
+import nucleo
+from tabela_relatorio import TabelaRelatorio
+
+COLUNAS = ('Produto', 'Entradas', 'Saídas', 'Compras (R$)', 'Vendas (R$)', 'Lucro (R$)')
+
+
+def formatar(r):
+    return (r[1], r[2], r[3], f"R$ {r[4]:.2f}", f"R$ {r[5]:.2f}", f"R$ {r[6]:.2f}")
+
+
+def recriar(frame, produtos):
+    for widget in frame.winfo_children():
+        widget.destroy()
+    caixa = tk.LabelFrame(frame, text="Movimentação de Produtos")
+    caixa.pack(fill='both', expand=True)
+    tree = ttk.Treeview(caixa, columns=COLUNAS, show='headings', height=8)
+    for col in COLUNAS:
+        tree.heading(col, text=col)
+        tree.column(col, width=100, anchor='center')
+    for r in produtos:
+        tree.insert('', 'end', values=formatar(r))
+    tree.pack(fill='both', expand=True)
+
+
+def medir(root, funcao):
+    inicio = time.perf_counter()
+    funcao()
+    root.update_idletasks()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Sem display disponível ({e}); benchmark não executado.")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ultimo_dia = criar_base(os.path.join(tmp, "bench.db"), n_produtos=n, n_movimentacoes=200_000, n_servicos=1000)
+        servico = nucleo.ServicoLocal(db)
+        fim = ultimo_dia.isoformat()
+        filtros = [(ultimo_dia.isoformat(), fim), ((ultimo_dia - timedelta(days=1)).isoformat(),) * 2,
+                   (ultimo_dia.replace(day=1).isoformat(), fim), ((ultimo_dia - timedelta(days=30)).isoformat(), fim)]
+        dados = []
+        for ini, fim_f in filtros:
+            dados.append([(pid, nome, q_in, q_out, comp, vend, vend - comp)
+                          for pid, nome, q_in, q_out, comp, vend in servico.resumo_caixa(ini, fim_f)])
+        servico.fechar()
+
+    root.geometry("1000x700")
+    antes = tk.Frame(root)
+    antes.pack(side='left', fill='both', expand=True)
+    depois = tk.Frame(root)
+    depois.pack(side='left', fill='both', expand=True)
+    tree = ttk.Treeview(depois, columns=COLUNAS, show='headings', height=8)
+    for col in COLUNAS:
+        tree.heading(col, text=col)
+    controles = tk.Frame(depois)
+    controles.pack(side='bottom', fill='x')
+    tree.pack(fill='both', expand=True)
+    tabela = TabelaRelatorio(tree, formatar=formatar, controles=controles, ordem=[(lambda r, i=i: r[i]) for i in range(1, 7)])
+    root.update()
+
+    print(f"{n} produtos; troca entre {len(filtros)} filtros rápidos, 3 voltas")
+    print(f"{'filtro':<10} {'linhas':>7} {'recriar (ms)':>13} {'diferença (ms)':>15} {'itens Tk':>9}")
+    totais = [0.0, 0.0]
+    for volta in range(3):
+        for i, produtos in enumerate(dados):
+            t_antes = medir(root, lambda: recriar(antes, produtos))
+            t_depois = medir(root, lambda: tabela.definir_linhas(produtos))
+            totais[0] += t_antes
+            totais[1] += t_depois
+            if volta == 2:
+                print(f"{i:<10} {len(produtos):>7} {t_antes:>13.1f} {t_depois:>15.2f} {len(tree.get_children()):>9}")
+    t_ordenar = medir(root, lambda: tabela.ordenar(5))
+    print(f"ordenar por lucro: {t_ordenar:.2f} ms; total recriar {totais[0]:.0f} ms x diferença {totais[1]:.0f} ms")
+    assert len(tree.get_children()) <= tabela.por_pagina, "a página materializa mais linhas que o limite"
+    assert totais[1] < totais[0], "a atualização por diferença deveria custar menos que recriar"
+    root.destroy()
+    print("OK: troca de filtro sem recriar widgets, uma página de linhas no Treeview.")
+
+
+if __name__ == "__main__":
+    main()
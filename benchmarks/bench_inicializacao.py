@@ -0,0 +1,61 @@
+# Benchmark: partida a frio da CLI headless (estoque.py) contra o orçamento de tempo.
+# Mede a mediana de vários processos novos e confere que tkinter/PIL não são carregados.
+# Uso: python benchmarks/bench_inicializacao.py [orcamento_ms] [repeticoes]
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _dados import RAIZ, criar_base
+
+ORCAMENTO_MS = 200   # report completo, do exec do interpretador até a saída
+
+
+def cronometrar(comando, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    orcamento = float(sys.argv[1]) if len(sys.argv) > 1 else ORCAMENTO_MS
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "bench.db")
+        db, ultimo_dia = criar_base(caminho, n_movimentacoes=20_000, n_servicos=10_000)
+        db.fechar()
+        periodo = ["--from", ultimo_dia.replace(day=1).isoformat(), "--to", ultimo_dia.isoformat()]
+        cli = [sys.executable, os.path.join(RAIZ, "estoque.py"), "--db", caminho]
+
+        # Nenhum módulo de interface pode ser importado no caminho headless
+        verificacao = (
+            "import sys; import estoque; estoque.main(sys.argv[1:]); "
+            "carregados = [m for m in ('tkinter', '_tkinter', 'PIL') if m in sys.modules]; "
+            "assert not carregados, carregados"
+        )
+        subprocess.run([sys.executable, "-c", verificacao, "--db", caminho, "report"] + periodo,
+                       cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+
+        medicoes = [
+            ("python -c pass (interpretador)", [sys.executable, "-c", "pass"]),
+            ("import main1 (casca Tk)", [sys.executable, "-c", "import main1"]),
+            ("estoque --help", cli + ["--help"]),
+            ("estoque report (mês)", cli + ["report"] + periodo),
+        ]
+        resultados = {}
+        for rotulo, comando in medicoes:
+            resultados[rotulo] = cronometrar(comando, repeticoes)
+            print(f"{rotulo:<32} {resultados[rotulo]:>8.1f} ms")
+
+    report = resultados["estoque report (mês)"]
+    assert report <= orcamento, f"partida a frio de {report:.1f} ms acima do orçamento de {orcamento:.0f} ms"
+    print(f"OK: report em {report:.1f} ms (orçamento {orcamento:.0f} ms), sem tkinter/PIL.")
+
+
+if __name__ == "__main__":
+    main()
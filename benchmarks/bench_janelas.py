@@ -0,0 +1,118 @@
+# Benchmark: partida da interface até a primeira pintura e latência de abertura dos diálogos.
+# Cada repetição é um processo novo (main1 importado a frio) sobre uma base sintética; mede a
+# primeira pintura da janela principal, a primeira listagem, a montagem preguiçosa da aba
+# Serviços e, para cada diálogo, a primeira abertura (montagem) x as seguintes (reuso).
+# Confere também que o PIL não é importado na partida (o logo vem do cache em assets/cache).
+# Requer um display (Tk); uso: python benchmarks/bench_janelas.py [orcamento_ms] [repeticoes]
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _dados import RAIZ, criar_base
+
+ORCAMENTO_MS = 800      # do import de main1 até a janela principal pintada
+ABERTURAS = 5           # aberturas de cada diálogo por processo (a primeira monta)
+
+FILHO = r"""
+import json, sys, time
+inicio = time.perf_counter()
+import tkinter as tk
+import main1
+
+def ms(desde):
+    return (time.perf_counter() - desde) * 1000
+
+medidas = {'import': ms(inicio)}
+try:
+    app = main1.BarberShopApp()
+except tk.TclError as e:
+    print(json.dumps({'sem_display': str(e)}))
+    sys.exit(0)
+root = app.root
+while not root.winfo_viewable():
+    root.update()
+root.update()
+medidas['primeira_pintura'] = ms(inicio)
+while not app._produtos_cache:
+    root.update()
+    time.sleep(0.002)
+medidas['primeira_listagem'] = ms(inicio)
+medidas['pil_na_partida'] = 'PIL' in sys.modules
+
+marco = time.perf_counter()
+app.notebook.select(1)
+root.update()
+medidas['aba_servicos'] = ms(marco)
+app.notebook.select(0)
+
+valores = app._formatar_linha(0, app._produtos_cache[0])[0]
+dialogos = {
+    'cadastro': app.abrir_janela_cadastro,
+    'precos': lambda: app.janelas.abrir('precos', app._montar_janela_precos, valores),
+    'movimentacao': lambda: app.abrir_janela_movimentacao("ENTRADA", valores),
+    'fechamento': app.abrir_janela_fechamento_caixa,
+}
+for chave, abrir in dialogos.items():
+    tempos = []
+    for _ in range(ABERTURAS):
+        marco = time.perf_counter()
+        abrir()
+        root.update_idletasks()
+        tempos.append(ms(marco))
+        app.janelas.esconder(chave)
+        root.update()
+    medidas[chave] = (tempos[0], min(tempos[1:]))
+app.tarefas.encerrar()
+app.servico.fechar()
+root.destroy()
+print(json.dumps(medidas))
+""".replace("ABERTURAS", str(ABERTURAS))
+
+
+def rodar(pasta):
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ)
+    saida = subprocess.run([sys.executable, "-c", FILHO], cwd=pasta, env=ambiente, check=True,
+                           capture_output=True, text=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    orcamento = float(sys.argv[1]) if len(sys.argv) > 1 else ORCAMENTO_MS
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        # main1 abre estoque_barbearia.db no diretório atual
+        db, _ = criar_base(os.path.join(tmp, "estoque_barbearia.db"), n_produtos=5000,
+                           n_movimentacoes=50_000, n_servicos=20_000)
+        db.fechar()
+        execucoes = []
+        for _ in range(repeticoes):
+            medidas = rodar(tmp)
+            if 'sem_display' in medidas:
+                print(f"Sem display disponível ({medidas['sem_display']}); benchmark não executado.")
+                return
+            execucoes.append(medidas)
+
+    def mediana(chave, indice=None):
+        return statistics.median(m[chave] if indice is None else m[chave][indice] for m in execucoes)
+
+    print(f"{repeticoes} partidas a frio (mediana)")
+    for rotulo, chave in (("import main1", 'import'), ("primeira pintura", 'primeira_pintura'),
+                          ("primeira listagem", 'primeira_listagem'), ("aba Serviços (montagem)", 'aba_servicos')):
+        print(f"{rotulo:<26} {mediana(chave):>8.1f} ms")
+    print(f"{'diálogo':<26} {'montagem':>11} {'reuso':>11}")
+    for chave in ('cadastro', 'precos', 'movimentacao', 'fechamento'):
+        montagem, reuso = mediana(chave, 0), mediana(chave, 1)
+        print(f"{chave:<26} {montagem:>8.1f} ms {reuso:>8.1f} ms")
+        assert reuso < montagem, f"{chave}: reabrir ({reuso:.1f} ms) deveria custar menos que montar ({montagem:.1f} ms)"
+
+    assert not any(m['pil_na_partida'] for m in execucoes), "PIL importado na partida"
+    pintura = mediana('primeira_pintura')
+    assert pintura <= orcamento, f"primeira pintura em {pintura:.1f} ms, acima do orçamento de {orcamento:.0f} ms"
+    print(f"OK: primeira pintura em {pintura:.1f} ms (orçamento {orcamento:.0f} ms), diálogos reaproveitados, sem PIL.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Benchmark: custo da instrumentação (medicao) por comando SQL e por movimentação.
+# Roda o mesmo trabalho em processos com ESTOQUE_MEDICAO=0 e =1 (melhor de várias rodadas) e
+# confere que o log de consultas lentas recebe a consulta pesada e ignora as rápidas.
+# Uso: python benchmarks/bench_medicao.py [consultas]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from _dados import RAIZ, criar_base
+
+ORCAMENTO_US = 10.0     # custo extra máximo por comando SQL cronometrado
+LENTA_MS = 50           # a varredura pesada leva centenas de ms; 50 ms fica longe das pausas do sistema
+
+FILHO = r"""
+import json, sys, time
+import medicao, nucleo
+from database import Database
+caminho, n = sys.argv[1], int(sys.argv[2])
+db = Database(caminho, tamanho_pool=1)
+melhor_sql = melhor_mov = float('inf')
+for _ in range(5):
+    with db.leitor() as conn:
+        inicio = time.perf_counter()
+        for i in range(n):
+            conn.execute("SELECT quantidade FROM produtos WHERE id = ?", (1 + i % 500,)).fetchone()
+        melhor_sql = min(melhor_sql, (time.perf_counter() - inicio) / n * 1e6)
+    inicio = time.perf_counter()
+    for i in range(200):
+        nucleo.movimentar_estoque(db, 1 + i % 500, 1, "ENTRADA")
+    melhor_mov = min(melhor_mov, (time.perf_counter() - inicio) / 200 * 1e6)
+# Uma varredura pesada (para o log de lentas) e o resumo que o painel mostraria
+db.consultar("SELECT produto_id, SUM(quantidade) FROM movimentacoes GROUP BY produto_id")
+db.fechar()
+print(json.dumps({'sql_us': melhor_sql, 'mov_us': melhor_mov, 'operacoes': len(medicao.resumo()),
+                  'contadores': medicao.contadores()}))
+"""
+
+
+def rodar(caminho, n, ativo, log):
+    ambiente = dict(os.environ, PYTHONPATH=RAIZ, ESTOQUE_MEDICAO=ativo, ESTOQUE_LOG_LENTAS=log, ESTOQUE_LENTA_MS=str(LENTA_MS))
+    saida = subprocess.run([sys.executable, "-c", FILHO, caminho, str(n)], env=ambiente, check=True,
+                           capture_output=True, text=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "bench.db")
+        db, _ = criar_base(caminho, n_produtos=500, n_movimentacoes=300_000, n_servicos=1000)
+        db.fechar()
+        log = os.path.join(tmp, "lentas.log")
+        desligado = rodar(caminho, n, "0", log)
+        assert not os.path.exists(log), "com a medição desligada nada deveria ir para o log"
+        ligado = rodar(caminho, n, "1", log)
+        with open(log, encoding="utf-8") as arquivo:
+            lentas = arquivo.read().splitlines()
+
+    extra_sql = ligado['sql_us'] - desligado['sql_us']
+    print(f"{'':<28} {'desligada':>10} {'ligada':>10} {'extra':>9}")
+    print(f"{'SELECT por id (µs)':<28} {desligado['sql_us']:>10.2f} {ligado['sql_us']:>10.2f} {extra_sql:>9.2f}")
+    print(f"{'movimentação (µs)':<28} {desligado['mov_us']:>10.1f} {ligado['mov_us']:>10.1f} "
+          f"{ligado['mov_us'] - desligado['mov_us']:>9.1f}")
+    print(f"operações distintas: {ligado['operacoes']}; contadores: {ligado['contadores']}")
+    print(f"consultas lentas (≥ {LENTA_MS} ms) no log: {len(lentas)}")
+    assert desligado['operacoes'] == 0 and not desligado['contadores'], "ESTOQUE_MEDICAO=0 deveria não registrar nada"
+    assert any("GROUP BY produto_id" in linha for linha in lentas), "a varredura pesada deveria estar no log"
+    assert not any("WHERE id = ?" in linha for linha in lentas), "consultas por id não são lentas"
+    assert ligado['contadores'].get('commits', 0) >= 1000, "cada movimentação conta um commit"
+    assert extra_sql <= ORCAMENTO_US, f"{extra_sql:.2f} µs por comando, acima do orçamento de {ORCAMENTO_US} µs"
+    print(f"OK: {extra_sql:.2f} µs por comando SQL cronometrado (orçamento {ORCAMENTO_US:g} µs).")
+
+
+if __name__ == "__main__":
+    main()
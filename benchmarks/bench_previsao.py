@@ -0,0 +1,71 @@
+# Previsão de demanda: passada vetorizada no catálogo inteiro x um SELECT por produto, e o
+# custo da atualização incremental depois de uma venda. Confere que o consumo diário calculado
+# pelos dois caminhos é o mesmo.
+# Uso: python benchmarks/bench_previsao.py [n_produtos] [n_movimentacoes]
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+from _dados import criar_base
+from bench_relatorios import cronometrar
+import nucleo
+from previsao import PrevisaoDemanda, JANELA_DIAS, ALFA
+
+
+def consumo_por_produto(db, hoje):
+    """Caminho ingênuo: saídas diárias de cada produto com uma consulta por produto."""
+    inicio = hoje - timedelta(days=JANELA_DIAS)
+    pesos = [ALFA * (1 - ALFA) ** (JANELA_DIAS - 1 - i) for i in range(JANELA_DIAS)]
+    total = sum(pesos)
+    resultado = {}
+    for pid, *_ in nucleo.listar_produtos(db):
+        diario = [0.0] * JANELA_DIAS
+        for dia, qtd in db.consultar(
+                "SELECT substr(data_hora, 1, 10), SUM(quantidade) FROM movimentacoes "
+                "WHERE produto_id = ? AND tipo = 'SAIDA' AND data_hora >= ? AND data_hora < ? GROUP BY 1",
+                (pid, inicio.isoformat(), hoje.isoformat())):
+            diario[(date.fromisoformat(dia) - inicio).days] += qtd
+        resultado[pid] = sum(p * q for p, q in zip(pesos, diario)) / total
+    return resultado
+
+
+def main():
+    n_produtos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 300_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ultimo_dia = criar_base(os.path.join(tmp, "bench.db"), n_produtos=n_produtos, n_movimentacoes=n,
+                                    n_servicos=1000, dias=365)
+        hoje = ultimo_dia + timedelta(days=1)
+
+        previsao = PrevisaoDemanda(db)
+        carga = cronometrar(lambda: previsao.base.sincronizar(), repeticoes=1)
+        completa = cronometrar(lambda: (setattr(previsao, '_dia', None), previsao.atualizar(hoje)))
+        sem_novidade = cronometrar(lambda: previsao.atualizar(hoje))
+        pid = next(p for p in previsao.previsoes if previsao.previsoes[p][2] > 0)
+
+        def vender():
+            nucleo.movimentar_estoque(db, pid, -0.01, "SAIDA")
+            previsao.atualizar(hoje)
+        incremental = cronometrar(vender)
+        ingenuo = cronometrar(lambda: consumo_por_produto(db, hoje), repeticoes=1)
+
+        print(f"{n_produtos} produtos, {n} movimentações")
+        print(f"  carga das colunas (uma vez):           {carga:9.2f} ms")
+        print(f"  previsão do catálogo inteiro (NumPy):  {completa:9.2f} ms")
+        print(f"  atualização sem movimentações novas:   {sem_novidade:9.2f} ms")
+        print(f"  atualização após uma venda:            {incremental:9.2f} ms")
+        print(f"  um SELECT por produto (só o consumo):  {ingenuo:9.2f} ms")
+        print(f"  produtos com sugestão de compra: {len(previsao.lista_de_compras())}")
+
+        previsao._dia = None
+        calculado = {p: v[4] for p, v in previsao.atualizar(hoje).items()}
+        esperado = consumo_por_produto(db, hoje)
+        divergentes = [p for p in esperado if abs(esperado[p] - calculado[p]) > 1e-9]
+        db.fechar()
+    assert not divergentes, f"consumo diverge do cálculo por produto: {divergentes[:10]}"
+    print("OK: consumo vetorizado confere com o cálculo produto a produto.")
+
+
+if __name__ == "__main__":
+    main()
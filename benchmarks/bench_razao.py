@@ -0,0 +1,99 @@
+# Estoque numa data passada: fotografia mais próxima + lançamentos desde ela x somar o razão
+# inteiro até a data. Mede também a fotografia diária e a reconciliação do razão com o cadastro,
+# e confere que os dois caminhos dão o mesmo saldo em instantes sorteados.
+# Uso: python benchmarks/bench_razao.py [n_produtos] [lancamentos_por_dia] [dias]
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from bench_relatorios import cronometrar  # noqa: E402
+from database import Database  # noqa: E402
+import nucleo  # noqa: E402
+import razao  # noqa: E402
+
+REPLAY = "SELECT produto_id, SUM(delta) FROM razao_estoque WHERE data_hora <= ?{} GROUP BY produto_id"
+
+
+def preparar(caminho, n_produtos, por_dia, dias):
+    """Razão sintético com uma fotografia ao fim de cada dia, como a aplicação faz."""
+    rnd = random.Random(3)
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    with db.transacao() as cur:
+        cur.executemany("INSERT INTO produtos (nome, categoria, quantidade, minimo) VALUES (?, 'Pomada', 0, 5)",
+                        [(f"Produto {i:06d}",) for i in range(n_produtos)])
+    inicio = datetime(2024, 1, 1)
+    for d in range(dias):
+        dia = inicio + timedelta(days=d)
+        segundos = sorted(rnd.randrange(8 * 3600, 20 * 3600) for _ in range(por_dia))
+        with db.transacao() as cur:
+            cur.executemany(
+                "INSERT INTO razao_estoque (produto_id, data_hora, delta, origem) VALUES (?, ?, ?, 'movimento')",
+                [(rnd.randint(1, n_produtos), (dia + timedelta(seconds=s)).strftime("%Y-%m-%d %H:%M:%S"),
+                  rnd.choice((-1, 1, 2, 3))) for s in segundos])
+        snapshot_id = razao.tirar_snapshot(db)
+        with db.transacao() as cur:
+            cur.execute("UPDATE estoque_snapshots SET tirado_em = ? WHERE id = ?",
+                        ((dia + timedelta(hours=23)).strftime("%Y-%m-%d %H:%M:%S"), snapshot_id))
+    # O cadastro recebe o saldo final sem gerar lançamentos (trigger suspenso só na carga)
+    gatilho = db.consultar_um("SELECT sql FROM sqlite_master WHERE name = 'trg_razao_movimento'")[0]
+    with db.transacao() as cur:
+        cur.execute("DROP TRIGGER trg_razao_movimento")
+        cur.execute("UPDATE produtos SET quantidade = "
+                    "COALESCE((SELECT SUM(delta) FROM razao_estoque WHERE produto_id = produtos.id), 0)")
+        cur.execute(gatilho)
+    return db, inicio
+
+
+def main():
+    n_produtos = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    por_dia = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    dias = int(sys.argv[3]) if len(sys.argv) > 3 else 365
+    rnd = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        db, inicio = preparar(os.path.join(tmp, "bench.db"), n_produtos, por_dia, dias)
+        instantes = [(inicio + timedelta(days=rnd.randrange(dias), seconds=rnd.randrange(86400)))
+                     .strftime("%Y-%m-%d %H:%M:%S") for _ in range(20)]
+
+        def consultar(funcao):
+            return lambda: [funcao(instante) for instante in instantes]
+        com_snapshot = cronometrar(consultar(lambda i: razao.estoque_em(db, i)), repeticoes=2) / len(instantes)
+        replay = cronometrar(consultar(lambda i: db.consultar(REPLAY.format(""), (i,))), repeticoes=2) / len(instantes)
+        um_snapshot = cronometrar(consultar(lambda i: razao.estoque_em(db, i, 7))) / len(instantes)
+        um_replay = cronometrar(consultar(lambda i: db.consultar(REPLAY.format(" AND produto_id = ?"), (i, 7)))) \
+            / len(instantes)
+        reconciliar = cronometrar(lambda: razao.reconciliar(db), repeticoes=3)
+        sem_divergencia = not razao.reconciliar(db)
+        with db.transacao() as cur:
+            cur.executemany(
+                "INSERT INTO razao_estoque (produto_id, data_hora, delta, origem) VALUES (?, ?, 1, 'movimento')",
+                [(rnd.randint(1, n_produtos), "2099-01-01 00:00:00") for _ in range(por_dia)])
+        fotografia = cronometrar(lambda: razao.tirar_snapshot(db), repeticoes=1)
+
+        print(f"{n_produtos} produtos, {por_dia * dias} lançamentos em {dias} dias, uma fotografia por dia")
+        print("Estoque do catálogo num instante passado:")
+        print(f"  fotografia + lançamentos desde ela: {com_snapshot:9.2f} ms")
+        print(f"  soma do razão inteiro até a data:   {replay:9.2f} ms")
+        print("Estoque de um produto num instante passado:")
+        print(f"  fotografia + lançamentos desde ela: {um_snapshot:9.2f} ms")
+        print(f"  soma do razão inteiro até a data:   {um_replay:9.2f} ms")
+        print(f"Fotografia de um dia ({por_dia} lançamentos): {fotografia:.2f} ms")
+        print(f"Reconciliação do razão com o cadastro:  {reconciliar:.2f} ms")
+
+        divergentes = []
+        for instante in instantes:
+            esperado = dict(db.consultar(REPLAY.format(""), (instante,)))
+            obtido = razao.estoque_em(db, instante)
+            if esperado.keys() != obtido.keys() or any(abs(esperado[p] - obtido[p]) > 1e-9 for p in esperado):
+                divergentes.append(instante)
+        db.fechar()
+    assert not divergentes, f"estoque_em diverge da soma do razão em {divergentes}"
+    assert sem_divergencia, "reconciliação acusou divergência numa base coerente"
+    print("OK: fotografias + lançamentos conferem com a soma do razão inteiro.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Benchmark dos relatórios de Fechamento de Caixa e verificação dos planos de consulta.
+# Uso: python benchmarks/bench_relatorios.py [n_movimentacoes]
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from _dados import criar_base
+import nucleo
+
+# Filtro antigo, com a coluna dentro de datetime() (não sargável)
+CAIXA_ANTES = """
+    SELECT p.id, p.nome,
+           SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade ELSE 0 END),
+           SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade ELSE 0 END),
+           SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade*m.preco_unitario ELSE 0 END),
+           SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade*m.preco_unitario ELSE 0 END)
+    FROM produtos p
+    LEFT JOIN movimentacoes m ON m.produto_id = p.id
+    WHERE datetime(m.data_hora) BETWEEN datetime(?) AND datetime(?)
+    GROUP BY p.id, p.nome
+    ORDER BY p.nome
+"""
+
+
+def cronometrar(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def capturar_sql(db, funcao):
+    """Executa funcao registrando o SQL (com parâmetros expandidos) enviado ao leitor do pool."""
+    capturadas = []
+    with db.leitor() as conn:
+        conn.set_trace_callback(capturadas.append)
+    try:
+        funcao()
+    finally:
+        with db.leitor() as conn:
+            conn.set_trace_callback(None)
+    return [sql for sql in capturadas if sql.lstrip().upper().startswith("SELECT")]
+
+
+def verificar_plano(db, funcao, indices):
+    # A busca das partições do período (esquemas_do_periodo) não é o relatório em si
+    for sql in capturar_sql(db, funcao):
+        if "FROM particoes" in sql:
+            continue
+        plano = db.plano(sql)
+        print("   plano:", " | ".join(plano))
+        for indice in indices:
+            assert any(indice in linha for linha in plano), f"índice {indice} não utilizado"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ultimo_dia = criar_base(os.path.join(tmp, "bench.db"), n_movimentacoes=n, n_servicos=n // 2)
+        ini = (ultimo_dia - timedelta(days=30)).strftime("%Y-%m-%d")
+        fim = ultimo_dia.strftime("%Y-%m-%d")
+        params = (ini + " 00:00:00", fim + " 23:59:59")
+
+        # Período com início e fim no meio do dia: dias inteiros pelos resumos, bordas pelas tabelas brutas
+        ini_parcial, fim_parcial = ini + " 12:00:00", fim + " 18:00:00"
+
+        antes = cronometrar(lambda: db.consultar(CAIXA_ANTES, params))
+        caixa = cronometrar(lambda: nucleo.resumo_caixa(db, ini, fim))
+        caixa_parcial = cronometrar(lambda: nucleo.resumo_caixa(db, ini_parcial, fim_parcial))
+        servicos = cronometrar(lambda: nucleo.resumo_servicos(db, ini, fim))
+        print(f"Últimos 30 dias sobre {n} movimentações:")
+        print(f"  caixa (datetime() na coluna):   {antes:8.2f} ms")
+        print(f"  caixa (resumos diários):        {caixa:8.2f} ms")
+        print(f"  caixa (resumos + dias parciais):{caixa_parcial:8.2f} ms")
+        print(f"  serviços (resumos diários):     {servicos:8.2f} ms")
+
+        verificar_plano(db, lambda: nucleo.resumo_caixa(db, ini_parcial, fim_parcial),
+                        ("resumo_diario_produtos USING PRIMARY KEY", "idx_mov_data_produto_tipo"))
+        verificar_plano(db, lambda: nucleo.resumo_caixa(db, ini_parcial, fim_parcial, produto_id=1),
+                        ("idx_resumo_produto_dia", "idx_mov_produto_data"))
+        verificar_plano(db, lambda: nucleo.resumo_servicos(db, ini_parcial, fim_parcial),
+                        ("resumo_diario_servicos USING PRIMARY KEY", "idx_servicos_data_barbeiro"))
+        db.fechar()
+
+
+if __name__ == "__main__":
+    main()
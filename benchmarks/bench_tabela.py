@@ -0,0 +1,75 @@
+# Benchmark: tempo de refresh da tabela de Estoque com 1k, 10k e 100k produtos.
+# Compara a reconstrução completa do Treeview (antes) com a TabelaVirtual (depois).
+# Requer um display (Tk); uso: python benchmarks/bench_tabela.py
+import os
+import random
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from tabela_virtual import TabelaVirtual  # noqa: E402
+
+COLUNAS = ('ID', 'Produto', 'Categoria', 'Qtd. Atual', 'Qtd. Mínima', 'Preço Custo', 'Preço Venda')
+
+
+def gerar(n):
+    rnd = random.Random(n)
+    return [(i, f"Produto {i}", rnd.choice(("Pomada", "Shampoo")), rnd.randint(0, 50), rnd.randint(0, 10),
+             10.0, 20.0) for i in range(1, n + 1)]
+
+
+def formatar(idx, registro):
+    (idp, nome, categoria, quantidade, minimo, preco_custo, preco_venda) = registro
+    tags = ['alerta'] if quantidade < minimo else []
+    tags.append('odd' if idx % 2 == 1 else 'even')
+    nome = ("⚠️ " + nome) if quantidade < minimo else nome
+    return (idp, nome.upper(), categoria.upper(), quantidade, minimo, preco_custo, preco_venda), tuple(tags)
+
+
+def refresh_completo(tree, linhas):
+    for i in tree.get_children():
+        tree.delete(i)
+    for idx, registro in enumerate(linhas):
+        valores, tags = formatar(idx, registro)
+        tree.insert('', 'end', values=valores, tags=tags)
+
+
+def medir(root, funcao):
+    inicio = time.perf_counter()
+    funcao()
+    root.update_idletasks()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Sem display disponível ({e}); benchmark não executado.")
+        return
+    root.geometry("1000x700")
+    frame = tk.Frame(root)
+    frame.pack(fill='both', expand=True)
+    tree_antes = ttk.Treeview(frame, columns=COLUNAS, show='headings')
+    tree_antes.pack(side='left', fill='both', expand=True)
+    tree_virtual = ttk.Treeview(frame, columns=COLUNAS, show='headings')
+    tree_virtual.pack(side='left', fill='both', expand=True)
+    barra = ttk.Scrollbar(frame, orient='vertical')
+    barra.pack(side='right', fill='y')
+    tabela = TabelaVirtual(tree_virtual, barra, formatar)
+    root.update()
+
+    print(f"{'produtos':>10} {'completo (ms)':>15} {'virtual (ms)':>14} {'itens Tk':>9}")
+    for n in (1_000, 10_000, 100_000):
+        linhas = gerar(n)
+        antes = medir(root, lambda: refresh_completo(tree_antes, linhas))
+        depois = medir(root, lambda: tabela.definir_linhas(linhas))
+        print(f"{n:>10} {antes:>15.1f} {depois:>14.2f} {len(tree_virtual.get_children()):>9}")
+        refresh_completo(tree_antes, [])
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
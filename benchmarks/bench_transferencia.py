@@ -0,0 +1,92 @@
+# Benchmark: vazão (linhas/s) da exportação e importação em streaming, CSV e JSON.
+# Exporta uma base sintética, reimporta numa base vazia, confere contagens e resumos diários,
+# mede o pico de memória da exportação e simula uma importação interrompida e retomada.
+# Uso: python benchmarks/bench_transferencia.py [n_movimentacoes]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _dados import criar_base
+from database import Database
+import nucleo
+import transferencia
+
+ORDEM = ("produtos", "movimentacoes", "servicos")
+
+
+class Interrompido(Exception):
+    pass
+
+
+def resumo(db):
+    # Arredonda os valores: a ordem das somas de ponto flutuante difere entre importação e reconstrução
+    return ([(dia, pid, round(qe, 6), round(qs, 6), round(ve, 4), round(vs, 4)) for dia, pid, qe, qs, ve, vs in
+             db.consultar("SELECT * FROM resumo_diario_produtos ORDER BY dia, produto_id")],
+            # ids do catálogo podem diferir entre os bancos: compara pelos nomes
+            [(dia, s, b, q, round(t, 4)) for dia, s, b, q, t in
+             db.consultar("SELECT r.dia, c.nome, b.nome, r.quantidade, r.total FROM resumo_diario_servicos r "
+                          "JOIN servicos_catalogo c ON c.id = r.servico_id JOIN barbeiros b ON b.id = r.barbeiro_id "
+                          "ORDER BY r.dia, c.nome, b.nome")])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    with tempfile.TemporaryDirectory() as tmp:
+        origem, _ = criar_base(os.path.join(tmp, "origem.db"), n_movimentacoes=n, n_servicos=n // 2)
+        totais = {t: origem.consultar_um(f"SELECT COUNT(*) FROM {t}")[0] for t in ORDEM}
+        print(f"base: {totais}")
+        print(f"{'formato':<8} {'tabela':<14} {'exportação (linhas/s)':>22} {'importação (linhas/s)':>22}")
+        for formato in ("csv", "json"):
+            destino = Database(os.path.join(tmp, f"destino_{formato}.db"))
+            nucleo.preparar_banco(destino)
+            for tabela in ORDEM:
+                arquivo = os.path.join(tmp, f"{tabela}.{formato}")
+                inicio = time.perf_counter()
+                exportadas = transferencia.exportar(origem, tabela, arquivo)
+                t_exp = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                resultado = transferencia.importar(destino, tabela, arquivo)
+                t_imp = time.perf_counter() - inicio
+                assert exportadas == totais[tabela] == resultado['importados'], (tabela, exportadas, resultado)
+                assert resultado['rejeitados'] == 0, resultado['erros'][:5]
+                print(f"{formato:<8} {tabela:<14} {exportadas / t_exp:>22,.0f} {exportadas / t_imp:>22,.0f}")
+            assert resumo(destino) == resumo(origem), "resumos diários divergentes após a importação"
+            destino.fechar()
+
+        # Memória da exportação: o pico não deve crescer com o número de linhas
+        arquivo = os.path.join(tmp, "mov_mem.json")
+        tracemalloc.start()
+        transferencia.exportar(origem, "movimentacoes", arquivo)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"pico de memória exportando {totais['movimentacoes']} movimentações: {pico / 1024:.0f} KiB")
+
+        # Retomada: interrompe depois de 3 lotes confirmados e importa de novo o mesmo arquivo
+        destino = Database(os.path.join(tmp, "destino_retomada.db"))
+        nucleo.preparar_banco(destino)
+        transferencia.importar(destino, "produtos", os.path.join(tmp, "produtos.csv"))
+        arquivo = os.path.join(tmp, "movimentacoes.csv")
+
+        def interromper(registros):
+            if registros >= 3 * transferencia.TAMANHO_LOTE:
+                raise Interrompido()
+        try:
+            transferencia.importar(destino, "movimentacoes", arquivo, ao_progresso=interromper)
+        except Interrompido:
+            pass
+        parcial = destino.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0]
+        resultado = transferencia.importar(destino, "movimentacoes", arquivo)
+        final = destino.consultar_um("SELECT COUNT(*) FROM movimentacoes")[0]
+        assert final == totais["movimentacoes"], (final, totais["movimentacoes"])
+        assert resultado['retomado_de'] == parcial
+        print(f"retomada: {parcial} linhas antes da interrupção, continuou do registro "
+              f"{resultado['retomado_de']}, total {final} sem duplicatas")
+        destino.fechar()
+        origem.fechar()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Teste de carga do servidor local: vários caixas concorrentes contra um servidor em localhost.
+# Cada caixa (processo) usa o ClienteAPI do app com uma mistura de saídas/entradas, serviços e
+# releituras de produtos; ao final reporta p50/p99 por operação, vazão, tamanho médio dos lotes
+# de commit e confere que saldo == histórico (nenhuma atualização perdida).
+# Uso: python benchmarks/carga_servidor.py [caixas] [operacoes_por_caixa]
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+
+from _dados import RAIZ
+from database import Database
+import nucleo
+from cliente import ClienteAPI
+
+N_PRODUTOS = 50
+QTD_INICIAL = 1000
+
+
+def caixa(args):
+    url, n, semente = args
+    rnd = random.Random(semente)
+    api = ClienteAPI(url)
+    latencias = defaultdict(list)
+    negadas = 0
+    for _ in range(n):
+        sorteio = rnd.random()
+        inicio = time.perf_counter()
+        if sorteio < 0.6:
+            operacao = "movimentar"
+            delta = rnd.choice((-1, -2, 3))
+            try:
+                api.movimentar(rnd.randint(1, N_PRODUTOS), delta, "ENTRADA" if delta > 0 else "SAIDA")
+            except nucleo.EstoqueInsuficiente:
+                negadas += 1
+        elif sorteio < 0.85:
+            operacao = "servico"
+            api.registrar_servico(rnd.choice(("Corte", "Barba")), rnd.choice((30, 40)), f"Barbeiro {semente % 3}")
+        else:
+            operacao = "listar"
+            api.listar_produtos([rnd.randint(1, N_PRODUTOS) for _ in range(3)])
+        latencias[operacao].append((time.perf_counter() - inicio) * 1000)
+    api.fechar()
+    return dict(latencias), negadas
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def preparar(caminho):
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    with db.transacao() as cur:
+        cur.executemany("INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) "
+                        "VALUES (?, 'Pomada', ?, 5, 10, 20)",
+                        [(f"Produto {i}", QTD_INICIAL) for i in range(N_PRODUTOS)])
+    db.fechar()
+
+
+def iniciar_servidor(caminho):
+    processo = subprocess.Popen([sys.executable, os.path.join(RAIZ, "servidor.py"), "--db", caminho, "--porta", "0"],
+                                cwd=RAIZ, stdout=subprocess.PIPE, text=True)
+    linha = processo.stdout.readline()   # "Servidor do estoque em http://host:porta (...)"
+    return processo, linha.split()[4]
+
+
+def main():
+    caixas = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "servidor.db")
+        preparar(caminho)
+        processo, url = iniciar_servidor(caminho)
+        try:
+            inicio = time.perf_counter()
+            with Pool(caixas) as pool:
+                resultados = pool.map(caixa, [(url, n, semente) for semente in range(caixas)])
+            duracao = time.perf_counter() - inicio
+            saude = ClienteAPI(url).requisitar("GET", "/saude")
+        finally:
+            processo.terminate()
+            processo.wait()
+
+        por_operacao = defaultdict(list)
+        for latencias, _ in resultados:
+            for operacao, valores in latencias.items():
+                por_operacao[operacao].extend(valores)
+        todas = [v for valores in por_operacao.values() for v in valores]
+        print(f"{caixas} caixas x {n} operações em {duracao:.2f}s ({len(todas) / duracao:.0f} req/s)")
+        print(f"{'operação':<12} {'n':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'média':>8}")
+        for operacao, valores in sorted(por_operacao.items()) + [("todas", todas)]:
+            print(f"{operacao:<12} {len(valores):>7} {percentil(valores, 50):>9.2f} {percentil(valores, 99):>9.2f} "
+                  f"{statistics.mean(valores):>8.2f}")
+        print(f"escritas: {saude['operacoes']} em {saude['lotes']} commits "
+              f"({saude['operacoes'] / max(1, saude['lotes']):.1f} operações por commit); "
+              f"negadas por estoque: {sum(r[1] for r in resultados)}")
+
+        with sqlite3.connect(caminho) as conn:
+            divergentes = conn.execute("""
+                SELECT p.id FROM produtos p LEFT JOIN movimentacoes m ON m.produto_id = p.id
+                GROUP BY p.id
+                HAVING ABS(p.quantidade - (? + COALESCE(SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade
+                                                             ELSE -m.quantidade END), 0))) > 1e-9
+            """, (QTD_INICIAL,)).fetchall()
+    assert not divergentes, f"saldo divergente do histórico: {divergentes}"
+    print("OK: saldo de todos os produtos confere com o histórico.")
+
+
+if __name__ == "__main__":
+    main()
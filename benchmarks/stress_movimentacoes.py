@@ -0,0 +1,111 @@
+# Teste de estresse multiprocesso do motor de movimentações.
+# Vários "caixas" (processos) movimentam os mesmos produtos no mesmo arquivo; ao final verifica
+# que não houve atualização perdida (saldo == inicial + entradas - saídas) e mede commits/s.
+# Uso: python benchmarks/stress_movimentacoes.py [processos] [movimentacoes_por_processo]
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import Database  # noqa: E402
+import nucleo  # noqa: E402
+
+N_PRODUTOS = 5
+QTD_INICIAL = 50
+
+
+def caixa_atomico(args):
+    caminho, n, semente = args
+    rnd = random.Random(semente)
+    db = Database(caminho, tamanho_pool=1)
+    ok = negadas = 0
+    try:
+        for _ in range(n):
+            delta = rnd.choice((1, -1, -2, 3))
+            try:
+                nucleo.movimentar_estoque(db, rnd.randint(1, N_PRODUTOS), delta, "ENTRADA" if delta > 0 else "SAIDA")
+                ok += 1
+            except nucleo.EstoqueInsuficiente:
+                negadas += 1
+    finally:
+        db.fechar()
+    return ok, negadas
+
+
+def caixa_antigo(args):
+    # Padrão anterior: lê a quantidade, grava o novo valor e a movimentação em conexões separadas
+    caminho, n, semente = args
+    rnd = random.Random(semente)
+    ok = negadas = 0
+    for _ in range(n):
+        delta = rnd.choice((1, -1, -2, 3))
+        pid = rnd.randint(1, N_PRODUTOS)
+        with sqlite3.connect(caminho, timeout=30) as conn:
+            atual = conn.execute("SELECT quantidade FROM produtos WHERE id=?", (pid,)).fetchone()[0]
+        if atual + delta < 0:
+            negadas += 1
+            continue
+        with sqlite3.connect(caminho, timeout=30) as conn:
+            conn.execute("UPDATE produtos SET quantidade = ? WHERE id = ?", (atual + delta, pid))
+        with sqlite3.connect(caminho, timeout=30) as conn:
+            conn.execute("INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) "
+                         "VALUES (?, ?, ?, 0, datetime('now'))", (pid, "ENTRADA" if delta > 0 else "SAIDA", abs(delta)))
+        ok += 1
+    return ok, negadas
+
+
+def preparar(caminho):
+    db = Database(caminho)
+    nucleo.preparar_banco(db)
+    with db.transacao() as cur:
+        cur.executemany("INSERT INTO produtos (nome, categoria, quantidade, minimo) VALUES (?, 'Pomada', ?, 5)",
+                        [(f"Produto {i}", QTD_INICIAL) for i in range(N_PRODUTOS)])
+    db.fechar()
+
+
+def verificar(caminho):
+    with sqlite3.connect(caminho) as conn:
+        divergentes = conn.execute("""
+            SELECT p.id, p.quantidade,
+                   ? + COALESCE(SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade ELSE -m.quantidade END), 0)
+            FROM produtos p LEFT JOIN movimentacoes m ON m.produto_id = p.id
+            GROUP BY p.id
+        """, (QTD_INICIAL,)).fetchall()
+        movimentos = conn.execute("SELECT COUNT(*) FROM movimentacoes").fetchone()[0]
+    perdidas = [(pid, saldo, ledger) for pid, saldo, ledger in divergentes if abs(saldo - ledger) > 1e-9]
+    negativos = [pid for pid, saldo, _ in divergentes if saldo < 0]
+    return perdidas, negativos, movimentos
+
+
+def rodar(rotulo, funcao, processos, n):
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "stress.db")
+        preparar(caminho)
+        inicio = time.perf_counter()
+        with Pool(processos) as pool:
+            resultados = pool.map(funcao, [(caminho, n, semente) for semente in range(processos)])
+        duracao = time.perf_counter() - inicio
+        ok = sum(r[0] for r in resultados)
+        perdidas, negativos, movimentos = verificar(caminho)
+    print(f"{rotulo}: {ok} movimentações em {duracao:.2f}s ({ok / duracao:.0f} commits/s); "
+          f"linhas em movimentacoes={movimentos}; produtos divergentes={len(perdidas)}; negativos={len(negativos)}")
+    return perdidas, negativos, ok, movimentos
+
+
+def main():
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rodar("antigo (ler-depois-gravar)", caixa_antigo, processos, n)
+    perdidas, negativos, ok, movimentos = rodar("atômico (UPDATE ... RETURNING)", caixa_atomico, processos, n)
+    assert not perdidas, f"atualizações perdidas: {perdidas}"
+    assert not negativos, f"estoque negativo: {negativos}"
+    assert ok == movimentos, "toda movimentação confirmada deve ter sua linha em movimentacoes"
+    print("OK: nenhuma atualização perdida no motor atômico.")
+
+
+if __name__ == "__main__":
+    main()
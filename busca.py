@@ -0,0 +1,114 @@
+# Índice de busca de produtos
+# Nomes pré-normalizados (sem acentos, casefold) e índice de trigramas mantido incrementalmente.
+import unicodedata
+from collections import Counter, defaultdict
+
+
+def normalizar(texto):
+    """Remove acentos e normaliza caixa: 'Pómada' -> 'pomada'."""
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold().strip()
+
+
+def trigramas(texto, bordas=False):
+    """Trigramas do texto; com `bordas`, inclui marcadores de início/fim (melhora a busca aproximada)."""
+    if bordas:
+        texto = "  " + texto + " "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+    """Busca por prefixo/substring via trigramas, com filtro de categoria e tolerância a erros de digitação.
+
+    Termos com menos de 3 caracteres recaem em varredura dos nomes já normalizados.
+    """
+
+    def __init__(self, similaridade_minima=0.5):
+        self.similaridade_minima = similaridade_minima
+        self._nomes = {}                     # id -> nome normalizado
+        self._categorias = {}                # id -> categoria normalizada
+        self._por_categoria = defaultdict(set)
+        self._trigramas = defaultdict(set)   # trigrama -> ids
+
+    def __len__(self):
+        return len(self._nomes)
+
+    # ===== Manutenção =====
+    def reconstruir(self, registros):
+        """registros: iterável de (id, nome, categoria, ...)."""
+        self._nomes.clear()
+        self._categorias.clear()
+        self._por_categoria.clear()
+        self._trigramas.clear()
+        for registro in registros:
+            self.adicionar(registro[0], registro[1], registro[2])
+
+    def adicionar(self, pid, nome, categoria):
+        nome_n = normalizar(nome)
+        categoria_n = normalizar(categoria)
+        self._nomes[pid] = nome_n
+        self._categorias[pid] = categoria_n
+        self._por_categoria[categoria_n].add(pid)
+        for tri in trigramas(nome_n, bordas=True):
+            self._trigramas[tri].add(pid)
+
+    def remover(self, pid):
+        nome_n = self._nomes.pop(pid, None)
+        if nome_n is None:
+            return
+        categoria_n = self._categorias.pop(pid)
+        self._por_categoria[categoria_n].discard(pid)
+        if not self._por_categoria[categoria_n]:
+            del self._por_categoria[categoria_n]
+        for tri in trigramas(nome_n, bordas=True):
+            ids = self._trigramas.get(tri)
+            if ids is not None:
+                ids.discard(pid)
+                if not ids:
+                    del self._trigramas[tri]
+
+    def atualizar(self, pid, nome, categoria):
+        if self._nomes.get(pid) == normalizar(nome) and self._categorias.get(pid) == normalizar(categoria):
+            return
+        self.remover(pid)
+        self.adicionar(pid, nome, categoria)
+
+    def categorias(self):
+        return sorted(self._por_categoria)
+
+    # ===== Consulta =====
+    def buscar(self, termo, categoria=None, tolerante=True):
+        """Retorna o conjunto de ids cujo nome contém o termo (e da categoria, se informada).
+        Sem resultados exatos, e com `tolerante`, devolve nomes com trigramas suficientemente parecidos."""
+        termo_n = normalizar(termo)
+        universo = None
+        if categoria:
+            universo = self._por_categoria.get(normalizar(categoria), set())
+        if not termo_n:
+            return set(self._nomes) if universo is None else set(universo)
+
+        if len(termo_n) < 3:
+            base = self._nomes if universo is None else universo
+            return {pid for pid in base if termo_n in self._nomes[pid]}
+
+        grams = sorted(trigramas(termo_n), key=lambda t: len(self._trigramas.get(t, ())))
+        candidatos = set(self._trigramas.get(grams[0], ()))
+        for tri in grams[1:]:
+            if not candidatos:
+                break
+            candidatos &= self._trigramas.get(tri, set())
+        if universo is not None:
+            candidatos &= universo
+        encontrados = {pid for pid in candidatos if termo_n in self._nomes[pid]}
+        if encontrados or not tolerante or len(termo_n) < 4:
+            return encontrados
+        return self._buscar_aproximado(trigramas(termo_n, bordas=True), universo)
+
+    def _buscar_aproximado(self, grams, universo):
+        # Conta quantos trigramas do termo cada nome possui; um erro de digitação afeta no máximo 3
+        contagem = Counter()
+        for tri in grams:
+            contagem.update(self._trigramas.get(tri, ()))
+        minimo = max(1, int(len(grams) * self.similaridade_minima))
+        return {pid for pid, n in contagem.items()
+                if n >= minimo and (universo is None or pid in universo)}
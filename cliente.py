@@ -0,0 +1,148 @@
+# Cliente do servidor local (servidor.py) para o modo caixa do app Tk
+# Mesma interface de nucleo.ServicoLocal; erros do servidor voltam como as exceções do núcleo.
+import http.client
+import json
+import threading
+from urllib.parse import urlencode, urlsplit
+
+import medicao
+from nucleo import ErroValidacao, EstoqueInsuficiente, ProdutoNaoEncontrado
+
+
+class ErroServidor(Exception):
+    """Falha de comunicação ou erro interno do servidor."""
+
+
+class ClienteAPI:
+    """Fala HTTP/JSON com o servidor. Uma conexão keep-alive por thread (os workers do app
+    chamam em paralelo)."""
+
+    remoto = True
+
+    def __init__(self, url, timeout=10):
+        partes = urlsplit(url if "://" in url else "http://" + url)
+        self.url = f"{partes.scheme}://{partes.netloc}"
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+        self._recarregar_catalogo = False
+
+    def _conexao(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+        return conn
+
+    def requisitar(self, metodo, caminho, corpo=None, params=None):
+        if params:
+            caminho += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        dados = None if corpo is None else json.dumps(corpo).encode("utf-8")
+        cabecalhos = {"Content-Type": "application/json"} if dados is not None else {}
+        with medicao.medir(f"api: {metodo} {caminho.split('?')[0]}"):
+            status, conteudo = self._enviar(metodo, caminho, dados, cabecalhos)
+        resultado = json.loads(conteudo) if conteudo else {}
+        if status < 400:
+            return resultado
+        erro = resultado.get("erro")
+        if erro == "validacao":
+            raise ErroValidacao(resultado.get("mensagem"), resultado.get("titulo", "Erro de Validação"))
+        if erro == "estoque_insuficiente":
+            raise EstoqueInsuficiente(resultado.get("detalhe"))
+        if erro == "produto_nao_encontrado":
+            raise ProdutoNaoEncontrado(resultado.get("detalhe"))
+        raise ErroServidor(resultado.get("mensagem") or f"HTTP {status}")
+
+    def _enviar(self, metodo, caminho, dados, cabecalhos):
+        while True:
+            conn = self._conexao()
+            reutilizada = conn.sock is not None
+            try:
+                conn.request(metodo, caminho, body=dados, headers=cabecalhos)
+                resposta = conn.getresponse()
+                return resposta.status, resposta.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                self._local.conn = None
+                # Conexão keep-alive antiga derrubada (ex.: servidor reiniciado): reenvia uma vez.
+                # Escritas só são reenviadas se o servidor não chegou a recebê-las.
+                seguro = metodo == "GET" or isinstance(e, (http.client.RemoteDisconnected, BrokenPipeError))
+                if not (reutilizada and seguro):
+                    raise ErroServidor(f"Servidor indisponível em {self.url}: {e}") from e
+
+    # ===== Interface de nucleo.ServicoLocal =====
+    def listar_produtos(self, ids=None):
+        params = None if ids is None else {"ids": ",".join(str(int(i)) for i in ids)}
+        return [tuple(r) for r in self.requisitar("GET", "/produtos", params=params)["produtos"]]
+
+    def listar_estoque_baixo(self):
+        return [tuple(r) for r in self.requisitar("GET", "/estoque-baixo")["produtos"]]
+
+    def contar_estoque_baixo(self):
+        return self.requisitar("GET", "/estoque-baixo", params={"contar": 1})["total"]
+
+    def cadastrar_produto(self, nome, categoria, quantidade, minimo):
+        return self.requisitar("POST", "/produtos", {"nome": nome, "categoria": categoria,
+                                                     "quantidade": quantidade, "minimo": minimo})["id"]
+
+    def excluir_produto(self, produto_id):
+        self.requisitar("DELETE", f"/produtos/{int(produto_id)}")
+
+    def definir_precos(self, produto_id, preco_custo, preco_venda):
+        self.requisitar("PUT", f"/produtos/{int(produto_id)}/precos",
+                        {"preco_custo": preco_custo, "preco_venda": preco_venda})
+
+    def movimentar(self, produto_id, delta, tipo_mov=None):
+        return tuple(self.requisitar("POST", "/movimentacoes",
+                                     {"produto_id": produto_id, "delta": delta, "tipo": tipo_mov})["resultado"])
+
+    def movimentar_lote(self, itens, tipo_mov):
+        resposta = self.requisitar("POST", "/movimentacoes", {"itens": [list(i) for i in itens], "tipo": tipo_mov})
+        return resposta["ids"], [tuple(b) for b in resposta["baixos"]]
+
+    def registrar_servico(self, servico, valor, barbeiro):
+        return self.requisitar("POST", "/servicos", {"servico": servico, "valor": valor, "barbeiro": barbeiro})["id"]
+
+    def catalogo(self):
+        params = {"recarregar": 1} if self._recarregar_catalogo else None
+        self._recarregar_catalogo = False
+        resposta = self.requisitar("GET", "/catalogo", params=params)
+        return {"servicos": [tuple(s) for s in resposta["servicos"]],
+                "barbeiros": [tuple(b) for b in resposta["barbeiros"]]}
+
+    def recarregar_catalogo(self):
+        self._recarregar_catalogo = True
+
+    def definir_servico(self, nome, preco, ativo=True):
+        return self.requisitar("PUT", "/catalogo/servicos", {"nome": nome, "preco": preco, "ativo": ativo})["id"]
+
+    def definir_barbeiro(self, nome, ativo=True):
+        return self.requisitar("PUT", "/catalogo/barbeiros", {"nome": nome, "ativo": ativo})["id"]
+
+    def desativar_servico(self, nome):
+        self.requisitar("POST", "/catalogo/servicos/desativar", {"nome": nome})
+
+    def desativar_barbeiro(self, nome):
+        self.requisitar("POST", "/catalogo/barbeiros/desativar", {"nome": nome})
+
+    def resumo_caixa(self, periodo_inicio=None, periodo_fim=None, produto_id=None):
+        params = {"inicio": periodo_inicio, "fim": periodo_fim, "produto_id": produto_id}
+        return [tuple(r) for r in self.requisitar("GET", "/resumo/caixa", params=params)["linhas"]]
+
+    def resumo_servicos(self, periodo_inicio=None, periodo_fim=None):
+        resposta = self.requisitar("GET", "/resumo/servicos", params={"inicio": periodo_inicio, "fim": periodo_fim})
+        return [tuple(r) for r in resposta["linhas"]], resposta["total"]
+
+    def desempenho_barbeiros(self, periodo_inicio, periodo_fim, comparar=True):
+        relatorio = self.requisitar("GET", "/desempenho", params={
+            "inicio": periodo_inicio, "fim": periodo_fim, "comparar": int(comparar)})
+        for chave in ('linhas', 'servicos', 'barbeiros'):
+            relatorio[chave] = [tuple(r) for r in relatorio[chave]]
+        if relatorio['anterior']:
+            relatorio['anterior']['barbeiros'] = [tuple(r) for r in relatorio['anterior']['barbeiros']]
+        return relatorio
+
+    def fechar(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
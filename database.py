@@ -0,0 +1,250 @@
+# Camada de acesso a dados - Barbearia
+# Conexão SQLite persistente e configurada, com pool de leitores para consultas em segundo plano.
+import os
+import sqlite3
+import threading
+import time
+import queue
+from contextlib import contextmanager
+
+import medicao
+
+# UPDATE ... RETURNING (movimentações atômicas) chegou no 3.35; UPSERT e funções de janela são anteriores
+SQLITE_MINIMO = (3, 35, 0)
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cronometra cada execute/executemany (até a primeira linha) como um span `sql: ...` e os
+    fetch* como `sql: ... (leitura)`. Iterar o cursor diretamente não é cronometrado."""
+
+    _sql = None
+
+    def execute(self, sql, parametros=()):
+        self._sql = sql
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            medicao.registrar(medicao.operacao_sql(sql), (time.perf_counter() - inicio) * 1000, sql)
+
+    def executemany(self, sql, parametros):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            medicao.registrar(medicao.operacao_sql(sql), (time.perf_counter() - inicio) * 1000, sql)
+
+    def _ler(self, leitura, *args):
+        inicio = time.perf_counter()
+        try:
+            return leitura(*args)
+        finally:
+            if self._sql is not None:
+                medicao.registrar(medicao.operacao_sql(self._sql, True), (time.perf_counter() - inicio) * 1000, self._sql)
+
+    def fetchone(self):
+        return self._ler(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._ler(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._ler(super().fetchall)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são CursorMedido."""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+class Database:
+    """Ponto único de acesso ao SQLite.
+
+    Mantém uma conexão de escrita de longa duração (protegida por lock) e um pequeno
+    pool de conexões somente-leitura, todas com WAL e cache de statements preparados.
+    Com a medição ligada (medicao.ATIVO), cada SQL, transação e abertura de conexão vira um span.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",      # seguro com WAL, evita fsync a cada commit
+        "PRAGMA cache_size=-20000",       # ~20 MB de cache de páginas
+        "PRAGMA mmap_size=268435456",     # 256 MB mapeados em memória
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA foreign_keys=ON",         # servicos -> servicos_catalogo/barbeiros, movimentacoes -> produtos
+    )
+
+    def __init__(self, caminho, tamanho_pool=4, cached_statements=256):
+        if sqlite3.sqlite_version_info < SQLITE_MINIMO:
+            # Sem isto o primeiro RETURNING falharia só ao movimentar estoque, com um erro de sintaxe
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} é antigo demais: o sistema precisa do "
+                f"{'.'.join(map(str, SQLITE_MINIMO))} ou mais novo (atualize o Python ou a biblioteca sqlite3).")
+        self.caminho = caminho
+        self.tamanho_pool = tamanho_pool
+        self.cached_statements = cached_statements
+        self._lock = threading.RLock()
+        self._conn = self._abrir()
+        self._pool = queue.LifoQueue()
+        self._leitores_criados = 0
+        self._pool_lock = threading.Lock()
+
+    def _abrir(self, somente_leitura=False):
+        # isolation_level=None: transações controladas explicitamente em transacao()
+        with medicao.medir('db.abrir_conexao'):
+            conn = sqlite3.connect(self.caminho, isolation_level=None, check_same_thread=False,
+                                   cached_statements=self.cached_statements,
+                                   factory=ConexaoMedida if medicao.ATIVO else sqlite3.Connection)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            if somente_leitura:
+                conn.execute("PRAGMA query_only=ON")
+        medicao.contar('conexões abertas')
+        return conn
+
+    # ===== Escrita =====
+    @contextmanager
+    def transacao(self):
+        """Abre BEGIN IMMEDIATE na conexão de escrita e entrega um cursor.
+        Faz COMMIT ao sair normalmente e ROLLBACK se houver exceção."""
+        with medicao.medir('db.transacao'), self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                medicao.contar('rollbacks')
+                raise
+            else:
+                try:
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    # COMMIT recusado (SQLITE_BUSY) deixa a transação aberta: sem o ROLLBACK o
+                    # próximo BEGIN falharia para sempre nesta conexão
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                    medicao.contar('rollbacks')
+                    raise
+                medicao.contar('commits')
+            finally:
+                cursor.close()
+
+    def migrar(self, migracoes):
+        """Aplica, em ordem, as migrações com versão maior que PRAGMA user_version.
+        Cada migração é (versao, passos); um passo é SQL ou uma função que recebe o cursor."""
+        with self.transacao() as cursor:
+            atual = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for versao, passos in migracoes:
+                if versao <= atual:
+                    continue
+                for passo in passos:
+                    if callable(passo):
+                        passo(cursor)
+                    else:
+                        cursor.execute(passo)
+                cursor.execute(f"PRAGMA user_version = {int(versao)}")
+                atual = versao
+        return atual
+
+    def execute(self, query, params=()):
+        with self.transacao() as cursor:
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+    # ===== Leitura =====
+    # Leituras usam o pool: podem rodar em workers sem disputar o lock do escritor
+    def consultar(self, query, params=()):
+        with medicao.medir('db.consultar'), self.leitor() as conn:
+            linhas = conn.execute(query, params).fetchall()
+        medicao.contar('linhas lidas', len(linhas))
+        return linhas
+
+    def consultar_um(self, query, params=()):
+        with medicao.medir('db.consultar'), self.leitor() as conn:
+            return conn.execute(query, params).fetchone()
+
+    def plano(self, query, params=()):
+        """Retorna as linhas de EXPLAIN QUERY PLAN (diagnóstico de uso de índices)."""
+        with self._lock:
+            return [linha[-1] for linha in self._conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+
+    @contextmanager
+    def leitor(self):
+        """Empresta uma conexão somente-leitura do pool (uso em threads de fundo).
+        Com WAL, leitores não bloqueiam nem são bloqueados pelo escritor."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if self._leitores_criados < self.tamanho_pool:
+                    self._leitores_criados += 1
+                    conn = self._abrir(somente_leitura=True)
+            if conn is None:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # ===== Bancos anexados =====
+    # Partições de arquivo (arquivo.py) são bancos SQLite à parte, anexados sob demanda
+    LIMITE_ANEXOS = 8     # o SQLite aceita no máximo 10 bancos anexados por conexão
+
+    def anexar(self, conn, anexos):
+        """Deixa anexados a `conn` os bancos {alias: caminho} pedidos. Anexos de consultas
+        anteriores ficam na conexão como cache e só saem para abrir espaço."""
+        presentes = [linha[1] for linha in conn.execute("PRAGMA database_list") if linha[1] not in ('main', 'temp')]
+        faltam = [alias for alias in anexos if alias not in presentes]
+        excesso = len(presentes) + len(faltam) - self.LIMITE_ANEXOS
+        for alias in [a for a in presentes if a not in anexos][:max(excesso, 0)]:
+            conn.execute(f"DETACH DATABASE {alias}")
+        for alias in faltam:
+            if not os.path.exists(anexos[alias]):
+                raise FileNotFoundError(f"Partição de arquivo ausente: {anexos[alias]}")
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (anexos[alias],))
+
+    @contextmanager
+    def escritor_anexado(self, caminho, alias):
+        """Anexa `caminho` à conexão de escrita durante o bloco (ATTACH não pode ocorrer dentro
+        de uma transação). Segura o lock do escritor até o DETACH. O anexo grava com
+        synchronous=FULL: partições recebem dados que em seguida saem do banco principal."""
+        with self._lock:
+            self._conn.execute(f"ATTACH DATABASE ? AS {alias}", (caminho,))
+            self._conn.execute(f"PRAGMA {alias}.synchronous=FULL")
+            try:
+                yield
+            finally:
+                self._conn.execute(f"DETACH DATABASE {alias}")
+
+    # ===== Manutenção =====
+    def vacuum(self):
+        """Reescreve o arquivo devolvendo as páginas livres ao sistema e trunca o WAL."""
+        with self._lock:
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def analisar(self):
+        """Atualiza as estatísticas usadas pelo planejador de consultas."""
+        with self._lock:
+            self._conn.execute("ANALYZE")
+
+    # ===== Encerramento =====
+    def fechar(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._conn.close()
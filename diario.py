@@ -0,0 +1,285 @@
+# Diário de escrita (write-behind) com group commit
+# Serviços e movimentações entram num buffer em memória e são gravados em grupo: a cada
+# `intervalo_ms` ou `max_eventos`, o grupo vai para um log append-only (um fsync) e em
+# seguida para o SQLite numa única transação. O log garante que nada confirmado se perde:
+# ao reabrir, eventos com seq acima do checkpoint gravado no banco são reaplicados. Se a
+# transação falhar (banco travado, disco cheio), o grupo é tentado de novo com espera crescente;
+# nenhum grupo posterior passa na frente, então o checkpoint nunca pula um evento não aplicado.
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime
+
+import medicao
+import nucleo
+
+ESPERA_INICIAL = 0.05   # s entre tentativas de aplicar um grupo que falhou (dobra a cada falha)
+ESPERA_MAXIMA = 2.0
+
+
+class _Lote:
+    """Eventos que serão gravados juntos. Os futuros são do grupo (criar dois por evento
+    custaria mais do que gravar o próprio evento)."""
+
+    def __init__(self):
+        self.eventos = []
+        self.duravel = Future()    # resolve após o fsync do log
+        self.aplicado = Future()   # resolve com [(ok, valor)] após o COMMIT
+
+
+class Recibo:
+    """Acompanha um evento: `duravel` resolve quando o evento está no log (fsync) e
+    `resultado()` espera o COMMIT e devolve o retorno da operação (ou levanta a recusa)."""
+
+    __slots__ = ('seq', '_lote', '_posicao')
+
+    def __init__(self, seq, lote, posicao):
+        self.seq = seq
+        self._lote = lote
+        self._posicao = posicao
+
+    @property
+    def duravel(self):
+        return self._lote.duravel
+
+    def resultado(self, timeout=None):
+        ok, valor = self._lote.aplicado.result(timeout)[self._posicao]
+        if not ok:
+            raise valor
+        return valor
+
+
+class DiarioEscrita:
+    """Group commit de serviços e movimentações.
+
+    A validação acontece na chamada (erros voltam na hora). Movimentações são checadas
+    contra o saldo do banco somado aos deltas ainda pendentes no diário, então uma saída
+    aceita aqui não deixa o estoque negativo quando o grupo for aplicado. Se outro processo
+    gravar no mesmo banco e a movimentação for recusada na aplicação, `recibo.resultado()`
+    levanta EstoqueInsuficiente e `ao_rejeitar(evento, exc)` é chamado.
+    """
+
+    def __init__(self, db, caminho_log, intervalo_ms=50, max_eventos=500, ao_aplicar=None, ao_rejeitar=None):
+        self.db = db
+        self.caminho_log = caminho_log
+        self.intervalo = intervalo_ms / 1000
+        self.max_eventos = max_eventos
+        self.ao_aplicar = ao_aplicar
+        self.ao_rejeitar = ao_rejeitar
+        self.grupos = 0
+        self.eventos = 0
+        self.falhas = 0                       # transações de grupo que falharam (e foram repetidas)
+        self.ultimo_erro = None
+        self._nome = os.path.basename(caminho_log)
+        self._cond = threading.Condition()
+        self._lotes = deque()                 # lotes aguardando gravação; só o último recebe eventos
+        self._pendentes = defaultdict(float)  # produto_id -> soma dos deltas ainda não aplicados
+        self._saldo_lock = threading.Lock()   # leitura de saldo x COMMIT do grupo
+        self._fechando = False
+        self._suspenso = False                # grupo não aplicado ao fechar: o resto fica só no log
+        self._seq = self._recuperar()
+        self._log = open(caminho_log, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._laco, name='diario', daemon=True)
+        self._thread.start()
+
+    # ===== Entrada de eventos =====
+    def registrar_servico(self, servico, valor, barbeiro):
+        try:
+            valor = float(valor)
+        except (TypeError, ValueError):
+            raise nucleo.ErroValidacao("Valor deve ser um número válido.", "Erro")
+        if valor <= 0:
+            raise nucleo.ErroValidacao("O valor deve ser maior que zero.", "Erro")
+        return self._enfileirar({'tipo': 'servico', 'servico': servico, 'valor': valor, 'barbeiro': barbeiro})
+
+    def movimentar(self, produto_id, delta, tipo_mov=None):
+        """Retorna (recibo, (produto_id, nome, quantidade_prevista, minimo))."""
+        delta = float(delta)
+        with self._saldo_lock:
+            linha = self.db.consultar_um("SELECT nome, quantidade, minimo FROM produtos WHERE id = ? AND excluido_em IS NULL", (produto_id,))
+            if linha is None:
+                raise nucleo.ProdutoNaoEncontrado(produto_id)
+            nome, quantidade, minimo = linha
+            prevista = quantidade + self._pendentes[produto_id] + delta
+            if prevista < 0:
+                raise nucleo.EstoqueInsuficiente(produto_id)
+            self._pendentes[produto_id] += delta
+            recibo = self._enfileirar({'tipo': 'movimentacao', 'produto_id': produto_id,
+                                       'delta': delta, 'tipo_mov': tipo_mov})
+        return recibo, (produto_id, nome, prevista, minimo)
+
+    def _enfileirar(self, evento):
+        with self._cond:
+            if self._fechando:
+                raise RuntimeError("Diário encerrado.")
+            self._seq += 1
+            evento['seq'] = self._seq
+            evento['data_hora'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if not self._lotes or len(self._lotes[-1].eventos) >= self.max_eventos:
+                self._lotes.append(_Lote())
+                self._cond.notify()   # lote novo: acorda o laço (primeiro evento ou lote anterior cheio)
+            lote = self._lotes[-1]
+            lote.eventos.append(evento)
+            if len(lote.eventos) == self.max_eventos:
+                self._cond.notify()   # lote cheio: grava sem esperar o intervalo
+        return Recibo(self._seq, lote, len(lote.eventos) - 1)
+
+    def descarregar(self, timeout=None):
+        """Espera até que todos os eventos aceitos até agora estejam aplicados no banco."""
+        with self._cond:
+            ultimo = self._lotes[-1] if self._lotes else None
+            self._cond.notify()
+        if ultimo is not None:
+            ultimo.aplicado.result(timeout)
+
+    def fechar(self):
+        with self._cond:
+            self._fechando = True
+            self._cond.notify()
+        self._thread.join()
+        self._log.close()
+
+    # ===== Gravação em grupo =====
+    def _laco(self):
+        while True:
+            with self._cond:
+                while not self._lotes and not self._fechando:
+                    self._cond.wait()
+                if not self._lotes and self._fechando:
+                    return
+                # Junta eventos até o intervalo vencer ou o lote encher
+                limite = time.monotonic() + self.intervalo
+                while (len(self._lotes) == 1 and len(self._lotes[0].eventos) < self.max_eventos
+                       and not self._fechando):
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+                lote = self._lotes.popleft()
+            self._gravar_grupo(lote)
+
+    def _gravar_grupo(self, lote):
+        eventos = lote.eventos
+        # 1) Log append-only: um write + um fsync para o grupo inteiro
+        try:
+            self._log.write("".join(json.dumps(evento, ensure_ascii=False) + "\n" for evento in eventos))
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        except OSError as e:
+            with self._saldo_lock:
+                self._desfazer_pendentes(eventos)
+            lote.duravel.set_exception(e)
+            lote.aplicado.set_exception(e)
+            return
+        lote.duravel.set_result(eventos[-1]['seq'])
+        # 2) Banco: uma transação por grupo, repetida até confirmar
+        resultados = self._aplicar_grupo(eventos)
+        if resultados is None:
+            # Fechando com o banco indisponível: os eventos ficam no log (acima do checkpoint) e
+            # são reaplicados na próxima abertura; os pendentes continuam valendo até lá
+            lote.aplicado.set_exception(self.ultimo_erro or RuntimeError("Diário encerrado antes da aplicação."))
+            return
+        self.grupos += 1
+        self.eventos += len(eventos)
+        lote.aplicado.set_result(resultados)
+        alterados = set()
+        for evento, (ok, valor) in zip(eventos, resultados):
+            if ok:
+                if evento['tipo'] == 'movimentacao':
+                    alterados.add(evento['produto_id'])
+            elif self.ao_rejeitar:
+                self.ao_rejeitar(evento, valor)
+        if self.ao_aplicar and alterados:
+            self.ao_aplicar(alterados)
+        self._compactar()
+
+    def _aplicar_grupo(self, eventos):
+        """Aplica o grupo numa transação (um savepoint por evento, checkpoint junto) e devolve
+        [(ok, valor)]. Se a transação falhar, espera e tenta de novo: o grupo seguinte não pode
+        ser aplicado antes deste, ou o checkpoint passaria por cima dele. Retorna None se o
+        diário for fechado (ou já estiver suspenso) sem conseguir aplicar."""
+        espera = ESPERA_INICIAL
+        while not self._suspenso:
+            # Leituras de saldo seguem durante a transação (o WAL não mostra o que ainda não foi
+            # confirmado); o lock cobre só o COMMIT e a baixa dos pendentes, que precisam ser vistos juntos.
+            travado = False
+            try:
+                with self.db.transacao() as cursor:
+                    resultados = nucleo.aplicar_isolado(cursor, [_operacao(evento) for evento in eventos])
+                    _salvar_checkpoint(cursor, self._nome, eventos[-1]['seq'])
+                    self._saldo_lock.acquire()
+                    travado = True
+                # Aplicados ou recusados em definitivo: saem dos pendentes só agora
+                self._desfazer_pendentes(eventos)
+                return resultados
+            except Exception as e:
+                self.falhas += 1
+                self.ultimo_erro = e
+                medicao.contar('diario: falhas de commit')
+            finally:
+                if travado:
+                    self._saldo_lock.release()
+            with self._cond:
+                if self._fechando:
+                    self._suspenso = True
+                    break
+                self._cond.wait(espera)     # fechar() acorda antes do prazo
+            espera = min(espera * 2, ESPERA_MAXIMA)
+        return None
+
+    def _desfazer_pendentes(self, eventos):
+        for evento in eventos:
+            if evento['tipo'] == 'movimentacao':
+                pid = evento['produto_id']
+                self._pendentes[pid] -= evento['delta']
+                if abs(self._pendentes[pid]) < 1e-9:
+                    del self._pendentes[pid]
+
+    def _compactar(self, limite_bytes=1 << 20):
+        # Tudo o que está no log já foi aplicado (checkpoint no banco): pode recomeçar vazio
+        with self._cond:
+            if self._lotes or self._suspenso or self._log.tell() < limite_bytes:
+                return
+            self._log.truncate(0)
+            self._log.seek(0)
+
+    # ===== Recuperação =====
+    def _recuperar(self):
+        """Reaplica eventos do log posteriores ao checkpoint. Retorna o último seq conhecido."""
+        linha = self.db.consultar_um("SELECT seq FROM diario_checkpoint WHERE diario = ?", (self._nome,))
+        checkpoint = linha[0] if linha else 0
+        pendentes = []
+        ultimo = checkpoint
+        if os.path.exists(self.caminho_log):
+            with open(self.caminho_log, encoding='utf-8') as log:
+                for texto in log:
+                    if not texto.endswith("\n"):
+                        break   # escrita interrompida antes do fsync: nunca foi confirmada
+                    evento = json.loads(texto)
+                    ultimo = max(ultimo, evento['seq'])
+                    if evento['seq'] > checkpoint:
+                        pendentes.append(evento)
+        if pendentes:
+            with self.db.transacao() as cursor:
+                for (ok, valor), evento in zip(nucleo.aplicar_isolado(cursor, [_operacao(e) for e in pendentes]), pendentes):
+                    if not ok and self.ao_rejeitar:
+                        self.ao_rejeitar(evento, valor)
+                _salvar_checkpoint(cursor, self._nome, pendentes[-1]['seq'])
+        self.recuperados = len(pendentes)
+        return ultimo
+
+
+def _operacao(evento):
+    if evento['tipo'] == 'servico':
+        return lambda cur: nucleo._inserir_servico(cur, evento['servico'], evento['valor'], evento['barbeiro'],
+                                                   evento['data_hora'])
+    return lambda cur: nucleo._movimentar(cur, evento['produto_id'], evento['delta'], evento['tipo_mov'],
+                                          evento['data_hora'])
+
+
+def _salvar_checkpoint(cursor, nome, seq):
+    cursor.execute("INSERT INTO diario_checkpoint (diario, seq) VALUES (?, ?) "
+                   "ON CONFLICT (diario) DO UPDATE SET seq = excluded.seq", (nome, seq))
@@ -0,0 +1,428 @@
+# Linha de comando da barbearia (sem interface gráfica)
+# Usa apenas o núcleo de domínio: nunca carrega tkinter/PIL. Módulos pesados são
+# importados dentro de cada comando, para a partida a frio ficar curta.
+# Uso: python estoque.py [--db arquivo] [--medir] report|desempenho|move|import|export|rebuild|analise|repor|
+#      snapshot|estoque-em|reconciliar|arquivar|manutencao|backup|restaurar|catalogo|barbeiros ...
+import argparse
+import os
+import sys
+from datetime import date
+
+from database import Database
+import medicao
+import nucleo
+
+
+def _formatar_moeda(valor):
+    return f"R$ {valor:.2f}"
+
+
+def cmd_report(db, args):
+    inicio = args.inicio or date.today().isoformat()
+    fim = args.fim or inicio
+    relatorio = nucleo.fechamento(db, inicio, fim)
+    if args.json:
+        import json
+        print(json.dumps(relatorio, ensure_ascii=False, indent=2))
+        return 0
+    print(f"Fechamento de caixa: {inicio} a {fim}")
+    print(f"\n{'Produto':<32} {'Entradas':>9} {'Saídas':>9} {'Compras':>13} {'Vendas':>13} {'Lucro':>13}")
+    for _, nome, q_in, q_out, compra, venda in relatorio['produtos']:
+        print(f"{nome[:32]:<32} {q_in:>9g} {q_out:>9g} {_formatar_moeda(compra):>13} "
+              f"{_formatar_moeda(venda):>13} {_formatar_moeda(venda - compra):>13}")
+    print(f"\n{'Serviço':<20} {'Barbeiro':<16} {'Qtd':>6} {'Total':>13}")
+    for servico, _, _, barbeiro, qtd, total in relatorio['servicos']:
+        print(f"{servico[:20]:<20} {barbeiro[:16]:<16} {qtd:>6} {_formatar_moeda(total):>13}")
+    print(f"\nTotal em Serviços: {_formatar_moeda(relatorio['total_servicos'])}")
+    print(f"Total em Produtos: {_formatar_moeda(relatorio['total_produtos'])}")
+    print(f"Total Geral: {_formatar_moeda(relatorio['total_geral'])}")
+    return 0
+
+
+def _formatar_variacao(variacao):
+    return "—" if variacao is None else f"{variacao:+.0%}"
+
+
+def cmd_desempenho(db, args):
+    inicio = args.inicio or date.today().replace(day=1).isoformat()
+    fim = args.fim or date.today().isoformat()
+    relatorio = nucleo.desempenho_barbeiros(db, inicio, fim, comparar=not args.sem_comparar)
+    if args.json:
+        import json
+        print(json.dumps(relatorio, ensure_ascii=False, indent=2))
+        return 0
+    print(f"Desempenho: {relatorio['inicio']} a {relatorio['fim']}")
+    if relatorio['anterior']:
+        print(f"Comparado com: {relatorio['anterior']['inicio']} a {relatorio['anterior']['fim']}")
+    print(f"\n{'Barbeiro':<20} {'Atend.':>7} {'Total':>13} {'Ticket':>11} {'Horas':>6} {'Serv./h':>8} {'vs ant.':>8}")
+    for barbeiro, atendimentos, total, ticket, horas, por_hora, variacao in relatorio['barbeiros']:
+        print(f"{barbeiro[:20]:<20} {atendimentos:>7} {_formatar_moeda(total):>13} {_formatar_moeda(ticket):>11} "
+              f"{horas:>6} {por_hora:>8.2f} {_formatar_variacao(variacao):>8}")
+    print(f"\n{'Serviço':<20} {'Qtd':>7} {'Total':>13} {'Ticket':>11}")
+    for servico, quantidade, total, ticket in relatorio['servicos']:
+        print(f"{servico[:20]:<20} {quantidade:>7} {_formatar_moeda(total):>13} {_formatar_moeda(ticket):>11}")
+    geral = relatorio['geral']
+    print(f"\nAtendimentos: {geral['atendimentos']}  Total: {_formatar_moeda(geral['total'])} "
+          f"({_formatar_variacao(geral['variacao'])} vs anterior)  Ticket médio: {_formatar_moeda(geral['ticket_medio'])}  "
+          f"Serviços/hora: {geral['servicos_por_hora']:.2f}")
+    return 0
+
+
+def cmd_move(db, args):
+    tipo = "ENTRADA" if args.tipo == "entrada" else "SAIDA"
+    if args.lote:
+        itens = nucleo.ler_itens_csv(args.lote)
+        resultado = nucleo.resultado_lote(*nucleo.movimentar_em_lote(db, itens, tipo), len(itens))
+    else:
+        if args.produto_id is None or args.quantidade is None:
+            raise nucleo.ErroValidacao("Informe PRODUTO_ID e QUANTIDADE, ou --lote arquivo.csv.")
+        quantidade = nucleo.validar_delta(args.quantidade)
+        if quantidade <= 0:
+            raise nucleo.ErroValidacao("Quantidade deve ser maior que zero.")
+        delta = quantidade if tipo == "ENTRADA" else -quantidade
+        resultado = nucleo.resultado_movimentacao(nucleo.movimentar_estoque(db, args.produto_id, delta, tipo))
+    print(resultado['mensagem'])
+    for _, nome, qtd, minimo in resultado['alertas']:
+        print(f"ALERTA: {nome} abaixo do mínimo ({qtd:g} < {minimo})", file=sys.stderr)
+    return 0
+
+
+def cmd_import(db, args):
+    import transferencia
+    resultado = transferencia.importar(db, args.tabela, args.arquivo, args.formato, args.lote,
+                                       args.reiniciar, args.rejeitados)
+    if resultado['retomado_de']:
+        print(f"Retomado a partir do registro {resultado['retomado_de']}.")
+    print(f"{resultado['importados']} importados, {resultado['rejeitados']} rejeitados "
+          f"de {resultado['registros']} registros.")
+    for posicao, motivo in resultado['erros'][:20]:
+        print(f"  {posicao}: {motivo}", file=sys.stderr)
+    return 0
+
+
+def cmd_export(db, args):
+    import transferencia
+    total = transferencia.exportar(db, args.tabela, args.arquivo, args.formato, args.lote)
+    print(f"{total} linhas de {args.tabela} exportadas para {args.arquivo}.")
+    return 0
+
+
+def cmd_rebuild(db, args):
+    with db.transacao() as cursor:
+        nucleo.reconstruir_resumos(cursor)
+    print("Resumos diários reconstruídos a partir do histórico.")
+    return 0
+
+
+def cmd_analise(db, args):
+    import analitico
+    base = analitico.BaseAnalitica(db)
+    base.sincronizar()
+    if args.relatorio == 'lucro':
+        linhas = base.lucro_por_produto(args.inicio, args.fim, args.por or 'mes')
+        nomes = {r[0]: r[1] for r in nucleo.listar_produtos(db, {r[1] for r in linhas})}
+        linhas = [(periodo, nomes.get(pid, f"#{pid} (excluído)"), *valores) for periodo, pid, *valores in linhas]
+        cabecalho = ('periodo', 'produto', 'qtd_entrada', 'qtd_saida', 'total_compra', 'total_venda', 'lucro')
+    elif args.relatorio == 'barbeiros':
+        linhas = base.desempenho_barbeiros(args.inicio, args.fim, args.por or 'trimestre')
+        cabecalho = ('periodo', 'barbeiro', 'atendimentos', 'total', 'ticket_medio', 'posicao')
+    else:
+        dias, valores = base.serie_diaria(args.fonte, args.inicio, args.fim)
+        medias = analitico.janela_movel(valores, args.janela)
+        linhas = list(zip(dias.astype(str).tolist(), valores.tolist(), medias.tolist()))
+        cabecalho = ('dia', args.fonte, f'media_{args.janela}d')
+    if args.json:
+        import json
+        print(json.dumps([dict(zip(cabecalho, linha)) for linha in linhas], ensure_ascii=False, indent=2))
+        return 0
+    print("  ".join(f"{c:>14}" for c in cabecalho))
+    for linha in linhas:
+        print("  ".join(f"{v:>14.2f}" if isinstance(v, float) else f"{str(v)[:14]:>14}" for v in linha))
+    return 0
+
+
+def cmd_repor(db, args):
+    import previsao
+    prev = previsao.PrevisaoDemanda(db, prazo_entrega=args.prazo, cobertura=args.cobertura)
+    prev.atualizar()
+    lista = prev.lista_de_compras()
+    if args.json:
+        import json
+        campos = ('produto_id', 'nome', 'quantidade', 'minimo', 'consumo_diario', 'dias_ate_ruptura', 'sugestao')
+        print(json.dumps([dict(zip(campos, p)) for p in lista], ensure_ascii=False, indent=2))
+        return 0
+    print(f"Sugestão de compra (entrega em {args.prazo} dias, cobertura de {args.cobertura} dias)")
+    print(f"\n{'Produto':<32} {'Atual':>7} {'Mínimo':>7} {'Consumo/dia':>12} {'Acaba em':>9} {'Comprar':>8}")
+    for _, nome, quantidade, minimo, consumo, dias, sugestao in lista:
+        acaba = "-" if dias is None else f"{dias} d"
+        print(f"{nome[:32]:<32} {quantidade:>7g} {minimo:>7} {consumo:>12.2f} {acaba:>9} {sugestao:>8}")
+    if not lista:
+        print("Nenhum produto precisa de reposição.")
+    return 0
+
+
+def cmd_snapshot(db, args):
+    import razao
+    snapshot_id = razao.tirar_snapshot(db) if args.forcar else razao.snapshot_se_necessario(db)
+    print(f"Fotografia {snapshot_id} gravada." if snapshot_id else "Nenhum lançamento novo desde a última fotografia.")
+    return 0
+
+
+def cmd_estoque_em(db, args):
+    import razao
+    saldos = razao.estoque_em(db, args.instante, args.produto)
+    nomes = dict(db.consultar("SELECT id, nome FROM produtos"))
+    linhas = sorted(((pid, nomes.get(pid, f"#{pid}"), saldo) for pid, saldo in saldos.items()),
+                    key=lambda linha: linha[1])
+    if args.json:
+        import json
+        print(json.dumps([dict(zip(('produto_id', 'nome', 'quantidade'), linha)) for linha in linhas],
+                         ensure_ascii=False, indent=2))
+        return 0
+    print(f"Estoque em {args.instante}")
+    for pid, nome, saldo in linhas:
+        print(f"{pid:>6} {nome[:40]:<40} {saldo:>10g}")
+    if not linhas:
+        print("Nenhum produto com saldo registrado nessa data.")
+    return 0
+
+
+def cmd_reconciliar(db, args):
+    import razao
+    divergencias = razao.reconciliar(db)
+    for pid, nome, quantidade, saldo in divergencias:
+        print(f"{pid:>6} {nome[:40]:<40} cadastro {quantidade:>10g}  razão {saldo:>10g}")
+    if divergencias:
+        print(f"{len(divergencias)} produto(s) com saldo divergente do razão.", file=sys.stderr)
+        return 1
+    print("Razão de estoque confere com as quantidades do cadastro.")
+    return 0
+
+
+def _imprimir_medicoes(antes, depois):
+    print(f"\n{'':<28} {'antes':>12} {'depois':>12}")
+    for chave, valor in antes.items():
+        if chave in ('banco_principal', 'particoes'):
+            print(f"{chave + ' (MB)':<28} {valor / 2**20:>12.1f} {depois[chave] / 2**20:>12.1f}")
+        elif isinstance(valor, float):
+            print(f"{chave + ' (ms)':<28} {valor:>12.1f} {depois[chave]:>12.1f}")
+        else:
+            print(f"{chave:<28} {valor:>12} {depois[chave]:>12}")
+
+
+def cmd_arquivar(db, args):
+    import arquivo
+    anos = args.anos or arquivo.anos_arquivaveis(db)
+    if args.listar or not anos:
+        print("Anos que podem ser arquivados: " + (", ".join(map(str, anos)) or "nenhum"))
+        return 0
+    antes = arquivo.medir(db, min(anos))
+    for ano in anos:
+        movimentacoes, servicos = arquivo.arquivar_ano(db, ano)
+        print(f"{ano}: {movimentacoes} movimentações e {servicos} serviços em {arquivo.arquivo_do_ano(db, ano)}")
+    if not args.sem_manutencao:
+        print("Manutenção: " + (", ".join(arquivo.manutencao_se_necessario(db, forcar=True)) or "nada a fazer"))
+    _imprimir_medicoes(antes, arquivo.medir(db, min(anos)))
+    return 0
+
+
+def cmd_manutencao(db, args):
+    import arquivo
+    feitas = arquivo.manutencao_se_necessario(db, forcar=args.forcar)
+    print("Manutenção: " + (", ".join(feitas) or "nada a fazer") + f" (páginas livres: {arquivo.paginas_livres(db):.0%})")
+    return 0
+
+
+def cmd_backup(db, args):
+    import backup
+    pasta = args.pasta or backup.pasta_padrao(args.db)
+    if args.listar:
+        for conjunto in backup.listar_conjuntos(pasta):
+            manifesto = backup.ler_manifesto(conjunto)
+            tamanho = sum(os.path.getsize(os.path.join(conjunto, item['gz'])) for item in manifesto['arquivos'])
+            print(f"{os.path.basename(conjunto)}  {manifesto['criado_em']}  {tamanho / 2**20:8.1f} MB  "
+                  f"{len(manifesto['arquivos'])} arquivo(s)")
+        return 0
+    if args.verificar:
+        conjuntos = backup.listar_conjuntos(pasta)
+        conjunto = args.verificar if args.verificar != 'ultimo' else (conjuntos[-1] if conjuntos else None)
+        if not conjunto:
+            print(f"Nenhum backup em {pasta}.", file=sys.stderr)
+            return 1
+        backup.verificar(conjunto)
+        print(f"{conjunto}: checksums, integridade e contagens conferem.")
+        return 0
+    conjunto, manifesto = backup.fazer_backup(args.db, pasta, manter=args.manter)
+    principal = manifesto['arquivos'][0]
+    compactado = sum(os.path.getsize(os.path.join(conjunto, item['gz'])) for item in manifesto['arquivos'])
+    print(f"Backup em {conjunto}: {principal['tamanho'] / 2**20:.1f} MB -> {compactado / 2**20:.1f} MB "
+          f"em {manifesto['duracao_s']:.1f} s ({principal['passos']} passos, {principal['reinicios']} reinícios)")
+    return 0
+
+
+def cmd_restaurar(db, args):
+    import backup
+    manifesto = backup.restaurar(args.conjunto, args.db)
+    print(f"Banco restaurado do backup de {manifesto['criado_em']} ({len(manifesto['arquivos'])} arquivo(s)); "
+          "os arquivos anteriores foram mantidos com o sufixo .antes-restauracao-*.")
+    return 0
+
+
+def cmd_catalogo(db, args):
+    if args.definir:
+        nome, preco = args.definir
+        nucleo.definir_servico(db, nome, preco)
+    elif args.desativar:
+        nucleo.desativar_servico(db, args.desativar)
+    ativos = {id_ for id_, _, _ in nucleo.catalogo(db).servicos()}
+    print(f"{'Serviço':<28} {'Preço':>13}  Situação")
+    for id_, nome, preco in nucleo.catalogo(db).servicos(todos=True):
+        print(f"{nome[:28]:<28} {_formatar_moeda(preco):>13}  {'ativo' if id_ in ativos else 'inativo'}")
+    return 0
+
+
+def cmd_barbeiros(db, args):
+    if args.adicionar:
+        nucleo.definir_barbeiro(db, args.adicionar)
+    elif args.desativar:
+        nucleo.desativar_barbeiro(db, args.desativar)
+    ativos = {id_ for id_, _ in nucleo.catalogo(db).barbeiros()}
+    for id_, nome in nucleo.catalogo(db).barbeiros(todos=True):
+        print(f"{id_:>4}  {nome:<28} {'ativo' if id_ in ativos else 'inativo'}")
+    return 0
+
+
+def criar_parser():
+    tabelas = ('produtos', 'movimentacoes', 'servicos')   # transferencia.TABELAS, sem importá-lo
+    parser = argparse.ArgumentParser(prog="estoque", description="Estoque e caixa da barbearia pela linha de comando.")
+    parser.add_argument('--db', default=nucleo.DB_NAME, help="arquivo do banco (padrão: %(default)s)")
+    parser.add_argument('--medir', action='store_true',
+                        help="ao final, mostra p50/p95 por operação e os contadores (em stderr)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p = sub.add_parser('report', help="fechamento de caixa do período")
+    p.add_argument('--from', dest='inicio', help="início AAAA-MM-DD[ HH:MM:SS] (padrão: hoje)")
+    p.add_argument('--to', dest='fim', help="fim AAAA-MM-DD[ HH:MM:SS] (padrão: igual ao início)")
+    p.add_argument('--json', action='store_true', help="saída em JSON")
+    p.set_defaults(executar=cmd_report)
+
+    p = sub.add_parser('desempenho', help="desempenho por barbeiro: ticket médio, serviços/hora e período anterior")
+    p.add_argument('--from', dest='inicio', help="início AAAA-MM-DD[ HH:MM:SS] (padrão: primeiro dia do mês)")
+    p.add_argument('--to', dest='fim', help="fim AAAA-MM-DD[ HH:MM:SS] (padrão: hoje)")
+    p.add_argument('--sem-comparar', action='store_true', help="não lê o período anterior")
+    p.add_argument('--json', action='store_true', help="saída em JSON")
+    p.set_defaults(executar=cmd_desempenho)
+
+    p = sub.add_parser('move', help="entrada ou saída de estoque")
+    p.add_argument('produto_id', type=int, nargs='?')
+    p.add_argument('quantidade', nargs='?')
+    p.add_argument('--tipo', choices=('entrada', 'saida'), required=True)
+    p.add_argument('--lote', help="CSV produto_id,quantidade[,preco_unitario] aplicado numa única transação")
+    p.set_defaults(executar=cmd_move)
+
+    for nome, executar, ajuda in (('import', cmd_import, "importa CSV/JSON (retomável)"),
+                                  ('export', cmd_export, "exporta CSV/JSON")):
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument('tabela', choices=tabelas)
+        p.add_argument('arquivo')
+        p.add_argument('--formato', choices=('csv', 'json'), help="padrão: extensão do arquivo")
+        p.add_argument('--lote', type=int, default=2000, help="linhas por lote (padrão: %(default)s)")
+        p.set_defaults(executar=executar)
+        if nome == 'import':
+            p.add_argument('--reiniciar', action='store_true', help="ignora o ponto de retomada")
+            p.add_argument('--rejeitados', help="CSV onde gravar as linhas rejeitadas")
+
+    p = sub.add_parser('analise', help="relatórios de período longo (requer NumPy)")
+    p.add_argument('relatorio', choices=('lucro', 'barbeiros', 'serie'),
+                   help="lucro por produto, ranking de barbeiros ou série diária com média móvel")
+    p.add_argument('--from', dest='inicio', help="início AAAA-MM-DD (padrão: todo o histórico)")
+    p.add_argument('--to', dest='fim', help="fim AAAA-MM-DD")
+    p.add_argument('--por', choices=('dia', 'semana', 'mes', 'trimestre', 'ano'),
+                   help="agrupamento (padrão: mes para lucro, trimestre para barbeiros)")
+    p.add_argument('--fonte', choices=('servicos', 'vendas', 'lucro'), default='servicos', help="série diária")
+    p.add_argument('--janela', type=int, default=7, help="dias da média móvel (padrão: %(default)s)")
+    p.add_argument('--json', action='store_true', help="saída em JSON")
+    p.set_defaults(executar=cmd_analise)
+
+    p = sub.add_parser('repor', help="lista de compras pela previsão de consumo (requer NumPy)")
+    p.add_argument('--prazo', type=int, default=7, help="dias até a entrega do fornecedor (padrão: %(default)s)")
+    p.add_argument('--cobertura', type=int, default=14, help="dias que a compra deve cobrir (padrão: %(default)s)")
+    p.add_argument('--json', action='store_true', help="saída em JSON")
+    p.set_defaults(executar=cmd_repor)
+
+    p = sub.add_parser('snapshot', help="fotografa o saldo do razão de estoque (para agendar no cron)")
+    p.add_argument('--forcar', action='store_true', help="grava mesmo sem atingir idade ou volume de lançamentos")
+    p.set_defaults(executar=cmd_snapshot)
+
+    p = sub.add_parser('estoque-em', help="estoque de cada produto numa data passada")
+    p.add_argument('instante', help="AAAA-MM-DD (fim do dia) ou AAAA-MM-DD HH:MM:SS")
+    p.add_argument('--produto', type=int, help="só este produto")
+    p.add_argument('--json', action='store_true', help="saída em JSON")
+    p.set_defaults(executar=cmd_estoque_em)
+
+    p = sub.add_parser('reconciliar', help="confere o razão de estoque contra as quantidades do cadastro")
+    p.set_defaults(executar=cmd_reconciliar)
+
+    p = sub.add_parser('arquivar', help="move anos fechados de movimentações e serviços para bancos anuais")
+    p.add_argument('anos', type=int, nargs='*', help="anos a arquivar (padrão: todos os fechados)")
+    p.add_argument('--listar', action='store_true', help="só mostra os anos que podem ser arquivados")
+    p.add_argument('--sem-manutencao', action='store_true', help="não roda VACUUM/ANALYZE ao final")
+    p.set_defaults(executar=cmd_arquivar)
+
+    p = sub.add_parser('manutencao', help="ANALYZE semanal e VACUUM quando há muitas páginas livres")
+    p.add_argument('--forcar', action='store_true', help="roda ANALYZE e VACUUM agora")
+    p.set_defaults(executar=cmd_manutencao)
+
+    p = sub.add_parser('backup', help="backup a quente, comprimido e com checksums (pode rodar com o programa aberto)")
+    p.add_argument('--pasta', help="pasta dos conjuntos (padrão: backups/ ao lado do banco)")
+    p.add_argument('--manter', type=int, default=7, help="conjuntos mantidos na rotação (padrão: %(default)s)")
+    p.add_argument('--listar', action='store_true', help="lista os conjuntos existentes")
+    p.add_argument('--verificar', nargs='?', const='ultimo', metavar='CONJUNTO',
+                   help="confere um conjunto sem restaurar (padrão: o mais recente)")
+    p.set_defaults(executar=cmd_backup)
+
+    p = sub.add_parser('restaurar', help="restaura um conjunto de backup (feche o programa e o servidor antes)")
+    p.add_argument('conjunto', help="pasta do conjunto (ver: backup --listar)")
+    p.set_defaults(executar=cmd_restaurar, sem_banco=True)
+
+    p = sub.add_parser('catalogo', help="lista os serviços e preços; cadastra, altera ou desativa um serviço")
+    grupo = p.add_mutually_exclusive_group()
+    grupo.add_argument('--definir', nargs=2, metavar=('NOME', 'PRECO'), help="cadastra o serviço ou altera o preço")
+    grupo.add_argument('--desativar', metavar='NOME', help="tira o serviço do formulário (o histórico fica)")
+    p.set_defaults(executar=cmd_catalogo)
+
+    p = sub.add_parser('barbeiros', help="lista os barbeiros; cadastra ou desativa um barbeiro")
+    grupo = p.add_mutually_exclusive_group()
+    grupo.add_argument('--adicionar', metavar='NOME', help="cadastra (ou reativa) o barbeiro")
+    grupo.add_argument('--desativar', metavar='NOME', help="tira a aba do barbeiro da interface")
+    p.set_defaults(executar=cmd_barbeiros)
+
+    p = sub.add_parser('rebuild', help="reconstrói os resumos diários a partir do histórico")
+    p.set_defaults(executar=cmd_rebuild)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    # restaurar troca o arquivo do banco: não pode haver conexão aberta nele
+    db = None if getattr(args, 'sem_banco', False) else Database(args.db, tamanho_pool=1)
+    try:
+        if db is not None:
+            nucleo.preparar_banco(db)
+        return args.executar(db, args)
+    except nucleo.ErroValidacao as e:
+        print(f"{e.titulo}: {e}", file=sys.stderr)
+    except (nucleo.EstoqueInsuficiente, nucleo.ProdutoNaoEncontrado) as e:
+        print(nucleo.resultado_recusado(e)['mensagem'], file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+    finally:
+        if db is not None:
+            db.fechar()
+        if args.medir:
+            print(medicao.formatar_resumo(), file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
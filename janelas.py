@@ -0,0 +1,140 @@
+# Janelas reaproveitadas, abas preguiçosas e logo pré-redimensionado - Barbearia
+# Os diálogos são montados uma vez por chave; fechar só esconde (withdraw) e reabrir chama a
+# função de atualização do diálogo em vez de reconstruir o Toplevel. As abas de um Notebook
+# são montadas na primeira vez que aparecem. O logo redimensionado fica num PNG em cache que o
+# Tk lê sozinho: o PIL só é importado quando o cache precisa ser (re)gerado.
+import os
+import time
+import tkinter as tk
+
+import medicao
+
+LOGO_TAMANHO = (120, 120)
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cache')
+
+
+class GerenciadorJanelas:
+    """Toplevels construídos uma vez e reaproveitados.
+
+    `abrir(chave, construir, *args)`: na primeira chamada cria o Toplevel e roda
+    `construir(janela)`, que monta os widgets e retorna `atualizar(*args)`; toda abertura
+    (inclusive a primeira) chama `atualizar(*args)` antes de mostrar a janela, e é ali que o
+    diálogo recarrega título, campos e dados. Fechar pelo gerenciador de janelas só esconde;
+    `ao_esconder(chave)` permite cancelar trabalho pendente do diálogo.
+    `latencias` guarda, por chave, a última abertura em ms (montagem ou reaproveitamento).
+    """
+
+    def __init__(self, root, ao_esconder=None):
+        self.root = root
+        self.ao_esconder = ao_esconder
+        self.latencias = {}     # chave -> (ms, 'montagem' | 'reuso')
+        self._janelas = {}      # chave -> (toplevel, atualizar)
+
+    def abrir(self, chave, construir, *args):
+        inicio = time.perf_counter()
+        registro = self._janelas.get(chave)
+        if registro is None or not registro[0].winfo_exists():
+            janela = tk.Toplevel(self.root)
+            janela.withdraw()       # montada escondida: nada pisca enquanto os widgets entram
+            janela.protocol('WM_DELETE_WINDOW', lambda: self.esconder(chave))
+            registro = self._janelas[chave] = (janela, construir(janela))
+            etapa = 'montagem'
+        else:
+            etapa = 'reuso'
+        janela, atualizar = registro
+        if atualizar is not None:
+            atualizar(*args)
+        janela.deiconify()
+        janela.lift()
+        janela.focus_set()
+        self.latencias[chave] = ((time.perf_counter() - inicio) * 1000, etapa)
+        medicao.registrar(f"janela: {chave} ({etapa})", self.latencias[chave][0])
+        return janela
+
+    def esconder(self, chave):
+        registro = self._janelas.get(chave)
+        if registro is not None and registro[0].winfo_exists():
+            registro[0].withdraw()
+            if self.ao_esconder:
+                self.ao_esconder(chave)
+
+    def visivel(self, chave):
+        registro = self._janelas.get(chave)
+        return registro is not None and registro[0].winfo_exists() and registro[0].winfo_viewable()
+
+    def janela(self, chave):
+        registro = self._janelas.get(chave)
+        return registro[0] if registro is not None else None
+
+
+class AbasPreguicosas:
+    """Abas de um ttk.Notebook montadas na primeira seleção.
+
+    `adicionar(texto, construir)` cria o frame vazio da aba; `construir(frame)` roda uma vez,
+    quando a aba é exibida. A aba já selecionada ao ser adicionada (a primeira) é montada na hora.
+    """
+
+    def __init__(self, notebook, **opcoes_frame):
+        self.notebook = notebook
+        self.opcoes_frame = opcoes_frame
+        self._pendentes = {}    # caminho do frame -> construir
+        notebook.bind('<<NotebookTabChanged>>', self._montar_selecionada, add='+')
+
+    def adicionar(self, texto, construir):
+        frame = tk.Frame(self.notebook, **self.opcoes_frame)
+        self.notebook.add(frame, text=texto)
+        self._pendentes[str(frame)] = construir
+        if self.notebook.select() == str(frame):
+            self._montar_selecionada()
+        return frame
+
+    def montada(self, frame):
+        return str(frame) not in self._pendentes
+
+    def _montar_selecionada(self, event=None):
+        aba = self.notebook.select()
+        construir = self._pendentes.pop(aba, None)
+        if construir is not None:
+            construir(self.notebook.nametowidget(aba))
+
+
+# ===== Logo =====
+def caminho_logo_cache(origem, tamanho=LOGO_TAMANHO, pasta=PASTA_CACHE):
+    base = os.path.splitext(os.path.basename(origem))[0]
+    return os.path.join(pasta, f"{base}_{tamanho[0]}x{tamanho[1]}.png")
+
+
+def gerar_logo_cache(origem, tamanho=LOGO_TAMANHO, pasta=PASTA_CACHE):
+    """(Re)gera o PNG redimensionado quando falta ou é mais velho que a origem.
+    Retorna o caminho do cache, ou None sem PIL ou sem permissão de escrita na pasta."""
+    destino = caminho_logo_cache(origem, tamanho, pasta)
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origem):
+        return destino
+    try:
+        from PIL import Image      # só aqui: a partida normal lê o cache com o Tk
+    except ImportError:
+        return None
+    try:
+        os.makedirs(pasta, exist_ok=True)
+        temporario = destino + ".tmp"
+        with Image.open(origem) as imagem:
+            imagem.resize(tamanho).save(temporario, format='PNG')
+        os.replace(temporario, destino)
+    except OSError:
+        return None
+    return destino
+
+
+def carregar_logo(master, origem, tamanho=LOGO_TAMANHO, pasta=PASTA_CACHE):
+    """PhotoImage do logo em `tamanho`, ou None se não houver logo.
+
+    Com o cache em dia é só um PhotoImage do PNG pequeno (sem PIL). Sem PIL para gerar o cache,
+    cai no PNG original reduzido por subsample inteiro, o melhor que o Tk faz sozinho."""
+    if not os.path.exists(origem):
+        return None
+    cache = gerar_logo_cache(origem, tamanho, pasta)
+    if cache is not None:
+        return tk.PhotoImage(master=master, file=cache)
+    imagem = tk.PhotoImage(master=master, file=origem)
+    fator = max(1, imagem.width() // tamanho[0], imagem.height() // tamanho[1])
+    return imagem.subsample(fator) if fator > 1 else imagem
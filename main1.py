@@ -1,16 +1,28 @@
 # Sistema de Gestão de Estoque e Serviços - Barbearia (OOP Refactor)
 # Desenvolvido por João Vitor de Souza Casco
 # Refatorado para POO em 30/10/2025
-import sqlite3
+import os
+import sys
+import threading
+from bisect import bisect_left
 from tkinter import *
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import tkinter as tk
 from datetime import datetime, timedelta, date
-try:
-    from PIL import Image, ImageTk
-except ImportError:
-    Image = None
-    ImageTk = None
+from database import Database
+import nucleo
+import razao
+import arquivo
+import backup
+import medicao
+from notificacoes import CentralNotificacoes
+from nucleo import (DB_NAME, ErroValidacao, EstoqueInsuficiente, ProdutoNaoEncontrado, ler_itens_csv,
+                    preparar_banco, reconstruir_resumos)
+from tabela_virtual import TabelaVirtual
+from tabela_relatorio import TabelaRelatorio
+from busca import IndiceBusca
+from tarefas import ExecutorTarefas
+from janelas import AbasPreguicosas, GerenciadorJanelas, carregar_logo
 
 
 class BarberShopApp:
@@ -18,9 +30,16 @@ class BarberShopApp:
     Elimina variáveis globais, migra funções para métodos e constrói a UI no __init__.
     """
 
-    def __init__(self):
+    def __init__(self, servidor=None):
         # Estado e configuração
-        self.DB_NAME = 'estoque_barbearia.db'
+        self.DB_NAME = DB_NAME
+        # cProfile opcional da sessão inteira, da partida ao fechamento (ESTOQUE_PERFIL=arquivo.prof)
+        self.ARQUIVO_PERFIL = os.environ.get("ESTOQUE_PERFIL")
+        if self.ARQUIVO_PERFIL:
+            medicao.iniciar_perfil()
+        self.SERVIDOR = servidor   # URL do servidor.py: modo caixa, sem banco local
+        self.PASTA_BACKUP = os.environ.get("ESTOQUE_BACKUP") or backup.pasta_padrao(DB_NAME)
+        self.BACKUP_VERIFICAR_MS = 30 * 60 * 1000    # confere a idade do último backup a cada 30 min
 
         # Tipografia base
         self.FONT_BASE = ("Segoe UI", 12)
@@ -44,88 +63,94 @@ class BarberShopApp:
         self.LIGHT_BUTTON_ACTIVE = "#EAC45E"
         self.LIGHT_TEXT = "#000000"
 
+        # Catálogo e busca
+        self.CATEGORIAS = ["Pomada", "Shampoo", "Frigobar", "Outro Insumo"]
+        self.DEBOUNCE_BUSCA_MS = 150
+        self.indice_busca = IndiceBusca()
+        self._busca_agendada = None
+        self._catalogo = None
+        self.servicos_notebook = None   # criado quando a aba Serviços é exibida pela primeira vez
+        self._abas_barbeiros = {}       # frame da aba -> nome do barbeiro (ainda sem formulário)
+        self.precos_servicos = {}       # nome -> preço, do cache do catálogo
+
         # Inicialização da janela
         self.root = Tk()
-        self.root.title("Gestão de Estoque - BARBEARIA")
+        self.root.title("Gestão de Estoque - BARBEARIA" + (f" (caixa conectado a {servidor})" if servidor else ""))
         self.root.geometry("1280x800")
         self.root.configure(bg=self.COLOR_BG)
 
-        # Banco e tema
-        self.setup_db()
+        # Banco (local ou via servidor) e tema
+        if self.SERVIDOR:
+            from cliente import ClienteAPI
+            self.db = None
+            self.servico = ClienteAPI(self.SERVIDOR)
+        else:
+            self.db = Database(self.DB_NAME)
+            self.setup_db()
+            self.servico = nucleo.ServicoLocal(self.db)
+        # Group commit opcional (ESTOQUE_GRUPO_COMMIT=ms): serviços e movimentações passam pelo diário
+        self.diario = None
+        grupo_ms = os.environ.get("ESTOQUE_GRUPO_COMMIT")
+        if grupo_ms and not self.SERVIDOR:
+            from diario import DiarioEscrita
+            self.diario = DiarioEscrita(self.db, self.DB_NAME + ".diario", intervalo_ms=float(grupo_ms))
         self.apply_dark_theme()
 
-        # Construção da UI
+        # Diálogos montados uma vez e reaproveitados; fechar só esconde
+        self.janelas = GerenciadorJanelas(self.root, ao_esconder=lambda chave: self.tarefas.cancelar(chave))
+
+        # Construção da UI (a aba de Serviços só é montada quando selecionada)
         self.build_top_bar()
         self.build_container()
         self.build_sidebar()
         self.build_notebook()
-        self.build_tab_estoque()
-        self.build_tab_servicos()
+        self.abas.adicionar("Estoque", self.build_tab_estoque)
+        self.abas.adicionar("Serviços", self.build_tab_servicos)
         # Removidas as abas superiores de Movimentações e Fechamento de Caixa
         self.build_status_bar()
+        # Avisos não modais (toasts) e central de notificações; diálogos ficam para confirmações
+        self.notificacoes = CentralNotificacoes(self.root, self.COLOR_CARD, self.COLOR_TEXT, self.COLOR_TEXT_SECONDARY,
+                                                ao_mudar=self._atualizar_badge_notificacoes)
+
+        # Trabalho de banco em threads de fundo (o mainloop nunca bloqueia em I/O)
+        self._nota_status = ""      # aviso extra na barra de status (ex.: último backup)
+        self.tarefas = ExecutorTarefas(self.root, ao_mudar_ocupado=self._atualizar_status)
 
         # Dados iniciais
         self._produtos_cache = []
+        self._chaves_cache = []
+        self._produtos_por_id = {}
+        self._listagem_pendente = False
+        self._alterados_durante_listagem = set()
+        self._ids_a_reler = set()           # produtos alterados aguardando a releitura no worker
+        self.janela_repor = None
+        self.previsao = None        # previsao.PrevisaoDemanda, criada no worker na primeira listagem
+        self._rupturas = {}         # produto_id -> dias até acabar, para os que acabam antes da entrega
         self.atualizar_listagem()
+        self.carregar_catalogo()
         self.atualizar_clock()
+        if not self.SERVIDOR:
+            # Fotografia diária do razão de estoque (consultas de estoque em datas passadas)
+            self.tarefas.submeter(razao.snapshot_se_necessario, self.db, chave='snapshot')
+            # ANALYZE semanal; VACUUM só quando um arquivamento deixou muitas páginas livres
+            self.tarefas.submeter(arquivo.manutencao_se_necessario, self.db, chave='manutencao')
+            # Backup a quente diário; o primeiro confere 1 min depois de abrir, fora da carga inicial
+            self._backup_interromper = threading.Event()
+            self._backup_rodando = False
+            self.root.after(60 * 1000, self.agendar_backup)
 
         # Atalhos
         self.root.bind('<Control-n>', lambda e: self.abrir_janela_cadastro())
-        self.root.bind('<F5>', lambda e: self.atualizar_listagem())
+        self.root.bind('<Control-r>', lambda e: self.abrir_painel_repor())
+        self.root.bind('<F5>', lambda e: self.recarregar_tudo())
+        self.root.bind('<F12>', lambda e: self.abrir_painel_desempenho())
 
     # ===== Banco de Dados =====
     def setup_db(self):
-        with sqlite3.connect(self.DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS produtos (
-                    id INTEGER PRIMARY KEY,
-                    nome TEXT NOT NULL,
-                    categoria TEXT NOT NULL,
-                    quantidade REAL NOT NULL,
-                    minimo INTEGER NOT NULL,
-                    preco_custo REAL DEFAULT 0,
-                    preco_venda REAL DEFAULT 0
-                )
-            ''')
-            # Ajusta colunas se necessário
-            try:
-                cursor.execute("ALTER TABLE produtos ADD COLUMN preco_custo REAL DEFAULT 0")
-            except sqlite3.OperationalError:
-                pass
-            try:
-                cursor.execute("ALTER TABLE produtos ADD COLUMN preco_venda REAL DEFAULT 0")
-            except sqlite3.OperationalError:
-                pass
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS movimentacoes (
-                    id INTEGER PRIMARY KEY,
-                    produto_id INTEGER NOT NULL,
-                    tipo TEXT NOT NULL,
-                    quantidade REAL NOT NULL,
-                    preco_unitario REAL NOT NULL,
-                    data_hora TEXT NOT NULL,
-                    FOREIGN KEY (produto_id) REFERENCES produtos (id)
-                )
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS servicos (
-                    id INTEGER PRIMARY KEY,
-                    servico TEXT NOT NULL,
-                    valor REAL NOT NULL,
-                    barbeiro TEXT NOT NULL,
-                    data_hora TEXT NOT NULL
-                )
-            ''')
-            conn.commit()
+        preparar_banco(self.db)
 
     def execute_query(self, query, params=()):
-        with sqlite3.connect(self.DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            conn.commit()
+        self.db.execute(query, params)
 
     # ===== Tema e Estilo =====
     def apply_dark_theme(self):
@@ -199,11 +224,9 @@ class BarberShopApp:
         self.top_bar.pack(fill='x', pady=10)
         self.logo_label = None
         try:
-            import os
-            logo_path = os.path.join(os.path.dirname(__file__), 'logo.png')
-            if Image and ImageTk and os.path.exists(logo_path):
-                img = Image.open(logo_path).resize((120, 120))
-                logo_img = ImageTk.PhotoImage(img)
+            # PNG 120x120 em assets/cache: o PIL só entra quando o logo.png muda
+            logo_img = carregar_logo(self.root, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logo.png'))
+            if logo_img is not None:
                 self.logo_label = Label(self.top_bar, image=logo_img, bg=self.COLOR_BG)
                 self.logo_label.image = logo_img
                 self.logo_label.pack(pady=5)
@@ -223,12 +246,16 @@ class BarberShopApp:
         self.criar_tile(self.sidebar, "Novo Produto", "➕", self.abrir_janela_cadastro)
         self.criar_tile(self.sidebar, "Entrada de Estoque", "⬆", lambda: self.abrir_janela_movimentacao("ENTRADA"))
         self.criar_tile(self.sidebar, "Saída de Estoque", "⬇", lambda: self.abrir_janela_movimentacao("SAÍDA"))
+        self.criar_tile(self.sidebar, "Movimentação em Lote", "📦", self.abrir_janela_lote)
         self.criar_tile(self.sidebar, "Definir Preços", "💲", self.abrir_janela_precos)
+        self.criar_tile(self.sidebar, "Serviços e Barbeiros", "💈", self.abrir_janela_catalogo)
+        self.criar_tile(self.sidebar, "Importar / Exportar", "🔄", self.abrir_janela_transferencia)
         self.criar_tile(self.sidebar, "Fechamento de Caixa", "🧾", self.abrir_janela_fechamento_caixa)
 
     def build_notebook(self):
         self.notebook = ttk.Notebook(self.container)
         self.notebook.pack(side="left", padx=10, fill="both", expand=True)
+        self.abas = AbasPreguicosas(self.notebook, bg=self.COLOR_BG)
 
     def add_tab_header(self, parent, titulo, subtitulo):
         hdr = Frame(parent, bg=self.COLOR_BG)
@@ -268,9 +295,8 @@ class BarberShopApp:
         return frame
 
     # ===== Abas =====
-    def build_tab_estoque(self):
-        self.frame_tabela = Frame(self.notebook, bg=self.COLOR_BG)
-        self.notebook.add(self.frame_tabela, text="Estoque")
+    def build_tab_estoque(self, frame):
+        self.frame_tabela = frame
         self.add_tab_header(self.frame_tabela, "Estoque 📦", "Produtos e quantidades em estoque")
 
         colunas = ('ID', 'Produto', 'Categoria', 'Qtd. Atual', 'Qtd. Mínima', 'Preço Custo', 'Preço Venda')
@@ -287,9 +313,10 @@ class BarberShopApp:
             self.tree.heading(col, text=col)
 
         # Tags
-        self.tree.tag_configure('odd', background='#FFFFFF')
-        self.tree.tag_configure('even', background='#F5F5F5')
-        self.tree.tag_configure('alerta', background='#FFE4E6')
+        self.tree.tag_configure('alerta', background='#ffcccc')
+        self.tree.tag_configure('ruptura', background='#ffe8b0')   # acaba antes de uma compra chegar
+        self.tree.tag_configure('odd', background='#f0f0f0')
+        self.tree.tag_configure('even', background='#ffffff')
 
         # Frame para busca e botões
         frame_controles = Frame(self.frame_tabela, bg=self.COLOR_BG)
@@ -298,7 +325,12 @@ class BarberShopApp:
         Label(frame_controles, text="Buscar Produto:", bg=self.COLOR_BG, fg=self.COLOR_TEXT).pack(side='left', padx=5)
         self.search_entry = Entry(frame_controles, bg='white', fg='black', insertbackground='black')
         self.search_entry.pack(side='left', padx=5)
-        self.search_entry.bind('<KeyRelease>', self.filtrar_produtos)
+        self.search_entry.bind('<KeyRelease>', self._agendar_busca)
+        Label(frame_controles, text="Categoria:", bg=self.COLOR_BG, fg=self.COLOR_TEXT).pack(side='left', padx=5)
+        self.categoria_filtro = ttk.Combobox(frame_controles, values=["Todas"] + self.CATEGORIAS, state="readonly", width=14)
+        self.categoria_filtro.current(0)
+        self.categoria_filtro.pack(side='left', padx=5)
+        self.categoria_filtro.bind("<<ComboboxSelected>>", self.filtrar_produtos)
         
         # Botão de exclusão
         btn_excluir = ttk.Button(frame_controles, text="🗑️ Excluir Produto", command=self.excluir_produto_selecionado)
@@ -306,60 +338,88 @@ class BarberShopApp:
         btn_excluir.pack(side='right', padx=10)
 
         self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar = ttk.Scrollbar(self.frame_tabela, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(self.frame_tabela, orient="vertical")
         scrollbar.pack(side="right", fill="y")
+        # Modo virtual: só as linhas visíveis existem como itens do Treeview
+        self.tabela = TabelaVirtual(self.tree, scrollbar, self._formatar_linha)
 
-    def build_tab_servicos(self):
-        self.tab_servico = Frame(self.notebook, bg=self.COLOR_BG)
-        self.notebook.add(self.tab_servico, text="Serviços")
+    def build_tab_servicos(self, frame):
+        self.tab_servico = frame
         self.add_tab_header(self.tab_servico, "Registrar Serviços 💈", "Escolha o barbeiro e o serviço")
 
-        tabela_precos = {
-            "BARBA": 30,
-            "BIGODE": 10,
-            "CORTE": 40,
-            "CABELO E ALISAMENTO": 80,
-            "CABELO E BARBA": 60,
-            "LUZES": 150,
-            "PLATINADO": 200,
-            "SOBRANCELHA": 10
-        }
-
-        servicos_notebook = ttk.Notebook(self.tab_servico)
-        servicos_notebook.pack(fill='both', expand=True, padx=10, pady=10)
-        tab_b1 = Frame(servicos_notebook, bg=self.COLOR_BG)
-        tab_b2 = Frame(servicos_notebook, bg=self.COLOR_BG)
-        servicos_notebook.add(tab_b1, text="Barbeiro 1")
-        servicos_notebook.add(tab_b2, text="Barbeiro 2")
-
-        def montar_form_servico(parent, barbeiro_nome):
-            Label(parent, text="Serviço:", bg=self.COLOR_BG, fg=self.COLOR_TEXT, font=self.FONT_BASE).pack(pady=10)
-            servico_var = StringVar(value=list(tabela_precos.keys())[0])
-            servico_combo = ttk.Combobox(parent, values=list(tabela_precos.keys()), textvariable=servico_var, state="readonly")
-            servico_combo.pack(pady=5)
-
-            Label(parent, text="Valor (R$):", bg=self.COLOR_BG, fg=self.COLOR_TEXT, font=self.FONT_BASE).pack(pady=10)
-            valor_var = StringVar()
-            valor_entry = ttk.Entry(parent, textvariable=valor_var, state='readonly')
-            valor_entry.pack(pady=5)
-
-            def atualizar_valor(_):
-                s = servico_var.get()
-                if s in tabela_precos:
-                    valor_var.set(str(tabela_precos[s]))
-            atualizar_valor(None)
-            servico_combo.bind("<<ComboboxSelected>>", atualizar_valor)
-
-            def salvar_servico():
-                if self.registrar_servico(servico_var.get().title(), valor_var.get(), barbeiro_nome):
-                    messagebox.showinfo("Sucesso", "Serviço registrado com sucesso!")
-            btn_salvar = ttk.Button(parent, text="💾 Salvar", command=salvar_servico)
-            self.estilizar_botao(btn_salvar, 'primary')
-            btn_salvar.pack(pady=12)
-
-        montar_form_servico(tab_b1, "Barbeiro 1")
-        montar_form_servico(tab_b2, "Barbeiro 2")
+        # Uma aba por barbeiro ativo do cadastro (servicos_catalogo/barbeiros); o formulário de
+        # cada aba só é montado na primeira vez que ela é exibida
+        self.servicos_notebook = ttk.Notebook(self.tab_servico)
+        self.servicos_notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.servicos_notebook.bind('<<NotebookTabChanged>>', self._montar_aba_barbeiro)
+        if self._catalogo is not None:
+            self._montar_abas_barbeiros()
+
+    def carregar_catalogo(self, recarregar=False):
+        if recarregar:
+            self.servico.recarregar_catalogo()
+        self.tarefas.submeter(self.servico.catalogo, ao_concluir=self._aplicar_catalogo, chave='catalogo',
+                              ao_falhar=lambda e: self.notificacoes.notificar('erro', "Catálogo de serviços indisponível", str(e)))
+
+    def _aplicar_catalogo(self, catalogo):
+        if catalogo == self._catalogo:
+            return
+        self._catalogo = catalogo
+        self.precos_servicos = {nome: preco for _, nome, preco in catalogo['servicos']}
+        if self.servicos_notebook is not None:
+            self._montar_abas_barbeiros()
+
+    def _montar_abas_barbeiros(self):
+        catalogo = self._catalogo
+        notebook = self.servicos_notebook
+        atual = notebook.tab(notebook.select(), 'text') if notebook.select() else None
+        for aba in notebook.tabs():
+            notebook.nametowidget(aba).destroy()
+        self._abas_barbeiros = {}
+        for _, nome in catalogo['barbeiros']:
+            aba = Frame(notebook, bg=self.COLOR_BG)
+            notebook.add(aba, text=nome)
+            self._abas_barbeiros[str(aba)] = nome
+            if nome == atual:
+                notebook.select(aba)
+        if not catalogo['barbeiros']:
+            aba = Frame(notebook, bg=self.COLOR_BG)
+            notebook.add(aba, text="Sem barbeiros")
+            Label(aba, text="Cadastre um barbeiro em \"Serviços e Barbeiros\".", bg=self.COLOR_BG,
+                  fg=self.COLOR_TEXT_SECONDARY, font=self.FONT_BASE).pack(pady=20)
+        self._montar_aba_barbeiro()
+
+    def _montar_aba_barbeiro(self, event=None):
+        aba = self.servicos_notebook.select()
+        barbeiro_nome = self._abas_barbeiros.pop(aba, None)
+        if barbeiro_nome is not None:
+            self.montar_form_servico(self.servicos_notebook.nametowidget(aba), barbeiro_nome)
+
+    def montar_form_servico(self, parent, barbeiro_nome):
+        nomes = list(self.precos_servicos)
+        Label(parent, text="Serviço:", bg=self.COLOR_BG, fg=self.COLOR_TEXT, font=self.FONT_BASE).pack(pady=10)
+        servico_var = StringVar(value=nomes[0] if nomes else "")
+        servico_combo = ttk.Combobox(parent, values=nomes, textvariable=servico_var, state="readonly")
+        servico_combo.pack(pady=5)
+
+        Label(parent, text="Valor (R$):", bg=self.COLOR_BG, fg=self.COLOR_TEXT, font=self.FONT_BASE).pack(pady=10)
+        valor_var = StringVar()
+        valor_entry = ttk.Entry(parent, textvariable=valor_var, state='readonly')
+        valor_entry.pack(pady=5)
+
+        def atualizar_valor(_):
+            s = servico_var.get()
+            if s in self.precos_servicos:
+                valor_var.set(str(self.precos_servicos[s]))
+        atualizar_valor(None)
+        servico_combo.bind("<<ComboboxSelected>>", atualizar_valor)
+
+        def salvar_servico():
+            if servico_var.get():
+                self.registrar_servico(servico_var.get(), valor_var.get(), barbeiro_nome)
+        btn_salvar = ttk.Button(parent, text="💾 Salvar", command=salvar_servico)
+        self.estilizar_botao(btn_salvar, 'primary')
+        btn_salvar.pack(pady=12)
 
     def build_tab_movimentacoes(self):
         tab_mov = Frame(self.notebook, bg=self.COLOR_BG)
@@ -376,46 +436,234 @@ class BarberShopApp:
     def build_status_bar(self):
         self.status_bar = Frame(self.root, bg=self.COLOR_BG)
         self.status_bar.pack(fill='x', padx=10, pady=10)
+        # Contador de produtos abaixo do mínimo (tabela estoque_baixo); clique abre o painel Repor
+        self.badge_repor = Label(self.status_bar, text="", bg=self.COLOR_ALERT, fg=self.COLOR_TEXT,
+                                 font=self.FONT_BASE, padx=8, cursor='hand2')
+        self.badge_repor.bind('<Button-1>', lambda e: self.abrir_painel_repor())
+        # Central de notificações: o sino mostra quantas chegaram desde a última abertura
+        self.badge_notificacoes = Label(self.status_bar, text="🔔", bg=self.COLOR_BG, fg=self.COLOR_TEXT_SECONDARY,
+                                        font=self.FONT_BASE, padx=8, cursor='hand2')
+        self.badge_notificacoes.bind('<Button-1>', lambda e: self.notificacoes.abrir_painel())
+        self.badge_notificacoes.pack(side='right')
         self.status_label = Label(self.status_bar, text="", bg=self.COLOR_BG, fg=self.COLOR_TEXT_SECONDARY, font=self.FONT_BASE)
-        self.status_label.pack()
+        self.status_label.pack(side='left', expand=True)
 
     # ===== Lógica de Estoque =====
+    def recarregar_tudo(self):
+        # F5: relê produtos e o catálogo (edições feitas em outro caixa ou pela CLI)
+        self.atualizar_listagem()
+        self.carregar_catalogo(recarregar=True)
+
     def atualizar_listagem(self):
-        with sqlite3.connect(self.DB_NAME) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome, categoria, quantidade, minimo, preco_custo, preco_venda FROM produtos ORDER BY categoria, nome")
-            self._produtos_cache = cursor.fetchall()
-        self._insert_rows(self._produtos_cache)
+        # Consulta e indexação rodam no worker; só a troca do cache e a renderização ficam no mainloop
+        self._listagem_pendente = True
+        self.tarefas.submeter(self._carregar_produtos, ao_concluir=self._aplicar_listagem, chave='listagem')
+
+    def _carregar_produtos(self):
+        registros = self.servico.listar_produtos()
+        indice = IndiceBusca()
+        indice.reconstruir(registros)
+        return registros, indice
+
+    def _aplicar_listagem(self, resultado):
+        self._produtos_cache, self.indice_busca = resultado
+        self._chaves_cache = [self._chave_ordem(r) for r in self._produtos_cache]
+        self._produtos_por_id = {r[0]: r for r in self._produtos_cache}
+        self._listagem_pendente = False
+        self.filtrar_produtos()
+        self.atualizar_alertas()
+        self.atualizar_previsao()
+        if self._alterados_durante_listagem:
+            # Alterações confirmadas enquanto a listagem era lida podem não estar no snapshot
+            alterados, self._alterados_durante_listagem = self._alterados_durante_listagem, set()
+            self.notificar_alteracao(alterados)
+
+    @staticmethod
+    def _chave_ordem(registro):
+        # Mesma ordem do SELECT de atualizar_listagem: categoria, nome, id
+        return (registro[2], registro[1], registro[0])
+
+    def notificar_alteracao(self, ids):
+        """Atualização incremental após operações pontuais: relê apenas os produtos afetados num
+        worker (no modo cliente é uma ida ao servidor) e aplica as linhas com _aplicar_alteracao."""
+        ids = {int(i) for i in ids}
+        if not ids:
+            return
+        if self._listagem_pendente:
+            self._alterados_durante_listagem.update(ids)
+        # Alterações seguidas se juntam: a submissão nova supera a anterior e relê a união
+        self._ids_a_reler.update(ids)
+        self.tarefas.submeter(self._reler_produtos, sorted(self._ids_a_reler),
+                              ao_concluir=self._aplicar_alteracao, chave='alteracao')
+
+    def _reler_produtos(self, ids):
+        return ids, self.servico.listar_produtos(ids)
+
+    def _aplicar_alteracao(self, resultado):
+        """Ajusta _produtos_cache in-place (mantendo a ordem) e toca só as linhas afetadas da tabela."""
+        ids, linhas = resultado
+        self._ids_a_reler.difference_update(ids)
+        atuais = {r[0]: r for r in linhas}
+        selecionado = self.tabela.registro_selecionado()
+        estrutural = False
+        alterados = []
+        for pid in ids:
+            antigo = self._produtos_por_id.pop(pid, None)
+            novo = atuais.get(pid)
+            if novo is not None:
+                self.indice_busca.atualizar(pid, novo[1], novo[2])
+            else:
+                self.indice_busca.remover(pid)
+            if antigo is not None:
+                pos = bisect_left(self._chaves_cache, self._chave_ordem(antigo))
+                if novo is not None and self._chave_ordem(novo) == self._chaves_cache[pos]:
+                    # Mesma posição: substitui a linha no lugar
+                    self._produtos_cache[pos] = novo
+                    self._produtos_por_id[pid] = novo
+                    alterados.append(pos)
+                    continue
+                del self._produtos_cache[pos]
+                del self._chaves_cache[pos]
+                estrutural = True
+            if novo is not None:
+                chave = self._chave_ordem(novo)
+                pos = bisect_left(self._chaves_cache, chave)
+                self._produtos_cache.insert(pos, novo)
+                self._chaves_cache.insert(pos, chave)
+                self._produtos_por_id[pid] = novo
+                estrutural = True
+
+        if self.tabela.linhas is not self._produtos_cache:
+            # Há um filtro de busca ativo: reaplica sobre o cache já atualizado
+            self.filtrar_produtos()
+        elif estrutural:
+            idx_sel = None
+            if selecionado is not None and selecionado[0] in self._produtos_por_id:
+                idx_sel = bisect_left(self._chaves_cache, self._chave_ordem(self._produtos_por_id[selecionado[0]]))
+            self.tabela.atualizar(idx_sel)
+        else:
+            self.tabela.atualizar_indices(alterados)
+        self.atualizar_alertas()
+        self.atualizar_previsao()
+
+    # ===== Estoque baixo (painel Repor) =====
+    def atualizar_alertas(self):
+        # Contagem e lista vêm de estoque_baixo (mantida por triggers): custo proporcional aos alertas
+        painel_aberto = self.janela_repor is not None and self.janela_repor.winfo_exists()
+        self.tarefas.submeter(self._ler_alertas, painel_aberto, ao_concluir=self._aplicar_alertas, chave='alertas')
+
+    def _ler_alertas(self, com_lista):
+        if com_lista:
+            linhas = self.servico.listar_estoque_baixo()
+            return len(linhas), linhas
+        return self.servico.contar_estoque_baixo(), None
+
+    def _aplicar_alertas(self, resultado):
+        total, linhas = resultado
+        if total:
+            self.badge_repor.configure(text=f"⚠️ {total} para repor")
+            self.badge_repor.pack(side='right')
+        else:
+            self.badge_repor.pack_forget()
+        if linhas is not None and self.janela_repor is not None and self.janela_repor.winfo_exists():
+            self._preencher_repor(linhas)
+
+    def abrir_painel_repor(self):
+        if self.janela_repor is not None and self.janela_repor.winfo_exists():
+            self.janela_repor.lift()
+            return
+        janela = self.janela_repor = Toplevel(self.root)
+        janela.title("Repor Estoque")
+        janela.geometry("900x420")
+        janela.configure(bg=self.LIGHT_BG)
+        colunas = ('ID', 'Produto', 'Categoria', 'Atual', 'Mínimo', 'Falta', 'Comprar', 'Abaixo desde')
+        larguras = (50, 230, 110, 70, 70, 70, 80, 150)
+        tree = ttk.Treeview(janela, columns=colunas, show='headings')
+        for coluna, largura in zip(colunas, larguras):
+            tree.heading(coluna, text=coluna)
+            tree.column(coluna, width=largura, anchor=W if coluna == 'Produto' else CENTER)
+        tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+        self._tree_repor = tree
+
+        def registrar_entrada():
+            item = tree.focus()
+            if not item:
+                messagebox.showwarning("Atenção", "Selecione um produto na lista.", parent=janela)
+                return
+            valores = tree.item(item, 'values')
+            self.abrir_janela_movimentacao("ENTRADA", (int(valores[0]), valores[1]))
+
+        botoes = Frame(janela, bg=self.LIGHT_BG)
+        botoes.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Button(botoes, text="⬆ Registrar Entrada", command=registrar_entrada).pack(side='left')
+        ttk.Button(botoes, text="Atualizar", command=self.atualizar_alertas).pack(side='left', padx=5)
+        Label(botoes, text="\"Comprar\" usa a previsão de consumo (prazo de entrega + cobertura).",
+              bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(side='right')
+        tree.bind('<Double-1>', lambda e: registrar_entrada())
+        self.atualizar_alertas()
+
+    def _preencher_repor(self, linhas):
+        tree = self._tree_repor
+        tree.delete(*tree.get_children())
+        previsoes = self.previsao.previsoes if self.previsao else {}
+        for pid, nome, categoria, quantidade, minimo, desde in linhas:
+            previsao = previsoes.get(pid)
+            comprar = previsao[6] if previsao else max(0, minimo - quantidade)
+            tree.insert('', 'end', values=(pid, nome, categoria, quantidade, minimo,
+                                           round(minimo - quantidade, 2), comprar, desde))
+
+    # ===== Previsão de demanda =====
+    def atualizar_previsao(self):
+        # Só no modo local: a previsão lê as colunas de movimentações do banco (NumPy, no worker)
+        if self.db is None or self.previsao is False:
+            return
+        self.tarefas.submeter(self._calcular_rupturas, ao_concluir=self._aplicar_rupturas,
+                              ao_falhar=self._previsao_indisponivel, chave='previsao')
+
+    def _calcular_rupturas(self):
+        if self.previsao is None:
+            from previsao import PrevisaoDemanda
+            self.previsao = PrevisaoDemanda(self.db)
+        from previsao import ruptura_proxima
+        return {pid: p[5] for pid, p in self.previsao.atualizar().items() if ruptura_proxima(p)}
+
+    def _aplicar_rupturas(self, rupturas):
+        if rupturas != self._rupturas:
+            self._rupturas = rupturas
+            self.tabela.reformatar_visiveis()
+
+    def _previsao_indisponivel(self, erro):
+        if isinstance(erro, ErroValidacao):
+            # Sem NumPy a tabela continua só com o alerta de mínimo
+            self.previsao = False
 
     def _insert_rows(self, rows):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        self.tree.tag_configure('alerta', background='#ffcccc')
-        self.tree.tag_configure('odd', background='#f0f0f0')
-        self.tree.tag_configure('even', background='#ffffff')
-        for idx, registro in enumerate(rows):
-            (idp, nome, categoria, quantidade, minimo, preco_custo, preco_venda) = registro
-            tags = []
-            if quantidade < minimo:
-                tags.append('alerta')
-            tags.append('odd' if idx % 2 == 1 else 'even')
-            display_nome = ("⚠️ " + str(nome)) if quantidade < minimo else str(nome)
-            nome_up = display_nome.upper()
-            categoria_up = str(categoria).upper()
-            self.tree.insert('', 'end', values=(idp, nome_up, categoria_up, quantidade, minimo, preco_custo, preco_venda), tags=tuple(tags))
+        with medicao.medir('ui: tabela de estoque'):
+            self.tabela.definir_linhas(rows)
+
+    def _formatar_linha(self, idx, registro):
+        (idp, nome, categoria, quantidade, minimo, preco_custo, preco_venda) = registro
+        tags = []
+        display_nome = str(nome)
+        if quantidade < minimo:
+            tags.append('alerta')
+            display_nome = "⚠️ " + display_nome
+        elif idp in self._rupturas:
+            # Ainda acima do mínimo, mas no ritmo atual acaba antes de uma compra chegar
+            tags.append('ruptura')
+            display_nome = "⏳ " + display_nome
+        tags.append('odd' if idx % 2 == 1 else 'even')
+        nome_up = display_nome.upper()
+        categoria_up = str(categoria).upper()
+        return (idp, nome_up, categoria_up, quantidade, minimo, preco_custo, preco_venda), tuple(tags)
 
     def excluir_produto_selecionado(self):
         # Verificar se há um item selecionado
-        selecionado = self.tree.selection()
-        if not selecionado:
+        valores = self.tabela.valores_selecionados()
+        if not valores:
             messagebox.showwarning("Aviso", "Selecione um produto para excluir.")
             return
         
-        # Obter dados do produto selecionado
-        item = self.tree.item(selecionado)
-        valores = item['values']
-        if not valores:
-            return
             
         id_produto = valores[0]
         nome_produto = valores[1]
@@ -432,47 +680,32 @@ class BarberShopApp:
         
         # Se confirmado, excluir o produto
         if resposta:
-            try:
-                with sqlite3.connect(self.DB_NAME) as conn:
-                    cursor = conn.cursor()
-                    # Excluir movimentações relacionadas ao produto
-                    cursor.execute("DELETE FROM movimentacoes WHERE produto_id = ?", (id_produto,))
-                    # Excluir o produto
-                    cursor.execute("DELETE FROM produtos WHERE id = ?", (id_produto,))
-                    conn.commit()
-                    
-                messagebox.showinfo("Sucesso", f"Produto '{nome_produto}' excluído com sucesso!")
-                self.atualizar_listagem()
-            except sqlite3.Error as e:
-                messagebox.showerror("Erro", f"Erro ao excluir produto: {str(e)}")
+            def excluido(_):
+                self.notificacoes.notificar('sucesso', "Produto excluído", nome_produto)
+                self.notificar_alteracao([id_produto])
+            # Exclusão lógica: movimentações e relatórios do produto são preservados
+            self.tarefas.submeter(
+                self.servico.excluir_produto, id_produto, ao_concluir=excluido,
+                ao_falhar=lambda e: self.notificacoes.notificar('erro', "Erro ao excluir produto", str(e)))
     
     def adicionar_produto(self, nome, categoria, quantidade, minimo):
-        if not nome or not categoria:
-            messagebox.showerror("Erro de Validação", "Nome e categoria não podem estar vazios.")
-            return
-        try:
-            if not all(c.isdigit() or c == '.' for c in quantidade.strip()):
-                messagebox.showerror("Erro de Validação", "Quantidade deve conter apenas números e ponto decimal.")
-                return
-            if not all(c.isdigit() for c in minimo.strip()):
-                messagebox.showerror("Erro de Validação", "Estoque mínimo deve conter apenas números inteiros.")
-                return
-            quantidade = float(quantidade)
-            minimo = int(minimo)
-            if quantidade < 0 or minimo < 0:
-                messagebox.showerror("Erro de Validação", "Valores não podem ser negativos.")
-                return
-            self.execute_query(
-                "INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) VALUES (?, ?, ?, ?, 0, 0)",
-                (nome, categoria, quantidade, minimo)
-            )
-            messagebox.showinfo("Sucesso", f"Produto '{nome}' cadastrado com sucesso!")
-            self.atualizar_listagem()
-        except ValueError:
-            messagebox.showerror("Erro de Entrada", "Quantidade e Estoque Mínimo devem ser números válidos.")
+        # Gravação no worker; a validação do núcleo volta pelo ao_falhar
+        def cadastrado(novo_id):
+            self.notificacoes.notificar('sucesso', "Produto cadastrado", nome)
+            self.notificar_alteracao([novo_id])
+
+        def falhou(e):
+            if isinstance(e, ErroValidacao):
+                messagebox.showerror(e.titulo, str(e))
+            else:
+                messagebox.showerror("Erro", f"Erro ao cadastrar produto: {e}")
+        self.tarefas.submeter(self.servico.cadastrar_produto, nome, categoria, quantidade, minimo,
+                              ao_concluir=cadastrado, ao_falhar=falhou)
 
     def abrir_janela_cadastro(self):
-        janela_c = Toplevel(self.root)
+        self.janelas.abrir('cadastro', self._montar_janela_cadastro)
+
+    def _montar_janela_cadastro(self, janela_c):
         janela_c.title("Cadastrar Produto")
         janela_c.geometry("600x500")
         janela_c.configure(bg=self.LIGHT_BG)
@@ -482,16 +715,13 @@ class BarberShopApp:
         nome_e = Entry(form, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
         nome_e.grid(row=0, column=1, sticky='w', padx=8, pady=10)
         Label(form, text="Categoria:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=1, column=0, sticky='e', padx=8, pady=10)
-        categoria_e = ttk.Combobox(form, values=["Pomada", "Shampoo", "Frigobar", "Outro Insumo"], state="readonly")
+        categoria_e = ttk.Combobox(form, values=self.CATEGORIAS, state="readonly")
         categoria_e.grid(row=1, column=1, sticky='w', padx=8, pady=10)
-        categoria_e.current(0)
         Label(form, text="Qtd. Inicial:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=2, column=0, sticky='e', padx=8, pady=10)
         qtd_e = Entry(form, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
-        qtd_e.insert(0, "0")
         qtd_e.grid(row=2, column=1, sticky='w', padx=8, pady=10)
         Label(form, text="Qtd. Mínima:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=3, column=0, sticky='e', padx=8, pady=10)
         min_e = Entry(form, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
-        min_e.insert(0, "0")
         min_e.grid(row=3, column=1, sticky='w', padx=8, pady=10)
         btn_cadastrar = Button(janela_c, text="➕ Cadastrar",
                                bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT,
@@ -499,235 +729,458 @@ class BarberShopApp:
                                command=lambda: self.adicionar_produto(nome_e.get(), categoria_e.get(), qtd_e.get(), min_e.get()))
         btn_cadastrar.pack(pady=10)
 
+        def limpar():
+            # Cada abertura começa um cadastro novo (a categoria escolhida por último fica)
+            nome_e.delete(0, END)
+            for entrada in (qtd_e, min_e):
+                entrada.delete(0, END)
+                entrada.insert(0, "0")
+            if not categoria_e.get():
+                categoria_e.current(0)
+            nome_e.focus_set()
+        return limpar
+
     def abrir_janela_precos(self):
-        if not self.tree.selection():
+        valores = self.tabela.valores_selecionados()
+        if not valores:
             messagebox.showwarning("Atenção", "Selecione um produto na lista primeiro.")
             return
-        item = self.tree.item(self.tree.focus())
-        produto_id = item['values'][0]
-        nome_produto = item['values'][1]
-        preco_custo_atual = item['values'][5] if len(item['values']) > 5 else 0
-        preco_venda_atual = item['values'][6] if len(item['values']) > 6 else 0
-        janela_p = Toplevel(self.root)
-        janela_p.title(f"Definir Preços: {nome_produto}")
+        self.janelas.abrir('precos', self._montar_janela_precos, valores)
+
+    def _montar_janela_precos(self, janela_p):
         janela_p.geometry("600x420")
         janela_p.configure(bg=self.LIGHT_BG)
-        Label(janela_p, text=f"Produto: {nome_produto}", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(pady=12, padx=12)
+        produto = {}
+        rotulo = Label(janela_p, bg=self.LIGHT_BG, fg=self.LIGHT_TEXT)
+        rotulo.pack(pady=12, padx=12)
         Label(janela_p, text="Preço de Custo (R$):", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(pady=8, padx=12)
         e_custo = Entry(janela_p, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
-        e_custo.insert(0, str(preco_custo_atual))
         e_custo.pack(pady=4, padx=12, ipady=4)
         Label(janela_p, text="Preço de Venda (R$):", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(pady=8, padx=12)
         e_venda = Entry(janela_p, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
-        e_venda.insert(0, str(preco_venda_atual))
         e_venda.pack(pady=4, padx=12, ipady=4)
+
+        def preencher(valores):
+            produto['id'], produto['nome'] = valores[0], valores[1]
+            janela_p.title(f"Definir Preços: {produto['nome']}")
+            rotulo.configure(text=f"Produto: {produto['nome']}")
+            for entrada, indice in ((e_custo, 5), (e_venda, 6)):
+                entrada.delete(0, END)
+                entrada.insert(0, str(valores[indice] if len(valores) > indice else 0))
+
         def salvar():
-            try:
-                custo = float(e_custo.get())
-                venda = float(e_venda.get())
-                self.execute_query("UPDATE produtos SET preco_custo=?, preco_venda=? WHERE id=?", (custo, venda, produto_id))
-                messagebox.showinfo("Sucesso", "Preços atualizados!")
-                self.atualizar_listagem()
-                janela_p.destroy()
-            except:
-                messagebox.showerror("Erro", "Valores inválidos de preço.")
+            # A janela pode ser reaberta para outro produto antes da gravação terminar
+            produto_id, nome = produto['id'], produto['nome']
+
+            def salvo(_):
+                self.notificacoes.notificar('sucesso', "Preços atualizados", nome)
+                self.notificar_alteracao([produto_id])
+                if produto['id'] == produto_id:
+                    self.janelas.esconder('precos')
+
+            def falhou(e):
+                if isinstance(e, ErroValidacao):
+                    messagebox.showerror(e.titulo, str(e), parent=janela_p)
+                else:
+                    messagebox.showerror("Erro", f"Erro ao salvar preços: {e}", parent=janela_p)
+            self.tarefas.submeter(self.servico.definir_precos, produto_id, e_custo.get(), e_venda.get(),
+                                  ao_concluir=salvo, ao_falhar=falhou)
         btn_salvar_precos = Button(janela_p, text="Salvar",
                                    bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT, activebackground=self.LIGHT_BUTTON_ACTIVE,
                                    command=salvar)
         btn_salvar_precos.pack(pady=14)
+        return preencher
+
+    def abrir_janela_catalogo(self):
+        # Edição por nome: um nome existente tem preço/situação alterados, um novo é cadastrado
+        janela_c = Toplevel(self.root)
+        janela_c.title("Serviços e Barbeiros")
+        janela_c.geometry("600x560")
+        janela_c.configure(bg=self.LIGHT_BG)
+        catalogo = self._catalogo or {'servicos': [], 'barbeiros': []}
+
+        Label(janela_c, text="Serviços ativos", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(pady=(12, 4), padx=12)
+        lista_servicos = ttk.Treeview(janela_c, columns=('Serviço', 'Preço'), show='headings', height=8)
+        lista_servicos.heading('Serviço', text='Serviço')
+        lista_servicos.heading('Preço', text='Preço')
+        lista_servicos.column('Preço', width=100, anchor=CENTER)
+        for _, nome, preco in catalogo['servicos']:
+            lista_servicos.insert('', 'end', values=(nome, f"{preco:.2f}"))
+        lista_servicos.pack(fill='x', padx=12)
+
+        frame_s = Frame(janela_c, bg=self.LIGHT_BG)
+        frame_s.pack(pady=8, padx=12)
+        Label(frame_s, text="Nome:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=0, padx=4)
+        e_servico = Entry(frame_s, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
+        e_servico.grid(row=0, column=1, padx=4)
+        Label(frame_s, text="Preço (R$):", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=2, padx=4)
+        e_preco = Entry(frame_s, width=10, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
+        e_preco.grid(row=0, column=3, padx=4)
+
+        def selecionar_servico(_):
+            valores = lista_servicos.item(lista_servicos.focus(), 'values')
+            if valores:
+                e_servico.delete(0, END)
+                e_servico.insert(0, valores[0])
+                e_preco.delete(0, END)
+                e_preco.insert(0, valores[1])
+        lista_servicos.bind('<<TreeviewSelect>>', selecionar_servico)
+
+        Label(janela_c, text="Barbeiros ativos: " + (", ".join(n for _, n in catalogo['barbeiros']) or "nenhum"),
+              bg=self.LIGHT_BG, fg=self.LIGHT_TEXT, wraplength=560).pack(pady=(16, 4), padx=12)
+        frame_b = Frame(janela_c, bg=self.LIGHT_BG)
+        frame_b.pack(pady=8, padx=12)
+        Label(frame_b, text="Nome:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=0, padx=4)
+        e_barbeiro = Entry(frame_b, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
+        e_barbeiro.grid(row=0, column=1, padx=4)
+
+        def salvar(operacao, *args, mensagem):
+            def salvo(_):
+                self.notificacoes.notificar('sucesso', "Catálogo atualizado", mensagem)
+                self.carregar_catalogo(recarregar=True)
+                if janela_c.winfo_exists():
+                    janela_c.destroy()
+
+            def falhou(e):
+                if isinstance(e, ErroValidacao):
+                    messagebox.showerror(e.titulo, str(e), parent=janela_c)
+                else:
+                    messagebox.showerror("Erro", f"Erro ao salvar o catálogo: {e}", parent=janela_c)
+            self.tarefas.submeter(operacao, *args, ao_concluir=salvo, ao_falhar=falhou)
+
+        def botao(parent, texto, comando, coluna):
+            Button(parent, text=texto, bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT,
+                   activebackground=self.LIGHT_BUTTON_ACTIVE, command=comando).grid(row=0, column=coluna, padx=4)
+        botao(frame_s, "Salvar", lambda: salvar(self.servico.definir_servico, e_servico.get(), e_preco.get(),
+                                                mensagem=e_servico.get().strip()), 4)
+        botao(frame_s, "Desativar", lambda: salvar(self.servico.desativar_servico, e_servico.get(),
+                                                   mensagem=f"{e_servico.get().strip()} desativado"), 5)
+        botao(frame_b, "Adicionar", lambda: salvar(self.servico.definir_barbeiro, e_barbeiro.get(),
+                                                   mensagem=e_barbeiro.get().strip()), 2)
+        botao(frame_b, "Desativar", lambda: salvar(self.servico.desativar_barbeiro, e_barbeiro.get(),
+                                                   mensagem=f"{e_barbeiro.get().strip()} desativado"), 3)
 
     def atualizar_estoque(self, produto_id, delta, tipo_mov=None):
         try:
-            if not all(c.isdigit() or c == '.' or c == '-' for c in str(delta).strip()):
-                messagebox.showerror("Erro de Validação", "Quantidade deve conter apenas números, ponto decimal ou sinal negativo.")
-                return
-            delta = float(delta)
-            with sqlite3.connect(self.DB_NAME) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT quantidade, nome, preco_custo, preco_venda, minimo FROM produtos WHERE id=?", (produto_id,))
-                resultado = cursor.fetchone()
-            quantidade_atual, nome_produto, preco_custo_atual, preco_venda_atual, minimo_produto = resultado
-            nova_quantidade = quantidade_atual + delta
-            if nova_quantidade < 0:
-                messagebox.showwarning("Atenção", "Operação cancelada: A quantidade não pode ser negativa!")
-                return
-            self.execute_query("UPDATE produtos SET quantidade = ? WHERE id = ?", (nova_quantidade, produto_id))
-            messagebox.showinfo("Sucesso", f"Estoque atualizado. Nova quantidade: {nova_quantidade}")
-            if nova_quantidade < minimo_produto:
-                nome_produto = "⚠️ " + nome_produto
-                messagebox.showwarning("⚠️ ALERTA - Estoque Baixo!",
-                                       f"O produto {nome_produto} está com estoque ABAIXO do mínimo configurado!\n"
-                                       f"Quantidade atual: {nova_quantidade}\n"
-                                       f"Mínimo configurado: {minimo_produto}")
-            if tipo_mov:
-                preco_unit = preco_custo_atual if tipo_mov == "ENTRADA" else preco_venda_atual
-                agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                tipo_norm = "ENTRADA" if tipo_mov == "ENTRADA" else "SAIDA"
-                self.execute_query(
-                    "INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) VALUES (?, ?, ?, ?, ?)",
-                    (produto_id, tipo_norm, abs(delta), preco_unit, agora)
-                )
-            self.atualizar_listagem()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao atualizar o estoque: {e}")
+            delta = nucleo.validar_delta(delta)
+        except ErroValidacao as e:
+            self.notificacoes.notificar('erro', e.titulo, str(e))
+            return
+        self.tarefas.submeter(
+            self._aplicar_movimentacao, produto_id, delta, tipo_mov,
+            ao_concluir=self.exibir_resultado,
+            ao_falhar=lambda e: self.notificacoes.notificar('erro', "Erro ao atualizar o estoque", str(e)))
 
-    def abrir_janela_movimentacao(self, tipo):
-        if not self.tree.selection():
+    def _aplicar_movimentacao(self, produto_id, delta, tipo_mov):
+        # Executa no worker: nada de widgets ou messagebox aqui
+        try:
+            if self.diario:
+                recibo, previsto = self.diario.movimentar(produto_id, delta, tipo_mov)
+                recibo.resultado()
+                return nucleo.resultado_movimentacao(previsto)
+            return nucleo.resultado_movimentacao(self.servico.movimentar(produto_id, delta, tipo_mov))
+        except (EstoqueInsuficiente, ProdutoNaoEncontrado) as e:
+            return nucleo.resultado_recusado(e)
+
+    def exibir_resultado(self, resultado, titulo="Estoque atualizado"):
+        """Mostra um resultado estruturado (nucleo.resultado_*) como toast; alertas de estoque
+        baixo de operações seguidas se juntam num único aviso."""
+        if not resultado['ok']:
+            self.notificacoes.notificar('alerta', "Operação cancelada", resultado['mensagem'])
+            return
+        self.notificacoes.notificar('sucesso', titulo, resultado['mensagem'])
+        self.notificacoes.alertar_estoque_baixo(resultado['alertas'])
+        self.notificar_alteracao(resultado['afetados'])
+
+    def abrir_janela_movimentacao(self, tipo, valores=None):
+        valores = valores or self.tabela.valores_selecionados()
+        if not valores:
             messagebox.showwarning("Atenção", "Selecione um produto na lista primeiro.")
             return
-        item_selecionado = self.tree.item(self.tree.focus())
-        produto_id = item_selecionado['values'][0]
-        nome_produto = item_selecionado['values'][1]
-        janela_m = Toplevel(self.root)
-        janela_m.title(f"{tipo} de Estoque: {nome_produto}")
+        # Uma janela só para entrada e saída: reabrir troca o tipo e o produto
+        self.janelas.abrir('movimentacao', self._montar_janela_movimentacao, tipo, valores)
+
+    def _montar_janela_movimentacao(self, janela_m):
         janela_m.geometry("700x520")
         janela_m.configure(bg=self.LIGHT_BG)
-        delta_sinal = 1 if tipo == "ENTRADA" else -1
+        atual = {}
         form = Frame(janela_m, bg=self.LIGHT_BG)
         form.pack(pady=10, padx=12, fill='both', expand=True)
         Label(form, text=f"Produto:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=0, sticky='e', padx=8, pady=10)
-        Label(form, text=f"{nome_produto}", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=1, sticky='w', padx=8, pady=10)
-        Label(form, text=f"Quantidade para {tipo}:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=1, column=0, sticky='e', padx=8, pady=10)
+        nome_l = Label(form, bg=self.LIGHT_BG, fg=self.LIGHT_TEXT)
+        nome_l.grid(row=0, column=1, sticky='w', padx=8, pady=10)
+        qtd_l = Label(form, bg=self.LIGHT_BG, fg=self.LIGHT_TEXT)
+        qtd_l.grid(row=1, column=0, sticky='e', padx=8, pady=10)
         qtd_m = Entry(form, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
-        qtd_m.insert(0, "1")
         qtd_m.grid(row=1, column=1, sticky='w', padx=8, pady=10)
-        btn_confirmar = Button(janela_m, text=("⬆ ENTRADA" if tipo == "ENTRADA" else "⬇ SAÍDA"),
-                               command=lambda: [
-                                   self.atualizar_estoque(
-                                       produto_id,
-                                       float(qtd_m.get()) * delta_sinal,
-                                       tipo_mov=("ENTRADA" if tipo == "ENTRADA" else "SAIDA")
-                                   ),
-                                   janela_m.destroy()
-                               ])
+
+        def confirmar():
+            delta_sinal = 1 if atual['tipo'] == "ENTRADA" else -1
+            self.atualizar_estoque(atual['id'], float(qtd_m.get()) * delta_sinal,
+                                   tipo_mov=("ENTRADA" if atual['tipo'] == "ENTRADA" else "SAIDA"))
+            self.janelas.esconder('movimentacao')
+        btn_confirmar = Button(janela_m, command=confirmar)
         btn_confirmar.configure(bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT, activebackground=self.LIGHT_BUTTON_ACTIVE)
         btn_confirmar.pack(pady=10)
 
+        def preencher(tipo, valores):
+            atual['tipo'], atual['id'] = tipo, valores[0]
+            janela_m.title(f"{tipo} de Estoque: {valores[1]}")
+            nome_l.configure(text=f"{valores[1]}")
+            qtd_l.configure(text=f"Quantidade para {tipo}:")
+            btn_confirmar.configure(text=("⬆ ENTRADA" if tipo == "ENTRADA" else "⬇ SAÍDA"))
+            qtd_m.delete(0, END)
+            qtd_m.insert(0, "1")
+            qtd_m.focus_set()
+        return preencher
+
+    def abrir_janela_lote(self):
+        janela_l = Toplevel(self.root)
+        janela_l.title("Movimentação em Lote")
+        janela_l.geometry("760x560")
+        janela_l.configure(bg=self.LIGHT_BG)
+        itens = []  # (produto_id, quantidade, preco_unitario)
+
+        topo = Frame(janela_l, bg=self.LIGHT_BG)
+        topo.pack(fill='x', padx=12, pady=10)
+        Label(topo, text="Tipo:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(side=LEFT, padx=4)
+        tipo_c = ttk.Combobox(topo, values=["ENTRADA", "SAÍDA"], state="readonly", width=10)
+        tipo_c.current(0)
+        tipo_c.pack(side=LEFT, padx=4)
+
+        form = Frame(janela_l, bg=self.LIGHT_BG)
+        form.pack(fill='x', padx=12)
+        opcoes = [f"{r[0]} - {r[1]}" for r in self._produtos_cache]
+        Label(form, text="Produto:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=0, sticky='e', padx=4, pady=4)
+        produto_c = ttk.Combobox(form, values=opcoes, width=34)
+        produto_c.grid(row=0, column=1, sticky='w', padx=4, pady=4)
+        Label(form, text="Qtd.:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=2, sticky='e', padx=4)
+        qtd_e = Entry(form, width=8, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
+        qtd_e.insert(0, "1")
+        qtd_e.grid(row=0, column=3, padx=4)
+        Label(form, text="Preço Unit.:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=4, sticky='e', padx=4)
+        preco_e = Entry(form, width=8, bg=self.LIGHT_CARD, fg=self.LIGHT_TEXT, insertbackground=self.LIGHT_TEXT)
+        preco_e.grid(row=0, column=5, padx=4)
+
+        cols = ('ID', 'Produto', 'Quantidade', 'Preço Unit.')
+        grade = ttk.Treeview(janela_l, columns=cols, show='headings', style='Light.Treeview', height=10)
+        for col in cols:
+            grade.heading(col, text=col); grade.column(col, width=110, anchor=CENTER)
+        grade.column('Produto', width=300, anchor=W)
+        grade.pack(fill='both', expand=True, padx=12, pady=8)
+
+        def incluir(produto_id, quantidade, preco):
+            itens.append((produto_id, quantidade, preco))
+            nome = self._produtos_por_id.get(produto_id, (produto_id, "?"))[1]
+            grade.insert('', 'end', values=(produto_id, nome, quantidade, "" if preco is None else f"{preco:.2f}"))
+
+        def adicionar():
+            try:
+                produto_id = int(produto_c.get().split(" - ", 1)[0])
+                quantidade = float(qtd_e.get())
+                preco = float(preco_e.get()) if preco_e.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Erro de Validação", "Informe produto, quantidade e preço válidos.", parent=janela_l)
+                return
+            incluir(produto_id, quantidade, preco)
+
+        def importar_csv():
+            caminho = filedialog.askopenfilename(parent=janela_l, filetypes=[("CSV", "*.csv"), ("Todos", "*.*")])
+            if not caminho:
+                return
+            try:
+                for item in ler_itens_csv(caminho):
+                    incluir(*item)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Erro", str(e), parent=janela_l)
+
+        def remover():
+            for item_id in grade.selection():
+                del itens[grade.index(item_id)]
+                grade.delete(item_id)
+
+        def concluido(resultado):
+            ids, baixos = resultado
+            self.exibir_resultado(nucleo.resultado_lote(ids, baixos, len(itens)), "Lote aplicado")
+            janela_l.destroy()
+
+        def falhou(erro):
+            # O lote recusado fica aberto para correção: aqui o diálogo é o retorno esperado
+            if isinstance(erro, (EstoqueInsuficiente, ProdutoNaoEncontrado)):
+                msg = nucleo.resultado_recusado(erro)['mensagem']
+            else:
+                msg = f"Ocorreu um erro ao aplicar o lote: {erro}"
+            messagebox.showerror("Erro", msg, parent=janela_l)
+
+        def aplicar():
+            if not itens:
+                messagebox.showwarning("Atenção", "Adicione ao menos um item ao lote.", parent=janela_l)
+                return
+            tipo = "ENTRADA" if tipo_c.get() == "ENTRADA" else "SAIDA"
+            self.tarefas.submeter(self.servico.movimentar_lote, list(itens), tipo, ao_concluir=concluido, ao_falhar=falhou)
+
+        botoes = Frame(janela_l, bg=self.LIGHT_BG)
+        botoes.pack(fill='x', padx=12, pady=8)
+        for texto, comando in (("➕ Adicionar", adicionar), ("📄 Importar CSV", importar_csv),
+                               ("🗑️ Remover", remover), ("✔ Aplicar Lote", aplicar)):
+            Button(botoes, text=texto, command=comando, bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT,
+                   activebackground=self.LIGHT_BUTTON_ACTIVE).pack(side=LEFT, padx=6)
+
+    def abrir_janela_transferencia(self):
+        if self.servico.remoto:
+            messagebox.showinfo("Importar / Exportar",
+                                "Em modo caixa a importação/exportação roda no computador do servidor:\n"
+                                "python estoque.py import|export <tabela> <arquivo>")
+            return
+        import transferencia  # importado sob demanda: csv/json só carregam quando a janela abre
+        janela_t = Toplevel(self.root)
+        janela_t.title("Importar / Exportar")
+        janela_t.geometry("520x260")
+        janela_t.configure(bg=self.LIGHT_BG)
+
+        form = Frame(janela_t, bg=self.LIGHT_BG)
+        form.pack(fill='x', padx=12, pady=12)
+        Label(form, text="Tabela:", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).grid(row=0, column=0, sticky='e', padx=4, pady=4)
+        tabela_c = ttk.Combobox(form, values=list(transferencia.TABELAS), state="readonly", width=18)
+        tabela_c.current(0)
+        tabela_c.grid(row=0, column=1, sticky='w', padx=4, pady=4)
+        retomar_v = BooleanVar(value=True)
+        Checkbutton(form, text="Retomar importação interrompida", variable=retomar_v,
+                    bg=self.LIGHT_BG, fg=self.LIGHT_TEXT, selectcolor=self.LIGHT_CARD).grid(row=1, column=0, columnspan=2, sticky='w', padx=4)
+        situacao = Label(janela_t, text="", bg=self.LIGHT_BG, fg=self.LIGHT_TEXT, justify=LEFT, wraplength=480)
+        situacao.pack(fill='x', padx=12)
+        tipos = [("CSV", "*.csv"), ("JSON", "*.json"), ("Todos", "*.*")]
+        botoes_lista = []
+
+        def pai():
+            # A janela pode ter sido fechada enquanto o worker trabalhava
+            return janela_t if janela_t.winfo_exists() else self.root
+
+        def ocupar(texto):
+            if not janela_t.winfo_exists():
+                return
+            situacao.configure(text=texto)
+            for b in botoes_lista:
+                b.configure(state=DISABLED if texto else NORMAL)
+
+        def falhou(erro):
+            ocupar("")
+            messagebox.showerror("Erro", f"Falha na transferência: {erro}", parent=pai())
+
+        def exportar():
+            tabela = tabela_c.get()
+            caminho = filedialog.asksaveasfilename(parent=janela_t, defaultextension=".csv", filetypes=tipos,
+                                                   initialfile=f"{tabela}.csv")
+            if not caminho:
+                return
+
+            def concluido(total):
+                ocupar("")
+                messagebox.showinfo("Sucesso", f"{total} linhas de {tabela} exportadas.", parent=pai())
+            ocupar(f"Exportando {tabela}…")
+            self.tarefas.submeter(transferencia.exportar, self.db, tabela, caminho,
+                                  ao_concluir=concluido, ao_falhar=falhou)
+
+        def importar():
+            tabela = tabela_c.get()
+            caminho = filedialog.askopenfilename(parent=janela_t, filetypes=tipos)
+            if not caminho:
+                return
+            rejeitados = caminho + ".rejeitados.csv"
+
+            def concluido(resultado):
+                ocupar("")
+                msg = (f"{resultado['importados']} registros importados, "
+                       f"{resultado['rejeitados']} rejeitados de {resultado['registros']}.")
+                if resultado['retomado_de']:
+                    msg += f"\nRetomado a partir do registro {resultado['retomado_de']}."
+                if resultado['rejeitados']:
+                    msg += f"\nDetalhes das rejeições em:\n{rejeitados}"
+                messagebox.showinfo("Importação concluída", msg, parent=pai())
+                if tabela == 'produtos':
+                    self.atualizar_listagem()
+            ocupar(f"Importando {tabela}…")
+            self.tarefas.submeter(transferencia.importar, self.db, tabela, caminho, None,
+                                  transferencia.TAMANHO_LOTE, not retomar_v.get(), rejeitados,
+                                  ao_concluir=concluido, ao_falhar=falhou)
+
+        botoes = Frame(janela_t, bg=self.LIGHT_BG)
+        botoes.pack(fill='x', padx=12, pady=12)
+        for texto, comando in (("⬇ Exportar…", exportar), ("⬆ Importar…", importar)):
+            b = Button(botoes, text=texto, command=comando, bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT,
+                       activebackground=self.LIGHT_BUTTON_ACTIVE)
+            b.pack(side=LEFT, padx=6)
+            botoes_lista.append(b)
+
+    def _agendar_busca(self, event=None):
+        # Debounce: digitação rápida resulta em uma única busca/renderização
+        if self._busca_agendada is not None:
+            self.root.after_cancel(self._busca_agendada)
+        self._busca_agendada = self.root.after(self.DEBOUNCE_BUSCA_MS, self.filtrar_produtos)
+
     def filtrar_produtos(self, event=None):
-        termo = self.search_entry.get().lower().strip()
-        if not termo:
+        self._busca_agendada = None
+        termo = self.search_entry.get().strip()
+        categoria = self.categoria_filtro.get()
+        categoria = None if categoria == "Todas" else categoria
+        if not termo and not categoria:
             # Campo vazio: reexibe todos
             self._insert_rows(self._produtos_cache)
             return
-        filtrados = []
-        for (idp, nome, categoria, quantidade, minimo, preco_custo, preco_venda) in self._produtos_cache:
-            if termo in str(nome).lower():
-                filtrados.append((idp, nome, categoria, quantidade, minimo, preco_custo, preco_venda))
-        self._insert_rows(filtrados)
+        ids = self.indice_busca.buscar(termo, categoria)
+        self._insert_rows(self._ordenar_por_cache(ids))
+
+    def _ordenar_por_cache(self, ids):
+        # Poucos resultados: ordena só eles; muitos: percorre o cache já ordenado
+        if len(ids) * 8 < len(self._produtos_cache):
+            return sorted((self._produtos_por_id[i] for i in ids), key=self._chave_ordem)
+        return [r for r in self._produtos_cache if r[0] in ids]
 
     # ===== Serviços =====
     def registrar_servico(self, servico, valor, barbeiro):
         try:
-            valor_float = float(valor)
-            if valor_float <= 0:
-                messagebox.showerror("Erro", "O valor deve ser maior que zero.")
-                return False
-            agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.execute_query(
-                "INSERT INTO servicos (servico, valor, barbeiro, data_hora) VALUES (?, ?, ?, ?)",
-                (servico, valor_float, barbeiro, agora)
-            )
-            return True
-        except ValueError:
-            messagebox.showerror("Erro", "Valor deve ser um número válido.")
+            if self.diario:
+                # Validado na hora; a confirmação vem quando o log do grupo chega ao disco e a espera
+                # pelo fsync fica num worker. A gravação no banco vem depois, no mesmo grupo.
+                recibo = self.diario.registrar_servico(servico, valor, barbeiro)
+
+                def confirmado(_):
+                    self.notificacoes.notificar('sucesso', "Serviço registrado", f"{servico} • {barbeiro} • R$ {float(valor):.2f}")
+                    self.tarefas.submeter(recibo.resultado, ao_falhar=lambda e: self.notificacoes.notificar(
+                        'erro', "Serviço recusado pelo banco", f"{servico} ({barbeiro}) estava no diário: {e}"))
+
+                self.tarefas.submeter(recibo.duravel.result, 10, ao_concluir=confirmado, ao_falhar=lambda e: (
+                    self.notificacoes.notificar('erro', "Erro ao registrar serviço", str(e) or type(e).__name__)))
+                return True
+        except ErroValidacao as e:
+            self.notificacoes.notificar('erro', e.titulo, str(e))
             return False
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao registrar serviço: {e}")
+            self.notificacoes.notificar('erro', "Erro ao registrar serviço", str(e))
             return False
 
-    def calcular_resumo_servicos(self, periodo_inicio=None, periodo_fim=None):
-        with sqlite3.connect(self.DB_NAME) as conn:
-            cursor = conn.cursor()
-            params = []
-            filtro_data = ""
-            if periodo_inicio and periodo_fim:
-                filtro_data = " WHERE datetime(data_hora) BETWEEN datetime(?) AND datetime(?)"
-                params.extend([periodo_inicio + " 00:00:00", periodo_fim + " 23:59:59"])
-            cursor.execute(
-                """
-                SELECT servico,
-                       COUNT(*) as quantidade,
-                       SUM(valor) as total,
-                       barbeiro,
-                       COUNT(CASE WHEN barbeiro = barbeiro THEN 1 END) as qtd_barbeiro,
-                       SUM(CASE WHEN barbeiro = barbeiro THEN valor ELSE 0 END) as total_barbeiro
-                FROM servicos
-                """ + filtro_data + """
-                GROUP BY servico, barbeiro
-                ORDER BY servico, barbeiro
-                """,
-                params
-            )
-            dados_servicos = cursor.fetchall()
-            cursor.execute(
-                """
-                SELECT SUM(valor) as total_servicos
-                FROM servicos
-                """ + filtro_data,
-                params
-            )
-            total_servicos = cursor.fetchone()[0] or 0
-        return dados_servicos, total_servicos
+        def falhou(e):
+            if isinstance(e, ErroValidacao):
+                self.notificacoes.notificar('erro', e.titulo, str(e))
+            else:
+                self.notificacoes.notificar('erro', "Erro ao registrar serviço", str(e))
+        self.tarefas.submeter(self.servico.registrar_servico, servico, valor, barbeiro, ao_falhar=falhou,
+                              ao_concluir=lambda _: self.notificacoes.notificar(
+                                  'sucesso', "Serviço registrado", f"{servico} • {barbeiro} • R$ {float(valor):.2f}"))
+        return True
 
     # ===== Fechamento de Caixa =====
+    @medicao.cronometrado('fechamento: resumo_caixa')
     def calcular_resumo_caixa(self, periodo_inicio=None, periodo_fim=None, produto_id=None):
-        with sqlite3.connect(self.DB_NAME) as conn:
-            cursor = conn.cursor()
-            params = []
-            if periodo_inicio and periodo_fim:
-                if produto_id:
-                    cursor.execute(
-                        """
-                        SELECT p.id, p.nome,
-                               SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade ELSE 0 END) AS qtd_entrada,
-                               SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade ELSE 0 END) AS qtd_saida,
-                               SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_compra,
-                               SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_venda
-                        FROM produtos p
-                        LEFT JOIN movimentacoes m ON m.produto_id = p.id
-                        WHERE p.id = ? AND datetime(m.data_hora) BETWEEN datetime(?) AND datetime(?)
-                        GROUP BY p.id, p.nome
-                        ORDER BY p.nome
-                        """,
-                        [produto_id, periodo_inicio + " 00:00:00", periodo_fim + " 23:59:59"]
-                    )
-                else:
-                    cursor.execute(
-                        """
-                        SELECT p.id, p.nome,
-                               SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade ELSE 0 END) AS qtd_entrada,
-                               SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade ELSE 0 END) AS qtd_saida,
-                               SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_compra,
-                               SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_venda
-                        FROM produtos p
-                        LEFT JOIN movimentacoes m ON m.produto_id = p.id
-                        WHERE datetime(m.data_hora) BETWEEN datetime(?) AND datetime(?)
-                        GROUP BY p.id, p.nome
-                        ORDER BY p.nome
-                        """,
-                        [periodo_inicio + " 00:00:00", periodo_fim + " 23:59:59"]
-                    )
-            else:
-                cursor.execute(
-                    """
-                    SELECT p.id, p.nome,
-                           SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade ELSE 0 END) AS qtd_entrada,
-                           SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade ELSE 0 END) AS qtd_saida,
-                           SUM(CASE WHEN m.tipo='ENTRADA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_compra,
-                           SUM(CASE WHEN m.tipo='SAIDA' THEN m.quantidade*m.preco_unitario ELSE 0 END) AS total_venda
-                    FROM produtos p
-                    LEFT JOIN movimentacoes m ON m.produto_id = p.id
-                    GROUP BY p.id, p.nome
-                    ORDER BY p.nome
-                    """
-                )
-            dados = cursor.fetchall()
-        return dados
+        return self.servico.resumo_caixa(periodo_inicio, periodo_fim, produto_id)
 
     def abrir_janela_fechamento_caixa(self):
-        janela_f = Toplevel(self.root)
+        # Reabrir mantém o período digitado e só recarrega os números
+        self.janelas.abrir('fechamento', self._montar_janela_fechamento)
+
+    def _montar_janela_fechamento(self, janela_f):
         janela_f.title("Fechamento de Caixa")
-        janela_f.geometry("900x600")
+        janela_f.geometry("900x760")
         janela_f.configure(bg=self.COLOR_BG)
 
         frame_style = {'bg': self.COLOR_BG, 'padx': 10, 'pady': 10}
@@ -777,54 +1230,172 @@ class BarberShopApp:
         frame_resultados = Frame(janela_f, **frame_style)
         frame_resultados.pack(pady=10, fill="both", expand=True)
 
+        # Widgets montados uma vez: carregar() só troca os dados (TabelaRelatorio aplica a diferença)
+        def secao(titulo, colunas, larguras, altura, paginada=True, **opcoes):
+            frame = LabelFrame(frame_resultados, text=titulo, bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 11, "bold"))
+            frame.pack(fill="both", expand=True, padx=5, pady=5)
+            tree = ttk.Treeview(frame, columns=colunas, show='headings', height=altura, style='Treeview')
+            for col in colunas:
+                tree.heading(col, text=col)
+                tree.column(col, width=larguras.get(col, 100), anchor=W if col in larguras else CENTER)
+            controles = None
+            if paginada:
+                controles = Frame(frame, bg=self.COLOR_CARD)
+                controles.pack(side='bottom', fill='x', padx=5)
+            tree.pack(fill="both", expand=True, padx=5, pady=5)
+            return frame, TabelaRelatorio(tree, controles=controles, cor_texto=self.COLOR_TEXT_SECONDARY, **opcoes)
+
+        _, tabela_prod = secao(
+            "Movimentação de Produtos", ('Produto', 'Entradas', 'Saídas', 'Compras (R$)', 'Vendas (R$)', 'Lucro (R$)'),
+            {'Produto': 200}, 8,
+            # (id, nome, entradas, saídas, compras, vendas, lucro)
+            formatar=lambda r: (r[1], r[2], r[3], f"R$ {r[4]:.2f}", f"R$ {r[5]:.2f}", f"R$ {r[6]:.2f}"),
+            ordem=[(lambda r, i=i: r[i]) for i in range(1, 7)])
+        _, tabela_serv = secao(
+            "Serviços Realizados", ('Serviço', 'Qtd', 'Total (R$)', 'Barbeiro', 'Qtd por Barbeiro', 'Total por Barbeiro (R$)'),
+            {'Serviço': 150, 'Barbeiro': 100}, 8,
+            formatar=lambda r: (r[0], r[1], f"R$ {r[2]:.2f}", r[3], r[4], f"R$ {r[5]:.2f}"),
+            chave=lambda r: (r[0], r[3]))
+        frame_desemp, tabela_desemp = secao(
+            "Desempenho por Barbeiro", ('Barbeiro', 'Atendimentos', 'Total (R$)', 'Ticket Médio (R$)', 'Serviços/hora', 'vs Anterior'),
+            {'Barbeiro': 150}, 4, paginada=False,
+            # (barbeiro, atendimentos, total, ticket, horas, serviços/hora, variação)
+            formatar=lambda r: (r[0], r[1], f"R$ {r[2]:.2f}", f"R$ {r[3]:.2f}", f"{r[5]:.2f}",
+                                "—" if r[6] is None else f"{r[6]:+.0%}"),
+            ordem=[(lambda r, i=i: r[i]) for i in (0, 1, 2, 3, 5, 6)])
+
+        frame_res = LabelFrame(frame_resultados, text="RESUMO DO PERÍODO", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 11, "bold"))
+        frame_res.pack(fill="both", padx=5, pady=5)
+        resumo = [Label(frame_res, bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 10, "bold" if i == 3 else "normal"))
+                  for i in range(4)]
+        for rotulo in resumo:
+            rotulo.pack(anchor='w', padx=10, pady=2)
+
+        def consultar(data_ini, data_fim):
+            # Executa no worker; um clique mais novo em Carregar/filtro descarta este resultado.
+            # Serviços Realizados e o total saem do relatório de desempenho (uma leitura só)
+            return self.calcular_resumo_caixa(data_ini, data_fim), self.servico.desempenho_barbeiros(data_ini, data_fim)
+
         def carregar():
-            for widget in frame_resultados.winfo_children():
-                widget.destroy()
             data_ini = e_ini.get(); data_fim = e_fim.get()
             try:
                 datetime.strptime(data_ini, "%Y-%m-%d"); datetime.strptime(data_fim, "%Y-%m-%d")
             except ValueError:
-                messagebox.showerror("Erro", "Formato de data inválido. Use AAAA-MM-DD"); return
-            dados_produtos = self.calcular_resumo_caixa(data_ini, data_fim)
-            dados_servicos, total_servicos = self.calcular_resumo_servicos(data_ini, data_fim)
-
-            frame_produtos = LabelFrame(frame_resultados, text="Movimentação de Produtos", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 11, "bold"))
-            frame_produtos.pack(fill="both", expand=True, padx=5, pady=5)
-            cols_prod = ('Produto', 'Entradas', 'Saídas', 'Compras (R$)', 'Vendas (R$)', 'Lucro (R$)')
-            tree_prod = ttk.Treeview(frame_produtos, columns=cols_prod, show='headings', height=8, style='Treeview')
-            for col in cols_prod:
-                tree_prod.heading(col, text=col); tree_prod.column(col, width=100, anchor=CENTER)
-            tree_prod.column('Produto', width=200, anchor=W)
-            total_compras = total_vendas = total_lucro = 0
-            for item in dados_produtos:
-                pid, nome, q_in, q_out, tot_comp, tot_vend = item
-                lucro = tot_vend - tot_comp
-                tree_prod.insert('', 'end', values=(nome, q_in, q_out, f"R$ {tot_comp:.2f}", f"R$ {tot_vend:.2f}", f"R$ {lucro:.2f}"))
-                total_compras += tot_comp; total_vendas += tot_vend; total_lucro += lucro
-            tree_prod.insert('', 'end', values=('TOTAL', '', '', f"R$ {total_compras:.2f}", f"R$ {total_vendas:.2f}", f"R$ {total_lucro:.2f}"))
-            tree_prod.pack(fill="both", expand=True, padx=5, pady=5)
-
-            frame_serv = LabelFrame(frame_resultados, text="Serviços Realizados", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 11, "bold"))
-            frame_serv.pack(fill="both", expand=True, padx=5, pady=5)
-            cols_serv = ('Serviço', 'Qtd', 'Total (R$)', 'Barbeiro', 'Qtd por Barbeiro', 'Total por Barbeiro (R$)')
-            tree_serv = ttk.Treeview(frame_serv, columns=cols_serv, show='headings', height=8, style='Treeview')
-            for col in cols_serv:
-                tree_serv.heading(col, text=col); tree_serv.column(col, width=100, anchor=CENTER)
-            tree_serv.column('Serviço', width=150, anchor=W); tree_serv.column('Barbeiro', width=100, anchor=W)
-            for item in dados_servicos:
-                servico, qtd, total, barbeiro, qtd_b, total_b = item
-                tree_serv.insert('', 'end', values=(servico, qtd, f"R$ {total:.2f}", barbeiro, qtd_b, f"R$ {total_b:.2f}"))
-            tree_serv.pack(fill="both", expand=True, padx=5, pady=5)
-
-            frame_res = LabelFrame(frame_resultados, text="RESUMO DO PERÍODO", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 11, "bold"))
-            frame_res.pack(fill="both", padx=5, pady=5)
-            Label(frame_res, text=f"Total em Serviços: R$ {total_servicos:.2f}", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 10)).pack(anchor='w', padx=10, pady=2)
-            Label(frame_res, text=f"Total em Produtos: R$ {total_lucro:.2f}", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 10)).pack(anchor='w', padx=10, pady=2)
-            Label(frame_res, text=f"Total Geral: R$ {(total_servicos + total_lucro):.2f}", bg=self.COLOR_CARD, fg=self.COLOR_TEXT, font=("Segoe UI", 10, "bold")).pack(anchor='w', padx=10, pady=2)
+                messagebox.showerror("Erro", "Formato de data inválido. Use AAAA-MM-DD", parent=janela_f); return
+            self.tarefas.submeter(consultar, data_ini, data_fim, ao_concluir=exibir, chave='fechamento')
+
+        def exibir(resultado):
+            if not janela_f.winfo_exists():
+                return
+            dados_produtos, desempenho = resultado
+
+            produtos = [(pid, nome, q_in, q_out, tot_comp, tot_vend, tot_vend - tot_comp)
+                        for pid, nome, q_in, q_out, tot_comp, tot_vend in dados_produtos]
+            total_compras = sum(p[4] for p in produtos)
+            total_vendas = sum(p[5] for p in produtos)
+            total_lucro = total_vendas - total_compras
+            tabela_prod.definir_linhas(produtos, rodape=('TOTAL', '', '', f"R$ {total_compras:.2f}",
+                                                         f"R$ {total_vendas:.2f}", f"R$ {total_lucro:.2f}"))
+            tabela_serv.definir_linhas(desempenho['linhas'])
+
+            anterior = desempenho['anterior']
+            frame_desemp.configure(text=f"Desempenho por Barbeiro (vs {anterior['inicio'][:10]} a {anterior['fim'][:10]})")
+            tabela_desemp.definir_linhas(desempenho['barbeiros'])
+
+            geral = desempenho['geral']
+            total_servicos = geral['total']
+            textos = (f"Total em Serviços: R$ {total_servicos:.2f}",
+                      f"Atendimentos: {geral['atendimentos']} • Ticket médio: R$ {geral['ticket_medio']:.2f} • "
+                      f"Serviços/hora: {geral['servicos_por_hora']:.2f}",
+                      f"Total em Produtos: R$ {total_lucro:.2f}",
+                      f"Total Geral: R$ {(total_servicos + total_lucro):.2f}")
+            for rotulo, texto in zip(resumo, textos):
+                rotulo.configure(text=texto)
 
         btn_carregar = Button(frame_filtros, text="Carregar 🔄", command=carregar, bg='white', fg='black', activebackground='#E5E5E5')
         btn_carregar.pack(side=LEFT, padx=10)
-        carregar()
+        return carregar
+
+    # ===== Desempenho =====
+    def abrir_painel_desempenho(self):
+        # Painel oculto (F12): p50/p95 por operação, contadores, spans recentes e cProfile
+        self.janelas.abrir('desempenho', self._montar_painel_desempenho)
+
+    def _montar_painel_desempenho(self, janela_d):
+        janela_d.title("Desempenho")
+        janela_d.geometry("1000x680")
+        janela_d.configure(bg=self.LIGHT_BG)
+        agendado = {}
+
+        def tabela(colunas, larguras, altura, **opcoes):
+            tree = ttk.Treeview(janela_d, columns=colunas, show='headings', height=altura)
+            for col, largura in zip(colunas, larguras):
+                tree.heading(col, text=col)
+                tree.column(col, width=largura, anchor=W if largura > 200 else CENTER)
+            controles = Frame(janela_d, bg=self.LIGHT_BG)
+            tree.pack(fill='both', expand=True, padx=10, pady=(10, 0))
+            controles.pack(fill='x', padx=10)
+            return TabelaRelatorio(tree, controles=controles, **opcoes)
+
+        # (operação, chamadas, p50, p95, máximo, total) de medicao.resumo()
+        tabela_ops = tabela(('Operação', 'Chamadas', 'p50 (ms)', 'p95 (ms)', 'Máx (ms)', 'Total (ms)'),
+                            (480, 80, 80, 80, 80, 90), 12,
+                            formatar=lambda r: (r[0], r[1], f"{r[2]:.2f}", f"{r[3]:.2f}", f"{r[4]:.2f}", f"{r[5]:.1f}"))
+        contadores_l = Label(janela_d, bg=self.LIGHT_BG, fg=self.LIGHT_TEXT, anchor='w', justify='left')
+        contadores_l.pack(fill='x', padx=10, pady=4)
+        # (quando, operação, ms, detalhe, thread, seq) de medicao.recentes(); o seq é a chave (o
+        # mesmo op na mesma thread e no mesmo milissegundo repetiria qualquer outra combinação)
+        tabela_spans = tabela(('Hora', 'Operação', 'ms', 'Thread', 'Detalhe'), (90, 300, 70, 90, 400), 8,
+                              formatar=lambda r: (datetime.fromtimestamp(r[0]).strftime("%H:%M:%S.%f")[:-3], r[1],
+                                                  f"{r[2]:.2f}", r[4], " ".join(str(r[3] or "").split())),
+                              chave=lambda r: r[5],
+                              ordem=[lambda r: r[0], lambda r: r[1], lambda r: r[2], lambda r: r[4], lambda r: r[3] or ""])
+
+        rodape = Frame(janela_d, bg=self.LIGHT_BG)
+        rodape.pack(fill='x', padx=10, pady=8)
+        lentas = (f"Consultas lentas (≥ {medicao.LENTA_MS:g} ms): "
+                  + (medicao.LOG_LENTAS or "log desligado (defina ESTOQUE_LOG_LENTAS)"))
+        Label(rodape, text=lentas if medicao.ATIVO else "Medição desligada (ESTOQUE_MEDICAO=0)",
+              bg=self.LIGHT_BG, fg=self.LIGHT_TEXT).pack(side='left')
+        perfil_texto = Text(janela_d, height=10, font=("Consolas", 9))
+
+        def alternar_perfil():
+            if not medicao.perfil_ativo():
+                medicao.iniciar_perfil()
+                btn_perfil.configure(text="⏹ Parar perfil")
+                return
+            caminho = self.ARQUIVO_PERFIL or f"{os.path.splitext(self.DB_NAME)[0]}-{datetime.now():%Y%m%d-%H%M%S}.prof"
+            saida = medicao.parar_perfil(caminho)
+            btn_perfil.configure(text="⏺ Iniciar perfil")
+            perfil_texto.delete('1.0', END)
+            perfil_texto.insert('1.0', saida)
+            perfil_texto.pack(fill='both', padx=10, pady=(0, 10))
+            self.notificacoes.notificar('info', "Perfil gravado", os.path.abspath(caminho))
+
+        def limpar():
+            medicao.limpar()
+            atualizar()
+
+        btn_perfil = Button(rodape, bg=self.LIGHT_BUTTON, fg=self.LIGHT_TEXT, activebackground=self.LIGHT_BUTTON_ACTIVE,
+                            text="⏹ Parar perfil" if medicao.perfil_ativo() else "⏺ Iniciar perfil", command=alternar_perfil)
+        btn_perfil.pack(side='right')
+        ttk.Button(rodape, text="Limpar", command=limpar).pack(side='right', padx=5)
+
+        def atualizar():
+            # Atualiza a cada segundo enquanto o painel está aberto (só as linhas que mudaram)
+            if agendado.get('id'):
+                self.root.after_cancel(agendado.pop('id'))
+            tabela_ops.definir_linhas(medicao.resumo())
+            tabela_spans.definir_linhas(medicao.recentes())
+            contadores_l.configure(text=" • ".join(f"{nome}: {valor}" for nome, valor in sorted(medicao.contadores().items()))
+                                   or "Sem contadores ainda.")
+            agendado['id'] = self.root.after(1000, tique)
+
+        def tique():
+            agendado.pop('id', None)
+            if janela_d.winfo_exists() and janela_d.state() != 'withdrawn':
+                atualizar()
+        return atualizar
 
     # ===== Utilidades =====
     def confirm_and_run(self, prompt, action, *args, **kwargs):
@@ -833,15 +1404,67 @@ class BarberShopApp:
         return False
 
     def atualizar_clock(self):
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        self.status_label.configure(text=f"Pronto • {agora}")
+        self._atualizar_status()
         self.root.after(1000, self.atualizar_clock)
 
+    def _atualizar_badge_notificacoes(self, nao_lidas):
+        self.badge_notificacoes.configure(text=f"🔔 {nao_lidas}" if nao_lidas else "🔔",
+                                          fg=self.COLOR_GOLD if nao_lidas else self.COLOR_TEXT_SECONDARY)
+
+    def _atualizar_status(self, ocupado=None):
+        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        estado = "⏳ Processando…" if self.tarefas.ocupado else "Pronto"
+        nota = f" • {self._nota_status}" if self._nota_status else ""
+        self.status_label.configure(text=f"{estado} • {agora}{nota}")
+
+    # ===== Backup =====
+    def agendar_backup(self):
+        """Laço do root.after: dispara o backup quando o último tiver mais de 24 h."""
+        if not self._backup_rodando:
+            self._backup_rodando = True
+            self.tarefas.submeter(backup.backup_se_necessario, self.DB_NAME, self.PASTA_BACKUP, backup.INTERVALO,
+                                  self._backup_interromper, ao_concluir=self._backup_concluido,
+                                  ao_falhar=self._backup_falhou)
+        self.root.after(self.BACKUP_VERIFICAR_MS, self.agendar_backup)
+
+    def _backup_concluido(self, conjunto):
+        self._backup_rodando = False
+        if conjunto:
+            self._nota_status = f"💾 Backup às {datetime.now().strftime('%H:%M')}"
+
+    def _backup_falhou(self, erro):
+        self._backup_rodando = False
+        if not isinstance(erro, backup.BackupInterrompido):
+            self._nota_status = f"⚠️ Backup falhou: {erro}"
+            self.notificacoes.notificar('erro', "Backup falhou", str(erro))
+
     # ===== Execução =====
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if not self.SERVIDOR:
+                self._backup_interromper.set()     # um backup em andamento não segura o fechamento
+            self.tarefas.encerrar()
+            if self.ARQUIVO_PERFIL and medicao.perfil_ativo():
+                medicao.parar_perfil(self.ARQUIVO_PERFIL)
+            if self.diario:
+                self.diario.fechar()
+            self.servico.fechar()
 
 
 if __name__ == "__main__":
-    app = BarberShopApp()
-    app.run()
\ No newline at end of file
+    if "--reconstruir-resumos" in sys.argv[1:]:
+        db = Database(DB_NAME)
+        preparar_banco(db)
+        with db.transacao() as cursor:
+            reconstruir_resumos(cursor)
+        db.fechar()
+        print("Resumos diários reconstruídos a partir do histórico.")
+    else:
+        # Modo caixa: python main1.py --servidor http://IP:8765 (ou variável ESTOQUE_SERVIDOR)
+        servidor = os.environ.get("ESTOQUE_SERVIDOR")
+        if "--servidor" in sys.argv[1:]:
+            servidor = sys.argv[sys.argv.index("--servidor") + 1]
+        app = BarberShopApp(servidor)
+        app.run()
\ No newline at end of file
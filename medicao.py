@@ -0,0 +1,179 @@
+# Instrumentação leve - Barbearia
+# Intervalos (spans) cronometrados de banco, interface e tarefas num buffer circular, contadores
+# (linhas renderizadas, commits, conexões abertas) e percentis p50/p95 por operação. Consultas
+# acima de ESTOQUE_LENTA_MS vão para o log de lentas (ESTOQUE_LOG_LENTAS); o cProfile é opcional
+# e só é importado quando uma captura começa. Sem tkinter: a CLI e o servidor também usam.
+# ESTOQUE_MEDICAO=0 desliga tudo (Database deixa de usar as conexões cronometradas).
+import itertools
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, wraps
+
+ATIVO = os.environ.get("ESTOQUE_MEDICAO", "1") != "0"
+CAPACIDADE = 2000           # spans recentes guardados (todas as operações)
+AMOSTRAS = 500              # durações guardadas por operação para os percentis
+LENTA_MS = float(os.environ.get("ESTOQUE_LENTA_MS") or 100)
+LOG_LENTAS = os.environ.get("ESTOQUE_LOG_LENTAS")   # caminho do log de consultas lentas (opcional)
+
+_lock = threading.Lock()
+_spans = deque(maxlen=CAPACIDADE)       # (quando, operacao, ms, detalhe, thread, seq)
+_seq = itertools.count(1)               # identifica cada span (não recomeça no limpar)
+_duracoes = {}                          # operacao -> deque de ms (amostra recente, para os percentis)
+_totais = {}                            # operacao -> [chamadas, ms somados] desde o início
+_contadores = Counter()
+_perfil = None                          # cProfile.Profile em captura
+
+
+# ===== Registro =====
+def registrar(operacao, ms, detalhe=None):
+    """Guarda um span já medido; consultas (`detalhe` com o SQL) lentas vão para o log."""
+    if not ATIVO:
+        return
+    thread = threading.current_thread().name
+    with _lock:
+        _spans.append((time.time(), operacao, ms, detalhe, thread, next(_seq)))
+        duracoes = _duracoes.get(operacao)
+        if duracoes is None:
+            duracoes = _duracoes[operacao] = deque(maxlen=AMOSTRAS)
+            _totais[operacao] = [0, 0.0]
+        duracoes.append(ms)
+        total = _totais[operacao]
+        total[0] += 1
+        total[1] += ms
+    if detalhe is not None and ms >= LENTA_MS and LOG_LENTAS:
+        _registrar_lenta(operacao, ms, detalhe, thread)
+
+
+@contextmanager
+def medir(operacao, detalhe=None):
+    """`with medir('fechamento.resumo_caixa'):` cronometra o bloco (exceções também contam)."""
+    if not ATIVO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(operacao, (time.perf_counter() - inicio) * 1000, detalhe)
+
+
+def cronometrado(operacao=None):
+    """Decorador: cada chamada vira um span `operacao` (padrão: módulo.função)."""
+    def decorar(funcao):
+        nome = operacao or f"{funcao.__module__}.{funcao.__qualname__}"
+
+        @wraps(funcao)
+        def chamada(*args, **kwargs):
+            with medir(nome):
+                return funcao(*args, **kwargs)
+        return chamada
+    return decorar
+
+
+def contar(contador, quantidade=1):
+    if ATIVO:
+        with _lock:
+            _contadores[contador] += quantidade
+
+
+@lru_cache(maxsize=1024)
+def operacao_sql(consulta, leitura=False):
+    """Nome de operação de um SQL: espaços colapsados e texto cortado (mesmo SQL, mesma linha).
+    `leitura` separa o tempo dos fetch* (agregações e ordenações trabalham ali, não no execute)."""
+    texto = " ".join(consulta.split())
+    texto = texto if len(texto) <= 80 else texto[:79] + "…"
+    return f"sql: {texto} (leitura)" if leitura else f"sql: {texto}"
+
+
+# ===== Leitura =====
+def percentil(valores, p):
+    """Percentil por ranque mais próximo de uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, math.ceil(p * len(valores)) - 1))]
+
+
+def resumo():
+    """[(operacao, chamadas, p50, p95, maximo, total_ms)], do maior tempo total para o menor.
+    Chamadas e total contam desde o início; percentis e máximo, as últimas AMOSTRAS."""
+    with _lock:
+        copias = {operacao: (sorted(duracoes), tuple(_totais[operacao])) for operacao, duracoes in _duracoes.items()}
+    linhas = [(operacao, n, percentil(v, .50), percentil(v, .95), v[-1], total)
+              for operacao, (v, (n, total)) in copias.items() if v]
+    return sorted(linhas, key=lambda linha: linha[5], reverse=True)
+
+
+def contadores():
+    with _lock:
+        return dict(_contadores)
+
+
+def recentes(quantidade=200):
+    """Spans mais recentes primeiro: (quando, operacao, ms, detalhe, thread, seq)."""
+    with _lock:
+        return list(_spans)[-quantidade:][::-1]
+
+
+def limpar():
+    with _lock:
+        _spans.clear()
+        _duracoes.clear()
+        _totais.clear()
+        _contadores.clear()
+
+
+# ===== Consultas lentas =====
+def _registrar_lenta(operacao, ms, detalhe, thread):
+    linha = (f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}\t{ms:.1f} ms\t{thread}\t"
+             f"{operacao}\t{' '.join(str(detalhe).split())}\n")
+    try:
+        with _lock, open(LOG_LENTAS, "a", encoding="utf-8") as arquivo:
+            arquivo.write(linha)
+    except OSError:
+        pass        # o log é diagnóstico: nunca derruba a operação medida
+
+
+# ===== cProfile (opcional) =====
+def perfil_ativo():
+    return _perfil is not None
+
+
+def iniciar_perfil():
+    """Começa uma captura do cProfile na thread atual (o mainloop, na interface)."""
+    global _perfil
+    if _perfil is None:
+        import cProfile
+        _perfil = cProfile.Profile()
+        _perfil.enable()
+
+
+def parar_perfil(caminho=None, linhas=25):
+    """Encerra a captura; grava o .prof em `caminho` (para snakeviz/pstats) e devolve o texto
+    das `linhas` funções com maior tempo acumulado."""
+    global _perfil
+    if _perfil is None:
+        return ""
+    import io
+    import pstats
+    perfil, _perfil = _perfil, None
+    perfil.disable()
+    if caminho:
+        perfil.dump_stats(caminho)
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(linhas)
+    return saida.getvalue()
+
+
+def formatar_resumo(limite=30):
+    """Tabela de texto com p50/p95 por operação e os contadores (CLI e servidor)."""
+    linhas = [f"{'operação':<60} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8} {'total ms':>9}"]
+    for operacao, n, p50, p95, maximo, total in resumo()[:limite]:
+        linhas.append(f"{operacao[:60]:<60} {n:>6} {p50:>8.2f} {p95:>8.2f} {maximo:>8.2f} {total:>9.1f}")
+    for contador, valor in sorted(contadores().items()):
+        linhas.append(f"{contador}: {valor}")
+    return "\n".join(linhas)
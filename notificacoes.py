@@ -0,0 +1,152 @@
+# Notificações não modais: toasts empilhados no canto da janela + central com o histórico
+# Substitui os messagebox dos caminhos quentes (movimentação, serviço, lote): nada bloqueia o
+# operador nem o mainloop. Avisos repetidos dentro de uma janela curta viram um resumo só.
+from collections import deque
+from datetime import datetime
+from tkinter import ttk
+import tkinter as tk
+
+# nível -> (ícone, cor da faixa lateral, tempo na tela em ms)
+NIVEIS = {
+    'sucesso': ("✔", "#16A34A", 2500),
+    'info': ("ℹ", "#3B82F6", 4000),
+    'alerta': ("⚠️", "#DAA520", 7000),
+    'erro': ("✖", "#B91C1C", 10000),
+}
+MAX_TOASTS = 4          # toasts simultâneos; o mais antigo sai quando chega outro
+COALESCER_MS = 400      # janela em que avisos do mesmo grupo viram um único toast
+MAX_LINHAS = 6          # linhas de um resumo antes do "… e mais N"
+HISTORICO = 200         # notificações guardadas na central
+
+
+class CentralNotificacoes:
+    """Toasts não modais sobre `root` e histórico consultável.
+
+    `notificar(nivel, titulo, texto, agrupar=None, item=None)`: com `agrupar`, os avisos que
+    chegam em até COALESCER_MS são somados num único toast; `item` identifica a linha dentro
+    do grupo (o aviso mais novo do mesmo item substitui o anterior, ex.: um produto que caiu
+    duas vezes no mesmo lote). `ao_mudar(nao_lidas)` é chamado quando o contador muda.
+    """
+
+    def __init__(self, root, cor_fundo="#2C2C2C", cor_texto="#FFFFFF", cor_secundaria="#B0B0B0", ao_mudar=None):
+        self.root = root
+        self.cor_fundo = cor_fundo
+        self.cor_texto = cor_texto
+        self.cor_secundaria = cor_secundaria
+        self.ao_mudar = ao_mudar
+        self.historico = deque(maxlen=HISTORICO)    # (quando, nivel, titulo, texto), mais recente por último
+        self.nao_lidas = 0
+        self._toasts = []       # frames visíveis, mais recente por último
+        self._grupos = {}       # agrupar -> (nivel, titulo, {item: texto})
+        self._painel = None
+        self._arvore = None
+
+    # ===== Entrada =====
+    def notificar(self, nivel, titulo, texto="", agrupar=None, item=None):
+        if agrupar is None:
+            self._publicar(nivel, titulo, texto)
+            return
+        grupo = self._grupos.get(agrupar)
+        if grupo is None:
+            grupo = self._grupos[agrupar] = (nivel, titulo, {})
+            self.root.after(COALESCER_MS, self._descarregar, agrupar)
+        chave = item if item is not None else object()
+        grupo[2].pop(chave, None)      # reinserido no fim: o aviso mais novo do item vale
+        grupo[2][chave] = texto
+
+    def alertar_estoque_baixo(self, alertas):
+        """Alertas (id, nome, quantidade, minimo) de uma ou várias operações: um toast por rajada."""
+        for produto_id, nome, quantidade, minimo in alertas:
+            self.notificar('alerta', "Estoque baixo", f"{nome}: {quantidade:g} (mínimo {minimo:g})",
+                           agrupar='estoque_baixo', item=produto_id)
+
+    def _descarregar(self, agrupar):
+        nivel, titulo, itens = self._grupos.pop(agrupar)
+        linhas = list(itens.values())
+        if len(linhas) > 1:
+            titulo = f"{titulo} ({len(linhas)})"
+        excedentes = len(linhas) - MAX_LINHAS
+        texto = "\n".join(linhas[:MAX_LINHAS]) + (f"\n… e mais {excedentes}" if excedentes > 0 else "")
+        self._publicar(nivel, titulo, texto, completo="\n".join(linhas))
+
+    def _publicar(self, nivel, titulo, texto, completo=None):
+        self.historico.append((datetime.now(), nivel, titulo, completo if completo is not None else texto))
+        self.nao_lidas += 1
+        self._mostrar(nivel, titulo, texto)
+        if self._painel is not None and self._painel.winfo_exists():
+            self._preencher_painel()
+        elif self.ao_mudar:
+            self.ao_mudar(self.nao_lidas)
+
+    # ===== Toasts =====
+    def _mostrar(self, nivel, titulo, texto):
+        icone, cor, duracao = NIVEIS.get(nivel, NIVEIS['info'])
+        # Frame sobre a janela principal (place), não Toplevel: não rouba o foco do operador
+        toast = tk.Frame(self.root, bg=self.cor_fundo, highlightthickness=1, highlightbackground=cor)
+        tk.Frame(toast, bg=cor, width=6).pack(side='left', fill='y')
+        corpo = tk.Frame(toast, bg=self.cor_fundo)
+        corpo.pack(side='left', fill='both', padx=10, pady=6)
+        tk.Label(corpo, text=f"{icone} {titulo}", bg=self.cor_fundo, fg=self.cor_texto, anchor='w',
+                 font=("Segoe UI", 11, "bold")).pack(fill='x')
+        if texto:
+            tk.Label(corpo, text=texto, bg=self.cor_fundo, fg=self.cor_secundaria, anchor='w', justify='left',
+                     wraplength=340, font=("Segoe UI", 10)).pack(fill='x')
+        for widget in (toast, corpo, *corpo.winfo_children()):
+            widget.bind('<Button-1>', lambda e, t=toast: self._fechar_toast(t))
+        self._toasts.append(toast)
+        while len(self._toasts) > MAX_TOASTS:
+            self._fechar_toast(self._toasts[0])
+        self.root.after(duracao, self._fechar_toast, toast)
+        self._empilhar()
+
+    def _fechar_toast(self, toast):
+        if toast in self._toasts:
+            self._toasts.remove(toast)
+            toast.destroy()
+            self._empilhar()
+
+    def _empilhar(self):
+        # Mais recente embaixo, à direita, acima da barra de status
+        self.root.update_idletasks()
+        y = -56
+        for toast in reversed(self._toasts):
+            toast.place(relx=1.0, rely=1.0, anchor='se', x=-16, y=y)
+            toast.lift()
+            y -= toast.winfo_reqheight() + 8
+
+    # ===== Central =====
+    def abrir_painel(self):
+        if self._painel is not None and self._painel.winfo_exists():
+            self._painel.lift()
+            self._preencher_painel()
+            return
+        painel = self._painel = tk.Toplevel(self.root)
+        painel.title("Notificações")
+        painel.geometry("760x420")
+        colunas = ('Hora', 'Tipo', 'Título', 'Mensagem')
+        arvore = self._arvore = ttk.Treeview(painel, columns=colunas, show='headings')
+        for coluna, largura in zip(colunas, (80, 70, 170, 420)):
+            arvore.heading(coluna, text=coluna)
+            arvore.column(coluna, width=largura, anchor='w')
+        barra = ttk.Scrollbar(painel, orient='vertical', command=arvore.yview)
+        arvore.configure(yscrollcommand=barra.set)
+        rodape = tk.Frame(painel)
+        rodape.pack(side='bottom', fill='x', padx=8, pady=6)
+        ttk.Button(rodape, text="Limpar", command=self.limpar).pack(side='right')
+        barra.pack(side='right', fill='y')
+        arvore.pack(fill='both', expand=True)
+        self._preencher_painel()
+
+    def _preencher_painel(self):
+        arvore = self._arvore
+        arvore.delete(*arvore.get_children())
+        for quando, nivel, titulo, texto in reversed(self.historico):
+            arvore.insert('', 'end', values=(quando.strftime("%H:%M:%S"), nivel, titulo, texto.replace("\n", " • ")))
+        self.nao_lidas = 0
+        if self.ao_mudar:
+            self.ao_mudar(0)
+
+    def limpar(self):
+        self.historico.clear()
+        if self._painel is not None and self._painel.winfo_exists():
+            self._preencher_painel()
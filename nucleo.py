@@ -0,0 +1,1348 @@
+# Núcleo de domínio - Barbearia
+# Regras de negócio, schema e relatórios sem dependência de interface gráfica.
+# Importável por scripts e pela CLI sem carregar tkinter/PIL; main1.py é só a casca Tk.
+import json
+import os
+import re
+import sqlite3
+import weakref
+from collections import defaultdict
+from datetime import datetime, timedelta, date
+
+DB_NAME = 'estoque_barbearia.db'
+
+# Acumula uma movimentação no resumo diário do produto (mesma transação da movimentação)
+SQL_ACUMULAR_PRODUTO = """
+    INSERT INTO resumo_diario_produtos (dia, produto_id, qtd_entrada, qtd_saida, valor_entrada, valor_saida)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (dia, produto_id) DO UPDATE SET
+        qtd_entrada = qtd_entrada + excluded.qtd_entrada,
+        qtd_saida = qtd_saida + excluded.qtd_saida,
+        valor_entrada = valor_entrada + excluded.valor_entrada,
+        valor_saida = valor_saida + excluded.valor_saida
+"""
+
+# Acumula um serviço no resumo diário serviço x barbeiro (ids de servicos_catalogo e barbeiros)
+SQL_ACUMULAR_SERVICO = """
+    INSERT INTO resumo_diario_servicos (dia, servico_id, barbeiro_id, quantidade, total)
+    VALUES (?, ?, ?, 1, ?)
+    ON CONFLICT (dia, servico_id, barbeiro_id) DO UPDATE SET
+        quantidade = quantidade + 1,
+        total = total + excluded.total
+"""
+
+
+# Marca a hora do serviço no resumo diário do barbeiro: bit h da máscara = atendeu entre h:00 e
+# h:59; `horas` conta os bits ligados (o SET vê a máscara antiga, então só soma hora nova)
+SQL_MARCAR_HORA = """
+    INSERT INTO resumo_diario_barbeiros (dia, barbeiro_id, horas_mascara, horas)
+    VALUES (?, ?, 1 << ?, 1)
+    ON CONFLICT (dia, barbeiro_id) DO UPDATE SET
+        horas = horas + ((horas_mascara & excluded.horas_mascara) = 0),
+        horas_mascara = horas_mascara | excluded.horas_mascara
+"""
+
+
+def hora_do_servico(data_hora):
+    return int(data_hora[11:13] or 0)
+
+
+class ErroValidacao(ValueError):
+    """Entrada rejeitada pelas regras de negócio; `titulo` acompanha a mensagem exibida ao usuário."""
+
+    def __init__(self, mensagem, titulo="Erro de Validação"):
+        super().__init__(mensagem)
+        self.titulo = titulo
+
+
+def validar_produto(nome, categoria, quantidade, minimo):
+    """Regras de cadastro de produto (formulário e importação).
+    Retorna (nome, categoria, quantidade, minimo) convertidos ou levanta ErroValidacao."""
+    if not nome or not categoria:
+        raise ErroValidacao("Nome e categoria não podem estar vazios.")
+    quantidade, minimo = str(quantidade), str(minimo)
+    if not all(c.isdigit() or c == '.' for c in quantidade.strip()):
+        raise ErroValidacao("Quantidade deve conter apenas números e ponto decimal.")
+    if not all(c.isdigit() for c in minimo.strip()):
+        raise ErroValidacao("Estoque mínimo deve conter apenas números inteiros.")
+    try:
+        quantidade = float(quantidade)
+        minimo = int(minimo)
+    except ValueError:
+        raise ErroValidacao("Quantidade e Estoque Mínimo devem ser números válidos.", "Erro de Entrada")
+    if quantidade < 0 or minimo < 0:
+        raise ErroValidacao("Valores não podem ser negativos.")
+    return nome, categoria, quantidade, minimo
+
+
+class EstoqueInsuficiente(Exception):
+    """A movimentação deixaria a quantidade do produto negativa."""
+
+
+class ProdutoNaoEncontrado(Exception):
+    """Não existe produto com o id informado."""
+
+
+def _movimentar(cursor, produto_id, delta, tipo_mov=None, data_hora=None):
+    """Aplica o delta, grava a movimentação e o resumo diário dentro da transação do cursor.
+    A restrição de não-negatividade é verificada no próprio UPDATE, sem leitura prévia."""
+    linhas = cursor.execute(
+        """
+        UPDATE produtos SET quantidade = quantidade + ?
+        WHERE id = ? AND excluido_em IS NULL AND quantidade + ? >= 0
+        RETURNING nome, quantidade, minimo, preco_custo, preco_venda
+        """,
+        (delta, produto_id, delta)
+    ).fetchall()
+    if not linhas:
+        if cursor.execute("SELECT 1 FROM produtos WHERE id = ? AND excluido_em IS NULL", (produto_id,)).fetchone():
+            raise EstoqueInsuficiente(produto_id)
+        raise ProdutoNaoEncontrado(produto_id)
+    nome_produto, nova_quantidade, minimo_produto, preco_custo, preco_venda = linhas[0]
+    if tipo_mov:
+        tipo_norm = "ENTRADA" if tipo_mov == "ENTRADA" else "SAIDA"
+        preco_unit = preco_custo if tipo_norm == "ENTRADA" else preco_venda
+        agora = data_hora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        qtd = abs(delta)
+        cursor.execute(
+            "INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora) VALUES (?, ?, ?, ?, ?)",
+            (produto_id, tipo_norm, qtd, preco_unit, agora)
+        )
+        entrada = tipo_norm == "ENTRADA"
+        cursor.execute(SQL_ACUMULAR_PRODUTO, (
+            agora[:10], produto_id,
+            qtd if entrada else 0, 0 if entrada else qtd,
+            qtd * preco_unit if entrada else 0, 0 if entrada else qtd * preco_unit
+        ))
+    return produto_id, nome_produto, nova_quantidade, minimo_produto
+
+
+def movimentar_estoque(db, produto_id, delta, tipo_mov=None):
+    """Movimentação atômica: um único BEGIN IMMEDIATE ... COMMIT (um fsync).
+    Retorna (produto_id, nome, nova_quantidade, minimo)."""
+    with db.transacao() as cursor:
+        return _movimentar(cursor, produto_id, delta, tipo_mov)
+
+
+# ===== Resultados estruturados =====
+# Operações de escrita devolvem o mesmo dicionário para a interface, a CLI e o lote:
+# {'ok', 'mensagem', 'afetados': [ids], 'alertas': [(id, nome, quantidade, minimo)]}.
+# Quem chama decide como exibir (toast, stderr, log); aqui não há diálogos.
+def resultado_movimentacao(linha):
+    """Resultado de movimentar_estoque a partir de (produto_id, nome, nova_quantidade, minimo)."""
+    produto_id, nome, nova_quantidade, minimo = linha
+    return {'ok': True, 'mensagem': f"{nome}: nova quantidade {nova_quantidade:g}", 'afetados': [produto_id],
+            'alertas': [linha] if nova_quantidade < minimo else []}
+
+
+def resultado_lote(ids, baixos, n_itens):
+    """Resultado de movimentar_em_lote a partir de (ids, baixos)."""
+    return {'ok': True, 'mensagem': f"{n_itens} movimentações aplicadas em {len(ids)} produtos.",
+            'afetados': list(ids), 'alertas': list(baixos)}
+
+
+def resultado_recusado(erro):
+    """Resultado de uma operação recusada pelas regras de estoque (nada foi gravado)."""
+    detalhe = erro.args[0] if erro.args else None
+    if isinstance(erro, EstoqueInsuficiente):
+        alvo = f" (produtos {detalhe})" if isinstance(detalhe, list) else ""
+        mensagem = f"Operação cancelada: a quantidade não pode ficar negativa{alvo}."
+    elif isinstance(erro, ProdutoNaoEncontrado):
+        mensagem = f"Produto inexistente: {detalhe}"
+    else:
+        mensagem = str(erro)
+    return {'ok': False, 'mensagem': mensagem, 'afetados': [], 'alertas': []}
+
+
+def movimentar_em_lote(db, itens, tipo_mov):
+    """Aplica uma lista de (produto_id, quantidade, preco_unitario) numa única transação.
+    preco_unitario None usa o preço de custo (ENTRADA) ou de venda (SAÍDA) do produto.
+    Tudo ou nada: se algum produto ficaria negativo ou não existe, nada é gravado.
+    Retorna (ids_afetados, baixos) com baixos = [(id, nome, quantidade, minimo)] abaixo do mínimo."""
+    with db.transacao() as cursor:
+        return _movimentar_lote(cursor, itens, tipo_mov)
+
+
+def _movimentar_lote(cursor, itens, tipo_mov):
+    tipo_norm = "ENTRADA" if tipo_mov == "ENTRADA" else "SAIDA"
+    sinal = 1 if tipo_norm == "ENTRADA" else -1
+    deltas = defaultdict(float)
+    for produto_id, quantidade, _ in itens:
+        if quantidade <= 0:
+            raise ValueError(f"Quantidade inválida para o produto {produto_id}: {quantidade}")
+        deltas[produto_id] += sinal * quantidade
+    if not deltas:
+        return [], []
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ids = list(deltas)
+    marcadores = ", ".join("?" * len(ids))
+    # Dentro do BEGIN IMMEDIATE nenhum outro escritor intervém: a leitura prévia só serve
+    # para nomear os produtos responsáveis caso o lote seja recusado
+    atuais = dict(cursor.execute(
+        f"SELECT id, quantidade FROM produtos WHERE id IN ({marcadores}) AND excluido_em IS NULL", ids))
+    inexistentes = [pid for pid in ids if pid not in atuais]
+    if inexistentes:
+        raise ProdutoNaoEncontrado(inexistentes)
+    insuficientes = [pid for pid in ids if atuais[pid] + deltas[pid] < 0]
+    if insuficientes:
+        raise EstoqueInsuficiente(insuficientes)
+    cursor.executemany(
+        "UPDATE produtos SET quantidade = quantidade + ? WHERE id = ? AND quantidade + ? >= 0",
+        [(delta, pid, delta) for pid, delta in deltas.items()]
+    )
+    if cursor.rowcount != len(deltas):
+        raise EstoqueInsuficiente(None)
+    ultimo_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM movimentacoes").fetchone()[0]
+    cursor.executemany(
+        """
+        INSERT INTO movimentacoes (produto_id, tipo, quantidade, preco_unitario, data_hora)
+        SELECT id, ?, ?, COALESCE(?, CASE WHEN ? = 'ENTRADA' THEN preco_custo ELSE preco_venda END), ?
+        FROM produtos WHERE id = ?
+        """,
+        [(tipo_norm, quantidade, preco, tipo_norm, agora, pid) for pid, quantidade, preco in itens]
+    )
+    # Um único upsert agrega no resumo diário todas as linhas do lote
+    cursor.execute(
+        """
+        INSERT INTO resumo_diario_produtos (dia, produto_id, qtd_entrada, qtd_saida, valor_entrada, valor_saida)
+        SELECT substr(data_hora, 1, 10), produto_id,
+               SUM(CASE WHEN tipo='ENTRADA' THEN quantidade ELSE 0 END),
+               SUM(CASE WHEN tipo='SAIDA' THEN quantidade ELSE 0 END),
+               SUM(CASE WHEN tipo='ENTRADA' THEN quantidade*preco_unitario ELSE 0 END),
+               SUM(CASE WHEN tipo='SAIDA' THEN quantidade*preco_unitario ELSE 0 END)
+        FROM movimentacoes WHERE id > ?
+        GROUP BY substr(data_hora, 1, 10), produto_id
+        ON CONFLICT (dia, produto_id) DO UPDATE SET
+            qtd_entrada = qtd_entrada + excluded.qtd_entrada,
+            qtd_saida = qtd_saida + excluded.qtd_saida,
+            valor_entrada = valor_entrada + excluded.valor_entrada,
+            valor_saida = valor_saida + excluded.valor_saida
+        """,
+        (ultimo_id,)
+    )
+    baixos = cursor.execute(
+        f"SELECT id, nome, quantidade, minimo FROM produtos WHERE id IN ({marcadores}) AND quantidade < minimo ORDER BY nome",
+        ids
+    ).fetchall()
+    return ids, baixos
+
+
+def ler_itens_csv(caminho):
+    """Lê um CSV com cabeçalho produto_id,quantidade[,preco_unitario] para movimentar_em_lote."""
+    import csv
+    itens = []
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        for linha, registro in enumerate(csv.DictReader(arquivo), start=2):
+            try:
+                preco = (registro.get('preco_unitario') or '').strip()
+                itens.append((int(registro['produto_id']), float(registro['quantidade']),
+                              float(preco) if preco else None))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Linha {linha} inválida no CSV: {registro}")
+    return itens
+
+
+def reconstruir_resumos(cursor):
+    """Regera as tabelas de resumo diário a partir do histórico completo.
+    Anos já arquivados (arquivo.py) não estão mais nas tabelas brutas: seus resumos ficam como estão."""
+    try:
+        arquivados = json.dumps([linha[0] for linha in cursor.execute("SELECT ano FROM particoes")])
+    except sqlite3.OperationalError:      # banco anterior à migração 8
+        arquivados = "[]"
+    fora_do_arquivo = "CAST(substr({}, 1, 4) AS INTEGER) NOT IN (SELECT value FROM json_each(?))"
+    cursor.execute("DELETE FROM resumo_diario_produtos WHERE " + fora_do_arquivo.format("dia"), (arquivados,))
+    cursor.execute("""
+        INSERT INTO resumo_diario_produtos (dia, produto_id, qtd_entrada, qtd_saida, valor_entrada, valor_saida)
+        SELECT substr(data_hora, 1, 10), produto_id,
+               SUM(CASE WHEN tipo='ENTRADA' THEN quantidade ELSE 0 END),
+               SUM(CASE WHEN tipo='SAIDA' THEN quantidade ELSE 0 END),
+               SUM(CASE WHEN tipo='ENTRADA' THEN quantidade*preco_unitario ELSE 0 END),
+               SUM(CASE WHEN tipo='SAIDA' THEN quantidade*preco_unitario ELSE 0 END)
+        FROM movimentacoes
+        WHERE """ + fora_do_arquivo.format("data_hora") + """
+        GROUP BY substr(data_hora, 1, 10), produto_id
+    """, (arquivados,))
+    # Antes da migração 9 (a migração 2 roda em bancos antigos) serviço e barbeiro eram texto
+    colunas = ("servico_id", "barbeiro_id") if _servicos_codificados(cursor) else ("servico", "barbeiro")
+    cursor.execute("DELETE FROM resumo_diario_servicos WHERE " + fora_do_arquivo.format("dia"), (arquivados,))
+    cursor.execute("""
+        INSERT INTO resumo_diario_servicos (dia, {0}, {1}, quantidade, total)
+        SELECT substr(data_hora, 1, 10), {0}, {1}, COUNT(*), SUM(valor)
+        FROM servicos
+        WHERE """.format(*colunas) + fora_do_arquivo.format("data_hora") + """
+        GROUP BY substr(data_hora, 1, 10), {0}, {1}
+    """.format(*colunas), (arquivados,))
+    # resumo_diario_barbeiros só existe a partir da migração 10 (que o preenche ao ser criado)
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'resumo_diario_barbeiros'").fetchone():
+        cursor.execute("DELETE FROM resumo_diario_barbeiros WHERE " + fora_do_arquivo.format("dia"), (arquivados,))
+        resumir_horas(cursor, "main", fora_do_arquivo.format("data_hora"), (arquivados,))
+
+
+def resumir_horas(cursor, esquema="main", filtro="1", params=()):
+    """Preenche resumo_diario_barbeiros com as horas ocupadas de `esquema`.servicos (a soma dos
+    bits distintos de cada dia é a máscara)."""
+    cursor.execute(f"""
+        INSERT INTO main.resumo_diario_barbeiros (dia, barbeiro_id, horas_mascara, horas)
+        SELECT dia, barbeiro_id, SUM(1 << hora), COUNT(*)
+        FROM (SELECT DISTINCT substr(data_hora, 1, 10) AS dia, barbeiro_id,
+                              CAST(substr(data_hora, 12, 2) AS INTEGER) AS hora
+              FROM {esquema}.servicos WHERE {filtro})
+        GROUP BY dia, barbeiro_id
+    """, params)
+
+
+def _servicos_codificados(cursor, esquema="main"):
+    return any(linha[1] == "servico_id" for linha in cursor.execute(f"PRAGMA {esquema}.table_info(servicos)"))
+
+
+def fatiar_periodo(periodo_inicio, periodo_fim):
+    """Divide o período em dias completos (respondidos pelos resumos) e trechos parciais
+    (lidos das tabelas brutas). Aceita 'AAAA-MM-DD' ou 'AAAA-MM-DD HH:MM:SS'.
+    Retorna (primeiro_dia, ultimo_dia, trechos); sem dias completos, primeiro_dia > ultimo_dia."""
+    inicio = periodo_inicio if len(periodo_inicio) > 10 else periodo_inicio + " 00:00:00"
+    fim = periodo_fim if len(periodo_fim) > 10 else periodo_fim + " 23:59:59"
+    dia_ini, dia_fim = inicio[:10], fim[:10]
+    if dia_ini == dia_fim and not (inicio.endswith("00:00:00") and fim.endswith("23:59:59")):
+        return dia_ini, "", [(inicio, fim)]
+    trechos = []
+    primeiro, ultimo = dia_ini, dia_fim
+    if not inicio.endswith("00:00:00"):
+        trechos.append((inicio, dia_ini + " 23:59:59"))
+        primeiro = (date.fromisoformat(dia_ini) + timedelta(days=1)).isoformat()
+    if not fim.endswith("23:59:59"):
+        trechos.append((dia_fim + " 00:00:00", fim))
+        ultimo = (date.fromisoformat(dia_fim) - timedelta(days=1)).isoformat()
+    return primeiro, ultimo, trechos
+
+
+# ===== Partições arquivadas =====
+TABELAS_ARQUIVADAS = ('movimentacoes', 'servicos')
+
+# Anos fechados de movimentacoes/servicos podem ir para bancos anuais (arquivo.py). Os resumos
+# diários ficam no banco principal; só as leituras das tabelas brutas anexam as partições.
+def caminho_particao(db, arquivo):
+    """Partições ficam na mesma pasta do banco principal."""
+    return os.path.join(os.path.dirname(os.path.abspath(db.caminho)), arquivo)
+
+
+def esquemas_do_periodo(db, conn, inicio, fim):
+    """Anexa ao leitor `conn` as partições com dados entre inicio e fim e retorna os esquemas
+    a consultar: 'main' mais um alias por partição."""
+    particoes = conn.execute("SELECT ano, arquivo FROM particoes WHERE ano BETWEEN ? AND ?",
+                             (int(inicio[:4]), int(fim[:4]))).fetchall()
+    anexos = {f"arquivo_{ano}": caminho_particao(db, arquivo) for ano, arquivo in particoes}
+    if anexos:
+        db.anexar(conn, anexos)
+    return ['main', *anexos]
+
+
+def garantir_sequencia(cursor, tabela, minimo):
+    """Faz o AUTOINCREMENT de `tabela` continuar acima de `minimo` (ids arquivados não voltam)."""
+    if minimo is None:
+        return
+    linha = cursor.execute("SELECT seq FROM main.sqlite_sequence WHERE name = ?", (tabela,)).fetchone()
+    if linha is None:
+        cursor.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, minimo))
+    elif linha[0] < minimo:
+        cursor.execute("UPDATE main.sqlite_sequence SET seq = ? WHERE name = ?", (minimo, tabela))
+
+
+def ultimo_id_arquivado(cursor, tabela):
+    """Maior id de `tabela` já movido para partições (0 sem arquivamento)."""
+    return cursor.execute(f"SELECT COALESCE(MAX(ultimo_id_{tabela}), 0) FROM particoes").fetchone()[0]
+
+
+def _registrar_ultimos_ids(cursor):
+    # Partições de antes da migração 11: guarda o maior id de cada tabela e empurra a sequência
+    arquivo = next(os.path.basename(linha[2]) for linha in cursor.execute("PRAGMA database_list")
+                   if linha[1] == 'arquivo')
+    for tabela in TABELAS_ARQUIVADAS:
+        ultimo = cursor.execute(f"SELECT MAX(id) FROM arquivo.{tabela}").fetchone()[0]
+        cursor.execute(f"UPDATE main.particoes SET ultimo_id_{tabela} = ? WHERE arquivo = ?", (ultimo, arquivo))
+        garantir_sequencia(cursor, tabela, ultimo)
+
+
+def _codificar_particao(cursor):
+    if not _servicos_codificados(cursor, 'arquivo'):
+        _recodificar_servicos(cursor, 'arquivo')
+
+
+# Ajustes que as partições arquivadas antes de uma migração recebem uma única vez, em ordem:
+# (marca em `manutencao`, função(cursor) com a partição anexada como 'arquivo')
+AJUSTES_PARTICOES = [
+    ('particoes_codificadas', _codificar_particao),       # migração 9: nomes -> ids
+    ('particoes_horas', lambda cursor: resumir_horas(cursor, 'arquivo')),    # migração 10
+    ('particoes_ultimo_id', _registrar_ultimos_ids),       # migração 11
+]
+
+
+def ajustar_particoes(db):
+    """Aplica às partições os AJUSTES_PARTICOES ainda não marcados; a marca em `manutencao`
+    evita anexá-las a cada abertura."""
+    feitos = {linha[0] for linha in db.consultar("SELECT tarefa FROM manutencao")}
+    pendentes = [(marca, ajuste) for marca, ajuste in AJUSTES_PARTICOES if marca not in feitos]
+    if not pendentes:
+        return
+    completo = True
+    for (arquivo,) in db.consultar("SELECT arquivo FROM particoes"):
+        caminho = caminho_particao(db, arquivo)
+        if not os.path.exists(caminho):
+            completo = False        # partição fora do lugar: tenta de novo na próxima abertura
+            continue
+        with db.escritor_anexado(caminho, 'arquivo'):
+            with db.transacao() as cursor:
+                for _, ajuste in pendentes:
+                    ajuste(cursor)
+    if completo:
+        for marca, _ in pendentes:
+            db.execute("INSERT OR REPLACE INTO manutencao (tarefa, executada_em) "
+                       "VALUES (?, datetime('now', 'localtime'))", (marca,))
+
+
+# ===== Serviços de domínio =====
+# Regras de negócio sem interface: a GUI, a CLI e os scripts chamam estas funções e
+# decidem como apresentar ErroValidacao/EstoqueInsuficiente ao usuário.
+# Produtos excluídos continuam na tabela (exclusão lógica) para preservar o histórico
+SQL_PRODUTOS = ("SELECT id, nome, categoria, quantidade, minimo, preco_custo, preco_venda FROM produtos "
+                "WHERE excluido_em IS NULL")
+
+
+def listar_produtos(db, ids=None):
+    """Produtos ativos na ordem da tabela de estoque (categoria, nome, id); com `ids`, só esses."""
+    if ids is None:
+        return db.consultar(SQL_PRODUTOS + " ORDER BY categoria, nome, id")
+    ids = [int(i) for i in ids]
+    return db.consultar(SQL_PRODUTOS + f" AND id IN ({', '.join('?' * len(ids))})", ids) if ids else []
+
+
+def listar_estoque_baixo(db):
+    """Produtos abaixo do mínimo, do maior déficit para o menor:
+    [(id, nome, categoria, quantidade, minimo, desde)]. Lê só a tabela estoque_baixo."""
+    return db.consultar(
+        """SELECT p.id, p.nome, p.categoria, p.quantidade, p.minimo, b.desde
+           FROM estoque_baixo b JOIN produtos p ON p.id = b.produto_id
+           ORDER BY p.minimo - p.quantidade DESC, p.nome""")
+
+
+def contar_estoque_baixo(db):
+    return db.consultar_um("SELECT COUNT(*) FROM estoque_baixo")[0]
+
+
+def cadastrar_produto(db, nome, categoria, quantidade, minimo):
+    """Valida e cadastra um produto (preços zerados). Retorna o id criado."""
+    with db.transacao() as cursor:
+        return _inserir_produto(cursor, nome, categoria, quantidade, minimo)
+
+
+def _inserir_produto(cursor, nome, categoria, quantidade, minimo):
+    nome, categoria, quantidade, minimo = validar_produto(nome, categoria, quantidade, minimo)
+    cursor.execute(
+        "INSERT INTO produtos (nome, categoria, quantidade, minimo, preco_custo, preco_venda) VALUES (?, ?, ?, ?, 0, 0)",
+        (nome, categoria, quantidade, minimo)
+    )
+    return cursor.lastrowid
+
+
+def excluir_produto(db, produto_id):
+    """Exclusão lógica: o produto sai do cadastro, mas movimentações, resumos e o razão de
+    estoque continuam valendo para relatórios e consultas de estoque em datas passadas."""
+    with db.transacao() as cursor:
+        _excluir_produto(cursor, produto_id)
+
+
+def _excluir_produto(cursor, produto_id):
+    cursor.execute("UPDATE produtos SET excluido_em = datetime('now', 'localtime') "
+                   "WHERE id = ? AND excluido_em IS NULL", (produto_id,))
+
+
+def definir_precos(db, produto_id, preco_custo, preco_venda):
+    with db.transacao() as cursor:
+        _definir_precos(cursor, produto_id, preco_custo, preco_venda)
+
+
+def _definir_precos(cursor, produto_id, preco_custo, preco_venda):
+    try:
+        preco_custo, preco_venda = float(preco_custo), float(preco_venda)
+    except (TypeError, ValueError):
+        raise ErroValidacao("Valores inválidos de preço.", "Erro")
+    cursor.execute("UPDATE produtos SET preco_custo=?, preco_venda=? WHERE id=? AND excluido_em IS NULL",
+                   (preco_custo, preco_venda, produto_id))
+    if cursor.rowcount == 0:
+        raise ProdutoNaoEncontrado(produto_id)
+
+
+def validar_delta(delta):
+    """Converte a quantidade digitada numa movimentação (aceita sinal negativo)."""
+    if not all(c.isdigit() or c == '.' or c == '-' for c in str(delta).strip()):
+        raise ErroValidacao("Quantidade deve conter apenas números, ponto decimal ou sinal negativo.")
+    try:
+        return float(delta)
+    except ValueError:
+        raise ErroValidacao(f"Quantidade inválida: {delta}", "Erro")
+
+
+def registrar_servico(db, servico, valor, barbeiro, data_hora=None):
+    """Grava o serviço e o acumula no resumo diário na mesma transação. Retorna o id criado."""
+    with db.transacao() as cursor:
+        return _inserir_servico(cursor, servico, valor, barbeiro, data_hora)
+
+
+def _inserir_servico(cursor, servico, valor, barbeiro, data_hora=None):
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise ErroValidacao("Valor deve ser um número válido.", "Erro")
+    if valor <= 0:
+        raise ErroValidacao("O valor deve ser maior que zero.", "Erro")
+    servico, barbeiro = str(servico or "").strip(), str(barbeiro or "").strip()
+    if not servico or not barbeiro:
+        raise ErroValidacao("Serviço e barbeiro não podem estar vazios.", "Erro")
+    data_hora = data_hora or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    servico_id, barbeiro_id = codificar_servico(cursor, servico, barbeiro, valor)
+    cursor.execute(
+        "INSERT INTO servicos (servico_id, valor, barbeiro_id, data_hora) VALUES (?, ?, ?, ?)",
+        (servico_id, valor, barbeiro_id, data_hora)
+    )
+    novo_id = cursor.lastrowid
+    cursor.execute(SQL_ACUMULAR_SERVICO, (data_hora[:10], servico_id, barbeiro_id, valor))
+    cursor.execute(SQL_MARCAR_HORA, (data_hora[:10], barbeiro_id, hora_do_servico(data_hora)))
+    return novo_id
+
+
+def codificar_servico(cursor, servico, barbeiro, valor=0.0):
+    """(servico_id, barbeiro_id) pelos nomes, dentro da transação do cursor. Nomes fora do
+    catálogo (importações, API, diário antigo) entram nele: o serviço inativo, com o valor
+    cobrado como preço, e o barbeiro ativo."""
+    ids = cursor.execute("SELECT (SELECT id FROM servicos_catalogo WHERE nome = ?), (SELECT id FROM barbeiros WHERE nome = ?)",
+                         (servico, barbeiro)).fetchone()
+    if None not in ids:
+        return ids
+    servico_id, barbeiro_id = ids
+    if servico_id is None:
+        servico_id = cursor.execute("INSERT INTO servicos_catalogo (nome, preco, ativo) VALUES (?, ?, 0) RETURNING id",
+                                    (servico, valor)).fetchone()[0]
+    if barbeiro_id is None:
+        barbeiro_id = cursor.execute("INSERT INTO barbeiros (nome) VALUES (?) RETURNING id", (barbeiro,)).fetchone()[0]
+    return servico_id, barbeiro_id
+
+
+# ===== Catálogo de serviços e barbeiros =====
+class CatalogoServicos:
+    """Cache em memória de servicos_catalogo e barbeiros (nome <-> id e preço).
+
+    Carregado na primeira consulta; as funções de edição deste módulo o invalidam depois do
+    COMMIT. Edições feitas por outro processo aparecem após `invalidar()` (F5 na interface).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._dados = None
+
+    def invalidar(self):
+        self._dados = None
+
+    def _carregados(self):
+        dados = self._dados
+        if dados is None:
+            servicos = self.db.consultar("SELECT id, nome, preco, ativo FROM servicos_catalogo ORDER BY nome")
+            barbeiros = self.db.consultar("SELECT id, nome, ativo FROM barbeiros ORDER BY id")
+            dados = self._dados = {
+                'servicos': servicos,
+                'barbeiros': barbeiros,
+                'precos': {nome: preco for _, nome, preco, _ in servicos},
+                'nomes_servicos': {id_: nome for id_, nome, _, _ in servicos},
+                'nomes_barbeiros': {id_: nome for id_, nome, _ in barbeiros},
+            }
+        return dados
+
+    def servicos(self, todos=False):
+        """[(id, nome, preco)] ordenados por nome; por padrão só os ativos."""
+        return [(i, n, p) for i, n, p, ativo in self._carregados()['servicos'] if todos or ativo]
+
+    def barbeiros(self, todos=False):
+        """[(id, nome)] na ordem de cadastro; por padrão só os ativos."""
+        return [(i, n) for i, n, ativo in self._carregados()['barbeiros'] if todos or ativo]
+
+    def _buscar(self, mapa, chave):
+        # Um nome/id desconhecido pode ter sido criado por outro processo: recarrega uma vez
+        valor = self._carregados()[mapa].get(chave)
+        if valor is None:
+            self.invalidar()
+            valor = self._carregados()[mapa].get(chave)
+        return valor
+
+    def preco(self, servico):
+        return self._buscar('precos', servico)
+
+    def nome_servico(self, servico_id):
+        return self._buscar('nomes_servicos', servico_id)
+
+    def nome_barbeiro(self, barbeiro_id):
+        return self._buscar('nomes_barbeiros', barbeiro_id)
+
+    def como_dict(self):
+        """Catálogo ativo no formato de ServicoLocal.catalogo() / GET /catalogo."""
+        return {'servicos': self.servicos(), 'barbeiros': self.barbeiros()}
+
+
+_CATALOGOS = weakref.WeakKeyDictionary()
+
+
+def catalogo(db):
+    """O CatalogoServicos compartilhado de `db`."""
+    cache = _CATALOGOS.get(db)
+    if cache is None:
+        cache = _CATALOGOS[db] = CatalogoServicos(db)
+    return cache
+
+
+def definir_servico(db, nome, preco, ativo=True):
+    """Cadastra o serviço ou altera seu preço/situação. Retorna o id."""
+    with db.transacao() as cursor:
+        servico_id = _definir_servico(cursor, nome, preco, ativo)
+    catalogo(db).invalidar()
+    return servico_id
+
+
+def _definir_servico(cursor, nome, preco, ativo=True):
+    nome = str(nome or "").strip()
+    if not nome:
+        raise ErroValidacao("O nome do serviço não pode estar vazio.")
+    try:
+        preco = float(preco)
+    except (TypeError, ValueError):
+        raise ErroValidacao("Preço deve ser um número válido.")
+    if preco <= 0:
+        raise ErroValidacao("O preço deve ser maior que zero.")
+    return cursor.execute(
+        "INSERT INTO servicos_catalogo (nome, preco, ativo) VALUES (?, ?, ?) "
+        "ON CONFLICT (nome) DO UPDATE SET preco = excluded.preco, ativo = excluded.ativo RETURNING id",
+        (nome, preco, int(bool(ativo)))).fetchone()[0]
+
+
+def definir_barbeiro(db, nome, ativo=True):
+    """Cadastra o barbeiro ou ativa/desativa um existente. Retorna o id."""
+    with db.transacao() as cursor:
+        barbeiro_id = _definir_barbeiro(cursor, nome, ativo)
+    catalogo(db).invalidar()
+    return barbeiro_id
+
+
+def _definir_barbeiro(cursor, nome, ativo=True):
+    nome = str(nome or "").strip()
+    if not nome:
+        raise ErroValidacao("O nome do barbeiro não pode estar vazio.")
+    return cursor.execute(
+        "INSERT INTO barbeiros (nome, ativo) VALUES (?, ?) "
+        "ON CONFLICT (nome) DO UPDATE SET ativo = excluded.ativo RETURNING id",
+        (nome, int(bool(ativo)))).fetchone()[0]
+
+
+def desativar_servico(db, nome):
+    """Tira o serviço do formulário; o histórico e os relatórios continuam com ele."""
+    with db.transacao() as cursor:
+        _desativar_servico(cursor, nome)
+    catalogo(db).invalidar()
+
+
+def _desativar_servico(cursor, nome):
+    nome = str(nome or "").strip()
+    if not cursor.execute("UPDATE servicos_catalogo SET ativo = 0 WHERE nome = ?", (nome,)).rowcount:
+        raise ErroValidacao(f"Serviço inexistente: {nome}")
+
+
+def desativar_barbeiro(db, nome):
+    """Tira a aba do barbeiro da interface; os serviços já registrados continuam com ele."""
+    with db.transacao() as cursor:
+        _desativar_barbeiro(cursor, nome)
+    catalogo(db).invalidar()
+
+
+def _desativar_barbeiro(cursor, nome):
+    nome = str(nome or "").strip()
+    if not cursor.execute("UPDATE barbeiros SET ativo = 0 WHERE nome = ?", (nome,)).rowcount:
+        raise ErroValidacao(f"Barbeiro inexistente: {nome}")
+
+
+def resumo_servicos(db, periodo_inicio=None, periodo_fim=None):
+    """Serviços por serviço x barbeiro no período. Retorna (linhas, total_servicos).
+
+    Linhas: (servico, qtd_servico, total_servico, barbeiro, qtd_barbeiro, total_barbeiro), onde
+    qtd/total do serviço somam todos os barbeiros e os do barbeiro são só a parte dele."""
+    # Dias completos vêm de resumo_diario_servicos; apenas trechos parciais leem servicos
+    params = []
+    with db.leitor() as conn:
+        if periodo_inicio and periodo_fim:
+            primeiro, ultimo, trechos = fatiar_periodo(periodo_inicio, periodo_fim)
+            partes = ["SELECT servico_id, barbeiro_id, quantidade, total FROM resumo_diario_servicos "
+                      "WHERE dia BETWEEN ? AND ?"]
+            params.extend([primeiro, ultimo])
+            for ini, fim in trechos:
+                for esquema in esquemas_do_periodo(db, conn, ini, fim):
+                    partes.append(f"SELECT servico_id, barbeiro_id, 1, valor FROM {esquema}.servicos "
+                                  "WHERE data_hora BETWEEN ? AND ?")
+                    params.extend([ini, fim])
+            origem = " UNION ALL ".join(partes)
+        else:
+            origem = "SELECT servico_id, barbeiro_id, quantidade, total FROM resumo_diario_servicos"
+        cursor = conn.cursor()
+        # Agrupa pelos ids inteiros e só depois junta os nomes (uma linha por serviço x barbeiro);
+        # o subtotal do serviço sai da mesma passada, por janela sobre as células agrupadas
+        cursor.execute(
+            """
+            SELECT c.nome AS servico,
+                   SUM(r.quantidade) OVER (PARTITION BY r.servico_id) AS quantidade,
+                   SUM(r.total) OVER (PARTITION BY r.servico_id) AS total,
+                   b.nome AS barbeiro,
+                   r.quantidade AS qtd_barbeiro,
+                   r.total AS total_barbeiro
+            FROM (SELECT servico_id, barbeiro_id, SUM(quantidade) AS quantidade, SUM(total) AS total
+                  FROM (""" + origem + """)
+                  GROUP BY servico_id, barbeiro_id) r
+            JOIN servicos_catalogo c ON c.id = r.servico_id
+            JOIN barbeiros b ON b.id = r.barbeiro_id
+            ORDER BY c.nome, b.nome
+            """,
+            params
+        )
+        dados_servicos = cursor.fetchall()
+    total_servicos = sum(linha[5] for linha in dados_servicos)
+    return dados_servicos, total_servicos
+
+
+# ===== Desempenho por barbeiro =====
+# Um relatório só para o período atual e o anterior. Dias completos vêm dos resumos diários
+# (serviço x barbeiro e horas ocupadas do barbeiro); `servicos` e as partições são lidos uma vez,
+# e só nos trechos parciais. Os níveis serviço, barbeiro e geral saem de funções de janela sobre as
+# células agrupadas (o GROUPING SETS que o SQLite não tem).
+SQL_DESEMPENHO = """
+    WITH brutos AS ({brutos}),
+    horas_brutas AS (
+        -- 1 só na primeira célula de cada hora do barbeiro: somado, dá as horas ocupadas
+        SELECT atual, servico_id, barbeiro_id, COUNT(*) AS n, SUM(valor) AS total,
+               ROW_NUMBER() OVER (PARTITION BY atual, barbeiro_id, hora) = 1 AS horas
+        FROM brutos
+        GROUP BY atual, barbeiro_id, hora, servico_id
+    ),
+    celulas AS (
+        SELECT atual, servico_id, barbeiro_id, SUM(n) AS n, SUM(total) AS total, SUM(horas) AS horas
+        FROM (SELECT atual, servico_id, barbeiro_id, n, total, horas FROM horas_brutas
+              UNION ALL {resumos})
+        GROUP BY atual, servico_id, barbeiro_id
+    ),
+    niveis AS (
+        SELECT atual, servico_id, barbeiro_id, n, total,
+               SUM(n) OVER por_servico AS n_servico, SUM(total) OVER por_servico AS total_servico,
+               SUM(n) OVER por_barbeiro AS n_barbeiro, SUM(total) OVER por_barbeiro AS total_barbeiro,
+               SUM(horas) OVER por_barbeiro AS horas_barbeiro,
+               SUM(n) OVER geral AS n_geral, SUM(total) OVER geral AS total_geral, SUM(horas) OVER geral AS horas_geral
+        FROM celulas
+        WINDOW por_servico AS (PARTITION BY atual, servico_id),
+               por_barbeiro AS (PARTITION BY atual, barbeiro_id),
+               geral AS (PARTITION BY atual)
+    )
+    -- As linhas só de horas (servico_id NULL) já entraram nas janelas; o JOIN as descarta
+    SELECT r.atual, c.nome, b.nome, r.n, r.total, r.n_servico, r.total_servico,
+           r.n_barbeiro, r.total_barbeiro, r.horas_barbeiro, r.n_geral, r.total_geral, r.horas_geral
+    FROM niveis r
+    JOIN servicos_catalogo c ON c.id = r.servico_id
+    JOIN barbeiros b ON b.id = r.barbeiro_id
+    ORDER BY r.atual DESC, c.nome, b.nome
+"""
+SQL_SEM_BRUTOS = "SELECT 0 AS atual, 0 AS barbeiro_id, 0 AS servico_id, '' AS hora, 0.0 AS valor WHERE 0"
+
+
+def _fontes_desempenho(db, conn, inicio, fim, atual):
+    """Partes (brutos, resumos) do período para SQL_DESEMPENHO, com os parâmetros de cada uma."""
+    primeiro, ultimo, trechos = fatiar_periodo(inicio, fim)
+    resumos = [(f"SELECT {atual}, servico_id, barbeiro_id, quantidade, total, 0 FROM resumo_diario_servicos "
+                "WHERE dia BETWEEN ? AND ?", [primeiro, ultimo]),
+               (f"SELECT {atual}, NULL, barbeiro_id, 0, 0.0, horas FROM resumo_diario_barbeiros "
+                "WHERE dia BETWEEN ? AND ?", [primeiro, ultimo])]
+    brutos = []
+    for ini, fim_trecho in trechos:
+        for esquema in esquemas_do_periodo(db, conn, ini, fim_trecho):
+            brutos.append((f"SELECT {atual} AS atual, barbeiro_id, servico_id, substr(data_hora, 1, 13) AS hora, valor "
+                           f"FROM {esquema}.servicos WHERE data_hora BETWEEN ? AND ?", [ini, fim_trecho]))
+    return brutos, resumos
+
+
+def periodo_anterior(periodo_inicio, periodo_fim):
+    """Período de mesma duração imediatamente antes de [inicio, fim] (com horas)."""
+    inicio = datetime.fromisoformat(periodo_inicio if len(periodo_inicio) > 10 else periodo_inicio + " 00:00:00")
+    fim = datetime.fromisoformat(periodo_fim if len(periodo_fim) > 10 else periodo_fim + " 23:59:59")
+    duracao = fim - inicio + timedelta(seconds=1)
+    formato = "%Y-%m-%d %H:%M:%S"
+    return (inicio - duracao).strftime(formato), (inicio - timedelta(seconds=1)).strftime(formato)
+
+
+def _indicadores(atendimentos, total, horas):
+    return {'atendimentos': atendimentos, 'total': total,
+            'ticket_medio': total / atendimentos if atendimentos else 0.0,
+            'horas': horas, 'servicos_por_hora': atendimentos / horas if horas else 0.0}
+
+
+def _variacao(atual, anterior):
+    return (atual - anterior) / anterior if anterior else None
+
+
+def desempenho_barbeiros(db, periodo_inicio, periodo_fim, comparar=True):
+    """Relatório de desempenho: totais por serviço, por barbeiro e geral, ticket médio, serviços
+    por hora e comparação com o período anterior de mesma duração, numa consulta só.
+
+    Serviços por hora = atendimentos / horas do relógio em que o barbeiro registrou algum serviço
+    (não há escala de trabalho no banco). Retorna um dict:
+      linhas: [(servico, qtd_servico, total_servico, barbeiro, qtd_barbeiro, total_barbeiro)]
+      servicos: [(servico, quantidade, total, ticket_medio)]
+      barbeiros: [(barbeiro, atendimentos, total, ticket_medio, horas, servicos_por_hora, variacao)]
+      geral: indicadores do período (+ 'variacao' do total)
+      anterior: {'inicio', 'fim', 'barbeiros', 'geral'} ou None sem comparação
+    `variacao` é a variação relativa do total contra o período anterior (None sem base)."""
+    inicio = periodo_inicio if len(periodo_inicio) > 10 else periodo_inicio + " 00:00:00"
+    fim = periodo_fim if len(periodo_fim) > 10 else periodo_fim + " 23:59:59"
+    anterior = periodo_anterior(inicio, fim) if comparar else None
+    with db.leitor() as conn:
+        brutos, resumos = _fontes_desempenho(db, conn, inicio, fim, 1)
+        if comparar:
+            brutos_ant, resumos_ant = _fontes_desempenho(db, conn, *anterior, 0)
+            brutos, resumos = brutos + brutos_ant, resumos + resumos_ant
+        sql = SQL_DESEMPENHO.format(brutos=" UNION ALL ".join(parte for parte, _ in brutos) or SQL_SEM_BRUTOS,
+                                    resumos=" UNION ALL ".join(parte for parte, _ in resumos))
+        linhas = conn.execute(sql, [p for _, params in brutos + resumos for p in params]).fetchall()
+
+    periodos = {1: {'linhas': [], 'servicos': {}, 'barbeiros': {}, 'geral': _indicadores(0, 0.0, 0)},
+                0: {'linhas': [], 'servicos': {}, 'barbeiros': {}, 'geral': _indicadores(0, 0.0, 0)}}
+    for atual, servico, barbeiro, n, total, n_s, total_s, n_b, total_b, horas_b, n_g, total_g, horas_g in linhas:
+        dados = periodos[atual]
+        dados['linhas'].append((servico, n_s, total_s, barbeiro, n, total))
+        dados['servicos'][servico] = (servico, n_s, total_s, total_s / n_s)
+        dados['barbeiros'][barbeiro] = _indicadores(n_b, total_b, horas_b)
+        dados['geral'] = _indicadores(n_g, total_g, horas_g)
+
+    atual, previo = periodos[1], periodos[0]
+    barbeiros = []
+    for nome, ind in sorted(atual['barbeiros'].items(), key=lambda item: -item[1]['total']):
+        base = previo['barbeiros'].get(nome)
+        barbeiros.append((nome, ind['atendimentos'], ind['total'], ind['ticket_medio'], ind['horas'],
+                          ind['servicos_por_hora'], _variacao(ind['total'], base['total']) if comparar and base else None))
+    geral = dict(atual['geral'], variacao=_variacao(atual['geral']['total'], previo['geral']['total']) if comparar else None)
+    relatorio = {'inicio': inicio, 'fim': fim, 'linhas': atual['linhas'],
+                 'servicos': list(atual['servicos'].values()), 'barbeiros': barbeiros, 'geral': geral, 'anterior': None}
+    if comparar:
+        relatorio['anterior'] = {
+            'inicio': anterior[0], 'fim': anterior[1], 'geral': previo['geral'],
+            'barbeiros': [(nome, ind['atendimentos'], ind['total'], ind['ticket_medio'], ind['horas'],
+                           ind['servicos_por_hora'], None)
+                          for nome, ind in sorted(previo['barbeiros'].items(), key=lambda item: -item[1]['total'])],
+        }
+    return relatorio
+
+
+def resumo_caixa(db, periodo_inicio=None, periodo_fim=None, produto_id=None):
+    """Entradas/saídas por produto no período: [(id, nome, qtd_entrada, qtd_saida, total_compra, total_venda)]."""
+    with db.leitor() as conn:
+        cursor = conn.cursor()
+        if periodo_inicio and periodo_fim:
+            # Dias completos vêm de resumo_diario_produtos; apenas trechos parciais leem movimentacoes
+            primeiro, ultimo, trechos = fatiar_periodo(periodo_inicio, periodo_fim)
+            filtro_produto = " AND produto_id = ?" if produto_id else ""
+            partes = ["SELECT produto_id, qtd_entrada, qtd_saida, valor_entrada, valor_saida "
+                      "FROM resumo_diario_produtos WHERE dia BETWEEN ? AND ?" + filtro_produto]
+            params = [primeiro, ultimo] + ([produto_id] if produto_id else [])
+            for ini, fim in trechos:
+                for esquema in esquemas_do_periodo(db, conn, ini, fim):
+                    partes.append(
+                        f"""SELECT produto_id,
+                                   CASE WHEN tipo='ENTRADA' THEN quantidade ELSE 0 END,
+                                   CASE WHEN tipo='SAIDA' THEN quantidade ELSE 0 END,
+                                   CASE WHEN tipo='ENTRADA' THEN quantidade*preco_unitario ELSE 0 END,
+                                   CASE WHEN tipo='SAIDA' THEN quantidade*preco_unitario ELSE 0 END
+                            FROM {esquema}.movimentacoes WHERE data_hora BETWEEN ? AND ?""" + filtro_produto)
+                    params.extend([ini, fim] + ([produto_id] if produto_id else []))
+            cursor.execute(
+                """
+                SELECT p.id, p.nome,
+                       SUM(r.qtd_entrada) AS qtd_entrada,
+                       SUM(r.qtd_saida) AS qtd_saida,
+                       SUM(r.valor_entrada) AS total_compra,
+                       SUM(r.valor_saida) AS total_venda
+                FROM (""" + " UNION ALL ".join(partes) + """) r
+                JOIN produtos p ON p.id = r.produto_id
+                GROUP BY p.id, p.nome
+                ORDER BY p.nome
+                """,
+                params
+            )
+        else:
+            cursor.execute(
+                """
+                SELECT p.id, p.nome,
+                       COALESCE(SUM(r.qtd_entrada), 0) AS qtd_entrada,
+                       COALESCE(SUM(r.qtd_saida), 0) AS qtd_saida,
+                       COALESCE(SUM(r.valor_entrada), 0) AS total_compra,
+                       COALESCE(SUM(r.valor_saida), 0) AS total_venda
+                FROM produtos p
+                LEFT JOIN resumo_diario_produtos r ON r.produto_id = p.id
+                WHERE p.excluido_em IS NULL OR r.produto_id IS NOT NULL
+                GROUP BY p.id, p.nome
+                ORDER BY p.nome
+                """
+            )
+        dados = cursor.fetchall()
+    return dados
+
+
+def fechamento(db, periodo_inicio, periodo_fim):
+    """Fechamento de caixa completo do período (mesmos totais da janela de Fechamento)."""
+    produtos = resumo_caixa(db, periodo_inicio, periodo_fim)
+    servicos, total_servicos = resumo_servicos(db, periodo_inicio, periodo_fim)
+    total_compras = sum(linha[4] for linha in produtos)
+    total_vendas = sum(linha[5] for linha in produtos)
+    total_produtos = total_vendas - total_compras
+    return {
+        'inicio': periodo_inicio, 'fim': periodo_fim,
+        'produtos': produtos, 'servicos': servicos,
+        'total_compras': total_compras, 'total_vendas': total_vendas,
+        'total_produtos': total_produtos, 'total_servicos': total_servicos,
+        'total_geral': total_servicos + total_produtos,
+    }
+
+
+def aplicar_isolado(cursor, operacoes):
+    """Executa várias operações (funções que recebem o cursor) na mesma transação, cada uma
+    no seu SAVEPOINT: uma operação recusada desfaz só o que ela fez.
+    Retorna [(True, resultado) | (False, exceção)] na ordem das operações."""
+    resultados = []
+    for operacao in operacoes:
+        cursor.execute("SAVEPOINT operacao")
+        try:
+            resultados.append((True, operacao(cursor)))
+        except Exception as e:
+            cursor.execute("ROLLBACK TO operacao")
+            resultados.append((False, e))
+        cursor.execute("RELEASE operacao")
+    return resultados
+
+
+class ServicoLocal:
+    """Operações usadas pela interface, executadas direto no banco local.
+    cliente.ClienteAPI oferece a mesma interface falando com o servidor (servidor.py)."""
+
+    remoto = False
+
+    def __init__(self, db):
+        self.db = db
+
+    def listar_produtos(self, ids=None):
+        return listar_produtos(self.db, ids)
+
+    def cadastrar_produto(self, nome, categoria, quantidade, minimo):
+        return cadastrar_produto(self.db, nome, categoria, quantidade, minimo)
+
+    def excluir_produto(self, produto_id):
+        excluir_produto(self.db, produto_id)
+
+    def definir_precos(self, produto_id, preco_custo, preco_venda):
+        definir_precos(self.db, produto_id, preco_custo, preco_venda)
+
+    def movimentar(self, produto_id, delta, tipo_mov=None):
+        return movimentar_estoque(self.db, produto_id, delta, tipo_mov)
+
+    def movimentar_lote(self, itens, tipo_mov):
+        return movimentar_em_lote(self.db, itens, tipo_mov)
+
+    def registrar_servico(self, servico, valor, barbeiro):
+        return registrar_servico(self.db, servico, valor, barbeiro)
+
+    def catalogo(self):
+        return catalogo(self.db).como_dict()
+
+    def recarregar_catalogo(self):
+        catalogo(self.db).invalidar()
+
+    def definir_servico(self, nome, preco, ativo=True):
+        return definir_servico(self.db, nome, preco, ativo)
+
+    def definir_barbeiro(self, nome, ativo=True):
+        return definir_barbeiro(self.db, nome, ativo)
+
+    def desativar_servico(self, nome):
+        desativar_servico(self.db, nome)
+
+    def desativar_barbeiro(self, nome):
+        desativar_barbeiro(self.db, nome)
+
+    def listar_estoque_baixo(self):
+        return listar_estoque_baixo(self.db)
+
+    def contar_estoque_baixo(self):
+        return contar_estoque_baixo(self.db)
+
+    def resumo_caixa(self, periodo_inicio=None, periodo_fim=None, produto_id=None):
+        return resumo_caixa(self.db, periodo_inicio, periodo_fim, produto_id)
+
+    def resumo_servicos(self, periodo_inicio=None, periodo_fim=None):
+        return resumo_servicos(self.db, periodo_inicio, periodo_fim)
+
+    def desempenho_barbeiros(self, periodo_inicio, periodo_fim, comparar=True):
+        return desempenho_barbeiros(self.db, periodo_inicio, periodo_fim, comparar)
+
+    def fechar(self):
+        self.db.fechar()
+
+
+def preparar_banco(db):
+    """Cria as tabelas base e aplica as migrações pendentes."""
+    with db.transacao() as cursor:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS produtos (
+                id INTEGER PRIMARY KEY,
+                nome TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                quantidade REAL NOT NULL,
+                minimo INTEGER NOT NULL,
+                preco_custo REAL DEFAULT 0,
+                preco_venda REAL DEFAULT 0
+            )
+        ''')
+        # Ajusta colunas se necessário
+        try:
+            cursor.execute("ALTER TABLE produtos ADD COLUMN preco_custo REAL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+        try:
+            cursor.execute("ALTER TABLE produtos ADD COLUMN preco_venda REAL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS movimentacoes (
+                id INTEGER PRIMARY KEY,
+                produto_id INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                quantidade REAL NOT NULL,
+                preco_unitario REAL NOT NULL,
+                data_hora TEXT NOT NULL,
+                FOREIGN KEY (produto_id) REFERENCES produtos (id)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS servicos (
+                id INTEGER PRIMARY KEY,
+                servico TEXT NOT NULL,
+                valor REAL NOT NULL,
+                barbeiro TEXT NOT NULL,
+                data_hora TEXT NOT NULL
+            )
+        ''')
+    db.migrar(MIGRACOES)
+    ajustar_particoes(db)
+
+
+# ===== Migração 9: catálogo de serviços e barbeiros =====
+# Tabela de preços que ficava fixa no formulário; os nomes seguem o .title() com que o
+# formulário antigo gravava, para os serviços já registrados caírem nas mesmas linhas
+SERVICOS_PADRAO = [(nome.title(), preco) for nome, preco in (
+    ("BARBA", 30), ("BIGODE", 10), ("CORTE", 40), ("CABELO E ALISAMENTO", 80),
+    ("CABELO E BARBA", 60), ("LUZES", 150), ("PLATINADO", 200), ("SOBRANCELHA", 10))]
+BARBEIROS_PADRAO = ["Barbeiro 1", "Barbeiro 2"]
+
+
+def _recodificar_servicos(cursor, esquema):
+    """Troca servico/barbeiro em texto por ids do catálogo em `esquema`.servicos (principal ou
+    partição). Nomes que não estão no catálogo entram nele: serviços inativos, com o valor médio
+    cobrado como preço."""
+    cursor.execute(f"INSERT OR IGNORE INTO main.servicos_catalogo (nome, preco, ativo) "
+                   f"SELECT servico, AVG(valor), 0 FROM {esquema}.servicos GROUP BY servico")
+    cursor.execute(f"INSERT OR IGNORE INTO main.barbeiros (nome) "
+                   f"SELECT barbeiro FROM {esquema}.servicos GROUP BY barbeiro ORDER BY MIN(id)")
+    referencias = esquema == 'main'     # chaves estrangeiras não atravessam bancos anexados
+    cursor.execute(f"""CREATE TABLE {esquema}.servicos_codificados (
+                           id INTEGER PRIMARY KEY,
+                           servico_id INTEGER NOT NULL{" REFERENCES servicos_catalogo (id)" if referencias else ""},
+                           valor REAL NOT NULL,
+                           barbeiro_id INTEGER NOT NULL{" REFERENCES barbeiros (id)" if referencias else ""},
+                           data_hora TEXT NOT NULL
+                       )""")
+    cursor.execute(f"""INSERT INTO {esquema}.servicos_codificados (id, servico_id, valor, barbeiro_id, data_hora)
+                       SELECT s.id, c.id, s.valor, b.id, s.data_hora
+                       FROM {esquema}.servicos s
+                       JOIN main.servicos_catalogo c ON c.nome = s.servico
+                       JOIN main.barbeiros b ON b.nome = s.barbeiro""")
+    cursor.execute(f"DROP TABLE {esquema}.servicos")
+    cursor.execute(f"ALTER TABLE {esquema}.servicos_codificados RENAME TO servicos")
+    cursor.execute(f"CREATE INDEX {esquema}.idx_servicos_data_barbeiro ON servicos (data_hora, barbeiro_id, servico_id, valor)")
+
+
+def _migrar_catalogo(cursor):
+    cursor.executemany("INSERT OR IGNORE INTO servicos_catalogo (nome, preco) VALUES (?, ?)", SERVICOS_PADRAO)
+    cursor.executemany("INSERT OR IGNORE INTO barbeiros (nome) VALUES (?)", [(n,) for n in BARBEIROS_PADRAO])
+    # Os resumos também cobrem anos já arquivados: seus nomes entram no catálogo antes da conversão
+    cursor.execute("INSERT OR IGNORE INTO servicos_catalogo (nome, preco, ativo) "
+                   "SELECT servico, SUM(total) / SUM(quantidade), 0 FROM resumo_diario_servicos GROUP BY servico")
+    cursor.execute("INSERT OR IGNORE INTO barbeiros (nome) "
+                   "SELECT barbeiro FROM resumo_diario_servicos GROUP BY barbeiro ORDER BY MIN(dia)")
+    _recodificar_servicos(cursor, 'main')
+    cursor.execute("""CREATE TABLE resumo_servicos_codificado (
+                          dia TEXT NOT NULL,
+                          servico_id INTEGER NOT NULL,
+                          barbeiro_id INTEGER NOT NULL,
+                          quantidade INTEGER NOT NULL DEFAULT 0,
+                          total REAL NOT NULL DEFAULT 0,
+                          PRIMARY KEY (dia, servico_id, barbeiro_id)
+                      ) WITHOUT ROWID""")
+    cursor.execute("""INSERT INTO resumo_servicos_codificado (dia, servico_id, barbeiro_id, quantidade, total)
+                      SELECT r.dia, c.id, b.id, r.quantidade, r.total
+                      FROM resumo_diario_servicos r
+                      JOIN servicos_catalogo c ON c.nome = r.servico
+                      JOIN barbeiros b ON b.nome = r.barbeiro""")
+    cursor.execute("DROP TABLE resumo_diario_servicos")
+    cursor.execute("ALTER TABLE resumo_servicos_codificado RENAME TO resumo_diario_servicos")
+
+
+# ===== Migração 11: ids que não se repetem =====
+def _autoincrementar(cursor, tabela):
+    """Recria `tabela` com id AUTOINCREMENT, mantendo linhas, índices e gatilhos. Sem ele o
+    SQLite numera a partir do maior id presente: se o arquivamento esvazia a tabela, os ids
+    recomeçam em 1 e colidem com os das partições (que exportação e importação usam)."""
+    sql = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone()[0]
+    if 'AUTOINCREMENT' in sql.upper():
+        return
+    dependentes = [linha[0] for linha in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (tabela,))]
+    nova = re.sub(r"^CREATE TABLE[^(]*\(", f"CREATE TABLE {tabela}_nova (", sql)
+    nova = re.sub(r"\bid\s+INTEGER\s+PRIMARY\s+KEY\b", "id INTEGER PRIMARY KEY AUTOINCREMENT", nova, count=1,
+                  flags=re.IGNORECASE)
+    cursor.execute(nova)
+    cursor.execute(f"INSERT INTO {tabela}_nova SELECT * FROM {tabela}")
+    cursor.execute(f"DROP TABLE {tabela}")
+    cursor.execute(f"ALTER TABLE {tabela}_nova RENAME TO {tabela}")
+    for comando in dependentes:
+        cursor.execute(comando)
+
+
+# Migrações versionadas do schema, controladas por PRAGMA user_version.
+# Nunca altere uma migração já publicada: acrescente uma nova ao final da lista.
+MIGRACOES = [
+    (1, [
+        # Índices de cobertura para os relatórios de Fechamento de Caixa
+        "CREATE INDEX IF NOT EXISTS idx_mov_data_produto_tipo ON movimentacoes (data_hora, produto_id, tipo, quantidade, preco_unitario)",
+        "CREATE INDEX IF NOT EXISTS idx_mov_produto_data ON movimentacoes (produto_id, data_hora)",
+        "CREATE INDEX IF NOT EXISTS idx_servicos_data_barbeiro ON servicos (data_hora, barbeiro, servico, valor)",
+    ]),
+    (2, [
+        # Resumos diários mantidos incrementalmente para o Fechamento de Caixa
+        """CREATE TABLE IF NOT EXISTS resumo_diario_produtos (
+               dia TEXT NOT NULL,
+               produto_id INTEGER NOT NULL,
+               qtd_entrada REAL NOT NULL DEFAULT 0,
+               qtd_saida REAL NOT NULL DEFAULT 0,
+               valor_entrada REAL NOT NULL DEFAULT 0,
+               valor_saida REAL NOT NULL DEFAULT 0,
+               PRIMARY KEY (dia, produto_id)
+           ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_resumo_produto_dia ON resumo_diario_produtos (produto_id, dia)",
+        """CREATE TABLE IF NOT EXISTS resumo_diario_servicos (
+               dia TEXT NOT NULL,
+               servico TEXT NOT NULL,
+               barbeiro TEXT NOT NULL,
+               quantidade INTEGER NOT NULL DEFAULT 0,
+               total REAL NOT NULL DEFAULT 0,
+               PRIMARY KEY (dia, servico, barbeiro)
+           ) WITHOUT ROWID""",
+        reconstruir_resumos,
+    ]),
+    (3, [
+        # Defesa extra: nenhum caminho de escrita pode deixar estoque negativo
+        """CREATE TRIGGER IF NOT EXISTS trg_produtos_quantidade_nao_negativa
+           BEFORE UPDATE OF quantidade ON produtos
+           WHEN NEW.quantidade < 0
+           BEGIN
+               SELECT RAISE(ABORT, 'quantidade negativa');
+           END""",
+    ]),
+    (4, [
+        # Ponto de retomada das importações em lote (transferencia.py)
+        """CREATE TABLE IF NOT EXISTS importacoes (
+               chave TEXT PRIMARY KEY,
+               tabela TEXT NOT NULL,
+               arquivo TEXT NOT NULL,
+               registros INTEGER NOT NULL DEFAULT 0,
+               importados INTEGER NOT NULL DEFAULT 0,
+               rejeitados INTEGER NOT NULL DEFAULT 0,
+               concluida INTEGER NOT NULL DEFAULT 0,
+               atualizado_em TEXT NOT NULL
+           )""",
+    ]),
+    (5, [
+        # Último evento do diário de escrita (diario.py) já aplicado ao banco
+        """CREATE TABLE IF NOT EXISTS diario_checkpoint (
+               diario TEXT PRIMARY KEY,
+               seq INTEGER NOT NULL
+           )""",
+    ]),
+    (6, [
+        # Produtos abaixo do mínimo, mantidos por triggers: o painel "Repor" e o contador da
+        # barra de status leem só os alertas, sem varrer o catálogo
+        """CREATE TABLE IF NOT EXISTS estoque_baixo (
+               produto_id INTEGER PRIMARY KEY,
+               desde TEXT NOT NULL
+           )""",
+        """CREATE TRIGGER IF NOT EXISTS trg_estoque_baixo_inserir
+           AFTER INSERT ON produtos
+           WHEN NEW.quantidade < NEW.minimo
+           BEGIN
+               INSERT OR IGNORE INTO estoque_baixo (produto_id, desde) VALUES (NEW.id, datetime('now', 'localtime'));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_estoque_baixo_entrar
+           AFTER UPDATE OF quantidade, minimo ON produtos
+           WHEN NEW.quantidade < NEW.minimo AND NOT (OLD.quantidade < OLD.minimo)
+           BEGIN
+               INSERT OR IGNORE INTO estoque_baixo (produto_id, desde) VALUES (NEW.id, datetime('now', 'localtime'));
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_estoque_baixo_sair
+           AFTER UPDATE OF quantidade, minimo ON produtos
+           WHEN NEW.quantidade >= NEW.minimo AND OLD.quantidade < OLD.minimo
+           BEGIN
+               DELETE FROM estoque_baixo WHERE produto_id = NEW.id;
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_estoque_baixo_excluir
+           AFTER DELETE ON produtos
+           BEGIN
+               DELETE FROM estoque_baixo WHERE produto_id = OLD.id;
+           END""",
+        """INSERT OR IGNORE INTO estoque_baixo (produto_id, desde)
+           SELECT id, datetime('now', 'localtime') FROM produtos WHERE quantidade < minimo""",
+    ]),
+    (7, [
+        # Exclusão lógica de produtos: o histórico de movimentações deixa de ser apagado
+        "ALTER TABLE produtos ADD COLUMN excluido_em TEXT",
+        """CREATE TRIGGER IF NOT EXISTS trg_produtos_sem_exclusao_fisica
+           BEFORE DELETE ON produtos
+           BEGIN
+               SELECT RAISE(ABORT, 'produtos são excluídos logicamente (excluido_em)');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_estoque_baixo_exclusao_logica
+           AFTER UPDATE OF excluido_em ON produtos
+           WHEN NEW.excluido_em IS NOT NULL
+           BEGIN
+               DELETE FROM estoque_baixo WHERE produto_id = NEW.id;
+           END""",
+        # Razão de estoque: cada mudança de produtos.quantidade vira um lançamento imutável,
+        # qualquer que seja o caminho de escrita (movimentação, lote, diário, importação)
+        """CREATE TABLE IF NOT EXISTS razao_estoque (
+               id INTEGER PRIMARY KEY,
+               produto_id INTEGER NOT NULL,
+               data_hora TEXT NOT NULL,
+               delta REAL NOT NULL,
+               origem TEXT NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_razao_produto ON razao_estoque (produto_id, id, delta)",
+        """CREATE TRIGGER IF NOT EXISTS trg_razao_cadastro
+           AFTER INSERT ON produtos
+           WHEN NEW.quantidade <> 0
+           BEGIN
+               INSERT INTO razao_estoque (produto_id, data_hora, delta, origem)
+               VALUES (NEW.id, datetime('now', 'localtime'), NEW.quantidade, 'cadastro');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_razao_movimento
+           AFTER UPDATE OF quantidade ON produtos
+           WHEN NEW.quantidade <> OLD.quantidade
+           BEGIN
+               INSERT INTO razao_estoque (produto_id, data_hora, delta, origem)
+               VALUES (NEW.id, datetime('now', 'localtime'), NEW.quantidade - OLD.quantidade, 'movimento');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_razao_imutavel_alterar
+           BEFORE UPDATE ON razao_estoque
+           BEGIN
+               SELECT RAISE(ABORT, 'razão de estoque é somente inclusão');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_razao_imutavel_excluir
+           BEFORE DELETE ON razao_estoque
+           BEGIN
+               SELECT RAISE(ABORT, 'razão de estoque é somente inclusão');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_imutavel_alterar
+           BEFORE UPDATE ON movimentacoes
+           BEGIN
+               SELECT RAISE(ABORT, 'movimentações são somente inclusão');
+           END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_imutavel_excluir
+           BEFORE DELETE ON movimentacoes
+           BEGIN
+               SELECT RAISE(ABORT, 'movimentações são somente inclusão');
+           END""",
+        # Saldo de abertura: o histórico anterior nem sempre explica a quantidade atual
+        # (movimentações importadas não alteram o estoque), então o razão parte do saldo de hoje
+        """INSERT INTO razao_estoque (produto_id, data_hora, delta, origem)
+           SELECT id, datetime('now', 'localtime'), quantidade, 'abertura' FROM produtos WHERE quantidade <> 0""",
+        # Fotografias periódicas do saldo: a consulta de estoque numa data parte da mais
+        # próxima e soma só os lançamentos posteriores a ela (razao.py)
+        """CREATE TABLE IF NOT EXISTS estoque_snapshots (
+               id INTEGER PRIMARY KEY,
+               tirado_em TEXT NOT NULL,
+               razao_id INTEGER NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_snapshots_tirado_em ON estoque_snapshots (tirado_em)",
+        """CREATE TABLE IF NOT EXISTS estoque_snapshot_itens (
+               snapshot_id INTEGER NOT NULL,
+               produto_id INTEGER NOT NULL,
+               saldo REAL NOT NULL,
+               PRIMARY KEY (snapshot_id, produto_id)
+           ) WITHOUT ROWID""",
+    ]),
+    (8, [
+        # Anos fechados movidos para bancos anuais (arquivo.py) e a última execução das
+        # tarefas de manutenção (VACUUM/ANALYZE)
+        """CREATE TABLE IF NOT EXISTS particoes (
+               ano INTEGER PRIMARY KEY,
+               arquivo TEXT NOT NULL,
+               movimentacoes INTEGER NOT NULL,
+               servicos INTEGER NOT NULL,
+               arquivado_em TEXT NOT NULL
+           )""",
+        """CREATE TABLE IF NOT EXISTS manutencao (
+               tarefa TEXT PRIMARY KEY,
+               executada_em TEXT NOT NULL
+           )""",
+    ]),
+    (9, [
+        # Catálogo de serviços (com preço) e barbeiros; `servicos` e o resumo diário passam a
+        # guardar ids inteiros em vez de repetir os nomes em cada linha
+        """CREATE TABLE IF NOT EXISTS servicos_catalogo (
+               id INTEGER PRIMARY KEY,
+               nome TEXT NOT NULL UNIQUE,
+               preco REAL NOT NULL,
+               ativo INTEGER NOT NULL DEFAULT 1
+           )""",
+        """CREATE TABLE IF NOT EXISTS barbeiros (
+               id INTEGER PRIMARY KEY,
+               nome TEXT NOT NULL UNIQUE,
+               ativo INTEGER NOT NULL DEFAULT 1
+           )""",
+        _migrar_catalogo,
+    ]),
+    (10, [
+        # Horas ocupadas de cada barbeiro por dia (máscara de 24 bits): serviços por hora no
+        # relatório de desempenho sem reler `servicos` nos dias completos
+        """CREATE TABLE IF NOT EXISTS resumo_diario_barbeiros (
+               dia TEXT NOT NULL,
+               barbeiro_id INTEGER NOT NULL REFERENCES barbeiros (id),
+               horas_mascara INTEGER NOT NULL DEFAULT 0,
+               horas INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (dia, barbeiro_id)
+           ) WITHOUT ROWID""",
+        resumir_horas,
+    ]),
+    (11, [
+        # Movimentações e serviços com AUTOINCREMENT; `particoes` guarda o maior id arquivado de
+        # cada tabela (partições antigas recebem o valor em ajustar_particoes, que também
+        # empurra a sequência para cima deles)
+        "ALTER TABLE particoes ADD COLUMN ultimo_id_movimentacoes INTEGER",
+        "ALTER TABLE particoes ADD COLUMN ultimo_id_servicos INTEGER",
+        lambda cursor: _autoincrementar(cursor, 'movimentacoes'),
+        lambda cursor: _autoincrementar(cursor, 'servicos'),
+    ]),
+]
@@ -0,0 +1,124 @@
+# Previsão de demanda e sugestão de compra - Barbearia
+# A velocidade de consumo de cada produto vem das SAIDAs em `movimentacoes`: média móvel
+# exponencial das saídas diárias, ajustada por um fator de dia da semana (a barbearia vende
+# mais pomada no sábado do que na terça). Com ela projeta-se em quantos dias o estoque atual
+# acaba e quanto comprar para atravessar o prazo de entrega mais a cobertura desejada.
+# O catálogo inteiro é calculado numa passada vetorizada sobre as colunas de analitico.py;
+# depois, só os produtos tocados por movimentações novas são recalculados.
+import threading
+from datetime import date
+
+import nucleo
+from analitico import BaseAnalitica, np
+
+JANELA_DIAS = 56          # 8 semanas de histórico
+ALFA = 0.1                # suavização exponencial (meia-vida de ~1 semana)
+HORIZONTE_DIAS = 180      # além disso, "sem previsão de ruptura"
+PRAZO_ENTREGA_DIAS = 7
+COBERTURA_DIAS = 14
+
+
+class PrevisaoDemanda:
+    """Cache de previsões por produto.
+
+    `atualizar()` sincroniza as colunas e recalcula: tudo na primeira chamada, ao virar o
+    dia ou quando as colunas forem recarregadas; senão só os produtos com movimentações novas
+    (mais os que surgiram ou sumiram do cadastro). Cada previsão é a tupla
+    (produto_id, nome, quantidade, minimo, consumo_diario, dias_ate_ruptura, sugestao),
+    com dias_ate_ruptura None quando o estoque dura mais que HORIZONTE_DIAS.
+    """
+
+    def __init__(self, db, base=None, janela_dias=JANELA_DIAS, alfa=ALFA, prazo_entrega=PRAZO_ENTREGA_DIAS,
+                 cobertura=COBERTURA_DIAS):
+        self.db = db
+        self.base = base or BaseAnalitica(db)
+        self.janela_dias = janela_dias
+        self.prazo_entrega = prazo_entrega
+        self.cobertura = cobertura
+        pesos = alfa * (1 - alfa) ** np.arange(janela_dias - 1, -1, -1)
+        self._pesos = pesos / pesos.sum()      # dia mais recente por último
+        self.previsoes = {}
+        self._lock = threading.Lock()
+        self._dia = None            # dia (época) do último cálculo completo
+        self._colunas = None        # colunas usadas no último cálculo (recarga cria outras)
+        self._linhas_lidas = 0      # linhas de movimentações já consideradas
+
+    def atualizar(self, hoje=None):
+        """Retorna o dicionário produto_id -> previsão, recalculando o necessário."""
+        with self._lock:
+            hoje = hoje or date.today()
+            dia = (hoje - date(1970, 1, 1)).days
+            self.base.sincronizar()
+            mov = self.base.mov
+            if dia != self._dia or mov is not self._colunas:
+                produtos = nucleo.listar_produtos(self.db)
+                self.previsoes = {}
+            else:
+                novos = np.unique(mov['produto'][self._linhas_lidas:])
+                tocados = {self.base.produtos.valores[c] for c in novos.tolist()}
+                ids_atuais = {r[0] for r in self.db.consultar("SELECT id FROM produtos WHERE excluido_em IS NULL")}
+                for pid in self.previsoes.keys() - ids_atuais:
+                    del self.previsoes[pid]
+                tocados |= ids_atuais - self.previsoes.keys()
+                produtos = nucleo.listar_produtos(self.db, tocados & ids_atuais) if tocados else []
+            if produtos:
+                self.previsoes.update(self._calcular(produtos, dia))
+            self._dia = dia
+            self._colunas = mov
+            self._linhas_lidas = len(mov)
+            return dict(self.previsoes)
+
+    def lista_de_compras(self):
+        """Previsões com sugestão de compra, das rupturas mais próximas para as mais distantes."""
+        return sorted((p for p in self.previsoes.values() if p[6] > 0),
+                      key=lambda p: (p[5] is None, p[5] if p[5] is not None else 0, p[1]))
+
+    def _calcular(self, produtos, hoje):
+        ids = [r[0] for r in produtos]
+        quantidade = np.array([r[3] for r in produtos], dtype=np.float64)
+        minimo = np.array([r[4] for r in produtos], dtype=np.float64)
+        n, janela = len(produtos), self.janela_dias
+        inicio = hoje - janela
+
+        # Matriz produto x dia com as saídas das últimas `janela` jornadas completas
+        codigos = self.base.produtos._codigos
+        linha_do_codigo = np.full(len(self.base.produtos) + 1, -1, dtype=np.int64)
+        for linha, pid in enumerate(ids):
+            codigo = codigos.get(pid)
+            if codigo is not None:
+                linha_do_codigo[codigo] = linha
+        mov = self.base.mov
+        dias = mov['dia']
+        m = ~mov['entrada'] & (dias >= inicio) & (dias < hoje)
+        linhas = linha_do_codigo[mov['produto'][m]]
+        validas = linhas >= 0
+        matriz = np.bincount(linhas[validas] * janela + (dias[m][validas] - inicio),
+                             weights=mov['quantidade'][m][validas], minlength=n * janela).reshape(n, janela)
+
+        # Nível: média móvel exponencial; sazonalidade: média por dia da semana / média geral,
+        # encolhida para 1 conforme o número de semanas observadas
+        consumo = matriz @ self._pesos
+        dia_semana = (np.arange(inicio, hoje) + 3) % 7          # 0 = segunda-feira
+        um_quente = np.eye(7)[dia_semana]
+        media_semana = (matriz @ um_quente) / np.maximum(um_quente.sum(axis=0), 1)
+        media = matriz.mean(axis=1, keepdims=True)
+        fator = np.divide(media_semana, media, out=np.ones_like(media_semana), where=media > 0)
+        semanas = janela / 7
+        fator = 1 + (fator - 1) * semanas / (semanas + 2)
+
+        # Demanda prevista dia a dia a partir de hoje e o dia em que o acumulado passa o estoque
+        futuros = (np.arange(hoje, hoje + HORIZONTE_DIAS) + 3) % 7
+        acumulada = np.cumsum(consumo[:, None] * fator[:, futuros], axis=1)
+        rompe = acumulada >= np.maximum(quantidade, 0)[:, None]
+        rompe &= acumulada > 0
+        dias_ate = np.where(rompe.any(axis=1), rompe.argmax(axis=1), -1)
+        reposicao = min(self.prazo_entrega + self.cobertura, HORIZONTE_DIAS) - 1
+        sugestao = np.ceil(np.maximum(acumulada[:, reposicao] + minimo - quantidade, 0))
+
+        return {pid: (pid, r[1], r[3], r[4], float(c), None if d < 0 else int(d), int(s))
+                for pid, r, c, d, s in zip(ids, produtos, consumo.tolist(), dias_ate.tolist(), sugestao.tolist())}
+
+
+def ruptura_proxima(previsao, prazo=PRAZO_ENTREGA_DIAS):
+    """True quando o estoque acaba antes de uma compra feita hoje chegar."""
+    return previsao is not None and previsao[5] is not None and previsao[5] <= prazo and previsao[4] > 0
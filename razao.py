@@ -0,0 +1,115 @@
+# Razão de estoque - Barbearia
+# Toda mudança de produtos.quantidade vira um lançamento imutável em `razao_estoque`
+# (triggers da migração 7), qualquer que seja o caminho de escrita. Fotografias periódicas
+# do saldo (`estoque_snapshots`) deixam a consulta "quanto havia no dia X" proporcional aos
+# lançamentos desde a fotografia mais próxima, e não ao histórico inteiro.
+from datetime import datetime, timedelta
+
+import nucleo
+
+SNAPSHOT_MAX_IDADE = timedelta(hours=24)
+SNAPSHOT_MAX_LANCAMENTOS = 20_000
+TOLERANCIA = 1e-6          # somas de deltas fracionários acumulam erro de arredondamento
+
+
+def _instante(texto):
+    """'AAAA-MM-DD' vale até o fim do dia; 'AAAA-MM-DD HH:MM:SS' é usado como está."""
+    try:
+        datetime.fromisoformat(texto)
+    except (TypeError, ValueError):
+        raise nucleo.ErroValidacao(f"Data inválida: '{texto}' (use AAAA-MM-DD[ HH:MM:SS]).", "Erro de Entrada")
+    return texto if len(texto) > 10 else texto + " 23:59:59"
+
+
+# ===== Fotografias do saldo =====
+def tirar_snapshot(db):
+    """Grava o saldo de cada produto do razão e retorna o id da fotografia.
+    O saldo é derivado do próprio razão (fotografia anterior + lançamentos desde ela), não de
+    produtos.quantidade: assim a reconciliação continua comparando duas fontes independentes."""
+    with db.transacao() as cursor:
+        anterior = cursor.execute(
+            "SELECT id, razao_id FROM estoque_snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        anterior_id, desde = anterior or (0, 0)
+        ate = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM razao_estoque").fetchone()[0]
+        cursor.execute("INSERT INTO estoque_snapshots (tirado_em, razao_id) VALUES (?, ?)",
+                       (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), ate))
+        snapshot_id = cursor.lastrowid
+        cursor.execute(
+            """
+            INSERT INTO estoque_snapshot_itens (snapshot_id, produto_id, saldo)
+            SELECT ?, produto_id, SUM(saldo) FROM (
+                SELECT produto_id, saldo FROM estoque_snapshot_itens WHERE snapshot_id = ?
+                UNION ALL
+                SELECT produto_id, delta FROM razao_estoque WHERE id > ? AND id <= ?
+            ) GROUP BY produto_id
+            """,
+            (snapshot_id, anterior_id, desde, ate)
+        )
+    return snapshot_id
+
+
+def snapshot_se_necessario(db, max_idade=SNAPSHOT_MAX_IDADE, max_lancamentos=SNAPSHOT_MAX_LANCAMENTOS):
+    """Tira uma fotografia se houver lançamentos novos e a última for velha ou estiver a mais
+    de `max_lancamentos` do fim do razão. Retorna o id criado ou None."""
+    ultimo = db.consultar_um("SELECT tirado_em, razao_id FROM estoque_snapshots ORDER BY id DESC LIMIT 1")
+    topo = db.consultar_um("SELECT COALESCE(MAX(id), 0) FROM razao_estoque")[0]
+    if ultimo:
+        tirado_em, razao_id = ultimo
+        if topo == razao_id:
+            return None
+        if topo - razao_id < max_lancamentos and datetime.now() - datetime.fromisoformat(tirado_em) < max_idade:
+            return None
+    return tirar_snapshot(db)
+
+
+# ===== Consultas =====
+def estoque_em(db, instante, produto_id=None):
+    """Saldo de cada produto no instante: {produto_id: saldo}.
+
+    Parte da última fotografia tirada até o instante e soma os lançamentos entre ela e a
+    fotografia seguinte (que limita a varredura) com data_hora até o instante. Produtos
+    ainda sem lançamentos naquele momento ou já excluídos nele ficam de fora.
+    O razão começa na migração 7 (lançamentos 'abertura'): antes disso não há saldo."""
+    instante = _instante(instante)
+    filtro = " AND produto_id = ?" if produto_id is not None else ""
+    extra = (produto_id,) if produto_id is not None else ()
+    with db.leitor() as conn:
+        antes = conn.execute(
+            "SELECT id, razao_id FROM estoque_snapshots WHERE tirado_em <= ? ORDER BY tirado_em DESC, id DESC LIMIT 1",
+            (instante,)).fetchone()
+        depois = conn.execute(
+            "SELECT razao_id FROM estoque_snapshots WHERE tirado_em > ? ORDER BY tirado_em, id LIMIT 1",
+            (instante,)).fetchone()
+        saldos = {}
+        desde = 0
+        if antes:
+            snapshot_id, desde = antes
+            saldos = dict(conn.execute(
+                "SELECT produto_id, saldo FROM estoque_snapshot_itens WHERE snapshot_id = ?" + filtro,
+                (snapshot_id, *extra)))
+        ate = depois[0] if depois else conn.execute("SELECT COALESCE(MAX(id), 0) FROM razao_estoque").fetchone()[0]
+        for pid, delta in conn.execute(
+                "SELECT produto_id, SUM(delta) FROM razao_estoque "
+                "WHERE id > ? AND id <= ? AND data_hora <= ?" + filtro + " GROUP BY produto_id",
+                (desde, ate, instante, *extra)):
+            saldos[pid] = saldos.get(pid, 0) + delta
+        for (pid,) in conn.execute("SELECT id FROM produtos WHERE excluido_em <= ?", (instante,)):
+            saldos.pop(pid, None)
+    return saldos
+
+
+def reconciliar(db):
+    """Confere, numa única passada agrupada pelo índice do razão, se a soma dos lançamentos de
+    cada produto bate com produtos.quantidade.
+    Retorna as divergências [(produto_id, nome, quantidade, saldo_razao)]; lista vazia é saúde."""
+    return db.consultar(
+        """
+        SELECT p.id, p.nome, p.quantidade, COALESCE(r.saldo, 0)
+        FROM produtos p
+        LEFT JOIN (SELECT produto_id, SUM(delta) AS saldo FROM razao_estoque GROUP BY produto_id) r
+               ON r.produto_id = p.id
+        WHERE ABS(p.quantidade - COALESCE(r.saldo, 0)) > ?
+        ORDER BY p.id
+        """,
+        (TOLERANCIA,)
+    )
@@ -0,0 +1,316 @@
+# Servidor local HTTP/JSON da barbearia
+# Um único processo é dono do banco: vários caixas (main1.py --servidor URL) compartilham o
+# mesmo estoque sem disputar locks do SQLite. Escritas passam por uma fila com um único
+# escritor, que confirma várias operações por COMMIT (group commit).
+# Uso: python servidor.py [--db arquivo] [--host 127.0.0.1] [--porta 8765]
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from database import Database
+import nucleo
+import razao
+
+PORTA_PADRAO = 8765
+MAX_CORPO = 10 * 1024 * 1024
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class Escritor:
+    """Fila de escrita com um único consumidor.
+
+    Cada operação é uma função que recebe o cursor. O consumidor retira tudo o que estiver
+    na fila (até `max_lote`), executa numa única transação com um SAVEPOINT por operação e
+    faz um só COMMIT: uma operação recusada desfaz apenas o próprio savepoint.
+    """
+
+    def __init__(self, db, max_lote=256):
+        self.db = db
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.operacoes = 0
+        self._fila = asyncio.Queue()
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='escritor')
+        self._tarefa = None
+
+    def iniciar(self):
+        self._tarefa = asyncio.get_running_loop().create_task(self._consumir())
+
+    async def encerrar(self):
+        if self._tarefa:
+            self._tarefa.cancel()
+        self._thread.shutdown(wait=True)
+
+    async def executar(self, operacao):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put((operacao, futuro))
+        return await futuro
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            # Enquanto o lote anterior gravava, novas operações se acumularam: vão todas juntas
+            while len(lote) < self.max_lote and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            try:
+                resultados = await loop.run_in_executor(self._thread, self._aplicar, [op for op, _ in lote])
+            except Exception as e:
+                resultados = [(False, e)] * len(lote)
+            self.lotes += 1
+            self.operacoes += len(lote)
+            for (_, futuro), (ok, valor) in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if ok:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+
+    def _aplicar(self, operacoes):
+        with self.db.transacao() as cursor:
+            return nucleo.aplicar_isolado(cursor, operacoes)
+
+
+class ServidorEstoque:
+    """Rotas HTTP/JSON sobre o núcleo. Leituras vão para threads com o pool de leitores;
+    escritas vão para o Escritor."""
+
+    def __init__(self, db):
+        self.db = db
+        self.escritor = Escritor(db)
+        self._leituras = ThreadPoolExecutor(max_workers=db.tamanho_pool, thread_name_prefix='leitor')
+        self.rotas = [
+            ("GET", ("saude",), self.saude),
+            ("GET", ("produtos",), self.listar_produtos),
+            ("GET", ("estoque-baixo",), self.estoque_baixo),
+            ("POST", ("produtos",), self.cadastrar_produto),
+            ("DELETE", ("produtos", None), self.excluir_produto),
+            ("PUT", ("produtos", None, "precos"), self.definir_precos),
+            ("POST", ("movimentacoes",), self.movimentar),
+            ("POST", ("servicos",), self.registrar_servico),
+            ("GET", ("catalogo",), self.listar_catalogo),
+            ("PUT", ("catalogo", "servicos"), self.definir_servico),
+            ("PUT", ("catalogo", "barbeiros"), self.definir_barbeiro),
+            ("POST", ("catalogo", "servicos", "desativar"), self.desativar_servico),
+            ("POST", ("catalogo", "barbeiros", "desativar"), self.desativar_barbeiro),
+            ("GET", ("resumo", "caixa"), self.resumo_caixa),
+            ("GET", ("resumo", "servicos"), self.resumo_servicos),
+            ("GET", ("fechamento",), self.fechamento),
+            ("GET", ("desempenho",), self.desempenho),
+        ]
+
+    async def ler(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._leituras, funcao, *args)
+
+    # ===== Rotas =====
+    async def saude(self, params, corpo):
+        return {"ok": True, "lotes": self.escritor.lotes, "operacoes": self.escritor.operacoes}
+
+    async def listar_produtos(self, params, corpo):
+        ids = params.get("ids")
+        ids = [int(i) for i in ids.split(",") if i] if ids is not None else None
+        return {"produtos": await self.ler(nucleo.listar_produtos, self.db, ids)}
+
+    async def estoque_baixo(self, params, corpo):
+        if params.get("contar"):
+            return {"total": await self.ler(nucleo.contar_estoque_baixo, self.db)}
+        return {"produtos": await self.ler(nucleo.listar_estoque_baixo, self.db)}
+
+    async def cadastrar_produto(self, params, corpo):
+        novo_id = await self.escritor.executar(lambda cur: nucleo._inserir_produto(
+            cur, corpo.get("nome"), corpo.get("categoria"), corpo.get("quantidade"), corpo.get("minimo")))
+        return {"id": novo_id}
+
+    async def excluir_produto(self, params, corpo, produto_id):
+        await self.escritor.executar(lambda cur: nucleo._excluir_produto(cur, int(produto_id)))
+        return {"ok": True}
+
+    async def definir_precos(self, params, corpo, produto_id):
+        await self.escritor.executar(lambda cur: nucleo._definir_precos(
+            cur, int(produto_id), corpo.get("preco_custo"), corpo.get("preco_venda")))
+        return {"ok": True}
+
+    async def movimentar(self, params, corpo):
+        tipo = corpo.get("tipo")
+        if "itens" in corpo:
+            itens = [(int(pid), float(qtd), None if preco is None else float(preco))
+                     for pid, qtd, preco in corpo["itens"]]
+            ids, baixos = await self.escritor.executar(lambda cur: nucleo._movimentar_lote(cur, itens, tipo))
+            return {"ids": ids, "baixos": baixos}
+        produto_id, delta = int(corpo["produto_id"]), nucleo.validar_delta(corpo["delta"])
+        resultado = await self.escritor.executar(lambda cur: nucleo._movimentar(cur, produto_id, delta, tipo))
+        return {"resultado": resultado}
+
+    async def registrar_servico(self, params, corpo):
+        novo_id = await self.escritor.executar(lambda cur: nucleo._inserir_servico(
+            cur, corpo.get("servico"), corpo.get("valor"), corpo.get("barbeiro")))
+        return {"id": novo_id}
+
+    async def listar_catalogo(self, params, corpo):
+        catalogo = nucleo.catalogo(self.db)
+        if params.get("recarregar"):
+            catalogo.invalidar()
+        return await self.ler(catalogo.como_dict)
+
+    async def definir_servico(self, params, corpo):
+        novo_id = await self.escritor.executar(lambda cur: nucleo._definir_servico(
+            cur, corpo.get("nome"), corpo.get("preco"), corpo.get("ativo", True)))
+        nucleo.catalogo(self.db).invalidar()
+        return {"id": novo_id}
+
+    async def definir_barbeiro(self, params, corpo):
+        novo_id = await self.escritor.executar(lambda cur: nucleo._definir_barbeiro(
+            cur, corpo.get("nome"), corpo.get("ativo", True)))
+        nucleo.catalogo(self.db).invalidar()
+        return {"id": novo_id}
+
+    async def desativar_servico(self, params, corpo):
+        await self.escritor.executar(lambda cur: nucleo._desativar_servico(cur, corpo.get("nome")))
+        nucleo.catalogo(self.db).invalidar()
+        return {"ok": True}
+
+    async def desativar_barbeiro(self, params, corpo):
+        await self.escritor.executar(lambda cur: nucleo._desativar_barbeiro(cur, corpo.get("nome")))
+        nucleo.catalogo(self.db).invalidar()
+        return {"ok": True}
+
+    async def resumo_caixa(self, params, corpo):
+        produto_id = int(params["produto_id"]) if params.get("produto_id") else None
+        return {"linhas": await self.ler(nucleo.resumo_caixa, self.db, params.get("inicio"), params.get("fim"), produto_id)}
+
+    async def resumo_servicos(self, params, corpo):
+        linhas, total = await self.ler(nucleo.resumo_servicos, self.db, params.get("inicio"), params.get("fim"))
+        return {"linhas": linhas, "total": total}
+
+    async def fechamento(self, params, corpo):
+        if not params.get("inicio") or not params.get("fim"):
+            raise ErroHTTP(400, "Informe inicio e fim (AAAA-MM-DD).")
+        return await self.ler(nucleo.fechamento, self.db, params["inicio"], params["fim"])
+
+    async def desempenho(self, params, corpo):
+        if not params.get("inicio") or not params.get("fim"):
+            raise ErroHTTP(400, "Informe inicio e fim (AAAA-MM-DD).")
+        return await self.ler(nucleo.desempenho_barbeiros, self.db, params["inicio"], params["fim"],
+                              params.get("comparar", "1") != "0")
+
+    # ===== HTTP =====
+    def _rotear(self, metodo, caminho):
+        partes = tuple(p for p in caminho.split("/") if p)
+        metodo_errado = False
+        for m, padrao, funcao in self.rotas:
+            if len(padrao) != len(partes) or any(p is not None and p != q for p, q in zip(padrao, partes)):
+                continue
+            if m != metodo:
+                metodo_errado = True
+                continue
+            return funcao, [q for p, q in zip(padrao, partes) if p is None]
+        raise ErroHTTP(405 if metodo_errado else 404, f"Rota inexistente: {metodo} {caminho}")
+
+    async def _despachar(self, metodo, alvo, corpo_bruto):
+        url = urlsplit(alvo)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            funcao, argumentos = self._rotear(metodo, url.path)
+            try:
+                corpo = json.loads(corpo_bruto) if corpo_bruto else {}
+            except ValueError:
+                raise ErroHTTP(400, "Corpo JSON inválido.")
+            return 201 if metodo == "POST" else 200, await funcao(params, corpo, *argumentos)
+        except ErroHTTP as e:
+            return e.status, {"erro": "http", "mensagem": str(e)}
+        except nucleo.ErroValidacao as e:
+            return 400, {"erro": "validacao", "mensagem": str(e), "titulo": e.titulo}
+        except nucleo.EstoqueInsuficiente as e:
+            return 409, {"erro": "estoque_insuficiente", "detalhe": e.args[0] if e.args else None}
+        except nucleo.ProdutoNaoEncontrado as e:
+            return 404, {"erro": "produto_nao_encontrado", "detalhe": e.args[0] if e.args else None}
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"erro": "requisicao", "mensagem": f"Requisição inválida: {e}"}
+        except Exception as e:
+            return 500, {"erro": "interno", "mensagem": str(e)}
+
+    async def atender(self, leitor, escritor):
+        """Uma conexão HTTP/1.1 com keep-alive: cada caixa reaproveita a mesma conexão."""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                metodo, alvo, versao = linha.decode("latin-1").split()
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get("content-length", 0))
+                if tamanho > MAX_CORPO:
+                    status, resposta = 413, {"erro": "http", "mensagem": "Corpo grande demais."}
+                    fechar = True
+                else:
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+                    status, resposta = await self._despachar(metodo, alvo, corpo)
+                    fechar = (cabecalhos.get("connection", "").lower() == "close"
+                              or versao == "HTTP/1.0")
+                dados = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+                escritor.write(
+                    f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(dados)}\r\n"
+                    f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode("latin-1") + dados)
+                await escritor.drain()
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host="127.0.0.1", porta=PORTA_PADRAO, ao_iniciar=None):
+        self.escritor.iniciar()
+        servidor = await asyncio.start_server(self.atender, host, porta)
+        if ao_iniciar:
+            ao_iniciar(servidor.sockets[0].getsockname())
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await self.escritor.encerrar()
+            self._leituras.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local do estoque da barbearia (HTTP/JSON).")
+    parser.add_argument('--db', default=nucleo.DB_NAME, help="arquivo do banco (padrão: %(default)s)")
+    parser.add_argument('--host', default="127.0.0.1", help="use 0.0.0.0 para aceitar outros computadores da rede")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    args = parser.parse_args(argv)
+
+    db = Database(args.db, tamanho_pool=8)
+    nucleo.preparar_banco(db)
+    razao.snapshot_se_necessario(db)
+    servidor = ServidorEstoque(db)
+    try:
+        asyncio.run(servidor.servir(args.host, args.porta, ao_iniciar=lambda endereco: print(
+            f"Servidor do estoque em http://{endereco[0]}:{endereco[1]} (banco: {args.db})", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
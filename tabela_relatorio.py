@@ -0,0 +1,143 @@
+# Tabela de relatório sobre ttk.Treeview: itens persistentes, atualização por diferença,
+# ordenação por coluna e paginação. Trocar o período de um relatório só mexe nas linhas que
+# mudaram: itens com a mesma chave são reaproveitados (valores reescritos só se diferentes),
+# os que saíram são removidos e os novos inseridos; widgets e colunas nunca são recriados.
+from tkinter import ttk
+import tkinter as tk
+
+import medicao
+
+POR_PAGINA = 100
+RODAPE = '__rodape__'       # iid da linha de totais, sempre a última e fora da ordenação
+
+
+def _chave_ordenacao(valor):
+    # None por último, texto sem diferenciar maiúsculas; números e texto não se comparam
+    if valor is None:
+        return (2, 0)
+    if isinstance(valor, str):
+        return (1, valor.casefold())
+    return (0, valor)
+
+
+class TabelaRelatorio:
+    """Controla um Treeview existente como uma página de um relatório.
+
+    `formatar(registro)` devolve os valores exibidos; `chave(registro)` identifica a linha entre
+    atualizações (padrão: o primeiro campo); `ordem[i](registro)` é o valor bruto usado para
+    ordenar pela coluna i (padrão: `registro[i]`). `controles`, se dado, recebe os botões de
+    página e o contador "1–100 de N" (no fundo do próprio frame, com `cor_texto`).
+    """
+
+    def __init__(self, tree, formatar, chave=None, ordem=None, controles=None, por_pagina=POR_PAGINA,
+                 cor_texto='#000000'):
+        self.tree = tree
+        self.formatar = formatar
+        self.chave = chave or (lambda registro: registro[0])
+        self.colunas = tuple(tree['columns'])
+        self.ordem = ordem or [(lambda registro, i=i: registro[i]) for i in range(len(self.colunas))]
+        self.por_pagina = por_pagina
+        self.registros = []
+        self.pagina = 0
+        self.ordenada_por = None    # (índice da coluna, decrescente)
+        self._rodape = None
+        self._exibidos = {}         # iid -> valores escritos no Treeview
+        self._ordem_itens = []      # iids na ordem exibida (sem o rodapé)
+        self._titulos = {coluna: tree.heading(coluna, 'text') for coluna in self.colunas}
+        for i, coluna in enumerate(self.colunas):
+            tree.heading(coluna, command=lambda i=i: self.ordenar(i))
+
+        self._anterior = self._proxima = self._contador = None
+        if controles is not None:
+            self._anterior = ttk.Button(controles, text="◀", width=3, command=lambda: self.ir_para(self.pagina - 1))
+            self._proxima = ttk.Button(controles, text="▶", width=3, command=lambda: self.ir_para(self.pagina + 1))
+            self._contador = tk.Label(controles, text="", bg=controles.cget('bg'), fg=cor_texto)
+            self._proxima.pack(side='right')
+            self._anterior.pack(side='right', padx=4)
+            self._contador.pack(side='right', padx=8)
+
+    # ===== Dados =====
+    def definir_linhas(self, registros, rodape=None):
+        """Troca os registros (mantendo ordenação e, se couber, a página) e aplica a diferença."""
+        self.registros = list(registros)
+        self._rodape = rodape
+        if self.ordenada_por is not None:
+            self._ordenar_registros()
+        self.pagina = min(self.pagina, self.total_paginas - 1)
+        self._render()
+
+    @property
+    def total_paginas(self):
+        return max(1, -(-len(self.registros) // self.por_pagina))
+
+    def ir_para(self, pagina):
+        pagina = max(0, min(self.total_paginas - 1, pagina))
+        if pagina != self.pagina:
+            self.pagina = pagina
+            self._render()
+            self.tree.yview_moveto(0)
+
+    # ===== Ordenação =====
+    def ordenar(self, indice):
+        """Clique no cabeçalho: ordena pela coluna; outro clique inverte."""
+        decrescente = self.ordenada_por == (indice, False)
+        self.ordenada_por = (indice, decrescente)
+        for i, coluna in enumerate(self.colunas):
+            seta = (" ▼" if decrescente else " ▲") if i == indice else ""
+            self.tree.heading(coluna, text=self._titulos[coluna] + seta)
+        self._ordenar_registros()
+        self.pagina = 0
+        self._render()
+        self.tree.yview_moveto(0)
+
+    def _ordenar_registros(self):
+        indice, decrescente = self.ordenada_por
+        valor = self.ordem[indice]
+        self.registros.sort(key=lambda registro: _chave_ordenacao(valor(registro)), reverse=decrescente)
+
+    # ===== Renderização =====
+    def _render(self):
+        inicio = self.pagina * self.por_pagina
+        pagina = self.registros[inicio:inicio + self.por_pagina]
+        desejados = [(str(self.chave(registro)), tuple(self.formatar(registro))) for registro in pagina]
+        if self._rodape is not None:
+            desejados.append((RODAPE, tuple(self._rodape)))
+        tree = self.tree
+        manter = {iid for iid, _ in desejados}
+        removidos = [iid for iid in self._exibidos if iid not in manter]
+        if removidos:
+            tree.delete(*removidos)
+            for iid in removidos:
+                del self._exibidos[iid]
+        ordem = [iid for iid in self._ordem_itens if iid in manter]
+        if RODAPE in self._exibidos:
+            ordem.append(RODAPE)
+        escritas = 0
+        for posicao, (iid, valores) in enumerate(desejados):
+            anterior = self._exibidos.get(iid)
+            if anterior is None:
+                tree.insert('', posicao, iid=iid, values=valores)
+                ordem.insert(posicao, iid)
+                escritas += 1
+            else:
+                if anterior != valores:
+                    tree.item(iid, values=valores)
+                    escritas += 1
+                if ordem[posicao] != iid:
+                    # Só as linhas fora do lugar se movem (ordenação nova ou linhas inseridas antes)
+                    tree.move(iid, '', posicao)
+                    ordem.remove(iid)
+                    ordem.insert(posicao, iid)
+            self._exibidos[iid] = valores
+        self._ordem_itens = [iid for iid in ordem if iid != RODAPE]
+        medicao.contar('linhas renderizadas', escritas)
+        self._atualizar_controles(inicio, len(pagina))
+
+    def _atualizar_controles(self, inicio, quantidade):
+        if self._contador is None:
+            return
+        total = len(self.registros)
+        texto = f"{inicio + 1}–{inicio + quantidade} de {total}" if total else "nenhuma linha"
+        self._contador.configure(text=texto)
+        self._anterior.state(['!disabled'] if self.pagina > 0 else ['disabled'])
+        self._proxima.state(['!disabled'] if self.pagina < self.total_paginas - 1 else ['disabled'])
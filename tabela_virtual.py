@@ -0,0 +1,173 @@
+# Tabela virtual (janela deslizante) sobre ttk.Treeview
+# Materializa apenas as linhas visíveis + um pequeno buffer e recicla os itens ao rolar.
+from tkinter import ttk
+import tkinter as tk
+
+import medicao
+
+
+class TabelaVirtual:
+    """Controla um Treeview existente em modo virtual.
+
+    `formatar(indice, registro)` deve devolver `(valores, tags)` para a linha; o índice é a
+    posição absoluta na lista (usado, por exemplo, para as tags odd/even).
+    """
+
+    def __init__(self, tree, scrollbar, formatar, buffer=4):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.formatar = formatar
+        self.buffer = buffer
+        self.linhas = []
+        self.offset = 0
+        self._itens = []            # itens reciclados do Treeview, na ordem de exibição
+        self._selecionado = None    # índice absoluto da linha selecionada
+        self._sincronizando = False
+
+        estilo = tree.cget('style') or 'Treeview'
+        try:
+            self.altura_linha = int(ttk.Style().lookup(estilo, 'rowheight') or 20)
+        except (tk.TclError, ValueError):
+            self.altura_linha = 20
+
+        scrollbar.configure(command=self._yview)
+        tree.configure(yscrollcommand=lambda *_: None)
+        tree.bind('<Configure>', lambda e: self._render())
+        tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        tree.bind('<MouseWheel>', self._on_wheel)
+        tree.bind('<Button-4>', lambda e: self._rolar(-3))
+        tree.bind('<Button-5>', lambda e: self._rolar(3))
+        tree.bind('<Up>', lambda e: self._mover_selecao(-1))
+        tree.bind('<Down>', lambda e: self._mover_selecao(1))
+        tree.bind('<Prior>', lambda e: self._rolar(-self.linhas_visiveis()))
+        tree.bind('<Next>', lambda e: self._rolar(self.linhas_visiveis()))
+
+    # ===== Dados =====
+    def definir_linhas(self, linhas):
+        """Troca o conjunto de linhas exibido. Custo proporcional à janela, não ao total."""
+        self.linhas = linhas
+        self._selecionado = None
+        self.offset = max(0, min(self.offset, len(linhas) - self.linhas_visiveis()))
+        self._render()
+
+    def atualizar(self, selecionado=None):
+        """Re-renderiza a janela após inserções/remoções in-place na lista (custo da janela).
+        `selecionado` é o novo índice absoluto da linha selecionada (None limpa a seleção)."""
+        self._selecionado = selecionado
+        self.offset = max(0, min(self.offset, len(self.linhas) - self.linhas_visiveis()))
+        self._render()
+
+    def atualizar_indices(self, indices):
+        """Reformata apenas as linhas indicadas, se estiverem materializadas."""
+        for idx in indices:
+            k = idx - self.offset
+            if 0 <= k < len(self._itens):
+                valores, tags = self.formatar(idx, self.linhas[idx])
+                self.tree.item(self._itens[k], values=valores, tags=tags)
+
+    def reformatar_visiveis(self):
+        """Reaplica o formatador nas linhas materializadas (ex.: tags que dependem de estado externo)."""
+        self.atualizar_indices(range(self.offset, self.offset + len(self._itens)))
+
+    def registro_selecionado(self):
+        if self._selecionado is None or self._selecionado >= len(self.linhas):
+            return None
+        return self.linhas[self._selecionado]
+
+    def valores_selecionados(self):
+        """Valores formatados da linha selecionada (mesmo formato exibido na tabela)."""
+        registro = self.registro_selecionado()
+        if registro is None:
+            return None
+        return self.formatar(self._selecionado, registro)[0]
+
+    # ===== Renderização =====
+    def linhas_visiveis(self):
+        altura = self.tree.winfo_height()
+        if altura <= 1:
+            return int(self.tree.cget('height') or 10)
+        return max(1, altura // self.altura_linha)
+
+    def _render(self):
+        total = len(self.linhas)
+        janela = min(self.linhas_visiveis() + self.buffer, max(0, total - self.offset))
+        # Ajusta o pool de itens: cria ou remove apenas a diferença
+        while len(self._itens) < janela:
+            self._itens.append(self.tree.insert('', 'end'))
+        while len(self._itens) > janela:
+            self.tree.delete(self._itens.pop())
+        for k, item in enumerate(self._itens):
+            idx = self.offset + k
+            valores, tags = self.formatar(idx, self.linhas[idx])
+            self.tree.item(item, values=valores, tags=tags)
+        medicao.contar('linhas renderizadas', len(self._itens))
+        self._sincronizar_selecao()
+        self.tree.yview_moveto(0)
+        if total:
+            visiveis = self.linhas_visiveis()
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visiveis) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _sincronizar_selecao(self):
+        self._sincronizando = True
+        try:
+            k = None if self._selecionado is None else self._selecionado - self.offset
+            if k is not None and 0 <= k < len(self._itens):
+                self.tree.selection_set(self._itens[k])
+                self.tree.focus(self._itens[k])
+            elif self.tree.selection():
+                self.tree.selection_set(())
+        finally:
+            # Os eventos <<TreeviewSelect>> gerados acima são processados depois; ignora-os
+            self.tree.after_idle(self._fim_sincronizacao)
+
+    def _fim_sincronizacao(self):
+        self._sincronizando = False
+
+    # ===== Rolagem =====
+    def _rolar(self, linhas):
+        maximo = max(0, len(self.linhas) - self.linhas_visiveis())
+        novo = max(0, min(maximo, self.offset + linhas))
+        if novo != self.offset:
+            self.offset = novo
+            self._render()
+        return 'break'
+
+    def _yview(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            maximo = max(0, len(self.linhas) - self.linhas_visiveis())
+            self.offset = max(0, min(maximo, int(float(args[1]) * len(self.linhas))))
+            self._render()
+        elif args[0] == 'scroll':
+            passos = int(args[1])
+            self._rolar(passos * self.linhas_visiveis() if args[2] == 'pages' else passos)
+
+    def _on_wheel(self, event):
+        passos = -1 if event.delta > 0 else 1
+        return self._rolar(passos * 3)
+
+    def _on_select(self, _event):
+        if self._sincronizando:
+            return
+        selecao = self.tree.selection()
+        if selecao and selecao[0] in self._itens:
+            self._selecionado = self.offset + self._itens.index(selecao[0])
+        elif not selecao:
+            self._selecionado = None
+
+    def _mover_selecao(self, passo):
+        if not self.linhas:
+            return 'break'
+        atual = self.offset if self._selecionado is None else self._selecionado
+        alvo = max(0, min(len(self.linhas) - 1, atual + passo))
+        self._selecionado = alvo
+        visiveis = self.linhas_visiveis()
+        if alvo < self.offset:
+            self.offset = alvo
+        elif alvo >= self.offset + visiveis:
+            self.offset = alvo - visiveis + 1
+        self._render()
+        return 'break'
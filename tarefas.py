@@ -0,0 +1,107 @@
+# Execução de trabalho de banco em threads de fundo
+# Resultados voltam ao mainloop do Tk por uma fila thread-safe consultada com root.after.
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import medicao
+
+
+class ExecutorTarefas:
+    """Roda funções em workers e entrega o resultado no mainloop.
+
+    Submissões com a mesma `chave` se superam: ao submeter de novo, a anterior é cancelada
+    (se ainda não começou) ou tem seu resultado descartado quando chegar.
+    """
+
+    def __init__(self, root, max_workers=2, intervalo_ms=30, ao_mudar_ocupado=None):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.ao_mudar_ocupado = ao_mudar_ocupado
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dados')
+        self._resultados = queue.Queue()
+        self._geracoes = {}     # chave -> geração atual
+        self._futuros = {}      # chave -> future mais recente
+        self._pendentes = 0
+        self._agendado = None
+
+    @property
+    def ocupado(self):
+        return self._pendentes > 0
+
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, chave=None):
+        """Agenda `funcao(*args)` num worker; `ao_concluir(resultado)` ou `ao_falhar(exc)` rodam no mainloop."""
+        geracao = None
+        if chave is not None:
+            self.cancelar(chave)
+            geracao = self._geracoes.get(chave, 0)
+        futuro = self._executor.submit(self._executar, funcao, args, chave, geracao, ao_concluir, ao_falhar)
+        if chave is not None:
+            self._futuros[chave] = futuro
+        self._alterar_pendentes(1)
+        return futuro
+
+    def cancelar(self, chave):
+        """Descarta a tarefa pendente de `chave`: cancela se não começou, ignora o resultado se já roda."""
+        self._geracoes[chave] = self._geracoes.get(chave, 0) + 1
+        futuro = self._futuros.pop(chave, None)
+        if futuro is not None and futuro.cancel():
+            self._alterar_pendentes(-1)
+
+    def encerrar(self):
+        for chave in list(self._futuros):
+            self.cancelar(chave)
+        self._executor.shutdown(wait=True)
+        if self._agendado is not None:
+            self.root.after_cancel(self._agendado)
+            self._agendado = None
+
+    # ===== Internos =====
+    def _executar(self, funcao, args, chave, geracao, ao_concluir, ao_falhar):
+        # Roda na thread do worker: nunca toca em widgets aqui
+        try:
+            with medicao.medir(f"tarefa: {_nome(funcao)}"):
+                resultado = (True, funcao(*args))
+        except Exception as e:
+            resultado = (False, e)
+        self._resultados.put((chave, geracao, resultado, ao_concluir, ao_falhar))
+
+    def _alterar_pendentes(self, delta):
+        antes = self.ocupado
+        self._pendentes += delta
+        if self._pendentes > 0 and self._agendado is None:
+            self._agendado = self.root.after(self.intervalo_ms, self._consumir)
+        if antes != self.ocupado and self.ao_mudar_ocupado:
+            self.ao_mudar_ocupado(self.ocupado)
+
+    def _consumir(self):
+        self._agendado = None
+        concluidas = 0
+        while True:
+            try:
+                chave, geracao, (ok, valor), ao_concluir, ao_falhar = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            concluidas += 1
+            if chave is not None:
+                if geracao != self._geracoes.get(chave):
+                    continue  # superada por uma submissão mais nova
+                self._futuros.pop(chave, None)
+            callback = ao_concluir if ok else ao_falhar
+            try:
+                if callback:
+                    # Atualização de interface com o resultado: o tempo que o mainloop fica ocupado
+                    with medicao.medir(f"ui: {_nome(callback)}"):
+                        callback(valor)
+                elif not ok:
+                    raise valor
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+        if concluidas:
+            self._alterar_pendentes(-concluidas)
+        if self._pendentes > 0 and self._agendado is None:
+            self._agendado = self.root.after(self.intervalo_ms, self._consumir)
+
+
+def _nome(funcao):
+    return getattr(funcao, '__qualname__', None) or type(funcao).__name__
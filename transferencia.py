@@ -0,0 +1,475 @@
+# Importação e exportação em streaming (CSV/JSON) de produtos, movimentações e serviços
+# Exporta com fetchmany (memória constante) e importa em transações por lote, com retomada.
+# Uso: python transferencia.py exportar|importar <tabela> <arquivo> [opções]
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from database import Database
+from nucleo import (DB_NAME, SQL_ACUMULAR_PRODUTO, SQL_MARCAR_HORA, TABELAS_ARQUIVADAS, ErroValidacao, caminho_particao,
+                    catalogo, codificar_servico, hora_do_servico, preparar_banco, ultimo_id_arquivado, validar_produto)
+
+TABELAS = {
+    'produtos': ('id', 'nome', 'categoria', 'quantidade', 'minimo', 'preco_custo', 'preco_venda', 'excluido_em'),
+    'movimentacoes': ('id', 'produto_id', 'tipo', 'quantidade', 'preco_unitario', 'data_hora'),
+    'servicos': ('id', 'servico', 'valor', 'barbeiro', 'data_hora'),
+}
+# Serviços viajam com os nomes do catálogo; no banco são ids (servicos_catalogo, barbeiros).
+# {esquema} é 'main' ou o alias de uma partição anexada; o catálogo fica sempre no principal.
+CONSULTAS = {
+    'servicos': """SELECT s.id, c.nome, s.valor, b.nome, s.data_hora FROM {esquema}.servicos s
+                   JOIN main.servicos_catalogo c ON c.id = s.servico_id
+                   JOIN main.barbeiros b ON b.id = s.barbeiro_id
+                   ORDER BY s.id""",
+}
+COLUNAS_BANCO = {'servicos': ('id', 'servico_id', 'valor', 'barbeiro_id', 'data_hora')}
+TAMANHO_LOTE = 2000
+BLOCO_LEITURA = 1 << 16
+MAX_ERROS = 100   # erros guardados no resultado; o restante vai só para o arquivo de rejeitados
+
+# Acumula no resumo diário de serviços um lote já agregado (dia, servico_id, barbeiro_id, quantidade, total)
+SQL_ACUMULAR_SERVICOS_LOTE = """
+    INSERT INTO resumo_diario_servicos (dia, servico_id, barbeiro_id, quantidade, total)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (dia, servico_id, barbeiro_id) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        total = total + excluded.total
+"""
+
+
+def formato_do_arquivo(caminho, formato=None):
+    formato = (formato or os.path.splitext(caminho)[1].lstrip('.')).lower()
+    if formato not in ('csv', 'json'):
+        raise ValueError(f"Formato não suportado: '{formato}' (use csv ou json).")
+    return formato
+
+
+def _checar_tabela(tabela):
+    if tabela not in TABELAS:
+        raise ValueError(f"Tabela desconhecida: '{tabela}' (opções: {', '.join(TABELAS)}).")
+    return TABELAS[tabela]
+
+
+# ===== Exportação =====
+def exportar(db, tabela, caminho, formato=None, tamanho_lote=TAMANHO_LOTE):
+    """Grava a tabela inteira em CSV ou JSON (array de objetos), lendo em lotes de `tamanho_lote`.
+    Escreve num arquivo temporário e o renomeia ao final. Retorna o número de linhas exportadas."""
+    colunas = _checar_tabela(tabela)
+    formato = formato_do_arquivo(caminho, formato)
+    temporario = caminho + ".parcial"
+    total = 0
+    with db.leitor() as conn, open(temporario, 'w', newline='', encoding='utf-8') as arquivo:
+        lotes = _lotes_exportacao(db, conn, tabela, tamanho_lote)
+        if formato == 'csv':
+            escritor = csv.writer(arquivo)
+            escritor.writerow(colunas)
+            for linhas in lotes:
+                escritor.writerows(linhas)
+                total += len(linhas)
+        else:
+            arquivo.write("[")
+            separador = "\n"
+            for linhas in lotes:
+                for linha in linhas:
+                    arquivo.write(separador)
+                    arquivo.write(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False))
+                    separador = ",\n"
+                total += len(linhas)
+            arquivo.write("\n]\n")
+    os.replace(temporario, caminho)
+    return total
+
+
+def _lotes_exportacao(db, conn, tabela, tamanho_lote):
+    """Gera lotes de linhas em ordem de id: primeiro as partições arquivadas (ano a ano, anexadas
+    uma de cada vez, pois o SQLite limita os anexos por conexão) e por último o banco principal."""
+    modelo = CONSULTAS.get(tabela) or f"SELECT {', '.join(TABELAS[tabela])} FROM {{esquema}}.{tabela} ORDER BY id"
+    consultar_particoes = "SELECT ano, arquivo FROM particoes ORDER BY ano"
+    particoes = conn.execute(consultar_particoes).fetchall() if tabela in TABELAS_ARQUIVADAS else []
+    for ano, arquivo in [*particoes, (None, None)]:
+        esquema = 'main' if ano is None else f"arquivo_{ano}"
+        if ano is not None:
+            db.anexar(conn, {esquema: caminho_particao(db, arquivo)})
+        # Cada partição é imutável; o principal é lido num único SELECT (instantâneo do WAL)
+        cursor = conn.execute(modelo.format(esquema=esquema))
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield linhas
+    if particoes and conn.execute(consultar_particoes).fetchall() != particoes:
+        # Um ano arquivado no meio da exportação teria saído do principal depois de lido
+        raise ValueError("Um ano foi arquivado durante a exportação; exporte novamente.")
+
+
+# ===== Leitura em streaming =====
+def ler_registros(caminho, formato=None):
+    """Gera (posicao, registro) do arquivo sem carregá-lo inteiro.
+    posicao é a linha no CSV ou o índice (1..n) do objeto no array JSON."""
+    formato = formato_do_arquivo(caminho, formato)
+    if formato == 'csv':
+        return _ler_csv(caminho)
+    return _ler_json(caminho)
+
+
+def _ler_csv(caminho):
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro
+
+
+def _ler_json(caminho):
+    decodificador = json.JSONDecoder()
+    with open(caminho, encoding='utf-8-sig') as arquivo:
+        buffer, pos, fim = "", 0, False
+
+        def proximo_caractere():
+            # Avança sobre espaços; lê mais blocos quando necessário. Retorna '' no fim do arquivo.
+            nonlocal buffer, pos, fim
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or fim:
+                    return buffer[pos] if pos < len(buffer) else ''
+                buffer, pos = arquivo.read(BLOCO_LEITURA), 0
+                fim = not buffer
+
+        if proximo_caractere() != '[':
+            raise ValueError("JSON inválido: esperado um array de objetos.")
+        pos += 1
+        indice = 0
+        while True:
+            c = proximo_caractere()
+            if c == ']':
+                return
+            if c == ',' and indice:
+                pos += 1
+                c = proximo_caractere()
+            if c == '':
+                raise ValueError("JSON inválido: array não terminado.")
+            while True:
+                try:
+                    registro, novo_pos = decodificador.raw_decode(buffer, pos)
+                    # Um valor que termina exatamente no fim do buffer pode estar incompleto (ex.: número)
+                    if novo_pos < len(buffer) or fim:
+                        break
+                except json.JSONDecodeError:
+                    if fim:
+                        raise ValueError(f"JSON inválido perto do objeto {indice + 1}.")
+                bloco = arquivo.read(BLOCO_LEITURA)
+                fim = not bloco
+                buffer, pos = buffer[pos:] + bloco, 0
+            pos = novo_pos
+            indice += 1
+            yield indice, registro
+
+
+# ===== Validação por tabela =====
+# Cada validador recebe o registro (dict de texto, no CSV, ou de valores JSON) e devolve a tupla
+# na ordem de TABELAS[tabela], com id None quando ausente; rejeita com ErroValidacao.
+def _texto(registro, campo):
+    valor = registro.get(campo)
+    return "" if valor is None else str(valor).strip()
+
+
+def _id_opcional(registro):
+    valor = _texto(registro, 'id')
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErroValidacao(f"id inválido: {valor!r}")
+
+
+def _numero(registro, campo, padrao=None, positivo=False):
+    valor = _texto(registro, campo)
+    if not valor:
+        if padrao is None:
+            raise ErroValidacao(f"{campo} é obrigatório.")
+        return padrao
+    try:
+        numero = float(valor)
+    except ValueError:
+        raise ErroValidacao(f"{campo} deve ser numérico: {valor!r}")
+    if not math.isfinite(numero) or numero < 0 or (positivo and numero == 0):
+        raise ErroValidacao(f"{campo} deve ser {'maior que zero' if positivo else 'não negativo'}.")
+    return numero
+
+
+def _data_hora(registro, campo='data_hora'):
+    valor = _texto(registro, campo)
+    try:
+        instante = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ErroValidacao(f"{campo} inválida: {valor!r} (use AAAA-MM-DD HH:MM:SS).")
+    # Já no formato do banco (caso comum, inclusive em arquivos exportados daqui): evita o strftime
+    if len(valor) == 19 and valor[10] == ' ':
+        return valor
+    return instante.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _validar_produto(registro):
+    nome, categoria, quantidade, minimo = validar_produto(
+        _texto(registro, 'nome'), _texto(registro, 'categoria'),
+        _texto(registro, 'quantidade'), _texto(registro, 'minimo'))
+    # Produtos excluídos (exclusão lógica) voltam excluídos; arquivos sem a coluna, ativos
+    excluido_em = _data_hora(registro, 'excluido_em') if _texto(registro, 'excluido_em') else None
+    return (_id_opcional(registro), nome, categoria, quantidade, minimo,
+            _numero(registro, 'preco_custo', 0.0), _numero(registro, 'preco_venda', 0.0), excluido_em)
+
+
+def _validar_movimentacao(registro):
+    try:
+        produto_id = int(_texto(registro, 'produto_id'))
+    except ValueError:
+        raise ErroValidacao(f"produto_id inválido: {_texto(registro, 'produto_id')!r}")
+    tipo = _texto(registro, 'tipo').upper().replace('Í', 'I')
+    if tipo not in ('ENTRADA', 'SAIDA'):
+        raise ErroValidacao(f"tipo deve ser ENTRADA ou SAIDA: {tipo!r}")
+    return (_id_opcional(registro), produto_id, tipo, _numero(registro, 'quantidade', positivo=True),
+            _numero(registro, 'preco_unitario', 0.0), _data_hora(registro))
+
+
+def _validar_servico(registro):
+    servico, barbeiro = _texto(registro, 'servico'), _texto(registro, 'barbeiro')
+    if not servico or not barbeiro:
+        raise ErroValidacao("servico e barbeiro não podem estar vazios.")
+    return (_id_opcional(registro), servico, _numero(registro, 'valor'), barbeiro, _data_hora(registro))
+
+
+VALIDADORES = {
+    'produtos': _validar_produto,
+    'movimentacoes': _validar_movimentacao,
+    'servicos': _validar_servico,
+}
+
+
+# ===== Importação =====
+def chave_importacao(tabela, caminho):
+    """Identifica uma importação para retomada: mesma tabela, mesmo arquivo e mesmo tamanho."""
+    return f"{tabela}:{os.path.abspath(caminho)}:{os.path.getsize(caminho)}"
+
+
+def _ids_existentes(cursor, tabela, ids):
+    if not ids:
+        return set()
+    return {linha[0] for linha in cursor.execute(
+        f"SELECT id FROM {tabela} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(list(ids)),))}
+
+
+def _ids_arquivados(cursor, tabela, ids):
+    # Ids até o maior já arquivado pertencem às partições (o AUTOINCREMENT não os devolve):
+    # reimportar uma exportação de antes do arquivamento duplicaria esse histórico no principal
+    if tabela not in TABELAS_ARQUIVADAS or not ids:
+        return set()
+    limite = ultimo_id_arquivado(cursor, tabela)
+    return {id_ for id_ in ids if id_ <= limite}
+
+
+def _gravar_lote(cursor, tabela, linhas):
+    """Insere as linhas válidas do lote e acumula os resumos diários.
+    Retorna [(posicao, motivo)] das linhas rejeitadas por conflito com o banco."""
+    colunas = COLUNAS_BANCO.get(tabela, TABELAS[tabela])
+    rejeitadas = []
+    ids_lote = [linha[0] for _, linha in linhas if linha[0] is not None]
+    repetidos = _ids_existentes(cursor, tabela, ids_lote)
+    arquivados = _ids_arquivados(cursor, tabela, ids_lote)
+    produtos = set()
+    if tabela == 'movimentacoes':
+        produtos = _ids_existentes(cursor, 'produtos', {linha[1] for _, linha in linhas})
+
+    aceitas, vistos = [], set()
+    for posicao, linha in linhas:
+        if linha[0] is not None and (linha[0] in repetidos or linha[0] in vistos):
+            rejeitadas.append((posicao, f"id {linha[0]} já existe."))
+        elif linha[0] in arquivados:
+            rejeitadas.append((posicao, f"id {linha[0]} está num ano arquivado."))
+        elif tabela == 'movimentacoes' and linha[1] not in produtos:
+            rejeitadas.append((posicao, f"produto {linha[1]} não existe."))
+        else:
+            if linha[0] is not None:
+                vistos.add(linha[0])
+            aceitas.append(linha)
+    if tabela == 'servicos':
+        # Nomes -> ids uma vez por par distinto do lote
+        codigos = {}
+        for _, servico, valor, barbeiro, _ in aceitas:
+            if (servico, barbeiro) not in codigos:
+                codigos[(servico, barbeiro)] = codificar_servico(cursor, servico, barbeiro, valor)
+        aceitas = [(id_, codigos[(s, b)][0], valor, codigos[(s, b)][1], data_hora)
+                   for id_, s, valor, b, data_hora in aceitas]
+
+    # Linhas com id preservam o id de origem; as demais recebem um novo
+    cursor.executemany(f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                       [linha for linha in aceitas if linha[0] is not None])
+    cursor.executemany(f"INSERT INTO {tabela} ({', '.join(colunas[1:])}) VALUES ({', '.join('?' * (len(colunas) - 1))})",
+                       [linha[1:] for linha in aceitas if linha[0] is None])
+
+    if tabela == 'produtos' and any(linha[-1] for linha in aceitas):
+        # O gatilho de inclusão põe em estoque_baixo pelo saldo; excluídos não aparecem no painel
+        cursor.execute("DELETE FROM estoque_baixo WHERE produto_id IN "
+                       "(SELECT e.produto_id FROM estoque_baixo e JOIN produtos p ON p.id = e.produto_id "
+                       "WHERE p.excluido_em IS NOT NULL)")
+
+    # Resumos diários: agrega o lote em memória e faz um upsert por (dia, chave)
+    if tabela == 'movimentacoes':
+        resumo = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+        for _, produto_id, tipo, quantidade, preco, data_hora in aceitas:
+            acumulado = resumo[(data_hora[:10], produto_id)]
+            k = 0 if tipo == 'ENTRADA' else 1
+            acumulado[k] += quantidade
+            acumulado[k + 2] += quantidade * preco
+        cursor.executemany(SQL_ACUMULAR_PRODUTO, [(*chave, *valores) for chave, valores in resumo.items()])
+    elif tabela == 'servicos':
+        resumo = defaultdict(lambda: [0, 0.0])
+        for _, servico_id, valor, barbeiro_id, data_hora in aceitas:
+            acumulado = resumo[(data_hora[:10], servico_id, barbeiro_id)]
+            acumulado[0] += 1
+            acumulado[1] += valor
+        cursor.executemany(SQL_ACUMULAR_SERVICOS_LOTE, [(*chave, *valores) for chave, valores in resumo.items()])
+        horas = {(data_hora[:10], barbeiro_id, hora_do_servico(data_hora)) for _, _, _, barbeiro_id, data_hora in aceitas}
+        cursor.executemany(SQL_MARCAR_HORA, sorted(horas))
+    return len(aceitas), rejeitadas
+
+
+def importar(db, tabela, caminho, formato=None, tamanho_lote=TAMANHO_LOTE, reiniciar=False,
+             arquivo_rejeitados=None, ao_progresso=None):
+    """Importa o arquivo em transações de `tamanho_lote` registros.
+
+    Cada lote grava as linhas válidas e o ponto de retomada na mesma transação: se o processo
+    cair, a próxima chamada com o mesmo arquivo continua do último lote confirmado. Linhas
+    inválidas são rejeitadas (não abortam o lote) e, com `arquivo_rejeitados`, gravadas em CSV.
+    Movimentações importadas entram no histórico e nos resumos, mas não alteram o saldo dos
+    produtos (o saldo atual vem no cadastro de produtos).
+
+    Retorna dict com registros, importados, rejeitados, retomado_de e erros (até MAX_ERROS)."""
+    _checar_tabela(tabela)
+    validar = VALIDADORES[tabela]
+    chave = chave_importacao(tabela, caminho)
+    if reiniciar:
+        db.execute("DELETE FROM importacoes WHERE chave = ?", (chave,))
+    estado = db.consultar_um(
+        "SELECT registros, importados, rejeitados, concluida FROM importacoes WHERE chave = ?", (chave,))
+    registros, importados, rejeitados, concluida = estado or (0, 0, 0, 0)
+    resultado = {'registros': registros, 'importados': importados, 'rejeitados': rejeitados,
+                 'retomado_de': registros, 'erros': []}
+    if concluida:
+        return resultado
+
+    saida = None
+    if arquivo_rejeitados:
+        novo = not os.path.exists(arquivo_rejeitados) or registros == 0
+        saida = open(arquivo_rejeitados, 'w' if novo else 'a', newline='', encoding='utf-8')
+        escritor = csv.writer(saida)
+        if novo:
+            escritor.writerow(('posicao', 'motivo', 'registro'))
+
+    def rejeitar(posicao, motivo, registro):
+        resultado['rejeitados'] += 1
+        if len(resultado['erros']) < MAX_ERROS:
+            resultado['erros'].append((posicao, motivo))
+        if saida:
+            escritor.writerow((posicao, motivo, json.dumps(registro, ensure_ascii=False)))
+
+    try:
+        fonte = islice(ler_registros(caminho, formato), registros, None)
+        while True:
+            lote = list(islice(fonte, tamanho_lote))
+            if not lote:
+                break
+            validas, brutos = [], {}
+            for posicao, registro in lote:
+                try:
+                    if not isinstance(registro, dict):
+                        raise ErroValidacao("registro deve ser um objeto.")
+                    validas.append((posicao, validar(registro)))
+                    brutos[posicao] = registro
+                except ErroValidacao as e:
+                    rejeitar(posicao, str(e), registro)
+            with db.transacao() as cursor:
+                aceitas, conflitos = _gravar_lote(cursor, tabela, validas)
+                resultado['registros'] += len(lote)
+                resultado['importados'] += aceitas
+                for posicao, motivo in conflitos:
+                    rejeitar(posicao, motivo, brutos[posicao])
+                _salvar_progresso(cursor, chave, tabela, caminho, resultado, concluida=False)
+            if saida:
+                saida.flush()
+            if ao_progresso:
+                ao_progresso(resultado['registros'])
+        with db.transacao() as cursor:
+            _salvar_progresso(cursor, chave, tabela, caminho, resultado, concluida=True)
+    finally:
+        if tabela == 'servicos':
+            catalogo(db).invalidar()       # a importação pode ter trazido serviços e barbeiros novos
+        if saida:
+            saida.close()
+    return resultado
+
+
+def _salvar_progresso(cursor, chave, tabela, caminho, resultado, concluida):
+    cursor.execute(
+        """
+        INSERT INTO importacoes (chave, tabela, arquivo, registros, importados, rejeitados, concluida, atualizado_em)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (chave) DO UPDATE SET
+            registros = excluded.registros, importados = excluded.importados,
+            rejeitados = excluded.rejeitados, concluida = excluded.concluida,
+            atualizado_em = excluded.atualizado_em
+        """,
+        (chave, tabela, os.path.abspath(caminho), resultado['registros'], resultado['importados'],
+         resultado['rejeitados'], int(concluida), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+
+
+# ===== Linha de comando =====
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importação/exportação de dados da barbearia (CSV ou JSON).")
+    parser.add_argument('--db', default=DB_NAME, help="arquivo do banco (padrão: %(default)s)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    comandos = {nome: sub.add_parser(nome) for nome in ('exportar', 'importar')}
+    for p in comandos.values():
+        p.add_argument('tabela', choices=list(TABELAS))
+        p.add_argument('arquivo')
+        p.add_argument('--formato', choices=('csv', 'json'), help="padrão: extensão do arquivo")
+        p.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="linhas por lote (padrão: %(default)s)")
+    comandos['importar'].add_argument('--reiniciar', action='store_true',
+                                      help="ignora o ponto de retomada e importa do início")
+    comandos['importar'].add_argument('--rejeitados', help="CSV onde gravar as linhas rejeitadas")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    try:
+        preparar_banco(db)
+        if args.comando == 'exportar':
+            total = exportar(db, args.tabela, args.arquivo, args.formato, args.lote)
+            print(f"{total} linhas de {args.tabela} exportadas para {args.arquivo}.")
+            return 0
+        resultado = importar(db, args.tabela, args.arquivo, args.formato, args.lote, args.reiniciar,
+                             args.rejeitados,
+                             ao_progresso=lambda n: print(f"\r{n} registros processados…", end='', file=sys.stderr))
+        print(file=sys.stderr)
+        if resultado['retomado_de']:
+            print(f"Retomado a partir do registro {resultado['retomado_de']}.")
+        print(f"{resultado['importados']} importados, {resultado['rejeitados']} rejeitados "
+              f"de {resultado['registros']} registros.")
+        for posicao, motivo in resultado['erros'][:20]:
+            print(f"  {posicao}: {motivo}")
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.fechar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())